@@ -0,0 +1,228 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""Measure cuboid collision query time as the number of obstacles grows, with and without
+broad phase culling (:py:attr:`~curobo.geom.sdf.world.WorldCollisionConfig.obb_broad_phase`).
+
+Scenes start from ``collision_cage.yml`` and are filled with warehouse shelving boards placed in
+aisles around the robot. Query spheres come from random configurations of the robot.
+"""
+
+# Standard Library
+import argparse
+import json
+import time
+
+# Third Party
+import torch
+
+# CuRobo
+from curobo.cuda_robot_model.cuda_robot_model import CudaRobotModel, CudaRobotModelConfig
+from curobo.geom.sdf.world import (
+    CollisionQueryBuffer,
+    WorldCollisionConfig,
+    WorldPrimitiveCollision,
+)
+from curobo.geom.types import Cuboid, WorldConfig
+from curobo.types.base import TensorDeviceType
+from curobo.util.logger import setup_curobo_logger
+from curobo.util_file import get_world_configs_path, join_path, load_yaml
+
+
+def _synchronize(tensor_args: TensorDeviceType):
+    if tensor_args.device.type == "cuda":
+        torch.cuda.synchronize(tensor_args.device)
+
+
+def get_warehouse_world(n_obstacles: int) -> WorldConfig:
+    """Fill ``collision_cage.yml`` with shelf boards until it has ``n_obstacles`` cuboids."""
+    world = WorldConfig.from_dict(
+        load_yaml(join_path(get_world_configs_path(), "collision_cage.yml"))
+    )
+    cuboids = list(world.cuboid)
+    aisle = 0
+    while len(cuboids) < n_obstacles:
+        # aisles alternate on both sides of the robot, boards are stacked at 5 levels:
+        y = (1.0 + 1.5 * (aisle // 2)) * (1 if aisle % 2 == 0 else -1)
+        for x_idx in range(-20, 20):
+            for level in range(5):
+                if len(cuboids) >= n_obstacles:
+                    break
+                cuboids.append(
+                    Cuboid(
+                        "shelf_" + str(len(cuboids)),
+                        [1.1 * x_idx, y, 0.2 + 0.4 * level, 1, 0, 0, 0],
+                        dims=[1.0, 0.5, 0.02],
+                    )
+                )
+        aisle += 1
+    return WorldConfig(cuboid=cuboids)
+
+
+def get_query_spheres(
+    robot_file: str, batch: int, horizon: int, tensor_args: TensorDeviceType
+) -> torch.Tensor:
+    robot_model = CudaRobotModel(
+        CudaRobotModelConfig.from_robot_yaml_file(robot_file, tensor_args=tensor_args)
+    )
+    limits = robot_model.get_joint_limits().position
+    generator = torch.Generator(device=tensor_args.device).manual_seed(0)
+    q = torch.rand(
+        (batch * horizon, limits.shape[1]), generator=generator, **vars(tensor_args)
+    )
+    q = limits[0] + q * (limits[1] - limits[0])
+    spheres = robot_model.forward(q)[-1]
+    return spheres.view(batch, horizon, -1, 4).contiguous()
+
+
+def bench_world(
+    world: WorldConfig,
+    query_spheres: torch.Tensor,
+    tensor_args: TensorDeviceType,
+    broad_phase: bool,
+    cell_size: float,
+    repeat: int,
+):
+    coll_check = WorldPrimitiveCollision(
+        WorldCollisionConfig(
+            tensor_args,
+            world_model=world,
+            obb_broad_phase=broad_phase,
+            obb_broad_phase_cell_size=cell_size,
+        )
+    )
+    query_buffer = CollisionQueryBuffer.initialize_from_shape(
+        query_spheres.shape, tensor_args, coll_check.collision_types
+    )
+    weight = tensor_args.to_device([1.0])
+    act_distance = tensor_args.to_device([0.02])
+    dt = tensor_args.to_device([0.02])
+    data = {"sphere": [], "swept_sphere": []}
+    for i in range(repeat + 1):
+        st_time = time.perf_counter()
+        distance = coll_check.get_sphere_distance(
+            query_spheres, query_buffer, weight, act_distance
+        ).clone()
+        _synchronize(tensor_args)
+        sphere_time = time.perf_counter() - st_time
+
+        st_time = time.perf_counter()
+        coll_check.get_swept_sphere_distance(
+            query_spheres, query_buffer, weight, act_distance, dt, 4, True
+        )
+        _synchronize(tensor_args)
+        # first iteration builds the grid and warms up kernels:
+        if i > 0:
+            data["sphere"].append(sphere_time)
+            data["swept_sphere"].append(time.perf_counter() - st_time)
+    data["collision_cost"] = float(torch.sum(distance))
+    if broad_phase:
+        data["candidates"] = coll_check._get_obb_query_tensors(query_spheres, act_distance)[5]
+    return data
+
+
+def run_benchmark(args):
+    tensor_args = TensorDeviceType(device=torch.device(args.device))
+    query_spheres = get_query_spheres(args.robot, args.batch, args.horizon, tensor_args)
+    results = {
+        "meta": {
+            "device": str(tensor_args.device),
+            "robot": args.robot,
+            "query_shape": list(query_spheres.shape),
+            "cell_size": args.cell_size,
+        },
+        "worlds": [],
+    }
+    for n_obstacles in args.n_obstacles:
+        world = get_warehouse_world(n_obstacles)
+        data = {"n_obstacles": len(world.cuboid)}
+        for broad_phase in [False, True]:
+            key = "broad_phase" if broad_phase else "all_obstacles"
+            data[key] = bench_world(
+                world, query_spheres, tensor_args, broad_phase, args.cell_size, args.repeat
+            )
+        print(
+            "obstacles: {}, all: {:.5f}s, broad phase: {:.5f}s, candidates: {}".format(
+                data["n_obstacles"],
+                min(data["all_obstacles"]["sphere"]),
+                min(data["broad_phase"]["sphere"]),
+                data["broad_phase"]["candidates"],
+            )
+        )
+        results["worlds"].append(data)
+
+    file_path = join_path(args.save_path, args.file_name + ".json")
+    with open(file_path, "w") as f:
+        json.dump(results, f, indent=2)
+    print("Saved results to " + file_path)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--save_path",
+        type=str,
+        default=".",
+        help="path to save file",
+    )
+    parser.add_argument(
+        "--file_name",
+        type=str,
+        default="obb_broad_phase",
+        help="File name prefix to use to save benchmark results",
+    )
+    parser.add_argument(
+        "--device",
+        type=str,
+        default="cuda:0",
+        help="Device to run collision queries on",
+    )
+    parser.add_argument(
+        "--robot",
+        type=str,
+        default="franka.yml",
+        help="Robot configuration file used to generate query spheres",
+    )
+    parser.add_argument(
+        "--n_obstacles",
+        type=int,
+        nargs="+",
+        default=[0, 100, 500, 1000, 2000, 5000, 10000],
+        help="Number of cuboids in every scene, 0 uses collision_cage.yml as is",
+    )
+    parser.add_argument(
+        "--batch",
+        type=int,
+        default=32,
+        help="Number of trajectories to query",
+    )
+    parser.add_argument(
+        "--horizon",
+        type=int,
+        default=32,
+        help="Number of timesteps in every trajectory",
+    )
+    parser.add_argument(
+        "--cell_size",
+        type=float,
+        default=0.5,
+        help="Edge length of broad phase grid cells in meters",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=10,
+        help="Number of times to run every query",
+    )
+
+    args = parser.parse_args()
+    setup_curobo_logger("error")
+    run_benchmark(args)
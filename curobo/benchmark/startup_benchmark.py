@@ -0,0 +1,242 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""Measure cold start of cuRobo: module import, robot model construction and motion generation
+setup. Results are written as json so that regressions can be tracked across versions.
+
+Import time is measured in a fresh interpreter for every module with ``python -X importtime``.
+Construction times are measured in this process and every repetition is stored. The first
+repetition of the first robot also pays for one-time initialization (e.g., warp and cuda context).
+"""
+
+# Standard Library
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+# Third Party
+import torch
+
+# CuRobo
+import curobo
+from curobo.cuda_robot_model.cuda_robot_model import CudaRobotModelConfig
+from curobo.types.base import TensorDeviceType
+from curobo.types.robot import RobotConfig
+from curobo.util.logger import setup_curobo_logger
+from curobo.util_file import get_robot_configs_path, get_robot_list, join_path, load_yaml
+
+IMPORT_MODULES = [
+    "curobo",
+    "curobo.types.robot",
+    "curobo.geom.types",
+    "curobo.cuda_robot_model.cuda_robot_model",
+    "curobo.wrap.model.robot_world",
+    "curobo.wrap.reacher.ik_solver",
+    "curobo.wrap.reacher.trajopt",
+    "curobo.wrap.reacher.motion_gen",
+    "curobo.wrap.reacher.mpc",
+]
+
+# dependencies whose import time is reported inside each curobo module:
+IMPORT_DEPENDENCIES = ["torch", "warp", "trimesh", "scipy", "yourdfpy", "pxr", "nvblox_torch"]
+
+
+def _synchronize(tensor_args: TensorDeviceType):
+    if tensor_args.device.type == "cuda":
+        torch.cuda.synchronize(tensor_args.device)
+
+
+def _parse_importtime(stderr: str):
+    """Get cumulative import time in seconds of every module from ``-X importtime`` output."""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        if not cumulative_us.strip().isdigit():
+            continue
+        # keep first (outermost) entry of module:
+        cumulative.setdefault(name.strip(), int(cumulative_us) * 1e-6)
+    return cumulative
+
+
+def bench_import(module: str):
+    """Import module in a fresh interpreter and return wall time and dependency breakdown."""
+    code = "import time; st=time.perf_counter(); import " + module
+    code += "; print(time.perf_counter() - st)"
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True
+    )
+    data = {"module": module, "success": out.returncode == 0}
+    if out.returncode != 0:
+        data["error"] = out.stderr.strip().splitlines()[-1]
+        return data
+    cumulative = _parse_importtime(out.stderr)
+    data["time"] = float(out.stdout.strip().splitlines()[-1])
+    data["dependencies"] = {k: cumulative[k] for k in IMPORT_DEPENDENCIES if k in cumulative}
+    return data
+
+
+def bench_robot_model(robot_file: str, tensor_args: TensorDeviceType, repeat: int):
+    """Time :py:class:`RobotConfig` construction and the kinematics build within it.
+
+    Kinematics are built by :py:meth:`CudaRobotModelConfig.from_data_dict`, which parses the robot
+    description and creates kinematics and collision sphere tensors. :py:class:`CudaRobotModel`
+    only wraps this config and is not timed.
+    """
+    data = {"robot": robot_file, "robot_config": [], "kinematics": []}
+    for _ in range(repeat):
+        robot_dict = load_yaml(join_path(get_robot_configs_path(), robot_file))["robot_cfg"]
+        st_time = time.perf_counter()
+        kinematics_cfg = CudaRobotModelConfig.from_data_dict(robot_dict["kinematics"], tensor_args)
+        _synchronize(tensor_args)
+        data["kinematics"].append(time.perf_counter() - st_time)
+
+        st_time = time.perf_counter()
+        RobotConfig.from_dict(robot_dict, tensor_args)
+        _synchronize(tensor_args)
+        data["robot_config"].append(time.perf_counter() - st_time)
+    data["dof"] = kinematics_cfg.kinematics_config.n_dof
+    return data
+
+
+def bench_motion_gen(robot_file: str, tensor_args: TensorDeviceType, warmup: bool):
+    """Time :py:meth:`MotionGenConfig.load_from_robot_config`, construction and warmup."""
+    # CuRobo
+    from curobo.wrap.reacher.motion_gen import MotionGen, MotionGenConfig
+
+    data = {"robot": robot_file}
+    st_time = time.perf_counter()
+    config = MotionGenConfig.load_from_robot_config(
+        robot_file, "collision_table.yml", tensor_args
+    )
+    _synchronize(tensor_args)
+    data["load_from_robot_config"] = time.perf_counter() - st_time
+
+    st_time = time.perf_counter()
+    motion_gen = MotionGen(config)
+    _synchronize(tensor_args)
+    data["init"] = time.perf_counter() - st_time
+
+    if warmup:
+        st_time = time.perf_counter()
+        motion_gen.warmup()
+        _synchronize(tensor_args)
+        data["warmup"] = time.perf_counter() - st_time
+    return data
+
+
+def run_benchmark(args):
+    tensor_args = TensorDeviceType(device=torch.device(args.device))
+    results = {
+        "meta": {
+            "curobo_version": curobo.__version__,
+            "torch_version": torch.__version__,
+            "python_version": platform.python_version(),
+            "device": str(tensor_args.device),
+            "device_name": (
+                torch.cuda.get_device_name(tensor_args.device)
+                if tensor_args.device.type == "cuda"
+                else platform.processor()
+            ),
+        },
+        "import": [],
+        "robot_model": [],
+        "motion_gen": [],
+    }
+
+    if not args.skip_import:
+        for module in IMPORT_MODULES:
+            results["import"].append(bench_import(module))
+            print(json.dumps(results["import"][-1]))
+
+    robot_list = get_robot_list() if args.robots is None else args.robots
+    for robot_file in robot_list:
+        data = bench_robot_model(robot_file, tensor_args, args.repeat)
+        results["robot_model"].append(data)
+        print(
+            robot_file,
+            "RobotConfig: {:.4f}s kinematics: {:.4f}s".format(
+                min(data["robot_config"]), min(data["kinematics"])
+            ),
+        )
+
+    for robot_file in args.motion_gen_robots:
+        results["motion_gen"].append(
+            bench_motion_gen(robot_file, tensor_args, warmup=not args.skip_warmup)
+        )
+        print(json.dumps(results["motion_gen"][-1]))
+
+    file_path = join_path(args.save_path, args.file_name + ".json")
+    with open(file_path, "w") as f:
+        json.dump(results, f, indent=2)
+    print("Saved results to " + file_path)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--save_path",
+        type=str,
+        default=".",
+        help="path to save file",
+    )
+    parser.add_argument(
+        "--file_name",
+        type=str,
+        default="startup",
+        help="File name prefix to use to save benchmark results",
+    )
+    parser.add_argument(
+        "--device",
+        type=str,
+        default="cuda:0",
+        help="Device to build robot models and motion generation",
+    )
+    parser.add_argument(
+        "--robots",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Robot configuration files to build, defaults to get_robot_list()",
+    )
+    parser.add_argument(
+        "--motion_gen_robots",
+        type=str,
+        nargs="*",
+        default=["franka.yml"],
+        help="Robot configuration files to load motion generation for",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of times to build every robot model",
+    )
+    parser.add_argument(
+        "--skip_import",
+        action="store_true",
+        help="When True, does not measure import time",
+        default=False,
+    )
+    parser.add_argument(
+        "--skip_warmup",
+        action="store_true",
+        help="When True, does not run MotionGen.warmup()",
+        default=False,
+    )
+
+    args = parser.parse_args()
+    setup_curobo_logger("error")
+    run_benchmark(args)
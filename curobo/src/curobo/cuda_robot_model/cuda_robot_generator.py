@@ -23,6 +23,12 @@ import torch.autograd.profiler as profiler
 
 # CuRobo
 from curobo.cuda_robot_model.kinematics_parser import LinkParams
+from curobo.cuda_robot_model.robot_model_cache import (
+    get_robot_model_cache_key,
+    get_robot_model_cache_path,
+    load_robot_model_cache,
+    save_robot_model_cache,
+)
 from curobo.cuda_robot_model.types import (
     CSpaceConfig,
     JointLimits,
@@ -30,8 +36,7 @@ from curobo.cuda_robot_model.types import (
     KinematicsTensorConfig,
     SelfCollisionKinematicsConfig,
 )
-from curobo.cuda_robot_model.urdf_kinematics_parser import UrdfKinematicsParser
-from curobo.curobolib.kinematics import get_cuda_kinematics
+from curobo.curobolib.kinematics import get_kinematics_fn
 from curobo.geom.types import tensor_sphere
 from curobo.types.base import TensorDeviceType
 from curobo.types.math import Pose
@@ -39,15 +44,6 @@ from curobo.types.state import JointState
 from curobo.util.logger import log_error, log_info, log_warn
 from curobo.util_file import get_assets_path, get_robot_configs_path, join_path, load_yaml
 
-try:
-    # CuRobo
-    from curobo.cuda_robot_model.usd_kinematics_parser import UsdKinematicsParser
-except ImportError:
-    log_warn(
-        "USDParser failed to import, install curobo with pip install .[usd] "
-        + "or pip install usd-core"
-    )
-
 
 @dataclass
 class CudaRobotGeneratorConfig:
@@ -142,6 +138,12 @@ class CudaRobotGeneratorConfig:
     #: cspace config
     cspace: Union[None, CSpaceConfig, Dict[str, List[Any]]] = None
 
+    #: Folder to cache kinematics and self-collision tensors built from this configuration. Cache
+    #: entries are keyed by a hash of this configuration and the urdf file, see
+    #: :py:mod:`curobo.cuda_robot_model.robot_model_cache`. When None, the folder is read from
+    #: environment variable ``CUROBO_ROBOT_MODEL_CACHE`` and caching is disabled if it's not set.
+    model_cache_path: Optional[str] = None
+
     def __post_init__(self):
         # add root path:
         if self.urdf_path is not None:
@@ -214,7 +216,23 @@ class CudaRobotGenerator(CudaRobotGeneratorConfig):
         self.non_fixed_joint_names = []
         self._n_dofs = 1
 
+        cache_path = get_robot_model_cache_path(self.model_cache_path)
+        cache_key = None
+        if cache_path is not None:
+            cache_key = get_robot_model_cache_key(self)
+        if cache_key is not None and self._load_from_cache(cache_path, cache_key):
+            return
         self.initialize_tensors()
+        if cache_key is not None:
+            save_robot_model_cache(
+                cache_path,
+                cache_key,
+                {
+                    "link_names": self.link_names,
+                    "kinematics_config": self._kinematics_config,
+                    "self_collision_config": self._self_collision_data,
+                },
+            )
 
     @property
     def kinematics_config(self):
@@ -266,20 +284,7 @@ class CudaRobotGenerator(CudaRobotGeneratorConfig):
 
         # other_links = list(set(self.link_names + self.collision_link_names))
 
-        # load kinematics parser based on file type:
-        # NOTE: Also add option to load from data buffers.
-        if self.use_usd_kinematics:
-            self._kinematics_parser = UsdKinematicsParser(
-                self.usd_path,
-                flip_joints=self.usd_flip_joints,
-                flip_joint_limits=self.usd_flip_joint_limits,
-                extra_links=self.extra_links,
-                usd_robot_root=self.usd_robot_root,
-            )
-        else:
-            self._kinematics_parser = UrdfKinematicsParser(
-                self.urdf_path, mesh_root=self.asset_root_path, extra_links=self.extra_links
-            )
+        self._load_kinematics_parser()
 
         if self.lock_joints is None:
             self._build_kinematics(self.base_link, self.ee_link, other_links, self.link_names)
@@ -325,6 +330,58 @@ class CudaRobotGenerator(CudaRobotGeneratorConfig):
         if self.asset_root_path != "":
             self._kinematics_parser.add_absolute_path_to_link_meshes(self.asset_root_path)
 
+    def _load_kinematics_parser(self):
+        # load kinematics parser based on file type:
+        # NOTE: Also add option to load from data buffers.
+        # parsers are imported here as they pull in usd and urdf dependencies:
+        if self.use_usd_kinematics:
+            try:
+                # CuRobo
+                from curobo.cuda_robot_model.usd_kinematics_parser import UsdKinematicsParser
+            except ImportError:
+                log_error(
+                    "USDParser failed to import, install curobo with pip install .[usd] "
+                    + "or pip install usd-core"
+                )
+            self._kinematics_parser = UsdKinematicsParser(
+                self.usd_path,
+                flip_joints=self.usd_flip_joints,
+                flip_joint_limits=self.usd_flip_joint_limits,
+                extra_links=self.extra_links,
+                usd_robot_root=self.usd_robot_root,
+            )
+        else:
+            # CuRobo
+            from curobo.cuda_robot_model.urdf_kinematics_parser import UrdfKinematicsParser
+
+            self._kinematics_parser = UrdfKinematicsParser(
+                self.urdf_path, mesh_root=self.asset_root_path, extra_links=self.extra_links
+            )
+
+    @profiler.record_function("robot_generator/load_from_cache")
+    def _load_from_cache(self, cache_path: str, cache_key: str) -> bool:
+        """Load kinematics and self-collision tensors from robot model cache.
+
+        The kinematics parser is still created as it's required to load link meshes, but the
+        kinematic tree is not traversed.
+
+        Returns:
+            True if tensors were loaded from cache.
+        """
+        data = load_robot_model_cache(cache_path, cache_key, self.tensor_args.device)
+        if data is None:
+            return False
+        self._kinematics_config = data["kinematics_config"]
+        self._self_collision_data = data["self_collision_config"]
+        self.link_names = data["link_names"]
+        self.cspace = self._kinematics_config.cspace
+        self.joint_names = self._kinematics_config.joint_names
+        self.lock_jointstate = self._kinematics_config.lock_jointstate
+        self._load_kinematics_parser()
+        if self.asset_root_path != "":
+            self._kinematics_parser.add_absolute_path_to_link_meshes(self.asset_root_path)
+        return True
+
     def add_link(self, link_params: LinkParams):
         self.extra_links[link_params.link_name] = link_params
 
@@ -623,38 +680,43 @@ class CudaRobotGenerator(CudaRobotGeneratorConfig):
         )
 
         with profiler.record_function("robot_generator/self_collision_distance"):
-            # iterate through each link:
+            # link pairs to check for collision, indexed by link index in global map:
+            n_links = max(self._name_to_idx_map.values()) + 1
+            link_pair_mask = torch.zeros(
+                (n_links, n_links), dtype=torch.bool, device=cpu_tensor_args.device
+            )
+            link_buffer = torch.zeros(
+                (n_links), dtype=cpu_tensor_args.dtype, device=cpu_tensor_args.device
+            )
+            collision_link_idx = [self._name_to_idx_map[j] for j in collision_link_names]
             for j_idx, j in enumerate(collision_link_names):
+                if j not in self.self_collision_buffer.keys():
+                    self.self_collision_buffer[j] = 0.0
+                link_buffer[collision_link_idx[j_idx]] = self.self_collision_buffer[j]
                 ignore_links = []
                 if j in self.self_collision_ignore.keys():
                     ignore_links = self.self_collision_ignore[j]
-                link1_idx = self._name_to_idx_map[j]
-                link1_spheres_idx = torch.nonzero(self._link_sphere_idx_map == link1_idx)
-
-                rad1 = self._link_spheres_tensor[link1_spheres_idx, 3]
-                if j not in self.self_collision_buffer.keys():
-                    self.self_collision_buffer[j] = 0.0
-                c1 = self.self_collision_buffer[j]
-                self.self_collision_offset[link1_spheres_idx] = c1
-                for _, i_name in enumerate(collision_link_names):
-                    if i_name == j or i_name in ignore_links:
-                        continue
-                    if i_name not in collision_link_names:
-                        log_error("Self Collision Link name not found in collision_link_names")
-                    # find index of this link name:
-                    if i_name not in self.self_collision_buffer.keys():
-                        self.self_collision_buffer[i_name] = 0.0
-                    c2 = self.self_collision_buffer[i_name]
-                    link2_idx = self._name_to_idx_map[i_name]
-                    # update collision distance between spheres from these two links:
-                    link2_spheres_idx = torch.nonzero(self._link_sphere_idx_map == link2_idx)
-                    rad2 = self._link_spheres_tensor[link2_spheres_idx, 3]
-
-                    for k1 in range(len(rad1)):
-                        sp1 = link1_spheres_idx[k1]
-                        for k2 in range(len(rad2)):
-                            sp2 = link2_spheres_idx[k2]
-                            self.self_collision_distance[sp1, sp2] = rad1[k1] + rad2[k2] + c1 + c2
+                check_idx = [
+                    collision_link_idx[i_idx]
+                    for i_idx, i_name in enumerate(collision_link_names)
+                    if i_name != j and i_name not in ignore_links
+                ]
+                link_pair_mask[collision_link_idx[j_idx], check_idx] = True
+
+            # expand link pairs to sphere pairs:
+            sphere_link_idx = self._link_sphere_idx_map.to(dtype=torch.long)
+            sphere_pair_mask = link_pair_mask[sphere_link_idx][:, sphere_link_idx]
+            sphere_radius = self._link_spheres_tensor[:, 3]
+            self.self_collision_offset[:] = link_buffer[sphere_link_idx]
+            sphere_distance = (
+                sphere_radius.unsqueeze(1)
+                + sphere_radius.unsqueeze(0)
+                + self.self_collision_offset.unsqueeze(1)
+                + self.self_collision_offset.unsqueeze(0)
+            )
+            self.self_collision_distance = torch.where(
+                sphere_pair_mask, sphere_distance, self.self_collision_distance
+            )
 
         with profiler.record_function("robot_generator/self_collision_min"):
             d_mat = self.self_collision_distance
@@ -696,33 +758,32 @@ class CudaRobotGenerator(CudaRobotGeneratorConfig):
         max_checks_per_thread = 512
         thread_loc = torch.zeros((2 * 32 * max_checks_per_thread), dtype=torch.int16) - 1
         n_spheres = coll_cpu.shape[0]
-        sl_idx = 0
-        skip_count = 0
-        all_val = 0
         valid_data = True
-        for i in range(n_spheres):
-            if not valid_data:
-                break
-            if torch.max(coll_cpu[i]) == -torch.inf:
-                print("skip", i)
-            for j in range(i + 1, n_spheres):
-                if sl_idx > thread_loc.shape[0] - 1:
-                    valid_data = False
-                    log_warn(
-                        "Self Collision checks are greater than "
-                        + str(32 * max_checks_per_thread)
-                        + ", using slower kernel"
-                    )
-                    break
-                if coll_cpu[i, j] != -torch.inf:
-                    thread_loc[sl_idx] = i
-                    sl_idx += 1
-                    thread_loc[sl_idx] = j
-                    sl_idx += 1
-                else:
-                    skip_count += 1
-                all_val += 1
-        log_info("Self Collision threads, skipped %: " + str(100 * float(skip_count) / all_val))
+
+        # sphere pairs (i, j > i) in row major order, keep pairs that need to be checked:
+        pair_i, pair_j = torch.triu_indices(n_spheres, n_spheres, 1)
+        check_idx = torch.nonzero(coll_cpu[pair_i, pair_j] != -torch.inf).view(-1)
+        all_val = pair_i.shape[0]
+        max_pairs = thread_loc.shape[0] // 2
+        if check_idx.shape[0] >= max_pairs and check_idx[max_pairs - 1] < all_val - 1:
+            # buffer is full and there are sphere pairs left:
+            valid_data = False
+            log_warn(
+                "Self Collision checks are greater than "
+                + str(32 * max_checks_per_thread)
+                + ", using slower kernel"
+            )
+            all_val = check_idx[max_pairs - 1].item() + 1
+            check_idx = check_idx[:max_pairs]
+        sl_idx = 2 * check_idx.shape[0]
+        thread_loc[:sl_idx] = torch.stack((pair_i[check_idx], pair_j[check_idx]), dim=-1).view(-1)
+        skip_count = all_val - check_idx.shape[0]
+        skip_spheres = torch.nonzero(torch.max(coll_cpu, dim=-1)[0] == -torch.inf).view(-1)
+        if skip_spheres.shape[0] > 0:
+            log_info("Self Collision skipping spheres: " + str(skip_spheres.tolist()))
+        log_info(
+            "Self Collision threads, skipped %: " + str(100 * float(skip_count) / max(all_val, 1))
+        )
         log_info("Self Collision count: " + str(sl_idx / (2)))
         log_info("Self Collision per thread: " + str(sl_idx / (2 * 1024)))
 
@@ -819,7 +880,8 @@ class CudaRobotGenerator(CudaRobotGeneratorConfig):
             device=self.tensor_args.device,
             dtype=self.tensor_args.dtype,
         )
-        link_pos_seq, link_quat_seq, _ = get_cuda_kinematics(
+        kinematics_fn = get_kinematics_fn(self.tensor_args.device)
+        link_pos_seq, link_quat_seq, _ = kinematics_fn(
             # self._link_mat_seq,  # data will be stored here
             link_pos_seq,
             link_quat_seq,
@@ -29,7 +29,7 @@ from curobo.cuda_robot_model.types import (
     KinematicsTensorConfig,
     SelfCollisionKinematicsConfig,
 )
-from curobo.curobolib.kinematics import get_cuda_kinematics
+from curobo.curobolib.kinematics import get_kinematics_fn
 from curobo.geom.types import Sphere
 from curobo.types.base import TensorDeviceType
 from curobo.types.math import Pose
@@ -313,7 +313,9 @@ class CudaRobotModel(CudaRobotModelConfig):
         return Pose(position=position, quaternion=quaternion)
 
     def _cuda_forward(self, q):
-        link_pos, link_quat, robot_spheres = get_cuda_kinematics(
+        # cpu tensors use a pytorch implementation of the fused kinematics kernel:
+        kinematics_fn = get_kinematics_fn(self.tensor_args.device)
+        link_pos, link_quat, robot_spheres = kinematics_fn(
             # self._link_mat_seq,  # data will be stored here
             self._link_pos_seq,
             self._link_quat_seq,
@@ -40,7 +40,7 @@ class LinkParams:
     def from_dict(dict_data):
         dict_data["joint_type"] = JointType[dict_data["joint_type"]]
         dict_data["fixed_transform"] = (
-            Pose.from_list(dict_data["fixed_transform"], tensor_args=TensorDeviceType())
+            Pose.from_list(dict_data["fixed_transform"], tensor_args=TensorDeviceType().cpu())
             .get_numpy_matrix()
             .reshape(4, 4)
         )
@@ -0,0 +1,132 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""On-disk cache of robot kinematics tensors built by
+:py:class:`~curobo.cuda_robot_model.cuda_robot_generator.CudaRobotGenerator`.
+
+Parsing a robot description and building kinematics and self-collision tensors is repeated every
+time a robot model is created. The cache stores the built
+:py:class:`~curobo.cuda_robot_model.types.KinematicsTensorConfig` and
+:py:class:`~curobo.cuda_robot_model.types.SelfCollisionKinematicsConfig` in a single file named by
+a hash of the generator configuration and contents of the robot's urdf file. Changing any of these
+creates a new key, so stale entries are never loaded. Files are loaded with memory mapping when
+supported by the installed pytorch version.
+"""
+from __future__ import annotations
+
+# Standard Library
+import os
+from dataclasses import fields
+from typing import Any, Dict, Optional
+
+# Third Party
+import torch
+from packaging import version
+
+# CuRobo
+from curobo.util.helpers import get_data_hash
+from curobo.util.logger import log_info, log_warn
+from curobo.util_file import join_path
+
+#: Increment when tensors built by the robot generator change for the same configuration.
+ROBOT_MODEL_CACHE_VERSION = 1
+
+#: Environment variable to enable the cache for all robot models with a cache folder.
+ROBOT_MODEL_CACHE_ENV = "CUROBO_ROBOT_MODEL_CACHE"
+
+# fields that do not change kinematics tensors:
+_IGNORED_FIELDS = ["model_cache_path", "debug", "isaac_usd_path", "usd_path", "usd_robot_root"]
+
+
+def get_robot_model_cache_path(cache_path: Optional[str] = None) -> Optional[str]:
+    """Get cache folder, falls back to environment variable ``CUROBO_ROBOT_MODEL_CACHE``.
+
+    Returns:
+        cache folder, None if caching is disabled.
+    """
+    if cache_path is None:
+        cache_path = os.environ.get(ROBOT_MODEL_CACHE_ENV, None)
+    if cache_path == "":
+        cache_path = None
+    return cache_path
+
+
+def get_robot_model_cache_key(config: Any) -> Optional[str]:
+    """Compute cache key of a robot generator configuration.
+
+    Args:
+        config: instance of
+            :py:class:`~curobo.cuda_robot_model.cuda_robot_generator.CudaRobotGeneratorConfig`.
+
+    Returns:
+        hash of configuration and urdf file contents, None if configuration cannot be cached.
+    """
+    if config.use_usd_kinematics or config.urdf_path is None:
+        return None
+    if not os.path.isfile(config.urdf_path):
+        return None
+    with open(config.urdf_path, "rb") as f:
+        urdf_data = f.read()
+    config_data = {
+        f.name: getattr(config, f.name)
+        for f in fields(config)
+        if f.name not in _IGNORED_FIELDS and f.name != "tensor_args"
+    }
+    config_data["device"] = str(config.tensor_args.device)
+    config_data["dtype"] = str(config.tensor_args.dtype)
+    return get_data_hash(
+        [ROBOT_MODEL_CACHE_VERSION, torch.__version__, config_data, urdf_data.hex()]
+    )
+
+
+def save_robot_model_cache(cache_path: str, key: str, data: Dict[str, Any]):
+    """Write robot model data to cache folder.
+
+    The file is written to a temporary path and renamed, so that processes loading the same robot
+    concurrently never read a partially written file.
+    """
+    os.makedirs(cache_path, exist_ok=True)
+    file_path = join_path(cache_path, key + ".pt")
+    tmp_path = file_path + "." + str(os.getpid()) + ".tmp"
+    try:
+        torch.save(data, tmp_path)
+        os.replace(tmp_path, file_path)
+    except OSError as e:
+        log_warn("Failed to write robot model cache " + file_path + ": " + str(e))
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_robot_model_cache(
+    cache_path: str, key: str, device: torch.device
+) -> Optional[Dict[str, Any]]:
+    """Load robot model data from cache folder.
+
+    Args:
+        cache_path: cache folder.
+        key: cache key from :py:func:`get_robot_model_cache_key`.
+        device: device to load tensors.
+
+    Returns:
+        cached data, None if key is not found or file cannot be read.
+    """
+    file_path = join_path(cache_path, key + ".pt")
+    if not os.path.isfile(file_path):
+        return None
+    kwargs = {}
+    if version.parse(torch.__version__) >= version.parse("2.1"):
+        kwargs = {"mmap": True, "weights_only": False}
+    try:
+        data = torch.load(file_path, map_location=device, **kwargs)
+    except Exception as e:
+        log_warn("Failed to read robot model cache " + file_path + ": " + str(e))
+        return None
+    log_info("Loaded robot model from cache " + file_path)
+    return data
@@ -394,7 +394,7 @@ compute_closest_point(const float3 &bounds, const float4 &sphere, float4 &pt) {
   }
   curr_val = bounds.z - fabsf(sphere.z); // distance to -ve bound
   if (curr_val < 0) {
-    pt.y = copysignf(bounds.z, sphere.z);
+    pt.z = copysignf(bounds.z, sphere.z);
   }
   curr_val = fabsf(curr_val);
   if (curr_val < min_val) {
@@ -0,0 +1,85 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""Deferred loading of cuRobo's compiled extensions.
+
+Extensions are loaded on the first call to one of their kernels instead of at import time, so that
+importing cuRobo modules for configuration parsing or CPU-only work does not require a prebuilt
+binary or a working CUDA toolchain. A prebuilt extension is imported when available, otherwise the
+extension is compiled with :py:func:`torch.utils.cpp_extension.load`.
+"""
+
+# Standard Library
+import importlib
+import threading
+from typing import Any, List, Optional
+
+# CuRobo
+from curobo.curobolib.util_file import add_cpp_path
+from curobo.util.logger import log_error, log_warn
+
+
+class LazyExtension:
+    def __init__(self, name: str, sources: List[str]):
+        """Initialize extension, nothing is loaded until an attribute is accessed.
+
+        Args:
+            name: name of extension module in :py:mod:`curobo.curobolib`.
+            sources: source files in ``curobolib/cpp`` to compile when prebuilt extension is not
+                found.
+        """
+        self._name = name
+        self._sources = sources
+        self._module = None
+        self._error: Optional[Exception] = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> Any:
+        """Load extension module, compiling it when a prebuilt binary is not found.
+
+        Raises:
+            The import or compilation error. Failures are cached so that compilation is attempted
+            only once per process.
+        """
+        if self._module is not None:
+            return self._module
+        with self._lock:
+            if self._module is None:
+                if self._error is not None:
+                    raise self._error
+                try:
+                    self._module = self._load_module()
+                except Exception as e:
+                    self._error = e
+                    log_error(self._name + " failed to load: " + str(e))
+        return self._module
+
+    def _load_module(self) -> Any:
+        try:
+            return importlib.import_module("curobo.curobolib." + self._name)
+        except ImportError:
+            log_warn(self._name + " binary not found, jit compiling...")
+        # Third Party
+        from torch.utils.cpp_extension import load
+
+        return load(name=self._name, sources=add_cpp_path(self._sources))
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
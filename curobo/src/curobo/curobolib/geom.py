@@ -12,31 +12,18 @@
 import torch
 
 # CuRobo
-from curobo.util.logger import log_warn
+from curobo.curobolib import geom_cpu
+from curobo.curobolib.extension_loader import LazyExtension
 
-try:
-    # CuRobo
-    from curobo.curobolib import geom_cu
-
-except ImportError:
-    log_warn("geom_cu binary not found, jit compiling...")
-    # Third Party
-    from torch.utils.cpp_extension import load
-
-    # CuRobo
-    from curobo.util_file import add_cpp_path
-
-    geom_cu = load(
-        name="geom_cu",
-        sources=add_cpp_path(
-            [
-                "geom_cuda.cpp",
-                "sphere_obb_kernel.cu",
-                "pose_distance_kernel.cu",
-                "self_collision_kernel.cu",
-            ]
-        ),
-    )
+geom_cu = LazyExtension(
+    "geom_cu",
+    [
+        "geom_cuda.cpp",
+        "sphere_obb_kernel.cu",
+        "pose_distance_kernel.cu",
+        "self_collision_kernel.cu",
+    ],
+)
 
 
 def get_self_collision_distance(
@@ -55,7 +42,11 @@ def get_self_collision_distance(
     checks_per_thread=32,
     experimental_kernel=True,
 ):
-    r = geom_cu.self_collision_distance(
+    if robot_spheres.device.type == "cpu":
+        self_collision_distance = geom_cpu.self_collision_distance
+    else:
+        self_collision_distance = geom_cu.self_collision_distance
+    r = self_collision_distance(
         out_distance,
         out_vec,
         sparse_index,
@@ -165,7 +156,11 @@ def get_pose_distance(
     if batch_pose_idx.shape[0] != batch_size:
         raise ValueError("Index buffer size is different from batch size")
 
-    r = geom_cu.pose_distance(
+    if current_position.device.type == "cpu":
+        pose_distance = geom_cpu.pose_distance
+    else:
+        pose_distance = geom_cu.pose_distance
+    r = pose_distance(
         out_distance,
         out_position_distance,
         out_rotation_distance,
@@ -214,7 +209,11 @@ def get_pose_distance_backward(
     batch_size,
     use_distance=False,
 ):
-    r = geom_cu.pose_distance_backward(
+    if grad_p_vec.device.type == "cpu":
+        pose_distance_backward = geom_cpu.pose_distance_backward
+    else:
+        pose_distance_backward = geom_cu.pose_distance_backward
+    r = pose_distance_backward(
         out_grad_p,
         out_grad_q,
         grad_distance,
@@ -254,7 +253,11 @@ class SdfSphereOBB(torch.autograd.Function):
         use_batch_env,
         return_loss: bool = False,
     ):
-        r = geom_cu.closest_point(
+        if query_sphere.device.type == "cpu":
+            closest_point = geom_cpu.closest_point
+        else:
+            closest_point = geom_cu.closest_point
+        r = closest_point(
             query_sphere,
             out_buffer,
             grad_out_buffer,
@@ -340,7 +343,11 @@ class SdfSweptSphereOBB(torch.autograd.Function):
         use_batch_env,
         return_loss: bool = False,
     ):
-        r = geom_cu.swept_closest_point(
+        if query_sphere.device.type == "cpu":
+            swept_closest_point = geom_cpu.swept_closest_point
+        else:
+            swept_closest_point = geom_cu.swept_closest_point
+        r = swept_closest_point(
             query_sphere,
             out_buffer,
             grad_out_buffer,
@@ -0,0 +1,719 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""Vectorized PyTorch implementations of ``geom_cu`` kernels for tensors on CPU.
+
+Functions take the same arguments as the kernels wrapped in :py:mod:`curobo.curobolib.geom`, write
+to the same output buffers and follow the kernels' numerics, so that results can be cross-checked
+against the CUDA implementation. :py:mod:`curobo.curobolib.geom` dispatches to these functions
+when inputs are on CPU.
+"""
+
+# Standard Library
+from typing import Optional
+
+# Third Party
+import torch
+
+# mode values of :py:class:`curobo.rollout.cost.pose_cost.PoseErrorType`:
+_BATCH_GOAL = 1
+_BATCH_GOALSET = 3
+
+
+def _quat_distance_vec(goal_quat: torch.Tensor, current_quat: torch.Tensor) -> torch.Tensor:
+    """Rotation error vector between quaternions (wxyz), sign chosen for the shortest rotation."""
+    aw, ax, ay, az = goal_quat.unbind(-1)
+    bw, bx, by, bz = current_quat.unbind(-1)
+    r_w = aw * bw + ax * bx + ay * by + az * bz
+    sign = torch.where(r_w < 0.0, 1.0, -1.0).to(dtype=goal_quat.dtype)
+    return sign.unsqueeze(-1) * torch.stack(
+        (
+            -aw * bx + bw * ax - ay * bz + by * az,
+            -aw * by + bw * ay - az * bx + bz * ax,
+            -aw * bz + bw * az - ax * by + bx * ay,
+        ),
+        dim=-1,
+    )
+
+
+def _converged_distance(distance_sq: torch.Tensor, convergence: torch.Tensor):
+    # kernel only takes the square root of distances above the convergence threshold:
+    active = distance_sq > convergence * convergence
+    return torch.where(active, torch.sqrt(distance_sq), distance_sq), active
+
+
+def pose_distance(
+    out_distance: torch.Tensor,
+    out_position_distance: torch.Tensor,
+    out_rotation_distance: torch.Tensor,
+    out_p_vec: torch.Tensor,
+    out_q_vec: torch.Tensor,
+    out_idx: torch.Tensor,
+    current_position: torch.Tensor,
+    goal_position: torch.Tensor,
+    current_quat: torch.Tensor,
+    goal_quat: torch.Tensor,
+    vec_weight: torch.Tensor,
+    weight: torch.Tensor,
+    vec_convergence: torch.Tensor,
+    run_weight: torch.Tensor,
+    run_vec_weight: torch.Tensor,
+    batch_pose_idx: torch.Tensor,
+    batch_size: int,
+    horizon: int,
+    mode: int = 1,
+    num_goals: int = 1,
+    write_grad: bool = False,
+    write_distance: bool = False,
+    use_metric: bool = False,
+):
+    """Distance to the closest goal in a goalset for a batch of pose trajectories.
+
+    Timesteps with zero position and rotation weight are skipped when ``write_distance`` is False,
+    leaving their outputs unchanged as in the kernel.
+    """
+    position = current_position.view(batch_size, horizon, 1, 3)
+    quat = current_quat.view(batch_size, horizon, 1, 4)
+    weight = weight.view(-1)
+    run_weight = run_weight.view(-1)[:horizon].view(1, horizon, 1)
+    vec_convergence = vec_convergence.view(-1)
+
+    # gather goals of every batch index, [batch, 1, num_goals, 3]:
+    offset = batch_pose_idx.view(-1).to(dtype=torch.long)
+    if mode in [_BATCH_GOAL, _BATCH_GOALSET]:
+        offset = offset * num_goals
+    goal_idx = offset.unsqueeze(-1) + torch.arange(num_goals, device=offset.device)
+    l_goal_position = goal_position.view(-1, 3)[goal_idx].unsqueeze(1)
+    l_goal_quat = goal_quat.view(-1, 4)[goal_idx].unsqueeze(1)
+
+    position_weight = weight[1].view(1, 1, 1)
+    rotation_weight = weight[0].view(1, 1, 1)
+    if use_metric:
+        p_alpha = weight[3].view(1, 1, 1)
+        r_alpha = weight[2].view(1, 1, 1)
+    if not write_distance:
+        position_weight = position_weight * run_weight
+        rotation_weight = rotation_weight * run_weight
+        if use_metric:
+            p_alpha = p_alpha * run_weight
+            r_alpha = r_alpha * run_weight
+        active = ((position_weight != 0.0) | (rotation_weight != 0.0)).view(1, horizon)
+    else:
+        active = None
+
+    # vector weight, run_vec_weight scales all but the last timestep:
+    d_vec_weight = vec_weight.view(1, 6).repeat(horizon, 1)
+    d_vec_weight[:-1] *= run_vec_weight.view(1, 6)
+    d_vec_weight = d_vec_weight.view(1, horizon, 1, 6)
+
+    p_vec = d_vec_weight[..., 3:] * (position - l_goal_position)
+    q_vec = d_vec_weight[..., :3] * _quat_distance_vec(l_goal_quat, quat)
+    position_distance, p_active = _converged_distance(
+        torch.sum(p_vec * p_vec, dim=-1), vec_convergence[1]
+    )
+    rotation_distance, r_active = _converged_distance(
+        torch.sum(q_vec * q_vec, dim=-1), vec_convergence[0]
+    )
+    if use_metric:
+        p_cost = position_weight * torch.log2(torch.cosh(p_alpha * position_distance))
+        r_cost = rotation_weight * torch.log2(torch.cosh(r_alpha * rotation_distance))
+    else:
+        p_cost = position_weight * position_distance
+        r_cost = rotation_weight * rotation_distance
+    distance = torch.where(r_active, r_cost, 0.0) + torch.where(p_active, p_cost, 0.0)
+
+    # kernel keeps the last goal among equal distances:
+    best_idx = num_goals - 1 - torch.argmin(torch.flip(distance, dims=[-1]), dim=-1, keepdim=True)
+
+    def _select(x: torch.Tensor) -> torch.Tensor:
+        return torch.gather(x, 2, best_idx).squeeze(2)
+
+    def _write(out: torch.Tensor, value: torch.Tensor):
+        out = out.view(value.shape)
+        if active is None:
+            out.copy_(value)
+        else:
+            mask = active.view(active.shape + (1,) * (value.ndim - 2))
+            out.copy_(torch.where(mask, value.to(dtype=out.dtype), out))
+
+    best_position_distance = _select(position_distance)
+    best_rotation_distance = _select(rotation_distance)
+    _write(out_distance, _select(distance))
+    _write(out_idx, best_idx.squeeze(2).to(dtype=out_idx.dtype))
+    if write_distance:
+        _write(out_position_distance, best_position_distance)
+        _write(out_rotation_distance, best_rotation_distance)
+
+    if write_grad:
+        vec_idx = best_idx.unsqueeze(-1).expand(-1, -1, -1, 3)
+        best_p_vec = torch.gather(p_vec, 2, vec_idx).squeeze(2)
+        best_q_vec = torch.gather(q_vec, 2, vec_idx).squeeze(2)
+        if write_distance:
+            position_weight = torch.ones_like(position_weight)
+            rotation_weight = torch.ones_like(rotation_weight)
+        position_weight = position_weight.view(1, -1)
+        rotation_weight = rotation_weight.view(1, -1)
+        if use_metric:
+            p_alpha = p_alpha.view(1, -1)
+            r_alpha = r_alpha.view(1, -1)
+            p_scale = (
+                p_alpha
+                * position_weight
+                * torch.tanh(p_alpha * best_position_distance)
+                / best_position_distance
+            )
+            r_scale = (
+                r_alpha
+                * rotation_weight
+                * torch.tanh(r_alpha * best_rotation_distance)
+                / best_rotation_distance
+            )
+        else:
+            p_scale = position_weight / best_position_distance
+            r_scale = rotation_weight / best_rotation_distance
+        p_scale = torch.where(best_position_distance > 0.0, p_scale, 0.0).unsqueeze(-1)
+        r_scale = torch.where(best_rotation_distance > 0.0, r_scale, 0.0).unsqueeze(-1)
+        d_vec_weight = d_vec_weight.squeeze(2)
+        _write(out_p_vec, d_vec_weight[..., 3:] * best_p_vec * p_scale)
+        _write(
+            out_q_vec.view(batch_size, horizon, 4)[..., 1:],
+            d_vec_weight[..., :3] * best_q_vec * r_scale,
+        )
+
+    return out_distance, out_position_distance, out_rotation_distance, out_p_vec, out_q_vec, out_idx
+
+
+def pose_distance_backward(
+    out_grad_p: torch.Tensor,
+    out_grad_q: torch.Tensor,
+    grad_distance: torch.Tensor,
+    grad_p_distance: torch.Tensor,
+    grad_q_distance: torch.Tensor,
+    pose_weight: torch.Tensor,
+    grad_p_vec: torch.Tensor,
+    grad_q_vec: torch.Tensor,
+    batch_size: int,
+    use_distance: bool = False,
+):
+    """Chain upstream gradients with gradient vectors computed in :py:func:`pose_distance`."""
+    pose_weight = pose_weight.view(-1)
+    g_distance = grad_distance.reshape(-1)[:batch_size].unsqueeze(-1)
+    g_p = g_distance * pose_weight[1]
+    g_q = g_distance * pose_weight[0]
+    if use_distance:
+        g_p = g_p + grad_p_distance.reshape(-1)[:batch_size].unsqueeze(-1)
+        g_q = g_q + grad_q_distance.reshape(-1)[:batch_size].unsqueeze(-1)
+    out_grad_p.view(-1, 3)[:batch_size] = grad_p_vec.reshape(-1, 3)[:batch_size] * g_p
+    out_grad_q.view(-1, 4)[:batch_size, 1:] = grad_q_vec.reshape(-1, 4)[:batch_size, 1:] * g_q
+    return out_grad_p, out_grad_q
+
+
+# maximum number of sphere-obstacle pairs evaluated at once, batches are processed in chunks to
+# bound memory:
+_MAX_CHUNK_PAIRS = 2**20
+
+
+def _transform_point(position: torch.Tensor, quat: torch.Tensor, point: torch.Tensor):
+    """Rotate point by quaternion (wxyz) and add position."""
+    w, x, y, z = quat.unbind(-1)
+    px, py, pz = point.unbind(-1)
+    rx = (
+        w * w * px
+        + 2 * y * w * pz
+        - 2 * z * w * py
+        + x * x * px
+        + 2 * y * x * py
+        + 2 * z * x * pz
+        - z * z * px
+        - y * y * px
+    )
+    ry = (
+        2 * x * y * px
+        + y * y * py
+        + 2 * z * y * pz
+        + 2 * w * z * px
+        - z * z * py
+        + w * w * py
+        - 2 * x * w * pz
+        - x * x * py
+    )
+    rz = (
+        2 * x * z * px
+        + 2 * y * z * py
+        + z * z * pz
+        - 2 * w * y * px
+        - y * y * pz
+        + 2 * w * x * py
+        - x * x * pz
+        + w * w * pz
+    )
+    rotated = torch.stack((rx, ry, rz), dim=-1)
+    return position + rotated
+
+
+def _inv_rotate_vec(quat: torch.Tensor, vec: torch.Tensor):
+    conjugate = torch.cat((quat[..., :1], -quat[..., 1:]), dim=-1)
+    return _transform_point(0.0, conjugate, vec)
+
+
+def _check_sphere_aabb(half_dims: torch.Tensor, loc: torch.Tensor, radius: torch.Tensor):
+    # spheres exactly at the bounds of a cuboid are not in collision:
+    return torch.amax(torch.abs(loc) - half_dims, dim=-1) < radius
+
+
+def _closest_point(bounds: torch.Tensor, loc: torch.Tensor):
+    """Point on surface of a cuboid centered at origin with half extents bounds, closest to loc.
+
+    Points outside are clamped to the cuboid and then moved to the face with the smallest
+    distance along its axis.
+    """
+    bounds = bounds.expand_as(loc)
+    point = torch.where(torch.abs(loc) > bounds, torch.copysign(bounds, loc), loc)
+    face = torch.argmin(torch.abs(bounds - torch.abs(loc)), dim=-1, keepdim=True)
+    face_bound = torch.gather(bounds, -1, face)
+    face_bound = torch.where(torch.gather(loc, -1, face) > 0.0, face_bound, -face_bound)
+    return point.scatter(-1, face, face_bound)
+
+
+def _box_distance(bounds: torch.Tensor, loc: torch.Tensor):
+    return torch.norm(loc - _closest_point(bounds, loc), dim=-1)
+
+
+def _sphere_gradient(bounds: torch.Tensor, loc: torch.Tensor, eta: float):
+    """Penetration cost and its gradient, smoothed quadratically below activation distance eta."""
+    vec = loc - _closest_point(bounds, loc)
+    distance = torch.norm(vec, dim=-1, keepdim=True)
+    grad = torch.where(distance > 0.0, vec / distance, 0.0)
+    if eta > 0.0:
+        cost = torch.where(distance > eta, distance - 0.5 * eta, (0.5 / eta) * distance * distance)
+        grad = torch.where(distance > eta, grad, grad * (distance / eta))
+    else:
+        cost = distance
+    return cost.squeeze(-1), grad
+
+
+def _get_env_obbs(
+    obb_bounds: torch.Tensor,
+    obb_pose: torch.Tensor,
+    obb_enable: torch.Tensor,
+    n_env_obb: torch.Tensor,
+    env_idx: Optional[torch.Tensor],
+    max_nobs: int,
+):
+    """Read obstacles of environments, returns tensors of shape [n_env_idx, n_obbs, -1]."""
+    n_envs = n_env_obb.shape[0]
+    half_dims = obb_bounds.view(n_envs, max_nobs, 4)[..., :3] / 2
+    obb_pose = obb_pose.view(n_envs, max_nobs, 8)
+    valid = (obb_enable.view(n_envs, max_nobs) != 0) & (
+        torch.arange(max_nobs, device=n_env_obb.device) < n_env_obb.view(-1, 1)
+    )
+    if env_idx is None:
+        env_idx = torch.zeros(1, dtype=torch.long, device=n_env_obb.device)
+    half_dims, obb_pose, valid = half_dims[env_idx], obb_pose[env_idx], valid[env_idx]
+
+    # skip obstacle slots that are empty in all queried environments:
+    keep = torch.any(valid, dim=0)
+    if not torch.any(keep):
+        keep[0] = True
+    if not torch.all(keep):
+        half_dims, obb_pose, valid = half_dims[:, keep], obb_pose[:, keep], valid[:, keep]
+    return obb_pose[..., :3], obb_pose[..., 3:7], half_dims, valid
+
+
+def _get_batch_chunks(
+    batch_size: int, pairs_per_batch: int, env_query_idx: torch.Tensor, use_batch_env: bool
+):
+    chunk = max(1, _MAX_CHUNK_PAIRS // max(pairs_per_batch, 1))
+    env_query_idx = env_query_idx.view(-1).to(dtype=torch.long)
+    for start in range(0, batch_size, chunk):
+        env_idx = None
+        if use_batch_env:
+            env_idx = env_query_idx[start : start + chunk]
+        yield slice(start, start + chunk), env_idx
+
+
+def _select_last_hit(
+    hit: torch.Tensor, grad: torch.Tensor, obb_quat: torch.Tensor
+) -> torch.Tensor:
+    # kernel overwrites the gradient with every obstacle in collision, the last one is kept:
+    n_obbs = hit.shape[-1]
+    last = n_obbs - 1 - torch.argmax(torch.flip(hit, dims=[-1]).to(dtype=torch.uint8), dim=-1)
+    last = last.unsqueeze(-1).unsqueeze(-1)
+    grad = torch.gather(grad, -2, last.expand(last.shape[:-1] + (3,))).squeeze(-2)
+    obb_quat = obb_quat.expand(hit.shape + (4,))
+    quat = torch.gather(obb_quat, -2, last.expand(last.shape[:-1] + (4,))).squeeze(-2)
+    return _inv_rotate_vec(quat, grad)
+
+
+def _write_sphere_outputs(
+    out_distance: torch.Tensor,
+    closest_pt: torch.Tensor,
+    sparsity_idx: torch.Tensor,
+    distance: torch.Tensor,
+    grad: Optional[torch.Tensor],
+    active: torch.Tensor,
+    weight: torch.Tensor,
+):
+    collision = distance != 0.0
+    out_distance.copy_(weight * distance)
+    sparsity_idx.copy_(collision)
+    if grad is not None:
+        closest_pt[..., :3] = torch.where(collision.unsqueeze(-1), weight * grad, 0.0)
+    closest_pt[~active] = 0.0
+
+
+def closest_point(
+    query_sphere: torch.Tensor,
+    out_distance: torch.Tensor,
+    closest_pt: torch.Tensor,
+    sparsity_idx: torch.Tensor,
+    weight: torch.Tensor,
+    activation_distance: torch.Tensor,
+    obb_accel: torch.Tensor,
+    obb_bounds: torch.Tensor,
+    obb_pose: torch.Tensor,
+    obb_enable: torch.Tensor,
+    n_env_obb: torch.Tensor,
+    env_query_idx: torch.Tensor,
+    max_nobs: int,
+    batch_size: int,
+    horizon: int,
+    n_spheres: int,
+    transform_back: bool,
+    compute_distance: bool,
+    use_batch_env: bool,
+):
+    """Signed distance between spheres and oriented bounding boxes.
+
+    Distance is summed across obstacles in collision. When ``compute_distance`` is False, only
+    checks for collision and writes ``weight`` for spheres in collision.
+    """
+    n_points = horizon * n_spheres
+    spheres = query_sphere.view(batch_size, n_points, 4)
+    b_distance = out_distance.view(batch_size, n_points)
+    b_closest_pt = closest_pt.view(batch_size, n_points, 4)
+    b_sparsity_idx = sparsity_idx.view(batch_size, n_points)
+    eta = float(activation_distance.view(-1)[0])
+    weight = weight.view(-1)[0]
+
+    for batch, env_idx in _get_batch_chunks(
+        batch_size, n_points * max_nobs, env_query_idx, use_batch_env
+    ):
+        obb_position, obb_quat, half_dims, valid = _get_env_obbs(
+            obb_bounds, obb_pose, obb_enable, n_env_obb, env_idx, max_nobs
+        )
+        # obstacle tensors are [batch, 1, n_obbs, -1], sphere tensors are [batch, points, 1, -1]:
+        obb_position, obb_quat = obb_position.unsqueeze(1), obb_quat.unsqueeze(1)
+        half_dims, valid = half_dims.unsqueeze(1), valid.unsqueeze(1)
+        sphere = spheres[batch]
+        active = sphere[..., 3] > 0.0
+        radius = (sphere[..., 3:] + eta).unsqueeze(-1)
+        loc = _transform_point(obb_position, obb_quat, sphere[..., :3].unsqueeze(-2))
+        hit = valid & active.unsqueeze(-1) & _check_sphere_aabb(half_dims, loc, radius.squeeze(-1))
+
+        if not compute_distance:
+            b_distance[batch] = weight * torch.any(hit, dim=-1)
+            continue
+        cost, grad = _sphere_gradient(half_dims + radius, loc, eta)
+        distance = torch.sum(torch.where(hit, cost, 0.0), dim=-1)
+        sphere_grad = None
+        if transform_back:
+            sphere_grad = _select_last_hit(hit, grad, obb_quat)
+        _write_sphere_outputs(
+            b_distance[batch],
+            b_closest_pt[batch],
+            b_sparsity_idx[batch],
+            distance,
+            sphere_grad,
+            active,
+            weight,
+        )
+    return out_distance, closest_pt, sparsity_idx
+
+
+def _sweep_distance(
+    loc_1: torch.Tensor,
+    loc_n: torch.Tensor,
+    sweep: torch.Tensor,
+    jump_mid_distance: torch.Tensor,
+    sphere_distance: torch.Tensor,
+    sphere_len: torch.Tensor,
+    half_dims: torch.Tensor,
+    radius: torch.Tensor,
+    eta: float,
+    sweep_steps: int,
+    sum_cost: torch.Tensor,
+    sum_grad: torch.Tensor,
+):
+    """Accumulate cost along the segment from loc_1 to its neighbor loc_n.
+
+    Interpolated spheres are placed by jumping along the segment by the distance to the obstacle,
+    so that steps are only spent near the obstacle.
+    """
+    running = sweep & (jump_mid_distance < sphere_distance / 2)
+    jump_distance = jump_mid_distance.clone()
+    grad_bounds = half_dims + radius.unsqueeze(-1)
+    for _ in range(sweep_steps):
+        running = running & (jump_distance < sphere_len / 2)
+        if not torch.any(running):
+            break
+        k0 = (1 - jump_distance / sphere_len).unsqueeze(-1)
+        interpolated = k0 * loc_1 + (1 - k0) * loc_n
+        inside = running & _check_sphere_aabb(half_dims, interpolated, radius)
+        cost, grad = _sphere_gradient(grad_bounds, interpolated, eta)
+        sum_cost += torch.where(inside, cost, 0.0)
+        sum_grad += torch.where(inside.unsqueeze(-1), grad, 0.0)
+        step = torch.maximum(_box_distance(grad_bounds, interpolated) - 2 * radius, radius)
+        jump_distance = torch.where(
+            running, jump_distance + torch.where(inside, radius, step), jump_distance
+        )
+
+
+def _scale_speed_metric(
+    sphere_0: torch.Tensor,
+    sphere_1: torch.Tensor,
+    sphere_2: torch.Tensor,
+    dt: float,
+    transform_back: bool,
+    distance: torch.Tensor,
+    grad: torch.Tensor,
+):
+    """Scale cost by sphere speed, gradient follows CHOMP (ICRA 2009) with central differences."""
+    velocity = (0.5 / dt) * (sphere_2 - sphere_0)
+    speed = torch.norm(velocity, dim=-1, keepdim=True)
+    if transform_back:
+        acceleration = (1 / (dt * dt)) * (sphere_0 + sphere_2 - 2 * sphere_1)
+        direction = velocity / speed
+        curvature = acceleration / (speed * speed)
+
+        def _orth_proj(vec):
+            return vec - direction * torch.sum(direction * vec, dim=-1, keepdim=True)
+
+        grad = speed * (_orth_proj(grad) - distance.unsqueeze(-1) * _orth_proj(curvature))
+    return speed.squeeze(-1) * distance, grad
+
+
+def swept_closest_point(
+    query_sphere: torch.Tensor,
+    out_distance: torch.Tensor,
+    closest_pt: torch.Tensor,
+    sparsity_idx: torch.Tensor,
+    weight: torch.Tensor,
+    activation_distance: torch.Tensor,
+    speed_dt: torch.Tensor,
+    obb_accel: torch.Tensor,
+    obb_bounds: torch.Tensor,
+    obb_pose: torch.Tensor,
+    obb_enable: torch.Tensor,
+    n_env_obb: torch.Tensor,
+    env_query_idx: torch.Tensor,
+    max_nobs: int,
+    batch_size: int,
+    horizon: int,
+    n_spheres: int,
+    sweep_steps: int,
+    enable_speed_metric: bool,
+    transform_back: bool,
+    compute_distance: bool,
+    use_batch_env: bool,
+):
+    """Signed distance between spheres swept across timesteps and oriented bounding boxes.
+
+    Spheres are swept halfway to their position in the previous and the next timestep. When
+    ``compute_distance`` is False, only checks for collision at ``sweep_steps`` uniformly
+    interpolated spheres on each side and writes ``weight`` for spheres in collision.
+    """
+    spheres = query_sphere.view(batch_size, horizon, n_spheres, 4)
+    b_distance = out_distance.view(batch_size, horizon, n_spheres)
+    b_closest_pt = closest_pt.view(batch_size, horizon, n_spheres, 4)
+    b_sparsity_idx = sparsity_idx.view(batch_size, horizon, n_spheres)
+    eta = float(activation_distance.view(-1)[0])
+    dt = float(speed_dt.view(-1)[0])
+    weight = weight.view(-1)[0]
+    has_back = torch.arange(horizon, device=spheres.device).view(1, -1, 1) > 0
+    has_fwd = torch.arange(horizon, device=spheres.device).view(1, -1, 1) < horizon - 1
+
+    for batch, env_idx in _get_batch_chunks(
+        batch_size, horizon * n_spheres * max_nobs, env_query_idx, use_batch_env
+    ):
+        obb_position, obb_quat, half_dims, valid = _get_env_obbs(
+            obb_bounds, obb_pose, obb_enable, n_env_obb, env_idx, max_nobs
+        )
+        # obstacle tensors are [batch, 1, 1, n_obbs, -1], sphere tensors are
+        # [batch, horizon, n_spheres, 1, -1]:
+        obb_position = obb_position.view(obb_position.shape[0], 1, 1, -1, 3)
+        obb_quat = obb_quat.view(obb_quat.shape[0], 1, 1, -1, 4)
+        half_dims = half_dims.view(half_dims.shape[0], 1, 1, -1, 3)
+        valid = valid.view(valid.shape[0], 1, 1, -1)
+        sphere = spheres[batch]
+        active = sphere[..., 3] > 0.0
+        sphere_1 = sphere[..., :3]
+        sphere_0 = torch.cat((sphere_1[:, :1], sphere_1[:, :-1]), dim=1)
+        sphere_2 = torch.cat((sphere_1[:, 1:], sphere_1[:, -1:]), dim=1)
+
+        def _transform(point):
+            return _transform_point(obb_position, obb_quat, point.unsqueeze(-2))
+
+        loc_1 = _transform(sphere_1)
+        if not compute_distance:
+            radius = (sphere[..., 3] + eta).unsqueeze(-1)
+            radius_0 = torch.cat((radius[:, :1], radius[:, :-1]), dim=1)
+            radius_2 = torch.cat((radius[:, 1:], radius[:, -1:]), dim=1)
+            hit = _check_sphere_aabb(half_dims, loc_1, radius)
+            for loc_n, radius_n, has_n in [
+                (_transform(sphere_0), radius_0, has_back),
+                (_transform(sphere_2), radius_2, has_fwd),
+            ]:
+                for j in range(sweep_steps):
+                    k0 = (j + 1) / (2 * sweep_steps + 1)
+                    hit |= has_n.unsqueeze(-1) & _check_sphere_aabb(
+                        half_dims,
+                        k0 * loc_1 + (1 - k0) * loc_n,
+                        k0 * radius + (1 - k0) * radius_n,
+                    )
+            hit = hit & valid & active.unsqueeze(-1)
+            b_distance[batch] = weight * torch.any(hit, dim=-1)
+            continue
+
+        radius = sphere[..., 3] + eta
+
+        def _neighbor_distance(sphere_n, has_n):
+            distance = torch.clamp(
+                torch.norm(sphere_n - sphere_1, dim=-1) - 2 * radius, min=0.0
+            )
+            return has_n & (distance > 0.0), distance, distance + 2 * radius
+
+        sweep_back, sphere_0_distance, sphere_0_len = _neighbor_distance(sphere_0, has_back)
+        sweep_fwd, sphere_2_distance, sphere_2_len = _neighbor_distance(sphere_2, has_fwd)
+
+        # pairwise tensors are [batch, horizon, n_spheres, n_obbs]:
+        pair_radius = radius.unsqueeze(-1)
+        grad_bounds = half_dims + pair_radius.unsqueeze(-1)
+        inside = _check_sphere_aabb(half_dims, loc_1, pair_radius)
+        sum_cost, sum_grad = _sphere_gradient(grad_bounds, loc_1, eta)
+        sum_cost = torch.where(inside, sum_cost, 0.0)
+        sum_grad = torch.where(inside.unsqueeze(-1), sum_grad, 0.0)
+        jump_mid_distance = torch.where(
+            inside,
+            pair_radius,
+            torch.where(
+                (sweep_back | sweep_fwd).unsqueeze(-1),
+                _box_distance(grad_bounds, loc_1) - pair_radius,
+                0.0,
+            ),
+        )
+        for loc_n, sweep, sphere_distance, sphere_len in [
+            (_transform(sphere_0), sweep_back, sphere_0_distance, sphere_0_len),
+            (_transform(sphere_2), sweep_fwd, sphere_2_distance, sphere_2_len),
+        ]:
+            _sweep_distance(
+                loc_1,
+                loc_n,
+                sweep.unsqueeze(-1) & valid,
+                jump_mid_distance,
+                sphere_distance.unsqueeze(-1),
+                sphere_len.unsqueeze(-1),
+                half_dims,
+                pair_radius,
+                eta,
+                sweep_steps,
+                sum_cost,
+                sum_grad,
+            )
+        hit = (sum_cost > 0.0) & valid & active.unsqueeze(-1)
+        distance = torch.sum(torch.where(hit, sum_cost, 0.0), dim=-1)
+        sphere_grad = _select_last_hit(hit, sum_grad, obb_quat)
+        if enable_speed_metric:
+            scaled_distance, scaled_grad = _scale_speed_metric(
+                sphere_0, sphere_1, sphere_2, dt, transform_back, distance, sphere_grad
+            )
+            speed_mask = sweep_back & sweep_fwd & (distance != 0.0)
+            distance = torch.where(speed_mask, scaled_distance, distance)
+            sphere_grad = torch.where(speed_mask.unsqueeze(-1), scaled_grad, sphere_grad)
+        _write_sphere_outputs(
+            b_distance[batch],
+            b_closest_pt[batch],
+            b_sparsity_idx[batch],
+            distance,
+            sphere_grad if transform_back else None,
+            active,
+            weight,
+        )
+    return out_distance, closest_pt, sparsity_idx
+
+
+def self_collision_distance(
+    out_distance: torch.Tensor,
+    out_vec: torch.Tensor,
+    sparse_index: torch.Tensor,
+    robot_spheres: torch.Tensor,
+    collision_offset: torch.Tensor,
+    weight: torch.Tensor,
+    coll_matrix: torch.Tensor,
+    thread_locations: torch.Tensor,
+    thread_size: int,
+    b_size: int,
+    nspheres: int,
+    compute_grad: bool,
+    checks_per_thread: int = 32,
+    experimental_kernel: bool = True,
+):
+    """Maximum penetration across pairs of robot spheres, for every batch index.
+
+    Sphere pairs to check are read as a sparse list from ``coll_matrix``, ``thread_locations``
+    and the remaining launch parameters of the CUDA kernel are ignored. Gradient is written for
+    the two spheres of the pair with maximum penetration.
+    """
+    spheres = robot_spheres.view(b_size, nspheres, 4)
+    b_distance = out_distance.view(b_size)
+    b_vec = out_vec.view(b_size, nspheres, 4)
+    b_sparse_index = sparse_index.view(b_size, nspheres)
+    weight = weight.view(-1)[0]
+    pair_i, pair_j = torch.nonzero(
+        torch.triu(coll_matrix.view(nspheres, nspheres) == 1, diagonal=1), as_tuple=True
+    )
+    if compute_grad:
+        b_vec[b_sparse_index != 0] = 0.0
+        b_sparse_index[:] = 0
+    if pair_i.shape[0] == 0:
+        b_distance[:] = 0.0
+        return out_distance, out_vec
+
+    radius = spheres[..., 3] + collision_offset.view(1, nspheres)
+    chunk = max(1, _MAX_CHUNK_PAIRS // pair_i.shape[0])
+    for start in range(0, b_size, chunk):
+        batch = slice(start, start + chunk)
+        position = spheres[batch, :, :3]
+        radius_i, radius_j = radius[batch][:, pair_i], radius[batch][:, pair_j]
+        penetration = radius_i + radius_j - torch.norm(
+            position[:, pair_i] - position[:, pair_j], dim=-1
+        )
+        # spheres with non-positive radius are disabled:
+        penetration = torch.where((radius_i > 0.0) & (radius_j > 0.0), penetration, 0.0)
+        max_penetration, max_idx = torch.max(penetration, dim=-1)
+        max_penetration = torch.clamp(max_penetration, min=0.0)
+        b_distance[batch] = weight * max_penetration
+        if not compute_grad:
+            continue
+        collision_idx = torch.nonzero(max_penetration > 0.0).view(-1)
+        if collision_idx.shape[0] == 0:
+            continue
+        sph_i = pair_i[max_idx[collision_idx]]
+        sph_j = pair_j[max_idx[collision_idx]]
+        dist_vec = (position[collision_idx, sph_i] - position[collision_idx, sph_j]) / (
+            max_penetration[collision_idx].unsqueeze(-1)
+        )
+        vec = b_vec[batch]
+        sparse = b_sparse_index[batch]
+        vec[collision_idx, sph_i, :3] = -1.0 * weight * dist_vec
+        vec[collision_idx, sph_j, :3] = weight * dist_vec
+        sparse[collision_idx, sph_i] = 1
+        sparse[collision_idx, sph_j] = 1
+    return out_distance, out_vec
@@ -8,33 +8,20 @@
 # without an express license agreement from NVIDIA CORPORATION or
 # its affiliates is strictly prohibited.
 #
+# Standard Library
+from typing import List
+
 # Third Party
 import torch
 from torch.autograd import Function
 
 # CuRobo
-from curobo.util.logger import log_warn
-
-try:
-    # CuRobo
-    from curobo.curobolib import kinematics_fused_cu
-except ImportError:
-    log_warn("kinematics_fused_cu not found, JIT compiling...")
-    # Third Party
-    from torch.utils.cpp_extension import load
-
-    # CuRobo
-    from curobo.curobolib.util_file import add_cpp_path
-
-    kinematics_fused_cu = load(
-        name="kinematics_fused_cu",
-        sources=add_cpp_path(
-            [
-                "kinematics_fused_cuda.cpp",
-                "kinematics_fused_kernel.cu",
-            ]
-        ),
-    )
+from curobo.curobolib.extension_loader import LazyExtension
+
+kinematics_fused_cu = LazyExtension(
+    "kinematics_fused_cu",
+    ["kinematics_fused_cuda.cpp", "kinematics_fused_kernel.cu"],
+)
 
 
 def rotation_matrix_to_quaternion(in_mat, out_quat):
@@ -496,3 +483,355 @@ def get_cuda_kinematics(
             grad_out_q,
         )
     return link_pos, link_quat, robot_spheres
+
+
+def _cpu_get_link_levels(link_map: torch.Tensor) -> List[torch.Tensor]:
+    """Group links by depth in the kinematic tree so that each level can be computed in one
+    batched matrix multiplication.
+
+    Links are stored in topological order (parent index is always smaller than child index).
+    """
+    parents = link_map.tolist()
+    depth = [0 for _ in parents]
+    for l in range(1, len(parents)):
+        depth[l] = depth[parents[l]] + 1
+    levels = [[] for _ in range(max(depth) + 1)]
+    for l in range(1, len(parents)):
+        levels[depth[l]].append(l)
+    return [
+        torch.as_tensor(l, dtype=torch.long, device=link_map.device) for l in levels[1:] if len(l)
+    ]
+
+
+def _cpu_joint_transforms(
+    q: torch.Tensor,
+    fixed_transform: torch.Tensor,
+    joint_map: torch.Tensor,
+    joint_map_type: torch.Tensor,
+) -> torch.Tensor:
+    """Compute fixed_transform @ joint_transform(q) for every link.
+
+    Args:
+        q: joint angles [batch, n_dof].
+        fixed_transform: fixed transform of every link w.r.t. its parent [n_links, 4, 4].
+        joint_map: index of joint that actuates a link, -1 for fixed links [n_links].
+        joint_map_type: joint type of every link, follows
+            :py:class:`curobo.cuda_robot_model.types.JointType` [n_links].
+
+    Returns:
+        torch.Tensor: local transform of every link [batch, n_links, 4, 4].
+    """
+    b_size = q.shape[0]
+    n_links = fixed_transform.shape[0]
+    j_map = joint_map.to(dtype=torch.long)
+    j_type = joint_map_type.to(dtype=torch.long)
+    angle = q[:, j_map.clamp(min=0)] * (j_map >= 0).to(dtype=q.dtype)
+
+    joint_mat = (
+        torch.eye(4, device=q.device, dtype=q.dtype).view(1, 1, 4, 4).repeat(b_size, n_links, 1, 1)
+    )
+    for axis in range(3):
+        prism_idx = torch.nonzero(j_type == axis).view(-1)
+        if prism_idx.shape[0] > 0:
+            joint_mat[:, prism_idx, axis, 3] = angle[:, prism_idx]
+
+        rot_idx = torch.nonzero(j_type == axis + 3).view(-1)
+        if rot_idx.shape[0] > 0:
+            # rotation about axis k mixes the other two axes (i, j) in cyclic order:
+            i, j = (axis + 1) % 3, (axis + 2) % 3
+            cos = torch.cos(angle[:, rot_idx])
+            sin = torch.sin(angle[:, rot_idx])
+            joint_mat[:, rot_idx, i, i] = cos
+            joint_mat[:, rot_idx, i, j] = -sin
+            joint_mat[:, rot_idx, j, i] = sin
+            joint_mat[:, rot_idx, j, j] = cos
+    return fixed_transform.unsqueeze(0) @ joint_mat
+
+
+def cpu_matrix_to_quaternion(rot_mat: torch.Tensor) -> torch.Tensor:
+    """Convert rotation matrices to quaternions with the same branch selection as the cuda kernel.
+
+    Args:
+        rot_mat: rotation matrices [..., 3, 3].
+
+    Returns:
+        torch.Tensor: quaternions in qw, qx, qy, qz format with qw >= 0 [..., 4].
+    """
+    r00, r01, r02 = rot_mat[..., 0, 0], rot_mat[..., 0, 1], rot_mat[..., 0, 2]
+    r10, r11, r12 = rot_mat[..., 1, 0], rot_mat[..., 1, 1], rot_mat[..., 1, 2]
+    r20, r21, r22 = rot_mat[..., 2, 0], rot_mat[..., 2, 1], rot_mat[..., 2, 2]
+
+    case_x = torch.logical_and(r22 < 0.0, r00 > r11)
+    case_y = torch.logical_and(r22 < 0.0, r00 <= r11)
+    case_z = torch.logical_and(r22 >= 0.0, r00 < -r11)
+
+    n_w = 1.0 + r00 + r11 + r22
+    n_x = 1.0 + r00 - r11 - r22
+    n_y = 1.0 - r00 + r11 - r22
+    n_z = 1.0 - r00 - r11 + r22
+    n = torch.where(case_x, n_x, torch.where(case_y, n_y, torch.where(case_z, n_z, n_w)))
+
+    quat = torch.stack(
+        [
+            torch.where(
+                case_x,
+                r21 - r12,
+                torch.where(case_y, r02 - r20, torch.where(case_z, r10 - r01, -n)),
+            ),
+            torch.where(
+                case_x,
+                n,
+                torch.where(case_y, r01 + r10, torch.where(case_z, r20 + r02, r12 - r21)),
+            ),
+            torch.where(
+                case_x,
+                r01 + r10,
+                torch.where(case_y, n, torch.where(case_z, r12 + r21, r20 - r02)),
+            ),
+            torch.where(
+                case_x,
+                r20 + r02,
+                torch.where(case_y, r12 + r21, torch.where(case_z, n, r01 - r10)),
+            ),
+        ],
+        dim=-1,
+    )
+    quat = quat / torch.linalg.norm(quat, dim=-1, keepdim=True)
+    quat = torch.where(quat[..., 0:1] < 0.0, -1.0 * quat, quat)
+    return quat
+
+
+def _cpu_kinematics_forward(
+    q: torch.Tensor,
+    fixed_transform: torch.Tensor,
+    robot_spheres: torch.Tensor,
+    link_map: torch.Tensor,
+    joint_map: torch.Tensor,
+    joint_map_type: torch.Tensor,
+    store_link_map: torch.Tensor,
+    link_sphere_map: torch.Tensor,
+):
+    local_mat = _cpu_joint_transforms(q, fixed_transform, joint_map, joint_map_type)
+    cumul_mat = local_mat.clone()
+    parent = link_map.to(dtype=torch.long)
+    for level in _cpu_get_link_levels(link_map):
+        cumul_mat[:, level] = cumul_mat[:, parent[level]] @ local_mat[:, level]
+
+    store_idx = store_link_map.to(dtype=torch.long)
+    link_pos = cumul_mat[:, store_idx, :3, 3]
+    link_quat = cpu_matrix_to_quaternion(cumul_mat[:, store_idx, :3, :3])
+
+    sph_mat = cumul_mat[:, link_sphere_map.to(dtype=torch.long)]
+    sph_pos = (sph_mat[..., :3, :3] @ robot_spheres[:, :3].unsqueeze(-1)).squeeze(-1) + sph_mat[
+        ..., :3, 3
+    ]
+    spheres = torch.cat(
+        [sph_pos, robot_spheres[:, 3:4].unsqueeze(0).expand(q.shape[0], -1, -1)], dim=-1
+    )
+    return link_pos, link_quat, spheres, cumul_mat
+
+
+def _cpu_kinematics_backward(
+    grad_link_pos: torch.Tensor,
+    grad_link_quat: torch.Tensor,
+    grad_spheres: torch.Tensor,
+    link_pos: torch.Tensor,
+    spheres: torch.Tensor,
+    cumul_mat: torch.Tensor,
+    n_dof: int,
+    joint_map: torch.Tensor,
+    joint_map_type: torch.Tensor,
+    store_link_map: torch.Tensor,
+    link_sphere_map: torch.Tensor,
+    link_chain_map: torch.Tensor,
+) -> torch.Tensor:
+    """Analytic gradient of link poses and sphere positions w.r.t. joint angles.
+
+    A revolute joint with world axis a at origin o moves a point p with velocity a x (p - o), so
+    the gradient of a point with upstream gradient g is g . (a x p) - g . (a x o). Summing over
+    all points that are downstream of a joint reduces to two matrix products with the chain map.
+    Orientation gradients follow the kernel convention of using the vector part of the quaternion
+    gradient as an angular gradient.
+    """
+    dtype = cumul_mat.dtype
+    sph_chain = link_chain_map[link_sphere_map.to(dtype=torch.long)].to(dtype=dtype)
+    link_chain = link_chain_map[store_link_map.to(dtype=torch.long)].to(dtype=dtype)
+
+    g_sph = grad_spheres[..., :3]
+    g_pos = grad_link_pos
+    g_rot = grad_link_quat[..., 1:]
+
+    moment = torch.einsum(
+        "sl,bsc->blc", sph_chain, torch.cross(spheres[..., :3], g_sph, dim=-1)
+    ) + torch.einsum("kl,bkc->blc", link_chain, torch.cross(link_pos, g_pos, dim=-1) + g_rot)
+    force = torch.einsum("sl,bsc->blc", sph_chain, g_sph) + torch.einsum(
+        "kl,bkc->blc", link_chain, g_pos
+    )
+
+    j_type = joint_map_type.to(dtype=torch.long)
+    axis_idx = (j_type % 3).view(1, -1, 1, 1).expand(cumul_mat.shape[0], -1, 3, 1)
+    axis = torch.gather(cumul_mat[..., :3, :3], -1, axis_idx).squeeze(-1)
+    origin = cumul_mat[..., :3, 3]
+
+    rot_grad = torch.sum(axis * moment, dim=-1) - torch.sum(
+        torch.cross(axis, origin, dim=-1) * force, dim=-1
+    )
+    prism_grad = torch.sum(axis * force, dim=-1)
+    link_grad = torch.where(j_type >= 3, rot_grad, prism_grad)
+
+    active = torch.nonzero(j_type >= 0).view(-1)
+    grad_q = torch.zeros((cumul_mat.shape[0], n_dof), device=cumul_mat.device, dtype=dtype)
+    grad_q.index_add_(1, joint_map[active].to(dtype=torch.long), link_grad[:, active])
+    return grad_q
+
+
+class KinematicsFusedCpuFunction(Function):
+    """Pytorch implementation of fused kinematics for cpu tensors.
+
+    This follows the same interface as :py:class:`KinematicsFusedGlobalCumulFunction`, writing
+    results into the given buffers. Cumulative transforms are always stored as they are needed
+    for the analytic backward.
+    """
+
+    @staticmethod
+    def forward(
+        ctx,
+        link_pos: torch.Tensor,
+        link_quat: torch.Tensor,
+        b_robot_spheres: torch.tensor,
+        global_cumul_mat: torch.Tensor,
+        joint_seq: torch.Tensor,
+        fixed_transform: torch.tensor,
+        robot_spheres: torch.tensor,
+        link_map: torch.tensor,
+        joint_map: torch.Tensor,
+        joint_map_type: torch.Tensor,
+        store_link_map: torch.Tensor,
+        link_sphere_map: torch.Tensor,
+        link_chain_map: torch.Tensor,
+        grad_out: torch.Tensor,
+    ):
+        b_size = link_pos.shape[0]
+        q = joint_seq.reshape(b_size, -1)
+        out_pos, out_quat, out_spheres, cumul_mat = _cpu_kinematics_forward(
+            q,
+            fixed_transform,
+            robot_spheres,
+            link_map,
+            joint_map,
+            joint_map_type,
+            store_link_map,
+            link_sphere_map,
+        )
+        link_pos.copy_(out_pos)
+        link_quat.copy_(out_quat)
+        b_robot_spheres.copy_(out_spheres)
+        global_cumul_mat.copy_(cumul_mat)
+        ctx.n_dof = q.shape[-1]
+        ctx.q_shape = joint_seq.shape
+        ctx.save_for_backward(
+            joint_map,
+            joint_map_type,
+            store_link_map,
+            link_sphere_map,
+            link_chain_map,
+            global_cumul_mat,
+            out_pos,
+            out_spheres,
+        )
+        return link_pos, link_quat, b_robot_spheres
+
+    @staticmethod
+    def backward(ctx, grad_out_link_pos, grad_out_link_quat, grad_out_spheres):
+        grad_joint = None
+
+        if ctx.needs_input_grad[4]:
+            (
+                joint_map,
+                joint_map_type,
+                store_link_map,
+                link_sphere_map,
+                link_chain_map,
+                global_cumul_mat,
+                link_pos,
+                spheres,
+            ) = ctx.saved_tensors
+            grad_joint = _cpu_kinematics_backward(
+                grad_out_link_pos,
+                grad_out_link_quat,
+                grad_out_spheres,
+                link_pos,
+                spheres,
+                global_cumul_mat,
+                ctx.n_dof,
+                joint_map,
+                joint_map_type,
+                store_link_map,
+                link_sphere_map,
+                link_chain_map,
+            ).view(ctx.q_shape)
+
+        return (
+            None,
+            None,
+            None,
+            None,
+            grad_joint,
+            None,
+            None,
+            None,
+            None,
+            None,
+            None,
+            None,
+            None,
+            None,
+        )
+
+
+def get_cpu_kinematics(
+    link_pos_seq,
+    link_quat_seq,
+    batch_robot_spheres,
+    global_cumul_mat,
+    q_in,
+    fixed_transform,
+    link_spheres_tensor,
+    link_map,  # tells which link is attached to which link i
+    joint_map,  # tells which joint is attached to a link i
+    joint_map_type,  # joint type
+    store_link_map,
+    link_sphere_idx_map,  # sphere idx map
+    link_chain_map,
+    grad_out_q,
+    use_global_cumul: bool = True,
+):
+    """Compute kinematics on cpu, same arguments as :py:func:`get_cuda_kinematics`.
+
+    use_global_cumul is ignored as the cpu implementation always reuses cumulative transforms in
+    backward.
+    """
+    link_pos, link_quat, robot_spheres = KinematicsFusedCpuFunction.apply(
+        link_pos_seq,
+        link_quat_seq,
+        batch_robot_spheres,
+        global_cumul_mat,
+        q_in,
+        fixed_transform,
+        link_spheres_tensor,
+        link_map,
+        joint_map,
+        joint_map_type,
+        store_link_map,
+        link_sphere_idx_map,
+        link_chain_map,
+        grad_out_q,
+    )
+    return link_pos, link_quat, robot_spheres
+
+
+def get_kinematics_fn(device: torch.device):
+    """Get fused kinematics function for the device where tensors are stored."""
+    if device.type == "cpu":
+        return get_cpu_kinematics
+    return get_cuda_kinematics
@@ -12,30 +12,13 @@
 import torch
 
 # CuRobo
-from curobo.util.logger import log_warn
+from curobo.curobolib import ls_cpu
+from curobo.curobolib.extension_loader import LazyExtension
 
-try:
-    # CuRobo
-    from curobo.curobolib import line_search_cu
-except ImportError:
-    log_warn("line_search_cu not found, JIT compiling...")
-
-    # Third Party
-    from torch.utils.cpp_extension import load
-
-    # CuRobo
-    from curobo.curobolib.util_file import add_cpp_path
-
-    line_search_cu = load(
-        name="line_search_cu",
-        sources=add_cpp_path(
-            [
-                "line_search_cuda.cpp",
-                "line_search_kernel.cu",
-                "update_best_kernel.cu",
-            ]
-        ),
-    )
+line_search_cu = LazyExtension(
+    "line_search_cu",
+    ["line_search_cuda.cpp", "line_search_kernel.cu", "update_best_kernel.cu"],
+)
 
 
 def wolfe_line_search(
@@ -57,7 +40,11 @@ def wolfe_line_search(
     batchsize = g_x.shape[0]
     l1 = g_x.shape[1]
     l2 = g_x.shape[2]
-    r = line_search_cu.line_search(
+    if g_x.device.type == "cpu":
+        line_search = ls_cpu.line_search
+    else:
+        line_search = line_search_cu.line_search
+    r = line_search(
         # m_idx,
         best_x,
         best_c,
@@ -94,7 +81,11 @@ def update_best(
 ):
     cost_s1 = cost.shape[0]
     cost_s2 = cost.shape[1]
-    r = line_search_cu.update_best(
+    if cost.device.type == "cpu":
+        update_best_fn = ls_cpu.update_best
+    else:
+        update_best_fn = line_search_cu.update_best
+    r = update_best_fn(
         best_cost,
         best_q,
         best_iteration,
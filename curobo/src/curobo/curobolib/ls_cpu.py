@@ -0,0 +1,127 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""Batched PyTorch implementations of ``line_search_cu`` kernels for tensors on CPU.
+
+:py:mod:`curobo.curobolib.ls` dispatches to these functions when inputs are on CPU. Functions take
+the same arguments as the kernels and write to the same output buffers.
+"""
+
+# Standard Library
+from typing import List
+
+# Third Party
+import torch
+
+
+def _last_true_index(mask: torch.Tensor) -> torch.Tensor:
+    # index of last True along last dimension, -1 if all are False:
+    index = torch.arange(mask.shape[-1], device=mask.device)
+    return torch.max(torch.where(mask, index, -1), dim=-1)[0]
+
+
+def line_search(
+    best_x: torch.Tensor,
+    best_c: torch.Tensor,
+    best_grad: torch.Tensor,
+    g_x: torch.Tensor,
+    x_set: torch.Tensor,
+    step_vec: torch.Tensor,
+    c: torch.Tensor,
+    alpha_list: torch.Tensor,
+    c_idx: torch.Tensor,
+    c_1: float,
+    c_2: float,
+    strong_wolfe: bool,
+    approx_wolfe: bool,
+    l1: int,
+    l2: int,
+    batchsize: int,
+) -> List[torch.Tensor]:
+    """Select largest step size that satisfies wolfe conditions.
+
+    Args:
+        best_x: output iterate, batchsize x l2.
+        best_c: output cost, batchsize x 1.
+        best_grad: output gradient, batchsize x l2.
+        g_x: gradient at every step size, batchsize x l1 x l2.
+        x_set: iterate at every step size, batchsize x l1 x l2.
+        step_vec: step direction, batchsize x 1 x l2.
+        c: cost at every step size, batchsize x l1 x 1.
+        alpha_list: step sizes, only the first l1 values are read as in the kernel.
+        c_idx: offset of every problem in flattened x_set, batchsize.
+        c_1: sufficient decrease parameter.
+        c_2: curvature parameter.
+        strong_wolfe: use strong curvature condition.
+        approx_wolfe: fall back to step size 0 instead of 1 when no step size satisfies
+            conditions.
+        l1: number of step sizes.
+        l2: number of optimization variables.
+        batchsize: number of problems.
+
+    Returns:
+        best_x, best_c, best_grad.
+    """
+    g_step = torch.bmm(g_x.view(batchsize, l1, l2), step_vec.view(batchsize, l2, 1)).view(
+        batchsize, l1
+    )
+    b_c = c.view(batchsize, l1)
+    alpha = alpha_list.reshape(-1)[:l1]
+    wolfe_1 = b_c <= b_c[:, :1] + c_1 * alpha * g_step[:, :1]
+    if strong_wolfe:
+        wolfe_2 = torch.abs(g_step) <= c_2 * torch.abs(g_step[:, :1])
+    else:
+        wolfe_2 = g_step >= c_2 * g_step[:, :1]
+    m_idx = _last_true_index(torch.logical_and(wolfe_1, wolfe_2))
+    if not approx_wolfe:
+        m_idx = torch.where(m_idx <= 0, _last_true_index(wolfe_1), m_idx)
+        m_idx = torch.where(m_idx <= 0, 1, m_idx)
+    else:
+        m_idx = torch.clamp(m_idx, min=0)
+    m_idx = m_idx + c_idx.view(batchsize)
+    best_x.view(batchsize, l2).copy_(x_set.view(-1, l2)[m_idx])
+    best_grad.view(batchsize, l2).copy_(g_x.view(-1, l2)[m_idx])
+    best_c.view(batchsize).copy_(c.view(-1)[m_idx])
+    return [best_x, best_c, best_grad]
+
+
+def update_best(
+    best_cost: torch.Tensor,
+    best_q: torch.Tensor,
+    best_iteration: torch.Tensor,
+    current_iteration: torch.Tensor,
+    cost: torch.Tensor,
+    q: torch.Tensor,
+    d_opt: int,
+    cost_s1: int,
+    cost_s2: int,
+    iteration: int,
+    delta_threshold: float,
+    relative_threshold: float = 0.999,
+) -> List[torch.Tensor]:
+    """Store iterates that reduce cost by more than thresholds.
+
+    best_iteration is reset to 0 for problems that improved and decremented for others.
+
+    Returns:
+        best_cost, best_q, best_iteration.
+    """
+    b_cost = cost.reshape(cost_s1)
+    b_best_cost = best_cost.view(cost_s1)
+    change = torch.logical_and(
+        (b_best_cost - b_cost) > delta_threshold, b_cost < b_best_cost * relative_threshold
+    )
+    best_q.view(cost_s1, d_opt).copy_(
+        torch.where(change.unsqueeze(-1), q.reshape(cost_s1, d_opt), best_q.view(cost_s1, d_opt))
+    )
+    b_best_cost.copy_(torch.where(change, b_cost, b_best_cost))
+    b_best_iteration = best_iteration.view(cost_s1)
+    b_best_iteration.copy_(torch.where(change, 0, b_best_iteration - 1))
+    return [best_cost, best_q, best_iteration]
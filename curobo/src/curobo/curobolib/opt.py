@@ -13,28 +13,10 @@ import torch
 from torch.autograd import Function
 
 # CuRobo
-from curobo.util.logger import log_warn
+from curobo.curobolib import opt_cpu
+from curobo.curobolib.extension_loader import LazyExtension
 
-try:
-    # CuRobo
-    from curobo.curobolib import lbfgs_step_cu
-except ImportError:
-    log_warn("lbfgs_step_cu not found, JIT compiling...")
-    # Third Party
-    from torch.utils.cpp_extension import load
-
-    # CuRobo
-    from curobo.curobolib.util_file import add_cpp_path
-
-    lbfgs_step_cu = load(
-        name="lbfgs_step_cu",
-        sources=add_cpp_path(
-            [
-                "lbfgs_step_cuda.cpp",
-                "lbfgs_step_kernel.cu",
-            ]
-        ),
-    )
+lbfgs_step_cu = LazyExtension("lbfgs_step_cu", ["lbfgs_step_cuda.cpp", "lbfgs_step_kernel.cu"])
 
 
 class LBFGScu(Function):
@@ -52,8 +34,11 @@ class LBFGScu(Function):
         stable_mode=False,
     ):
         m, b, v_dim, _ = y_buffer.shape
-
-        R = lbfgs_step_cu.forward(
+        if step_vec.device.type == "cpu":
+            lbfgs_step = opt_cpu.lbfgs_step
+        else:
+            lbfgs_step = lbfgs_step_cu.forward
+        R = lbfgs_step(
             step_vec,  # .view(-1),
             rho_buffer,  # .view(-1),
             y_buffer,  # .view(-1),
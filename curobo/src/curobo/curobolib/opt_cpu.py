@@ -0,0 +1,102 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""Batched PyTorch implementation of the ``lbfgs_step_cu`` kernel for tensors on CPU.
+
+:py:class:`curobo.curobolib.opt.LBFGScu` dispatches to :py:func:`lbfgs_step` when inputs are on
+CPU. Buffers are updated in place with the same layout and history shifting as the fused CUDA
+kernel.
+"""
+
+# Standard Library
+from typing import List
+
+# Third Party
+import torch
+
+
+def lbfgs_step(
+    step_vec: torch.Tensor,
+    rho_buffer: torch.Tensor,
+    y_buffer: torch.Tensor,
+    s_buffer: torch.Tensor,
+    q: torch.Tensor,
+    grad_q: torch.Tensor,
+    x_0: torch.Tensor,
+    grad_0: torch.Tensor,
+    epsilon: float,
+    batch_size: int,
+    m: int,
+    v_dim: int,
+    stable_mode: bool,
+) -> List[torch.Tensor]:
+    """Update L-BFGS history with the latest iterate and compute the next step direction.
+
+    Args:
+        step_vec: output step direction, batch_size x v_dim.
+        rho_buffer: history of 1 / (y^T s), m x batch_size x 1 x 1.
+        y_buffer: history of gradient differences, m x batch_size x v_dim x 1.
+        s_buffer: history of iterate differences, m x batch_size x v_dim x 1.
+        q: current iterate, batch_size x v_dim.
+        grad_q: gradient at current iterate, batch_size x v_dim.
+        x_0: previous iterate, overwritten with q.
+        grad_0: gradient at previous iterate, overwritten with grad_q.
+        epsilon: value of the initial hessian scale when y^T y is zero in stable_mode.
+        batch_size: number of problems.
+        m: history length.
+        v_dim: number of optimization variables.
+        stable_mode: replace divisions by zero with finite values.
+
+    Returns:
+        step_vec, rho_buffer, y_buffer, s_buffer, x_0, grad_0.
+    """
+    b_step = step_vec.view(batch_size, v_dim)
+    b_rho = rho_buffer.view(m, batch_size)
+    b_y = y_buffer.view(m, batch_size, v_dim)
+    b_s = s_buffer.view(m, batch_size, v_dim)
+    b_x_0 = x_0.view(batch_size, v_dim)
+    b_grad_0 = grad_0.view(batch_size, v_dim)
+    gq = grad_q.reshape(batch_size, v_dim)
+    b_q = q.reshape(batch_size, v_dim)
+
+    y = gq - b_grad_0
+    s = b_q - b_x_0
+    numerator = torch.sum(y * s, dim=-1)
+
+    # shift history by one and append latest pair:
+    b_s[:-1] = b_s[1:].clone()
+    b_y[:-1] = b_y[1:].clone()
+    b_rho[:-1] = b_rho[1:].clone()
+    b_s[-1] = s
+    b_y[-1] = y
+    rho = 1.0 / numerator
+    if stable_mode:
+        rho = torch.where(numerator == 0.0, 0.0, rho)
+    b_rho[-1] = rho
+    b_grad_0.copy_(gq)
+    b_x_0.copy_(b_q)
+
+    # two loop recursion:
+    alpha = torch.empty((m, batch_size), device=gq.device, dtype=gq.dtype)
+    r = gq.clone()
+    for i in range(m - 1, -1, -1):
+        alpha[i] = torch.sum(r * b_s[i], dim=-1) * b_rho[i]
+        r = r - alpha[i].unsqueeze(-1) * b_y[i]
+
+    denominator = torch.sum(y * y, dim=-1)
+    gamma = numerator / denominator
+    if stable_mode:
+        gamma = torch.where(denominator == 0.0, epsilon, gamma)
+    r = torch.nn.functional.relu(gamma).unsqueeze(-1) * r
+    for i in range(m):
+        beta = torch.sum(r * b_y[i], dim=-1) * b_rho[i]
+        r = r + (alpha[i] - beta).unsqueeze(-1) * b_s[i]
+    b_step.copy_(-1.0 * r)
+    return [step_vec, rho_buffer, y_buffer, s_buffer, x_0, grad_0]
@@ -12,24 +12,10 @@
 import torch
 
 # CuRobo
-from curobo.util.logger import log_warn
+from curobo.curobolib import tensor_step_cpu
+from curobo.curobolib.extension_loader import LazyExtension
 
-try:
-    # CuRobo
-    from curobo.curobolib import tensor_step_cu
-
-except ImportError:
-    # Third Party
-    from torch.utils.cpp_extension import load
-
-    # CuRobo
-    from curobo.curobolib.util_file import add_cpp_path
-
-    log_warn("tensor_step_cu not found, jit compiling...")
-    tensor_step_cu = load(
-        name="tensor_step_cu",
-        sources=add_cpp_path(["tensor_step_cuda.cpp", "tensor_step_kernel.cu"]),
-    )
+tensor_step_cu = LazyExtension("tensor_step_cu", ["tensor_step_cuda.cpp", "tensor_step_kernel.cu"])
 
 
 def tensor_step_pos_clique_idx_fwd(
@@ -48,7 +34,11 @@ def tensor_step_pos_clique_idx_fwd(
     dof,
     mode=-1,
 ):
-    r = tensor_step_cu.step_idx_position2(
+    if u_position.device.type == "cpu":
+        step_idx_position2 = tensor_step_cpu.step_idx_position2
+    else:
+        step_idx_position2 = tensor_step_cu.step_idx_position2
+    r = step_idx_position2(
         out_position,
         out_velocity,
         out_acceleration,
@@ -82,7 +72,11 @@ def tensor_step_pos_clique_fwd(
     dof,
     mode=-1,
 ):
-    r = tensor_step_cu.step_position2(
+    if u_position.device.type == "cpu":
+        step_position2 = tensor_step_cpu.step_position2
+    else:
+        step_position2 = tensor_step_cu.step_position2
+    r = step_position2(
         out_position,
         out_velocity,
         out_acceleration,
@@ -115,7 +109,11 @@ def tensor_step_acc_fwd(
     dof,
     use_rk2=True,
 ):
-    r = tensor_step_cu.step_acceleration(
+    if u_acc.device.type == "cpu":
+        step_acceleration = tensor_step_cpu.step_acceleration
+    else:
+        step_acceleration = tensor_step_cu.step_acceleration
+    r = step_acceleration(
         out_position,
         out_velocity,
         out_acceleration,
@@ -149,7 +147,11 @@ def tensor_step_acc_idx_fwd(
     dof,
     use_rk2=True,
 ):
-    r = tensor_step_cu.step_acceleration_idx(
+    if u_acc.device.type == "cpu":
+        step_acceleration_idx = tensor_step_cpu.step_acceleration_idx
+    else:
+        step_acceleration_idx = tensor_step_cu.step_acceleration_idx
+    r = step_acceleration_idx(
         out_position,
         out_velocity,
         out_acceleration,
@@ -180,7 +182,11 @@ def tensor_step_pos_clique_bwd(
     dof,
     mode=-1,
 ):
-    r = tensor_step_cu.step_position_backward2(
+    if out_grad_position.device.type == "cpu":
+        step_position_backward2 = tensor_step_cpu.step_position_backward2
+    else:
+        step_position_backward2 = tensor_step_cu.step_position_backward2
+    r = step_position_backward2(
         out_grad_position,
         grad_position,
         grad_velocity,
@@ -193,3 +199,31 @@ def tensor_step_pos_clique_bwd(
         mode,
     )
     return r[0]
+
+
+def tensor_step_acc_bwd(
+    out_grad_acc,
+    grad_position,
+    grad_velocity,
+    grad_acceleration,
+    grad_jerk,
+    traj_dt,
+    batch_size,
+    horizon,
+    dof,
+    use_rk2=True,
+):
+    # there is no cuda kernel for this, tensor implementation runs on all devices:
+    r = tensor_step_cpu.step_acceleration_backward(
+        out_grad_acc,
+        grad_position,
+        grad_velocity,
+        grad_acceleration,
+        grad_jerk,
+        traj_dt,
+        batch_size,
+        horizon,
+        dof,
+        use_rk2,
+    )
+    return r[0]
@@ -0,0 +1,507 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""Vectorized PyTorch implementations of ``tensor_step_cu`` kernels for tensors on CPU.
+
+Functions take the same arguments as the kernels wrapped in :py:mod:`curobo.curobolib.tensor_step`
+and write to the same output buffers. Every function computes all timesteps of
+[batch, horizon, dof] in one pass by gathering the finite difference stencil of each timestep,
+instead of looping over the horizon. :py:mod:`curobo.curobolib.tensor_step` dispatches to these
+functions when inputs are on CPU.
+"""
+
+# Standard Library
+from typing import List, Optional
+
+# Third Party
+import torch
+
+# finite difference modes of position clique kernels:
+_BWD_DIFF = -1
+_CENTRAL_DIFF = 0
+
+
+def _get_start_state(
+    start_position: torch.Tensor,
+    start_velocity: torch.Tensor,
+    start_acceleration: torch.Tensor,
+    start_idx: Optional[torch.Tensor],
+    batch_size: int,
+    dof: int,
+):
+    start = [start_position, start_velocity, start_acceleration]
+    if start_idx is None:
+        return [x.reshape(batch_size, 1, dof) for x in start]
+    index = start_idx.view(-1).to(dtype=torch.long)
+    return [x.reshape(-1, dof)[index].view(batch_size, 1, dof) for x in start]
+
+
+def _write_state(
+    out_position: torch.Tensor,
+    out_velocity: torch.Tensor,
+    out_acceleration: torch.Tensor,
+    out_jerk: torch.Tensor,
+    position: torch.Tensor,
+    velocity: torch.Tensor,
+    acceleration: torch.Tensor,
+    jerk: torch.Tensor,
+    batch_size: int,
+    horizon: int,
+    dof: int,
+):
+    out_position.view(batch_size, horizon, dof).copy_(position)
+    out_velocity.view(batch_size, horizon, dof).copy_(velocity)
+    out_acceleration.view(batch_size, horizon, dof).copy_(acceleration)
+    out_jerk.view(batch_size, horizon, dof).copy_(jerk)
+
+
+def _backward_difference(u, st_pos, st_vel, st_acc, dt, horizon):
+    # positions before start are extrapolated from start velocity and acceleration:
+    st_delta = (st_vel - 0.5 * st_acc * dt) * dt
+    # ext[:, h + 2] is position at timestep h:
+    ext = torch.cat([st_pos - 2.0 * st_delta, st_pos - st_delta, st_pos, u[:, : horizon - 1]], 1)
+    p_0 = ext[:, :-3]
+    p_1 = ext[:, 1:-2]
+    p_2 = ext[:, 2:-1]
+    p_3 = ext[:, 3:]
+    zero = torch.zeros_like(st_pos)
+    position = torch.cat([st_pos, p_3], 1)
+    velocity = torch.cat([st_vel, (p_3 - p_2) * dt], 1)
+    acceleration = torch.cat([st_acc, (p_1 - 2.0 * p_2 + p_3) * dt * dt], 1)
+    jerk = torch.cat([zero, (-p_0 + 3.0 * p_1 - 3.0 * p_2 + p_3) * dt * dt * dt], 1)
+    return position, velocity, acceleration, jerk
+
+
+def _central_difference_index(horizon: int, device: torch.device) -> torch.Tensor:
+    # index into extended positions of five point stencil of every timestep, the kernel repeats
+    # the last read action near the end of the horizon:
+    h_idx = torch.arange(horizon, device=device).unsqueeze(-1)
+    u_idx = h_idx - 4 + torch.arange(5, device=device).unsqueeze(0)
+    u_idx = torch.where(
+        h_idx >= 4, torch.clamp(u_idx, max=horizon - 5), torch.clamp(u_idx, max=horizon - 1)
+    )
+    return (u_idx + 4).view(-1)
+
+
+def _central_difference(u, st_pos, st_vel, st_acc, dt, batch_size, horizon, dof):
+    st_delta = dt * (st_vel + 0.5 * st_acc * dt)
+    # ext[:, i + 4] is u[:, i], positions before start are extrapolated:
+    ext = torch.cat(
+        [st_pos - 3.0 * st_delta, st_pos - 2.0 * st_delta, st_pos - st_delta, st_pos, u], 1
+    )
+    stencil = ext[:, _central_difference_index(horizon, u.device)]
+    p_0, p_1, p_2, p_3, p_4 = stencil.view(batch_size, horizon, 5, dof).unbind(-2)
+    position = p_2
+    velocity = (0.083333333 * p_0 - 0.666666667 * p_1 + 0.666666667 * p_3 - 0.083333333 * p_4) * dt
+    acceleration = (
+        -0.083333333 * p_0 + 1.333333333 * p_1 - 2.5 * p_2 + 1.333333333 * p_3 - 0.083333333 * p_4
+    ) * (dt * dt)
+    jerk = (-0.5 * p_0 + p_1 - p_3 + 0.5 * p_4) * (dt * dt * dt)
+    return position, velocity, acceleration, jerk
+
+
+def _step_position(
+    out_position,
+    out_velocity,
+    out_acceleration,
+    out_jerk,
+    u_position,
+    start_position,
+    start_velocity,
+    start_acceleration,
+    start_idx,
+    traj_dt,
+    batch_size,
+    horizon,
+    dof,
+    mode,
+):
+    st_pos, st_vel, st_acc = _get_start_state(
+        start_position, start_velocity, start_acceleration, start_idx, batch_size, dof
+    )
+    u = u_position.view(batch_size, horizon, dof)
+    # traj_dt stores inverse of dt, kernels only read the first value:
+    dt = traj_dt.view(-1)[0]
+    if mode == _BWD_DIFF:
+        state = _backward_difference(u, st_pos, st_vel, st_acc, dt, horizon)
+    elif mode == _CENTRAL_DIFF:
+        state = _central_difference(u, st_pos, st_vel, st_acc, dt, batch_size, horizon, dof)
+    else:
+        raise ValueError("unknown finite difference mode: " + str(mode))
+    _write_state(
+        out_position,
+        out_velocity,
+        out_acceleration,
+        out_jerk,
+        *state,
+        batch_size,
+        horizon,
+        dof,
+    )
+    return [out_position, out_velocity, out_acceleration, out_jerk]
+
+
+def step_position2(
+    out_position: torch.Tensor,
+    out_velocity: torch.Tensor,
+    out_acceleration: torch.Tensor,
+    out_jerk: torch.Tensor,
+    u_position: torch.Tensor,
+    start_position: torch.Tensor,
+    start_velocity: torch.Tensor,
+    start_acceleration: torch.Tensor,
+    traj_dt: torch.Tensor,
+    batch_size: int,
+    horizon: int,
+    dof: int,
+    mode: int = -1,
+) -> List[torch.Tensor]:
+    """Compute joint state trajectory from position actions with finite differences.
+
+    Args:
+        out_position: output position, batch_size x horizon x dof.
+        out_velocity: output velocity, batch_size x horizon x dof.
+        out_acceleration: output acceleration, batch_size x horizon x dof.
+        out_jerk: output jerk, batch_size x horizon x dof.
+        u_position: position actions, batch_size x horizon x dof.
+        start_position: start position, batch_size x dof.
+        start_velocity: start velocity, batch_size x dof.
+        start_acceleration: start acceleration, batch_size x dof.
+        traj_dt: inverse of timestep, only the first value is used.
+        batch_size: number of trajectories.
+        horizon: number of timesteps.
+        dof: number of joints.
+        mode: -1 for backward difference, 0 for central difference.
+
+    Returns:
+        out_position, out_velocity, out_acceleration, out_jerk.
+    """
+    return _step_position(
+        out_position,
+        out_velocity,
+        out_acceleration,
+        out_jerk,
+        u_position,
+        start_position,
+        start_velocity,
+        start_acceleration,
+        None,
+        traj_dt,
+        batch_size,
+        horizon,
+        dof,
+        mode,
+    )
+
+
+def step_idx_position2(
+    out_position: torch.Tensor,
+    out_velocity: torch.Tensor,
+    out_acceleration: torch.Tensor,
+    out_jerk: torch.Tensor,
+    u_position: torch.Tensor,
+    start_position: torch.Tensor,
+    start_velocity: torch.Tensor,
+    start_acceleration: torch.Tensor,
+    start_idx: torch.Tensor,
+    traj_dt: torch.Tensor,
+    batch_size: int,
+    horizon: int,
+    dof: int,
+    mode: int = -1,
+) -> List[torch.Tensor]:
+    """Same as :py:func:`step_position2`, start state of trajectory i is start_idx[i]."""
+    return _step_position(
+        out_position,
+        out_velocity,
+        out_acceleration,
+        out_jerk,
+        u_position,
+        start_position,
+        start_velocity,
+        start_acceleration,
+        start_idx,
+        traj_dt,
+        batch_size,
+        horizon,
+        dof,
+        mode,
+    )
+
+
+def step_position_backward2(
+    out_grad_position: torch.Tensor,
+    grad_position: torch.Tensor,
+    grad_velocity: torch.Tensor,
+    grad_acceleration: torch.Tensor,
+    grad_jerk: torch.Tensor,
+    traj_dt: torch.Tensor,
+    batch_size: int,
+    horizon: int,
+    dof: int,
+    mode: int = -1,
+) -> List[torch.Tensor]:
+    """Gradient of position actions from gradients of :py:func:`step_position2` outputs.
+
+    Actions that do not contribute to the trajectory get zero gradient.
+
+    Returns:
+        out_grad_position.
+    """
+    g_p, g_v, g_a, g_j = [
+        x.view(batch_size, horizon, dof)
+        for x in [grad_position, grad_velocity, grad_acceleration, grad_jerk]
+    ]
+    dt = traj_dt.view(-1)[0]
+    out_grad = torch.zeros_like(g_p)
+    if mode == _BWD_DIFF:
+        # action h - 1 is position at timestep h and affects derivatives till timestep h + 3:
+        zero = torch.zeros((batch_size, 3, dof), device=g_p.device, dtype=g_p.dtype)
+        g_v, g_a, g_j = [torch.cat([x, zero], 1) for x in [g_v, g_a, g_j]]
+
+        def s(x, k):
+            return x[:, 1 + k : horizon + k]
+
+        out_grad[:, :-1] = (
+            g_p[:, 1:]
+            + (s(g_v, 0) - s(g_v, 1)) * dt
+            + (s(g_a, 0) - 2.0 * s(g_a, 1) + s(g_a, 2)) * dt * dt
+            + (s(g_j, 0) - 3.0 * s(g_j, 1) + 3.0 * s(g_j, 2) - s(g_j, 3)) * dt * dt * dt
+        )
+    elif mode == _CENTRAL_DIFF:
+        # action h - 2 is position at timestep h, stencil covers timesteps h - 2 to h + 2:
+        n = horizon - 5
+
+        def s(x, k):
+            return x[:, k : k + n]
+
+        out_grad[:, :n] = (
+            s(g_p, 2)
+            + (
+                -0.083333333 * s(g_v, 0)
+                + 0.666666667 * s(g_v, 1)
+                - 0.666666667 * s(g_v, 3)
+                + 0.083333333 * s(g_v, 4)
+            )
+            * dt
+            + (
+                -0.083333333 * s(g_a, 0)
+                + 1.333333333 * s(g_a, 1)
+                - 2.5 * s(g_a, 2)
+                + 1.333333333 * s(g_a, 3)
+                - 0.083333333 * s(g_a, 4)
+            )
+            * (dt * dt)
+            + (0.5 * s(g_j, 0) - s(g_j, 1) + s(g_j, 3) - 0.5 * s(g_j, 4)) * (dt * dt * dt)
+        )
+        # last action is repeated till end of horizon:
+        out_grad[:, n] = (
+            g_p[:, -3:].sum(1)
+            + (
+                -0.083333333 * g_v[:, -5]
+                + 0.583333333 * g_v[:, -4]
+                + 0.583333333 * g_v[:, -3]
+                - 0.083333333 * g_v[:, -2]
+            )
+            * dt
+            + (
+                -0.083333333 * g_a[:, -5]
+                + 1.25 * g_a[:, -4]
+                - 1.25 * g_a[:, -3]
+                + 0.083333333 * g_a[:, -2]
+            )
+            * (dt * dt)
+            + (0.5 * g_j[:, -5] - 0.5 * g_j[:, -4] - 0.5 * g_j[:, -3] + 0.5 * g_j[:, -2])
+            * (dt * dt * dt)
+        )
+    else:
+        raise ValueError("unknown finite difference mode: " + str(mode))
+    out_grad_position.view(batch_size, horizon, dof).copy_(out_grad)
+    return [out_grad_position]
+
+
+def _shift_cumsum(x: torch.Tensor) -> torch.Tensor:
+    # cumulative sum along horizon, ignoring first timestep:
+    x = torch.cat([torch.zeros_like(x[:, :1]), x[:, 1:]], 1)
+    return torch.cumsum(x, dim=1)
+
+
+def _step_acceleration(
+    out_position,
+    out_velocity,
+    out_acceleration,
+    out_jerk,
+    u_acc,
+    start_position,
+    start_velocity,
+    start_acceleration,
+    start_idx,
+    traj_dt,
+    batch_size,
+    horizon,
+    dof,
+    use_rk2,
+):
+    st_pos, st_vel, st_acc = _get_start_state(
+        start_position, start_velocity, start_acceleration, start_idx, batch_size, dof
+    )
+    u = u_acc.view(batch_size, horizon, dof)
+    dt = traj_dt.view(-1)[:horizon].view(1, horizon, 1)
+    acceleration = torch.cat([st_acc, u[:, :-1]], 1)
+    if use_rk2:
+        velocity = st_vel + _shift_cumsum(0.5 * dt * acceleration)
+        prev_velocity = torch.cat([velocity[:, :1], velocity[:, :-1]], 1)
+        position = st_pos + _shift_cumsum(prev_velocity * dt + 0.5 * dt * dt * acceleration)
+    else:
+        # semi implicit euler:
+        velocity = st_vel + _shift_cumsum(acceleration * dt)
+        position = st_pos + _shift_cumsum(velocity * dt)
+    jerk = torch.cat(
+        [torch.zeros_like(st_acc), (acceleration[:, 1:] - acceleration[:, :-1]) / dt[:, 1:]], 1
+    )
+    _write_state(
+        out_position,
+        out_velocity,
+        out_acceleration,
+        out_jerk,
+        position,
+        velocity,
+        acceleration,
+        jerk,
+        batch_size,
+        horizon,
+        dof,
+    )
+    return [out_position, out_velocity, out_acceleration, out_jerk]
+
+
+def step_acceleration(
+    out_position: torch.Tensor,
+    out_velocity: torch.Tensor,
+    out_acceleration: torch.Tensor,
+    out_jerk: torch.Tensor,
+    u_acc: torch.Tensor,
+    start_position: torch.Tensor,
+    start_velocity: torch.Tensor,
+    start_acceleration: torch.Tensor,
+    traj_dt: torch.Tensor,
+    batch_size: int,
+    horizon: int,
+    dof: int,
+    use_rk2: bool = True,
+) -> List[torch.Tensor]:
+    """Integrate acceleration actions with rk2 or semi implicit euler.
+
+    Args:
+        traj_dt: timestep of every step in horizon.
+        use_rk2: use rk2 integration, semi implicit euler otherwise.
+
+    Returns:
+        out_position, out_velocity, out_acceleration, out_jerk.
+    """
+    return _step_acceleration(
+        out_position,
+        out_velocity,
+        out_acceleration,
+        out_jerk,
+        u_acc,
+        start_position,
+        start_velocity,
+        start_acceleration,
+        None,
+        traj_dt,
+        batch_size,
+        horizon,
+        dof,
+        use_rk2,
+    )
+
+
+def step_acceleration_idx(
+    out_position: torch.Tensor,
+    out_velocity: torch.Tensor,
+    out_acceleration: torch.Tensor,
+    out_jerk: torch.Tensor,
+    u_acc: torch.Tensor,
+    start_position: torch.Tensor,
+    start_velocity: torch.Tensor,
+    start_acceleration: torch.Tensor,
+    start_idx: torch.Tensor,
+    traj_dt: torch.Tensor,
+    batch_size: int,
+    horizon: int,
+    dof: int,
+    use_rk2: bool = True,
+) -> List[torch.Tensor]:
+    """Same as :py:func:`step_acceleration`, start state of trajectory i is start_idx[i].
+
+    As in the kernel, semi implicit euler integration is used for both values of use_rk2.
+    """
+    return _step_acceleration(
+        out_position,
+        out_velocity,
+        out_acceleration,
+        out_jerk,
+        u_acc,
+        start_position,
+        start_velocity,
+        start_acceleration,
+        start_idx,
+        traj_dt,
+        batch_size,
+        horizon,
+        dof,
+        False,
+    )
+
+
+def _reverse_cumsum(x: torch.Tensor) -> torch.Tensor:
+    return torch.flip(torch.cumsum(torch.flip(x, [1]), dim=1), [1])
+
+
+def step_acceleration_backward(
+    out_grad_acc: torch.Tensor,
+    grad_position: torch.Tensor,
+    grad_velocity: torch.Tensor,
+    grad_acceleration: torch.Tensor,
+    grad_jerk: torch.Tensor,
+    traj_dt: torch.Tensor,
+    batch_size: int,
+    horizon: int,
+    dof: int,
+    use_rk2: bool = True,
+) -> List[torch.Tensor]:
+    """Gradient of acceleration actions from gradients of :py:func:`step_acceleration` outputs.
+
+    Only uses tensor operations and runs on any device.
+
+    Returns:
+        out_grad_acc.
+    """
+    g_p, g_v, g_a, g_j = [
+        x.view(batch_size, horizon, dof)
+        for x in [grad_position, grad_velocity, grad_acceleration, grad_jerk]
+    ]
+    dt = traj_dt.view(-1)[:horizon].view(1, horizon, 1)
+    # position at timestep h depends on all steps till h:
+    sum_g_p = _reverse_cumsum(g_p)
+    if use_rk2:
+        # position at timestep h depends on velocity at h - 1:
+        g_v = g_v + torch.cat([dt[:, 1:] * sum_g_p[:, 1:], torch.zeros_like(g_p[:, :1])], 1)
+        g_acc = g_a + 0.5 * dt * dt * sum_g_p + 0.5 * dt * _reverse_cumsum(g_v)
+    else:
+        g_v = g_v + dt * sum_g_p
+        g_acc = g_a + dt * _reverse_cumsum(g_v)
+    g_j = g_j / dt
+    g_acc = g_acc + g_j - torch.cat([g_j[:, 1:], torch.zeros_like(g_j[:, :1])], 1)
+    # action h - 1 is acceleration at timestep h, last action is not used:
+    out_grad = torch.cat([g_acc[:, 1:], torch.zeros_like(g_acc[:, :1])], 1)
+    out_grad_acc.view(batch_size, horizon, dof).copy_(out_grad)
+    return [out_grad_acc]
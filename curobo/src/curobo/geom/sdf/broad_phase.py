@@ -0,0 +1,215 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""Broad phase culling of oriented bounding boxes for collision queries.
+
+World aligned bounding boxes (AABB) of obstacles are binned into a uniform grid that is stored as
+a sorted list of (cell, obstacle) pairs. Query spheres are binned into the same grid and joined
+with this list to find the obstacles that are close to each batch of spheres. Obstacles covering
+more than ``max_cells_per_obb`` cells (e.g., floors and walls) are not binned and are a candidate
+for every query.
+"""
+
+# Standard Library
+from typing import List, Optional, Tuple
+
+# Third Party
+import torch
+
+# CuRobo
+from curobo.geom.transform import torch_quaternion_to_matrix
+from curobo.types.base import TensorDeviceType
+
+
+def _expand_cell_ranges(
+    low_cell: torch.Tensor, high_cell: torch.Tensor, grid_dims: torch.Tensor
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Enumerate cells inside inclusive integer ranges.
+
+    Args:
+        low_cell: lowest cell index of every range, shape [n, 3].
+        high_cell: highest cell index of every range, shape [n, 3].
+        grid_dims: number of cells along each axis, shape [3].
+
+    Returns:
+        Range index and linear cell index of every enumerated cell.
+    """
+    extent = high_cell - low_cell + 1
+    n_cells = torch.prod(extent, dim=-1)
+    range_idx = torch.repeat_interleave(
+        torch.arange(n_cells.shape[0], device=n_cells.device), n_cells
+    )
+    start = torch.cumsum(n_cells, dim=0) - n_cells
+    local_idx = torch.arange(range_idx.shape[0], device=n_cells.device) - start[range_idx]
+    extent = extent[range_idx]
+    cell = low_cell[range_idx]
+    cell_x = cell[:, 0] + local_idx // (extent[:, 1] * extent[:, 2])
+    cell_y = cell[:, 1] + (local_idx // extent[:, 2]) % extent[:, 1]
+    cell_z = cell[:, 2] + local_idx % extent[:, 2]
+    linear_cell = (cell_x * grid_dims[1] + cell_y) * grid_dims[2] + cell_z
+    return range_idx, linear_cell
+
+
+class ObbBroadPhase:
+    """Uniform grid over world aligned bounding boxes of obstacles in
+    :py:class:`~curobo.geom.sdf.world.WorldPrimitiveCollision`.
+
+    Bounding boxes are updated per obstacle when obstacles are added, moved or enabled. The grid
+    is rebuilt from these bounding boxes on the next query after a change, with bounds fit to the
+    enabled obstacles. Queries outside the grid bounds are clamped to the boundary cells, which
+    only adds candidates.
+    """
+
+    def __init__(
+        self,
+        tensor_args: TensorDeviceType,
+        cell_size: float = 0.5,
+        max_cells_per_obb: int = 512,
+    ):
+        self.tensor_args = tensor_args
+        self.cell_size = cell_size
+        self.max_cells_per_obb = max_cells_per_obb
+        self.reset()
+
+    def reset(self):
+        self._obb_aabb = None
+        self._obb_valid = None
+        self._grid_origin = None
+        self._grid_dims = None
+        self._cell_keys = None
+        self._cell_obbs = None
+        self._always_candidate = None
+        self._dirty = True
+        self.world_fingerprint = None
+
+    def update_aabbs(
+        self,
+        cube_tensor_list: List[torch.Tensor],
+        env_n_obbs: torch.Tensor,
+        env_idx: Optional[torch.Tensor] = None,
+        obb_idx: Optional[torch.Tensor] = None,
+    ):
+        """Recompute bounding boxes of obstacles from the obb cache.
+
+        Args:
+            cube_tensor_list: obb cache with dims [n_envs, n, 4], inverse poses [n_envs, n, 8]
+                and enable flags [n_envs, n].
+            env_n_obbs: number of obstacles in every environment.
+            env_idx: environment index of obstacles to update. All obstacles are updated when
+                None.
+            obb_idx: index of obstacles to update, same shape as env_idx.
+        """
+        n_envs, n_obbs = cube_tensor_list[2].shape
+        if self._obb_aabb is None or self._obb_aabb.shape[:2] != (n_envs, n_obbs):
+            self._obb_aabb = torch.zeros(
+                (n_envs, n_obbs, 6), device=self.tensor_args.device, dtype=self.tensor_args.dtype
+            )
+            self._obb_valid = torch.zeros(
+                (n_envs, n_obbs), device=self.tensor_args.device, dtype=torch.bool
+            )
+            env_idx = None
+        if env_idx is None:
+            dims, pose, enable = cube_tensor_list
+            valid = torch.arange(n_obbs, device=enable.device) < env_n_obbs.view(-1, 1)
+            self._obb_aabb[:] = self._get_world_aabb(dims[..., :3], pose)
+            self._obb_valid[:] = (enable != 0) & valid
+        else:
+            env_idx = torch.as_tensor(env_idx, device=self.tensor_args.device).view(-1)
+            obb_idx = torch.as_tensor(obb_idx, device=self.tensor_args.device).view(-1)
+            dims = cube_tensor_list[0][env_idx, obb_idx, :3]
+            pose = cube_tensor_list[1][env_idx, obb_idx]
+            self._obb_aabb[env_idx, obb_idx] = self._get_world_aabb(dims, pose)
+            self._obb_valid[env_idx, obb_idx] = (cube_tensor_list[2][env_idx, obb_idx] != 0) & (
+                obb_idx < env_n_obbs[env_idx]
+            )
+        self._dirty = True
+
+    @staticmethod
+    def _get_world_aabb(dims: torch.Tensor, obj_w_pose: torch.Tensor) -> torch.Tensor:
+        # obb cache stores inverse pose (world to object), object rotation is its transpose:
+        obj_w_rot = torch_quaternion_to_matrix(obj_w_pose[..., 3:7])
+        center = -(obj_w_rot.transpose(-1, -2) @ obj_w_pose[..., :3].unsqueeze(-1)).squeeze(-1)
+        half_extent = (torch.abs(obj_w_rot).transpose(-1, -2) @ (dims / 2).unsqueeze(-1)).squeeze(
+            -1
+        )
+        return torch.cat((center - half_extent, center + half_extent), dim=-1)
+
+    def _get_cell_range(self, aabb: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        max_cell = self._grid_dims - 1
+        low_cell = torch.floor((aabb[..., :3] - self._grid_origin) / self.cell_size).long()
+        high_cell = torch.floor((aabb[..., 3:] - self._grid_origin) / self.cell_size).long()
+        low_cell = torch.minimum(torch.clamp(low_cell, min=0), max_cell)
+        high_cell = torch.minimum(torch.clamp(high_cell, min=0), max_cell)
+        return low_cell, high_cell
+
+    def build(self):
+        """Bin valid obstacles into the grid, grid bounds are fit to the current obstacles."""
+        valid_aabb = self._obb_aabb[self._obb_valid]
+        if valid_aabb.shape[0] > 0:
+            self._grid_origin = torch.amin(valid_aabb[:, :3], dim=0)
+            grid_extent = torch.amax(valid_aabb[:, 3:], dim=0) - self._grid_origin
+        else:
+            self._grid_origin = torch.zeros(3, **vars(self.tensor_args))
+            grid_extent = torch.zeros(3, **vars(self.tensor_args))
+        self._grid_dims = torch.floor(grid_extent / self.cell_size).long() + 1
+        n_grid_cells = torch.prod(self._grid_dims)
+
+        low_cell, high_cell = self._get_cell_range(self._obb_aabb)
+        n_cells = torch.prod(high_cell - low_cell + 1, dim=-1)
+        self._always_candidate = self._obb_valid & (n_cells > self.max_cells_per_obb)
+        binned = self._obb_valid & ~self._always_candidate
+        env_idx, obb_idx = torch.nonzero(binned, as_tuple=True)
+        range_idx, cell = _expand_cell_ranges(
+            low_cell[env_idx, obb_idx], high_cell[env_idx, obb_idx], self._grid_dims
+        )
+        keys = env_idx[range_idx] * n_grid_cells + cell
+        self._cell_keys, order = torch.sort(keys)
+        self._cell_obbs = obb_idx[range_idx][order]
+        self._dirty = False
+
+    def get_candidates(
+        self, query_aabb: torch.Tensor, query_env_idx: torch.Tensor, query_valid: torch.Tensor
+    ) -> torch.Tensor:
+        """Find obstacles with bounding boxes overlapping the grid cells of queries.
+
+        Args:
+            query_aabb: bounding box of every query, shape [batch, n, 6].
+            query_env_idx: environment index of every batch, shape [batch].
+            query_valid: queries to use, shape [batch, n].
+
+        Returns:
+            Boolean mask of candidate obstacles for every batch, shape [batch, n_obbs].
+        """
+        if self._dirty:
+            self.build()
+        n_obbs = self._obb_valid.shape[1]
+        query_env_idx = query_env_idx.view(-1).long()
+        candidates = self._always_candidate[query_env_idx].clone()
+        if self._cell_keys.shape[0] == 0:
+            return candidates
+        n_grid_cells = torch.prod(self._grid_dims)
+
+        batch_idx, query_idx = torch.nonzero(query_valid, as_tuple=True)
+        low_cell, high_cell = self._get_cell_range(query_aabb[batch_idx, query_idx])
+        range_idx, cell = _expand_cell_ranges(low_cell, high_cell, self._grid_dims)
+        # many spheres of a batch share cells, remove duplicates before the join:
+        batch_cell = torch.unique(batch_idx[range_idx] * n_grid_cells + cell)
+        batch_idx = batch_cell // n_grid_cells
+        keys = query_env_idx[batch_idx] * n_grid_cells + batch_cell % n_grid_cells
+
+        start = torch.searchsorted(self._cell_keys, keys, right=False)
+        end = torch.searchsorted(self._cell_keys, keys, right=True)
+        count = end - start
+        match_idx = torch.repeat_interleave(torch.arange(keys.shape[0], device=keys.device), count)
+        offset = torch.cumsum(count, dim=0) - count
+        pair_idx = start[match_idx] + torch.arange(match_idx.shape[0], device=keys.device)
+        pair_idx = pair_idx - offset[match_idx]
+        candidates.view(-1)[batch_idx[match_idx] * n_obbs + self._cell_obbs[pair_idx]] = True
+        return candidates
@@ -8,6 +8,9 @@
 # without an express license agreement from NVIDIA CORPORATION or
 # its affiliates is strictly prohibited.
 #
+# Standard Library
+from typing import Optional, Tuple
+
 # Third Party
 import torch
 
@@ -71,3 +74,71 @@ class SDFGrid(torch.autograd.Function):
         if ctx.needs_input_grad[2]:
             raise NotImplementedError("SDFGrid: Can't get gradient w.r.t. num_voxels")
         return grad_pt, grad_matrix_flat, grad_voxels
+
+
+def trilinear_lookup_distance(
+    pt: torch.Tensor,
+    dist_grid: torch.Tensor,
+    grid_origin: torch.Tensor,
+    voxel_size: float,
+    env_idx: Optional[torch.Tensor] = None,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Trilinear interpolation of distances stored at voxel centers.
+
+    Points outside the grid are clamped to the grid bounds, gradient along clamped axes is zero.
+
+    Args:
+        pt: points in grid frame, shape [..., 3].
+        dist_grid: distance at voxel centers, shape [n_envs, nx, ny, nz].
+        grid_origin: position of center of voxel [0, 0, 0], shape [3].
+        voxel_size: edge length of voxels.
+        env_idx: environment index of every point, shape [...]. Uses environment 0 when None.
+
+    Returns:
+        Interpolated distance of shape [...] and its analytic gradient w.r.t. pt of shape [..., 3].
+    """
+    n_envs, nx, ny, nz = dist_grid.shape
+    # grid sizes are kept on host, copying them to device would break CUDA graph capture:
+    num_voxels = [nx, ny, nz]
+    # environments are stacked along x, so that lookup_distance can index all environments:
+    flat_num_voxels = [n_envs * nx, ny, nz]
+    dist_matrix_flat = dist_grid.reshape(-1)
+
+    voxel_pt = (pt - grid_origin) / voxel_size
+    low = torch.stack(
+        [
+            torch.clamp(torch.floor(voxel_pt[..., i]), 0, max(num_voxels[i] - 2, 0))
+            for i in range(3)
+        ],
+        dim=-1,
+    )
+    t = voxel_pt - low
+    in_range = ((t >= 0.0) & (t <= 1.0)).to(dtype=pt.dtype)
+    t = torch.clamp(t, 0.0, 1.0)
+    low = low.to(dtype=torch.int64)
+    high = torch.stack(
+        [torch.clamp(low[..., i] + 1, max=num_voxels[i] - 1) for i in range(3)], dim=-1
+    )
+    if env_idx is not None:
+        env_offset = torch.zeros_like(low)
+        env_offset[..., 0] = env_idx.to(dtype=torch.int64) * nx
+        low = low + env_offset
+        high = high + env_offset
+
+    dist = torch.zeros_like(pt[..., 0])
+    grad = torch.zeros_like(pt)
+    for corner in range(8):
+        select = [(corner >> (2 - i)) & 1 for i in range(3)]
+        corner_pt = torch.stack(
+            [high[..., i] if select[i] else low[..., i] for i in range(3)], dim=-1
+        )
+        d = lookup_distance(corner_pt, dist_matrix_flat, flat_num_voxels)
+        # weight of corner along each axis and its derivative:
+        w = torch.stack([t[..., i] if select[i] else 1.0 - t[..., i] for i in range(3)], dim=-1)
+        dw = [1.0 if s else -1.0 for s in select]
+        dist = dist + d * w[..., 0] * w[..., 1] * w[..., 2]
+        grad[..., 0] += d * dw[0] * w[..., 1] * w[..., 2]
+        grad[..., 1] += d * w[..., 0] * dw[1] * w[..., 2]
+        grad[..., 2] += d * w[..., 0] * w[..., 1] * dw[2]
+    grad = grad * in_range / voxel_size
+    return dist, grad
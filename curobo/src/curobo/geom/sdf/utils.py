@@ -30,6 +30,11 @@ def create_collision_checker(config: WorldCollisionConfig):
         from curobo.geom.sdf.world_mesh import WorldMeshCollision
 
         return WorldMeshCollision(config)
+    elif config.checker_type == CollisionCheckerType.ESDF:
+        # CuRobo
+        from curobo.geom.sdf.world_esdf import WorldEsdfCollision
+
+        return WorldEsdfCollision(config)
     else:
         log_error("Not implemented", exc_info=True)
         raise NotImplementedError
@@ -13,6 +13,9 @@
 import torch
 import warp as wp
 
+# CuRobo
+from curobo.util.warp import warp_stream_from_torch
+
 wp.set_module_options({"fast_math": False})
 
 
@@ -876,6 +879,7 @@ class SdfMeshWarpPy(torch.autograd.Function):
         return_loss=False,
     ):
         b, h, n, _ = query_spheres.shape
+        wp_device = wp.device_from_torch(query_spheres.device)
 
         if env_query_idx is None:
             # launch
@@ -900,7 +904,8 @@ class SdfMeshWarpPy(torch.autograd.Function):
                     n,
                     mesh_idx.shape[1],
                 ],
-                stream=wp.stream_from_torch(query_spheres.device),
+                device=wp_device,
+                stream=warp_stream_from_torch(query_spheres.device),
             )
         else:
             wp.launch(
@@ -925,7 +930,8 @@ class SdfMeshWarpPy(torch.autograd.Function):
                     mesh_idx.shape[1],
                     wp.from_torch(env_query_idx.view(-1), dtype=wp.int32),
                 ],
-                stream=wp.stream_from_torch(query_spheres.device),
+                device=wp_device,
+                stream=warp_stream_from_torch(query_spheres.device),
             )
         ctx.return_loss = return_loss
         ctx.save_for_backward(out_grad)
@@ -964,6 +970,7 @@ class SweptSdfMeshWarpPy(torch.autograd.Function):
         return_loss=False,
     ):
         b, h, n, _ = query_spheres.shape
+        wp_device = wp.device_from_torch(query_spheres.device)
 
         if env_query_idx is None:
             wp.launch(
@@ -990,7 +997,8 @@ class SweptSdfMeshWarpPy(torch.autograd.Function):
                     sweep_steps,
                     enable_speed_metric,
                 ],
-                stream=wp.stream_from_torch(query_spheres.device),
+                device=wp_device,
+                stream=warp_stream_from_torch(query_spheres.device),
             )
         else:
             wp.launch(
@@ -1018,7 +1026,8 @@ class SweptSdfMeshWarpPy(torch.autograd.Function):
                     enable_speed_metric,
                     wp.from_torch(env_query_idx.view(-1), dtype=wp.int32),
                 ],
-                stream=wp.stream_from_torch(query_spheres.device),
+                device=wp_device,
+                stream=warp_stream_from_torch(query_spheres.device),
             )
         ctx.return_loss = return_loss
         ctx.save_for_backward(out_grad)
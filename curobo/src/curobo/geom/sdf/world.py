@@ -19,6 +19,7 @@ import torch
 
 # CuRobo
 from curobo.curobolib.geom import SdfSphereOBB, SdfSweptSphereOBB
+from curobo.geom.sdf.broad_phase import ObbBroadPhase
 from curobo.geom.types import Cuboid, Mesh, Obstacle, WorldConfig, batch_tensor_cube
 from curobo.types.base import TensorDeviceType
 from curobo.types.math import Pose
@@ -221,6 +222,7 @@ class CollisionCheckerType(Enum):
     PRIMITIVE = "PRIMITIVE"
     BLOX = "BLOX"
     MESH = "MESH"
+    ESDF = "ESDF"
 
 
 @dataclass
@@ -231,6 +233,22 @@ class WorldCollisionConfig:
     n_envs: int = 1
     checker_type: CollisionCheckerType = CollisionCheckerType.PRIMITIVE
     max_distance: float = 0.01
+    #: Cull obstacles with a uniform grid before checking spheres against oriented bounding boxes.
+    #: Useful for worlds with thousands of cuboids. Culling needs a host synchronization and is
+    #: skipped when queries are captured in a CUDA graph.
+    obb_broad_phase: bool = False
+    #: Edge length of grid cells used by :py:attr:`obb_broad_phase`, in meters.
+    obb_broad_phase_cell_size: float = 0.5
+    #: Edge length of voxels in meters, used by :py:attr:`CollisionCheckerType.ESDF`.
+    esdf_voxel_size: float = 0.02
+    #: Bounds of ESDF grid as [x_min, y_min, z_min, x_max, y_max, z_max]. Fit to obstacles when
+    #: None.
+    esdf_bounds: Optional[List[float]] = None
+    #: Distances outside obstacles are truncated at this value, should be larger than the largest
+    #: sphere radius plus activation distance.
+    esdf_truncation_distance: float = 0.3
+    #: Folder to cache baked ESDF grids, falls back to environment variable CUROBO_ESDF_CACHE.
+    esdf_cache_path: Optional[str] = None
 
     def __post_init__(self):
         if self.world_model is not None and isinstance(self.world_model, list):
@@ -261,6 +279,20 @@ class WorldCollision(WorldCollisionConfig):
         if config is not None:
             WorldCollisionConfig.__init__(self, **vars(config))
         self.collision_types = {}  # Use this dictionary to store collision types
+        self._world_fingerprint = 0
+
+    @property
+    def world_fingerprint(self) -> int:
+        """Counter that changes whenever obstacles are loaded, moved, enabled or disabled.
+
+        Results computed against the world (e.g., cached motion plans) are valid while this value
+        is unchanged. Call :meth:`update_world_fingerprint` after writing to collision tensors
+        directly.
+        """
+        return self._world_fingerprint
+
+    def update_world_fingerprint(self):
+        self._world_fingerprint += 1
 
     def load_collision_model(self, world_model: WorldConfig):
         raise NotImplementedError
@@ -353,6 +385,12 @@ class WorldPrimitiveCollision(WorldCollision):
         self._cube_tensor_list = None
         self._env_n_obbs = None
         self._env_obbs_names = None
+        self._env_obbs_name_idx = None
+        self._obb_broad_phase = None
+        if self.obb_broad_phase:
+            self._obb_broad_phase = ObbBroadPhase(
+                self.tensor_args, cell_size=self.obb_broad_phase_cell_size
+            )
         self._init_cache()
         if self.world_model is not None:
             if isinstance(self.world_model, list):
@@ -365,6 +403,7 @@ class WorldPrimitiveCollision(WorldCollision):
             self._create_obb_cache(self.cache["obb"])
 
     def load_collision_model(self, world_config: WorldConfig, env_idx=0):
+        self.update_world_fingerprint()
         self._load_collision_model_in_cache(world_config, env_idx)
 
     def load_batch_collision_model(self, world_config_list: List[WorldConfig]):
@@ -373,6 +412,7 @@ class WorldPrimitiveCollision(WorldCollision):
         Args:
             world_config_list: list of world configs to load from.
         """
+        self.update_world_fingerprint()
         # First find largest number of cuboid:
         c_len = []
         pose_batch = []
@@ -429,6 +469,7 @@ class WorldPrimitiveCollision(WorldCollision):
                 ]
                 self._cube_tensor_list[2][i, : c_len[i]] = 1
                 self._env_obbs_names[i][: c_len[i]] = names_batch[c_start : c_start + c_len[i]]
+                self._env_obbs_name_idx[i] = self._get_name_idx_map(self._env_obbs_names[i])
                 self._cube_tensor_list[2][i, c_len[i] :] = 0
                 c_start += c_len[i]
         self._env_n_obbs[:] = torch.as_tensor(
@@ -463,6 +504,7 @@ class WorldPrimitiveCollision(WorldCollision):
 
         self._env_n_obbs[env_idx] = max_obb
         self._env_obbs_names[env_idx][:max_obb] = names_batch
+        self._env_obbs_name_idx[env_idx] = self._get_name_idx_map(self._env_obbs_names[env_idx])
         self.collision_types["primitive"] = True
 
     def _create_obb_cache(self, obb_cache):
@@ -489,6 +531,7 @@ class WorldPrimitiveCollision(WorldCollision):
         self._cube_tensor_list = [box_dims, box_pose, obs_enable]
         self.collision_types["primitive"] = True
         self._env_obbs_names = [[None for _ in range(obb_cache)] for _ in range(self.n_envs)]
+        self._env_obbs_name_idx = [{} for _ in range(self.n_envs)]
 
     def add_obb_from_raw(
         self,
@@ -504,8 +547,9 @@ class WorldPrimitiveCollision(WorldCollision):
         position: x,y,z
         rotation: matrix (3x3)
         """
+        self.update_world_fingerprint()
         assert w_obj_pose is not None or obj_w_pose is not None
-        if name in self._env_obbs_names[env_idx]:
+        if name in self._env_obbs_name_idx[env_idx]:
             log_error("Obstacle already exists with name: " + name, exc_info=True)
         if w_obj_pose is not None:
             obj_w_pose = w_obj_pose.inverse()
@@ -517,7 +561,9 @@ class WorldPrimitiveCollision(WorldCollision):
         ] = obj_w_pose.get_pose_vector()
         self._cube_tensor_list[2][env_idx, self._env_n_obbs[env_idx]] = 1
         self._env_obbs_names[env_idx][self._env_n_obbs[env_idx]] = name
+        self._env_obbs_name_idx[env_idx] = self._get_name_idx_map(self._env_obbs_names[env_idx])
         self._env_n_obbs[env_idx] += 1
+        self._update_obb_broad_phase(env_idx, self._env_n_obbs[env_idx] - 1)
         return self._env_n_obbs[env_idx] - 1
 
     def add_obb(
@@ -546,6 +592,7 @@ class WorldPrimitiveCollision(WorldCollision):
             obj_idx (torch.Tensor or int):
 
         """
+        self.update_world_fingerprint()
         if env_obj_idx is not None:
             self._cube_tensor_list[0][env_obj_idx, :3] = obj_dims
         else:
@@ -553,6 +600,7 @@ class WorldPrimitiveCollision(WorldCollision):
             obs_idx = self.get_obb_idx(name, env_idx)
 
             self._cube_tensor_list[0][env_idx, obs_idx, :3] = obj_dims
+            self._update_obb_broad_phase(env_idx, obs_idx)
 
     def enable_obstacle(
         self,
@@ -576,6 +624,7 @@ class WorldPrimitiveCollision(WorldCollision):
             obj_idx (torch.Tensor or int):
 
         """
+        self.update_world_fingerprint()
         if env_obj_idx is not None:
             self._cube_tensor_list[2][env_obj_idx] = int(enable)  # enable == 1
         else:
@@ -583,6 +632,7 @@ class WorldPrimitiveCollision(WorldCollision):
             obs_idx = self.get_obb_idx(name, env_idx)
 
             self._cube_tensor_list[2][env_idx, obs_idx] = int(enable)
+            self._update_obb_broad_phase(env_idx, obs_idx)
 
     def update_obstacle_pose(
         self,
@@ -590,7 +640,7 @@ class WorldPrimitiveCollision(WorldCollision):
         w_obj_pose: Pose,
         env_idx: int = 0,
     ):
-        if self._env_obbs_names is not None and name in self._env_obbs_names[env_idx]:
+        if self._env_obbs_name_idx is not None and name in self._env_obbs_name_idx[env_idx]:
             self.update_obb_pose(name=name, w_obj_pose=w_obj_pose, env_idx=env_idx)
         else:
             log_error("obstacle not found in OBB world model: " + name)
@@ -609,12 +659,65 @@ class WorldPrimitiveCollision(WorldCollision):
         obj_w_pose: Pose
         obj_idx:
         """
+        self.update_world_fingerprint()
         obj_w_pose = self._get_obstacle_poses(w_obj_pose, obj_w_pose)
         if env_obj_idx is not None:
             self._cube_tensor_list[1][env_obj_idx, :7] = obj_w_pose.get_pose_vector()
         else:
             obs_idx = self.get_obb_idx(name, env_idx)
             self._cube_tensor_list[1][env_idx, obs_idx, :7] = obj_w_pose.get_pose_vector()
+            self._update_obb_broad_phase(env_idx, obs_idx)
+
+    def update_obb_pose_batch(
+        self,
+        env_idx: torch.Tensor,
+        obb_idx: torch.Tensor,
+        w_obj_pose: Optional[Pose] = None,
+        obj_w_pose: Optional[Pose] = None,
+    ):
+        """Update poses of many obbs across environments with a single scatter into the cache.
+
+        Cache tensors are written in place, so this can be called between replays of a CUDA graph.
+        Do not capture this call in a graph, the world fingerprint used by plan caches and broad
+        phase culling is only updated on host. Use :py:meth:`get_obb_idx_tensor` to get obb indices
+        from names once and reuse them across updates. If an obb is repeated, the pose written
+        is undefined.
+
+        Args:
+            env_idx: environment index of every obb, shape [n].
+            obb_idx: index of every obb in its environment, shape [n].
+            w_obj_pose: pose of obbs in world frame, batch size n.
+            obj_w_pose: inverse pose of obbs, used if w_obj_pose is None.
+        """
+        self.update_world_fingerprint()
+        obj_w_pose = self._get_obstacle_poses(w_obj_pose, obj_w_pose)
+        env_idx = env_idx.view(-1).long()
+        obb_idx = obb_idx.view(-1).long()
+        self._cube_tensor_list[1][env_idx, obb_idx, :7] = obj_w_pose.get_pose_vector().view(-1, 7)
+        self._update_obb_broad_phase(env_idx, obb_idx)
+
+    def enable_obb_batch(
+        self,
+        env_idx: torch.Tensor,
+        obb_idx: torch.Tensor,
+        enable: Union[bool, torch.Tensor] = True,
+    ):
+        """Enable or disable many obbs across environments with a single scatter into the cache.
+
+        Args:
+            env_idx: environment index of every obb, shape [n].
+            obb_idx: index of every obb in its environment, shape [n].
+            enable: enable flag for all obbs or a tensor with a flag per obb, shape [n].
+        """
+        self.update_world_fingerprint()
+        env_idx = env_idx.view(-1).long()
+        obb_idx = obb_idx.view(-1).long()
+        if isinstance(enable, torch.Tensor):
+            enable = enable.view(-1).to(dtype=self._cube_tensor_list[2].dtype)
+        else:
+            enable = int(enable)
+        self._cube_tensor_list[2][env_idx, obb_idx] = enable
+        self._update_obb_broad_phase(env_idx, obb_idx)
 
     @classmethod
     def _get_obstacle_poses(
@@ -630,14 +733,147 @@ class WorldPrimitiveCollision(WorldCollision):
             raise ValueError("Object pose is not given")
         return w_inv_pose
 
+    def _update_obb_broad_phase(
+        self, env_idx: Union[int, torch.Tensor], obb_idx: Union[int, torch.Tensor]
+    ):
+        """Update bounding boxes of obstacles in broad phase after they were changed in cache."""
+        if self._obb_broad_phase is None:
+            return
+        # changes made before this one were not seen by broad phase, e.g., a new world was loaded:
+        if self._obb_broad_phase.world_fingerprint != self.world_fingerprint - 1:
+            return
+        self._obb_broad_phase.update_aabbs(
+            self._cube_tensor_list, self._env_n_obbs, env_idx, obb_idx
+        )
+        self._obb_broad_phase.world_fingerprint = self.world_fingerprint
+
+    def _get_obb_query_tensors(
+        self,
+        query_sphere: torch.Tensor,
+        activation_distance: torch.Tensor,
+        env_query_idx: Optional[torch.Tensor] = None,
+        swept: bool = False,
+    ):
+        """Get obstacle tensors to check query spheres against.
+
+        When :py:attr:`WorldCollisionConfig.obb_broad_phase` is enabled, obstacles that are not
+        near any sphere of a batch are culled and the remaining candidates of every batch are
+        gathered into a compact buffer that is indexed by batch.
+
+        Returns:
+            obb dims, obb inverse poses, obb enable flags, number of obbs per environment,
+            environment index of every batch, obb buffer size and use_batch_env.
+        """
+        use_batch_env = True
+        if env_query_idx is None:
+            use_batch_env = False
+            env_query_idx = self._env_n_obbs
+        obb_tensors = (
+            self._cube_tensor_list[0],
+            self._cube_tensor_list[1],
+            self._cube_tensor_list[2],
+            self._env_n_obbs,
+            env_query_idx,
+            self._cube_tensor_list[0].shape[1],
+            use_batch_env,
+        )
+        if self._obb_broad_phase is None or (
+            query_sphere.is_cuda and torch.cuda.is_current_stream_capturing()
+        ):
+            return obb_tensors
+        broad_phase = self._obb_broad_phase
+        if broad_phase.world_fingerprint != self.world_fingerprint:
+            broad_phase.update_aabbs(self._cube_tensor_list, self._env_n_obbs)
+            broad_phase.world_fingerprint = self.world_fingerprint
+
+        b = query_sphere.shape[0]
+        spheres = query_sphere.detach().view(b, query_sphere.shape[1], -1, 4)
+        low = high = spheres[..., :3]
+        if swept:
+            # swept spheres are checked along segments to neighboring timesteps:
+            previous = torch.cat((spheres[:, :1, :, :3], spheres[:, :-1, :, :3]), dim=1)
+            following = torch.cat((spheres[:, 1:, :, :3], spheres[:, -1:, :, :3]), dim=1)
+            low = torch.minimum(torch.minimum(previous, following), low)
+            high = torch.maximum(torch.maximum(previous, following), high)
+        margin = spheres[..., 3:] + activation_distance.view(-1)[0]
+        query_aabb = torch.cat((low - margin, high + margin), dim=-1).view(b, -1, 6)
+        query_valid = spheres[..., 3].view(b, -1) > 0.0
+        if use_batch_env:
+            batch_env_idx = env_query_idx.view(-1).long()
+        else:
+            batch_env_idx = torch.zeros(b, device=query_sphere.device, dtype=torch.long)
+        candidates = broad_phase.get_candidates(query_aabb, batch_env_idx, query_valid)
+
+        # move candidates of every batch to the front, keeping obstacle order:
+        n_candidates = max(int(torch.max(torch.sum(candidates, dim=-1))), 1)
+        order = torch.argsort((~candidates).to(dtype=torch.uint8), dim=-1, stable=True)
+        order = order[:, :n_candidates]
+        batch_env_idx = batch_env_idx.view(-1, 1)
+        return (
+            self._cube_tensor_list[0][batch_env_idx, order],
+            self._cube_tensor_list[1][batch_env_idx, order],
+            torch.gather(candidates, 1, order).to(dtype=self._cube_tensor_list[2].dtype),
+            torch.full(
+                (b,), n_candidates, device=query_sphere.device, dtype=self._env_n_obbs.dtype
+            ),
+            torch.arange(b, device=query_sphere.device, dtype=torch.int32),
+            n_candidates,
+            True,
+        )
+
     def get_obb_idx(
         self,
         name: str,
         env_idx: int = 0,
     ) -> int:
-        if name not in self._env_obbs_names[env_idx]:
+        if name not in self._env_obbs_name_idx[env_idx]:
             log_error("Obstacle with name: " + name + " not found in current world", exc_info=True)
-        return self._env_obbs_names[env_idx].index(name)
+        return self._env_obbs_name_idx[env_idx][name]
+
+    def get_obb_idx_tensor(
+        self,
+        names: List[str],
+        env_idx: Union[int, List[int]] = 0,
+    ) -> torch.Tensor:
+        """Get cache index of obbs as a tensor, to use with :py:meth:`update_obb_pose_batch` and
+        :py:meth:`enable_obb_batch`.
+
+        Args:
+            names: names of obbs.
+            env_idx: environment index of every obb, a single index is used for all obbs.
+
+        Returns:
+            Index of obbs in their environment, shape [len(names)].
+        """
+        return self._get_idx_tensor(self._env_obbs_name_idx, names, env_idx)
+
+    def _get_idx_tensor(
+        self,
+        env_name_idx: List[Dict[str, int]],
+        names: List[str],
+        env_idx: Union[int, List[int]] = 0,
+    ) -> torch.Tensor:
+        if isinstance(env_idx, int):
+            env_idx = [env_idx for _ in range(len(names))]
+        if len(env_idx) != len(names):
+            log_error("env_idx should have one index per obstacle name")
+        idx_list = []
+        for name, e in zip(names, env_idx):
+            if name not in env_name_idx[e]:
+                log_error(
+                    "Obstacle with name: " + name + " not found in current world", exc_info=True
+                )
+            idx_list.append(env_name_idx[e][name])
+        return torch.as_tensor(idx_list, device=self.tensor_args.device, dtype=torch.long)
+
+    @staticmethod
+    def _get_name_idx_map(names: List[Optional[str]]) -> Dict[str, int]:
+        # first index of a name wins, same as list.index:
+        name_idx = {}
+        for i, name in enumerate(names):
+            if name is not None and name not in name_idx:
+                name_idx[name] = i
+        return name_idx
 
     def get_sphere_distance(
         self,
@@ -652,10 +888,17 @@ class WorldPrimitiveCollision(WorldCollision):
             raise ValueError("Primitive Collision has no obstacles")
 
         b, h, n, _ = query_sphere.shape  # This can be read from collision query buffer
-        use_batch_env = True
-        if env_query_idx is None:
-            use_batch_env = False
-            env_query_idx = self._env_n_obbs
+        (
+            obb_dims,
+            obb_pose,
+            obb_enable,
+            n_env_obbs,
+            env_query_idx,
+            max_nobs,
+            use_batch_env,
+        ) = self._get_obb_query_tensors(
+            query_sphere, activation_distance, env_query_idx, swept=False
+        )
 
         dist = SdfSphereOBB.apply(
             query_sphere,
@@ -664,13 +907,13 @@ class WorldPrimitiveCollision(WorldCollision):
             collision_query_buffer.primitive_collision_buffer.sparsity_index_buffer,
             weight,
             activation_distance,
-            self._cube_tensor_list[0],
-            self._cube_tensor_list[0],
-            self._cube_tensor_list[1],
-            self._cube_tensor_list[2],
-            self._env_n_obbs,
+            obb_dims,
+            obb_dims,
+            obb_pose,
+            obb_enable,
+            n_env_obbs,
             env_query_idx,
-            self._cube_tensor_list[0].shape[1],
+            max_nobs,
             b,
             h,
             n,
@@ -696,10 +939,17 @@ class WorldPrimitiveCollision(WorldCollision):
         if return_loss:
             raise ValueError("cannot return loss for classification, use get_sphere_distance")
         b, h, n, _ = query_sphere.shape
-        use_batch_env = True
-        if env_query_idx is None:
-            use_batch_env = False
-            env_query_idx = self._env_n_obbs
+        (
+            obb_dims,
+            obb_pose,
+            obb_enable,
+            n_env_obbs,
+            env_query_idx,
+            max_nobs,
+            use_batch_env,
+        ) = self._get_obb_query_tensors(
+            query_sphere, activation_distance, env_query_idx, swept=False
+        )
 
         dist = SdfSphereOBB.apply(
             query_sphere,
@@ -708,13 +958,13 @@ class WorldPrimitiveCollision(WorldCollision):
             collision_query_buffer.primitive_collision_buffer.sparsity_index_buffer,
             weight,
             activation_distance,
-            self._cube_tensor_list[0],
-            self._cube_tensor_list[0],
-            self._cube_tensor_list[1],
-            self._cube_tensor_list[2],
-            self._env_n_obbs,
+            obb_dims,
+            obb_dims,
+            obb_pose,
+            obb_enable,
+            n_env_obbs,
             env_query_idx,
-            self._cube_tensor_list[0].shape[1],
+            max_nobs,
             b,
             h,
             n,
@@ -746,10 +996,17 @@ class WorldPrimitiveCollision(WorldCollision):
             raise ValueError("Primitive Collision has no obstacles")
 
         b, h, n, _ = query_sphere.shape
-        use_batch_env = True
-        if env_query_idx is None:
-            use_batch_env = False
-            env_query_idx = self._env_n_obbs
+        (
+            obb_dims,
+            obb_pose,
+            obb_enable,
+            n_env_obbs,
+            env_query_idx,
+            max_nobs,
+            use_batch_env,
+        ) = self._get_obb_query_tensors(
+            query_sphere, activation_distance, env_query_idx, swept=True
+        )
 
         dist = SdfSweptSphereOBB.apply(
             query_sphere,
@@ -759,13 +1016,13 @@ class WorldPrimitiveCollision(WorldCollision):
             weight,
             activation_distance,
             speed_dt,
-            self._cube_tensor_list[0],
-            self._cube_tensor_list[0],
-            self._cube_tensor_list[1],
-            self._cube_tensor_list[2],
-            self._env_n_obbs,
+            obb_dims,
+            obb_dims,
+            obb_pose,
+            obb_enable,
+            n_env_obbs,
             env_query_idx,
-            self._cube_tensor_list[0].shape[1],
+            max_nobs,
             b,
             h,
             n,
@@ -802,10 +1059,17 @@ class WorldPrimitiveCollision(WorldCollision):
             raise ValueError("cannot return loss for classify, use get_swept_sphere_distance")
         b, h, n, _ = query_sphere.shape
 
-        use_batch_env = True
-        if env_query_idx is None:
-            use_batch_env = False
-            env_query_idx = self._env_n_obbs
+        (
+            obb_dims,
+            obb_pose,
+            obb_enable,
+            n_env_obbs,
+            env_query_idx,
+            max_nobs,
+            use_batch_env,
+        ) = self._get_obb_query_tensors(
+            query_sphere, activation_distance, env_query_idx, swept=True
+        )
         dist = SdfSweptSphereOBB.apply(
             query_sphere,
             collision_query_buffer.primitive_collision_buffer.distance_buffer,
@@ -814,13 +1078,13 @@ class WorldPrimitiveCollision(WorldCollision):
             weight,
             activation_distance,
             speed_dt,
-            self._cube_tensor_list[0],
-            self._cube_tensor_list[0],
-            self._cube_tensor_list[1],
-            self._cube_tensor_list[2],
-            self._env_n_obbs,
+            obb_dims,
+            obb_dims,
+            obb_pose,
+            obb_enable,
+            n_env_obbs,
             env_query_idx,
-            self._cube_tensor_list[0].shape[1],
+            max_nobs,
             b,
             h,
             n,
@@ -835,6 +1099,7 @@ class WorldPrimitiveCollision(WorldCollision):
         return dist
 
     def clear_cache(self):
+        self.update_world_fingerprint()
         pass
 
     def get_voxels_in_bounding_box(
@@ -56,6 +56,7 @@ class WorldBloxCollision(WorldMeshCollision):
         super().__init__(config)
 
     def load_collision_model(self, world_model: WorldConfig):
+        self.update_world_fingerprint()
         # load nvblox mesh
         if len(world_model.blox) > 0:
             # check if there is a mapper instance:
@@ -112,10 +113,12 @@ class WorldBloxCollision(WorldMeshCollision):
         return super().load_collision_model(world_model)
 
     def clear_cache(self):
+        self.update_world_fingerprint()
         self._blox_mapper.clear()
         super().clear_cache()
 
     def clear_blox_layer(self, layer_name: str):
+        self.update_world_fingerprint()
         index = self._blox_names.index(layer_name)
         self._blox_mapper.clear(index)
 
@@ -364,6 +367,7 @@ class WorldBloxCollision(WorldMeshCollision):
             super().enable_obstacle(name, enable, env_idx)
 
     def enable_blox(self, enable: bool = True, name: Optional[str] = None):
+        self.update_world_fingerprint()
         index = self._blox_names.index(name)
         self._blox_tensor_list[1][index] = int(enable)
 
@@ -373,6 +377,7 @@ class WorldBloxCollision(WorldMeshCollision):
         obj_w_pose: Optional[Pose] = None,
         name: Optional[str] = None,
     ):
+        self.update_world_fingerprint()
         obj_w_pose = self._get_obstacle_poses(w_obj_pose, obj_w_pose)
         index = self._blox_names.index(name)
         self._blox_tensor_list[0][index][:7] = obj_w_pose.get_pose_vector()
@@ -409,6 +414,7 @@ class WorldBloxCollision(WorldMeshCollision):
 
     @profiler.record_function("world_blox/add_camera_frame")
     def add_camera_frame(self, camera_observation: CameraObservation, layer_name: str):
+        self.update_world_fingerprint()
         index = self._blox_names.index(layer_name)
         pose_mat = camera_observation.pose.get_matrix().view(4, 4)
         if camera_observation.rgb_image is not None:
@@ -436,10 +442,12 @@ class WorldBloxCollision(WorldMeshCollision):
 
     @profiler.record_function("world_blox/update_hashes")
     def update_blox_hashes(self):
+        self.update_world_fingerprint()
         self._blox_mapper.update_hashmaps()
 
     @profiler.record_function("world_blox/update_esdf")
     def update_blox_esdf(self, layer_name: Optional[str] = None):
+        self.update_world_fingerprint()
         index = -1
         if layer_name is not None:
             index = self._blox_names.index(layer_name)
@@ -474,5 +482,6 @@ class WorldBloxCollision(WorldMeshCollision):
         return mesh
 
     def decay_layer(self, layer_name: str):
+        self.update_world_fingerprint()
         index = self._blox_names.index(layer_name)
         self._blox_mapper.decay_occupancy(mapper_id=index)
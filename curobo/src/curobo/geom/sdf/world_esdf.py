@@ -0,0 +1,658 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""World collision checker that bakes static obstacles into a voxel grid of signed distances.
+
+:py:class:`WorldEsdfCollision` computes a Euclidean signed distance field (ESDF) of all obstacles
+in a :py:class:`~curobo.geom.types.WorldConfig` once, and answers sphere queries with trilinear
+interpolation (:py:func:`~curobo.geom.sdf.sdf_grid.trilinear_lookup_distance`). Query cost does
+not depend on the number or complexity of obstacles. Obstacles cannot be moved after baking, use
+this checker for static worlds.
+
+Distances are positive outside obstacles and are truncated at
+:py:attr:`~curobo.geom.sdf.world.WorldCollisionConfig.esdf_truncation_distance`, which should be
+larger than the largest sphere radius plus activation distance. Every obstacle only updates
+voxels within the truncation distance of its bounding box. Baked grids are cached on disk when
+``esdf_cache_path`` or environment variable ``CUROBO_ESDF_CACHE`` is set. Files are named by a
+hash of obstacle geometry and grid parameters.
+"""
+
+# Standard Library
+import math
+import os
+from typing import List, Optional
+
+# Third Party
+import numpy as np
+import torch
+import warp as wp
+
+# CuRobo
+from curobo.curobolib.geom_cpu import _scale_speed_metric
+from curobo.geom.sdf.sdf_grid import trilinear_lookup_distance
+from curobo.geom.sdf.world import CollisionQueryBuffer, WorldCollision, WorldCollisionConfig
+from curobo.geom.transform import torch_quaternion_to_matrix
+from curobo.geom.types import (
+    BloxMap,
+    Capsule,
+    Cuboid,
+    Cylinder,
+    Mesh,
+    Obstacle,
+    Sphere,
+    WorldConfig,
+)
+from curobo.types.base import TensorDeviceType
+from curobo.util.helpers import get_data_hash
+from curobo.util.logger import log_error, log_info, log_warn
+from curobo.util.warp import init_warp, warp_stream_from_torch
+from curobo.util_file import join_path
+
+#: Increment when baked grids change for the same world and grid parameters.
+ESDF_CACHE_VERSION = 1
+
+#: Environment variable to enable the cache for all ESDF worlds without a cache folder.
+ESDF_CACHE_ENV = "CUROBO_ESDF_CACHE"
+
+_NON_GEOMETRIC_FIELDS = ["name", "color", "texture_id", "texture", "material", "tensor_args"]
+
+# number of voxels to evaluate per obstacle batch when baking:
+_MAX_BLOCK_VOXELS = 2**22
+
+
+@wp.kernel
+def get_mesh_signed_distance(
+    pt: wp.array(dtype=wp.vec3),
+    mesh: wp.uint64,
+    max_dist: wp.float32,
+    distance: wp.array(dtype=wp.float32),
+):
+    # points are in mesh frame, distance is positive outside mesh:
+    tid = wp.tid()
+    sign = float(0.0)
+    face_index = int(0)
+    face_u = float(0.0)
+    face_v = float(0.0)
+    local_pt = pt[tid]
+    if wp.mesh_query_point(mesh, local_pt, max_dist, sign, face_index, face_u, face_v):
+        cl_pt = wp.mesh_eval_position(mesh, face_index, face_u, face_v)
+        distance[tid] = sign * wp.length(cl_pt - local_pt)
+
+
+class EsdfSphereDistance(torch.autograd.Function):
+    """Returns cost computed from the ESDF, gradient w.r.t. spheres is precomputed in forward."""
+
+    @staticmethod
+    def forward(
+        ctx,
+        query_sphere: torch.Tensor,
+        distance: torch.Tensor,
+        grad_distance: torch.Tensor,
+        return_loss: bool,
+    ):
+        ctx.return_loss = return_loss
+        ctx.save_for_backward(grad_distance)
+        return distance
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        grad_pt = None
+        if ctx.needs_input_grad[0]:
+            (grad_pt,) = ctx.saved_tensors
+            if ctx.return_loss:
+                grad_pt = grad_pt * grad_output.unsqueeze(-1)
+        return grad_pt, None, None, None
+
+
+def get_esdf_cache_path(cache_path: Optional[str] = None) -> Optional[str]:
+    """Get cache folder, falls back to environment variable ``CUROBO_ESDF_CACHE``.
+
+    Returns:
+        cache folder, None if caching is disabled.
+    """
+    if cache_path is None:
+        cache_path = os.environ.get(ESDF_CACHE_ENV, None)
+    if cache_path == "":
+        cache_path = None
+    return cache_path
+
+
+def get_obstacle_geometry(obstacle: Obstacle):
+    """Get data that defines geometry of an obstacle, used to compute cache keys."""
+    data = {k: v for k, v in vars(obstacle).items() if k not in _NON_GEOMETRIC_FIELDS}
+    data["type"] = type(obstacle).__name__
+    if isinstance(obstacle, Mesh) and obstacle.file_path is not None:
+        # mesh files can change without changing the obstacle:
+        with open(obstacle.file_path, "rb") as f:
+            data["file_data"] = np.frombuffer(f.read(), dtype=np.uint8)
+    return data
+
+
+def get_esdf_cache_key(
+    world: WorldConfig,
+    grid_bounds: torch.Tensor,
+    voxel_size: float,
+    truncation_distance: float,
+    dtype: torch.dtype,
+) -> str:
+    """Compute cache key of a baked world from its obstacles and grid parameters."""
+    return get_data_hash(
+        [
+            ESDF_CACHE_VERSION,
+            [get_obstacle_geometry(x) for x in world.objects],
+            grid_bounds,
+            voxel_size,
+            truncation_distance,
+            str(dtype),
+        ]
+    )
+
+
+def _get_local_bounds(obstacle: Obstacle) -> np.ndarray:
+    """Axis aligned bounding box of obstacle in its own frame as [2, 3] (min, max)."""
+    if isinstance(obstacle, Cuboid):
+        half_dims = np.asarray(obstacle.dims, dtype=np.float64) / 2
+        return np.stack((-half_dims, half_dims))
+    if isinstance(obstacle, Sphere):
+        return np.asarray([[-obstacle.radius] * 3, [obstacle.radius] * 3], dtype=np.float64)
+    if isinstance(obstacle, Cylinder):
+        extent = [obstacle.radius, obstacle.radius, obstacle.height / 2]
+        return np.asarray([[-x for x in extent], extent], dtype=np.float64)
+    if isinstance(obstacle, Capsule):
+        points = np.asarray([obstacle.base, obstacle.tip], dtype=np.float64)
+        return np.stack(
+            (np.min(points, axis=0) - obstacle.radius, np.max(points, axis=0) + obstacle.radius)
+        )
+    verts, _ = obstacle.get_mesh_data()
+    verts = np.asarray(verts, dtype=np.float64)
+    return np.stack((np.min(verts, axis=0), np.max(verts, axis=0)))
+
+
+def _get_obstacle_pose(obstacle: Obstacle, tensor_args: TensorDeviceType):
+    pose = obstacle.pose if obstacle.pose is not None else [0, 0, 0, 1, 0, 0, 0]
+    pose = tensor_args.to_device(pose)
+    return pose[:3], torch_quaternion_to_matrix(pose[3:7])
+
+
+def get_obstacle_aabb(obstacle: Obstacle, tensor_args: TensorDeviceType) -> torch.Tensor:
+    """Axis aligned bounding box of obstacle in world frame as [2, 3] (min, max)."""
+    bounds = tensor_args.to_device(_get_local_bounds(obstacle))
+    corners = torch.stack(
+        [torch.stack([bounds[(i >> (2 - k)) & 1, k] for k in range(3)]) for i in range(8)]
+    )
+    position, rotation = _get_obstacle_pose(obstacle, tensor_args)
+    corners = corners @ rotation.transpose(0, 1) + position
+    return torch.stack((torch.amin(corners, dim=0), torch.amax(corners, dim=0)))
+
+
+def get_primitive_signed_distance(obstacle: Obstacle, local_pt: torch.Tensor) -> torch.Tensor:
+    """Signed distance of points in obstacle frame to a primitive, positive outside."""
+    if isinstance(obstacle, Cuboid):
+        q = torch.abs(local_pt) - local_pt.new_tensor(obstacle.dims) / 2
+        outside = torch.norm(torch.clamp(q, min=0.0), dim=-1)
+        return outside + torch.clamp(torch.amax(q, dim=-1), max=0.0)
+    if isinstance(obstacle, Sphere):
+        return torch.norm(local_pt, dim=-1) - obstacle.radius
+    if isinstance(obstacle, Cylinder):
+        q = torch.stack(
+            (
+                torch.norm(local_pt[..., :2], dim=-1) - obstacle.radius,
+                torch.abs(local_pt[..., 2]) - obstacle.height / 2,
+            ),
+            dim=-1,
+        )
+        outside = torch.norm(torch.clamp(q, min=0.0), dim=-1)
+        return outside + torch.clamp(torch.amax(q, dim=-1), max=0.0)
+    if isinstance(obstacle, Capsule):
+        base = local_pt.new_tensor(obstacle.base)
+        axis = local_pt.new_tensor(obstacle.tip) - base
+        t = torch.sum((local_pt - base) * axis, dim=-1) / torch.clamp(
+            torch.sum(axis * axis), min=1e-12
+        )
+        t = torch.clamp(t, 0.0, 1.0).unsqueeze(-1)
+        return torch.norm(local_pt - base - t * axis, dim=-1) - obstacle.radius
+    log_error("Obstacle type not supported in ESDF: " + type(obstacle).__name__)
+
+
+class WorldEsdfCollision(WorldCollision):
+    """Collision checker for static worlds baked into a dense voxel grid of signed distances.
+
+    All obstacle types except :py:class:`~curobo.geom.types.BloxMap` are supported. Grid bounds
+    are read from :py:attr:`WorldCollisionConfig.esdf_bounds` or fit to the obstacles of all
+    environments, padded by the truncation distance. When bounds are fit and a world loaded later
+    does not fit in the grid, the grid is refit to all loaded worlds and they are baked again.
+    Spheres outside the grid read distances at the grid boundary. Results are written to the
+    primitive buffers of :py:class:`~curobo.geom.sdf.world.CollisionQueryBuffer`.
+    """
+
+    def __init__(self, config: WorldCollisionConfig):
+        super().__init__(config)
+        self._esdf = None
+        self._grid_bounds = None
+        self._grid_origin = None
+        self._env_world_models = None
+        self._wp_device = None
+        if self.world_model is not None:
+            if isinstance(self.world_model, list):
+                self.load_batch_collision_model(self.world_model)
+            else:
+                self.load_collision_model(self.world_model)
+
+    def load_collision_model(self, world_config: WorldConfig, env_idx: int = 0):
+        self.update_world_fingerprint()
+        if self._esdf is None or (self.esdf_bounds is None and self.n_envs == 1):
+            self._create_esdf_cache(self._get_grid_bounds([world_config]))
+        elif self.esdf_bounds is None and not self._is_in_grid(world_config):
+            log_warn("World does not fit in ESDF grid, refitting grid of all environments")
+            world_models = self._env_world_models
+            world_models[env_idx] = world_config
+            self._create_esdf_cache(
+                self._get_grid_bounds([x for x in world_models if x is not None])
+            )
+            self._env_world_models = world_models
+            for i, x in enumerate(world_models):
+                if x is not None and i != env_idx:
+                    self._esdf[i] = self._get_esdf(x)
+        self._esdf[env_idx] = self._get_esdf(world_config)
+        self._env_world_models[env_idx] = world_config
+        self.world_model = world_config
+        self.collision_types["primitive"] = True
+
+    def load_batch_collision_model(self, world_config_list: List[WorldConfig]):
+        """Bake a batch of collision environments into a grid with shared bounds.
+
+        Args:
+            world_config_list: list of world configs to load from.
+        """
+        self.update_world_fingerprint()
+        self.n_envs = len(world_config_list)
+        self._create_esdf_cache(self._get_grid_bounds(world_config_list))
+        for env_idx, world_config in enumerate(world_config_list):
+            self._esdf[env_idx] = self._get_esdf(world_config)
+            self._env_world_models[env_idx] = world_config
+        self.collision_types["primitive"] = True
+
+    def _get_obstacle_bounds(self, world_config_list: List[WorldConfig]) -> Optional[torch.Tensor]:
+        """Bounding box of all obstacles as [2, 3] (min, max), None if there are no obstacles."""
+        aabbs = [
+            get_obstacle_aabb(x, self.tensor_args)
+            for world_config in world_config_list
+            for x in world_config.objects
+            if not isinstance(x, BloxMap)
+        ]
+        if len(aabbs) == 0:
+            return None
+        aabbs = torch.stack(aabbs)
+        return torch.stack((torch.amin(aabbs[:, 0], dim=0), torch.amax(aabbs[:, 1], dim=0)))
+
+    def _is_in_grid(self, world_config: WorldConfig) -> bool:
+        """Check if obstacles of world, padded by truncation distance, are inside grid bounds."""
+        bounds = self._get_obstacle_bounds([world_config])
+        if bounds is None:
+            return True
+        return bool(
+            torch.all(bounds[0] - self.esdf_truncation_distance >= self._grid_bounds[0])
+            and torch.all(bounds[1] + self.esdf_truncation_distance <= self._grid_bounds[1])
+        )
+
+    def _get_grid_bounds(self, world_config_list: List[WorldConfig]) -> torch.Tensor:
+        if self.esdf_bounds is not None:
+            return self.tensor_args.to_device(self.esdf_bounds).view(2, 3)
+        bounds = self._get_obstacle_bounds(world_config_list)
+        if bounds is None:
+            bounds = torch.zeros((2, 3), **vars(self.tensor_args))
+        bounds[0] -= self.esdf_truncation_distance
+        bounds[1] += self.esdf_truncation_distance
+        return bounds
+
+    def _create_esdf_cache(self, grid_bounds: torch.Tensor):
+        num_voxels = [
+            max(1, math.ceil(float(x) / self.esdf_voxel_size))
+            for x in (grid_bounds[1] - grid_bounds[0])
+        ]
+        shape = [self.n_envs] + num_voxels
+        self._env_world_models = [None for _ in range(self.n_envs)]
+        if self._esdf is not None and list(self._esdf.shape) == shape:
+            # reuse buffers as cuda graphs hold pointers to them:
+            self._grid_bounds.copy_(grid_bounds)
+            self._grid_origin.copy_(grid_bounds[0] + 0.5 * self.esdf_voxel_size)
+            self._esdf[:] = self.esdf_truncation_distance
+            return
+        if self._esdf is not None:
+            log_warn(
+                "ESDF grid shape changed from "
+                + str(list(self._esdf.shape))
+                + " to "
+                + str(shape)
+                + ", reloading collision buffers (breaks CG)"
+            )
+        log_info("Creating ESDF cache with voxels: " + str(num_voxels))
+        self._grid_bounds = grid_bounds.clone()
+        self._grid_origin = grid_bounds[0] + 0.5 * self.esdf_voxel_size
+        self._esdf = torch.full(shape, self.esdf_truncation_distance, **vars(self.tensor_args))
+
+    def _get_esdf(self, world_config: WorldConfig) -> torch.Tensor:
+        """Load ESDF of world from disk cache or bake it."""
+        cache_path = get_esdf_cache_path(self.esdf_cache_path)
+        if cache_path is None:
+            return self._bake_esdf(world_config)
+        key = get_esdf_cache_key(
+            world_config,
+            self._grid_bounds,
+            self.esdf_voxel_size,
+            self.esdf_truncation_distance,
+            self.tensor_args.dtype,
+        )
+        file_path = join_path(cache_path, key + ".pt")
+        if os.path.isfile(file_path):
+            try:
+                esdf = torch.load(file_path, map_location=self.tensor_args.device)
+                log_info("Loaded ESDF from cache " + file_path)
+                return esdf
+            except Exception as e:
+                log_warn("Failed to read ESDF cache " + file_path + ": " + str(e))
+        esdf = self._bake_esdf(world_config)
+        # write to a temporary path and rename, so that other processes never read partial files:
+        os.makedirs(cache_path, exist_ok=True)
+        tmp_path = file_path + "." + str(os.getpid()) + ".tmp"
+        try:
+            torch.save(esdf.cpu(), tmp_path)
+            os.replace(tmp_path, file_path)
+        except OSError as e:
+            log_warn("Failed to write ESDF cache " + file_path + ": " + str(e))
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return esdf
+
+    def _bake_esdf(self, world_config: WorldConfig) -> torch.Tensor:
+        """Compute signed distance at voxel centers as the minimum across obstacles."""
+        esdf = torch.full(
+            self._esdf.shape[1:], self.esdf_truncation_distance, **vars(self.tensor_args)
+        )
+        num_voxels = torch.as_tensor(esdf.shape, device=self.tensor_args.device)
+        voxel_size = self.esdf_voxel_size
+        for obstacle in world_config.objects:
+            if isinstance(obstacle, BloxMap):
+                log_warn("BloxMap cannot be baked into ESDF, ignoring " + obstacle.name)
+                continue
+            # voxels within truncation distance of obstacle bounds:
+            aabb = get_obstacle_aabb(obstacle, self.tensor_args)
+            if torch.any(aabb[1] < self._grid_bounds[0]) or torch.any(
+                aabb[0] > self._grid_bounds[1]
+            ):
+                log_warn(
+                    "Obstacle " + str(obstacle.name) + " is outside ESDF grid bounds, it will be"
+                    + " ignored in collision queries"
+                )
+            elif torch.any(aabb[0] < self._grid_bounds[0]) or torch.any(
+                aabb[1] > self._grid_bounds[1]
+            ):
+                log_warn(
+                    "Obstacle " + str(obstacle.name) + " is partly outside ESDF grid bounds, it"
+                    + " will be clipped in collision queries"
+                )
+            low = torch.floor(
+                (aabb[0] - self.esdf_truncation_distance - self._grid_origin) / voxel_size
+            )
+            high = torch.ceil(
+                (aabb[1] + self.esdf_truncation_distance - self._grid_origin) / voxel_size
+            )
+            low = torch.clamp(low.long(), min=0)
+            high = torch.minimum(high.long(), num_voxels - 1)
+            if torch.any(high < low):
+                continue
+            low, high = low.tolist(), high.tolist()
+            block_idx = torch.meshgrid(
+                *[torch.arange(low[i], high[i] + 1, device=esdf.device) for i in range(3)],
+                indexing="ij",
+            )
+            block_pt = torch.stack(block_idx, dim=-1).to(dtype=esdf.dtype)
+            block_pt = self._grid_origin + voxel_size * block_pt
+            position, rotation = _get_obstacle_pose(obstacle, self.tensor_args)
+            local_pt = ((block_pt - position) @ rotation).view(-1, 3)
+            if isinstance(obstacle, Mesh):
+                distance = self._get_mesh_signed_distance(obstacle, local_pt)
+            else:
+                distance = torch.cat(
+                    [
+                        get_primitive_signed_distance(obstacle, x)
+                        for x in torch.split(local_pt, _MAX_BLOCK_VOXELS)
+                    ]
+                )
+            block = esdf[low[0] : high[0] + 1, low[1] : high[1] + 1, low[2] : high[2] + 1]
+            torch.minimum(block, distance.view(block.shape), out=block)
+        return esdf
+
+    def _get_mesh_signed_distance(self, mesh: Mesh, local_pt: torch.Tensor) -> torch.Tensor:
+        if self._wp_device is None:
+            init_warp(tensor_args=self.tensor_args)
+            self._wp_device = wp.device_from_torch(self.tensor_args.device)
+        verts, faces = mesh.get_mesh_data()
+        wp_mesh = wp.Mesh(
+            points=wp.array(verts, dtype=wp.vec3, device=self._wp_device),
+            indices=wp.array(np.ravel(faces), dtype=int, device=self._wp_device),
+        )
+        local_pt = local_pt.to(dtype=torch.float32).contiguous()
+        # points are inside the padded bounding box, so their surface distance is bounded:
+        max_dist = float(torch.max(torch.norm(local_pt, dim=-1))) + float(
+            np.max(np.linalg.norm(np.asarray(verts, dtype=np.float64), axis=-1))
+        )
+        distance = torch.full(
+            (local_pt.shape[0],),
+            self.esdf_truncation_distance,
+            device=local_pt.device,
+            dtype=torch.float32,
+        )
+        wp.launch(
+            kernel=get_mesh_signed_distance,
+            dim=local_pt.shape[0],
+            inputs=[
+                wp.from_torch(local_pt.view(-1, 3), dtype=wp.vec3),
+                wp_mesh.id,
+                max_dist,
+                wp.from_torch(distance),
+            ],
+            device=self._wp_device,
+            stream=warp_stream_from_torch(local_pt.device),
+        )
+        return distance.to(dtype=self.tensor_args.dtype)
+
+    def _get_sphere_cost(
+        self,
+        spheres: torch.Tensor,
+        eta: torch.Tensor,
+        env_query_idx: Optional[torch.Tensor],
+    ):
+        """Cost and its gradient for spheres of shape [b, h, n, 4], same as primitive kernels.
+
+        Activation distance ``eta`` is a device tensor and is not read on host, so that queries
+        can be captured in CUDA graphs and follow in place updates of the activation distance.
+        """
+        env_idx = None
+        if env_query_idx is not None:
+            env_idx = env_query_idx.view(-1, 1, 1).expand(spheres.shape[:-1])
+        distance, distance_grad = trilinear_lookup_distance(
+            spheres[..., :3], self._esdf, self._grid_origin, self.esdf_voxel_size, env_idx
+        )
+        penetration = spheres[..., 3] + eta - distance
+        hit = (spheres[..., 3] > 0.0) & (penetration > 0.0)
+        # with eta = 0, all hits are in the linear region:
+        linear = penetration > eta
+        inv_eta = 1.0 / torch.clamp(eta, min=1e-12)
+        cost = torch.where(linear, penetration - 0.5 * eta, (0.5 * inv_eta) * penetration**2)
+        grad_scale = torch.where(linear, 1.0, penetration * inv_eta)
+        grad = -distance_grad * grad_scale.unsqueeze(-1)
+        return torch.where(hit, cost, 0.0), torch.where(hit.unsqueeze(-1), grad, 0.0)
+
+    def _get_swept_sphere_cost(
+        self,
+        spheres: torch.Tensor,
+        eta: torch.Tensor,
+        dt: torch.Tensor,
+        sweep_steps: int,
+        enable_speed_metric: bool,
+        env_query_idx: Optional[torch.Tensor],
+    ):
+        """Cost of spheres swept halfway to their position in the previous and next timestep.
+
+        Cost and gradient of ``sweep_steps`` uniformly interpolated spheres on each side are added
+        to the sphere at the current timestep.
+        """
+        cost, grad = self._get_sphere_cost(spheres, eta, env_query_idx)
+        horizon = spheres.shape[1]
+        sphere_1 = spheres[..., :3]
+        sphere_0 = torch.cat((sphere_1[:, :1], sphere_1[:, :-1]), dim=1)
+        sphere_2 = torch.cat((sphere_1[:, 1:], sphere_1[:, -1:]), dim=1)
+        if horizon > 1:
+            for sphere_n in [sphere_0, sphere_2]:
+                for j in range(sweep_steps):
+                    k0 = 0.5 * (j + 1) / sweep_steps
+                    interpolated = torch.cat(
+                        ((1 - k0) * sphere_1 + k0 * sphere_n, spheres[..., 3:]), dim=-1
+                    )
+                    step_cost, step_grad = self._get_sphere_cost(interpolated, eta, env_query_idx)
+                    cost = cost + step_cost
+                    grad = grad + step_grad
+            if enable_speed_metric:
+                has_neighbors = (torch.arange(horizon, device=spheres.device) > 0) & (
+                    torch.arange(horizon, device=spheres.device) < horizon - 1
+                )
+                moving = torch.norm(sphere_2 - sphere_0, dim=-1) > 0.0
+                speed_mask = has_neighbors.view(1, -1, 1) & moving & (cost != 0.0)
+                scaled_cost, scaled_grad = _scale_speed_metric(
+                    sphere_0, sphere_1, sphere_2, dt, True, cost, grad
+                )
+                cost = torch.where(speed_mask, scaled_cost, cost)
+                grad = torch.where(speed_mask.unsqueeze(-1), scaled_grad, grad)
+        return cost, grad
+
+    def _write_query_buffer(
+        self,
+        query_sphere: torch.Tensor,
+        collision_query_buffer: CollisionQueryBuffer,
+        weight: torch.Tensor,
+        cost: torch.Tensor,
+        grad: torch.Tensor,
+        compute_distance: bool,
+        return_loss: bool,
+    ):
+        buffer = collision_query_buffer.primitive_collision_buffer
+        weight = weight.view(-1)[0]
+        collision = cost != 0.0
+        if not compute_distance:
+            buffer.distance_buffer.copy_(weight * collision)
+            return buffer.distance_buffer
+        buffer.distance_buffer.copy_(weight * cost)
+        buffer.sparsity_index_buffer.copy_(collision)
+        buffer.grad_distance_buffer[..., :3] = weight * grad
+        buffer.grad_distance_buffer[..., 3] = 0.0
+        return EsdfSphereDistance.apply(
+            query_sphere,
+            buffer.distance_buffer,
+            buffer.grad_distance_buffer,
+            return_loss,
+        )
+
+    def _check_esdf(self):
+        if self._esdf is None:
+            raise ValueError("ESDF Collision has no obstacles")
+
+    def get_sphere_distance(
+        self,
+        query_sphere,
+        collision_query_buffer: CollisionQueryBuffer,
+        weight: torch.Tensor,
+        activation_distance: torch.Tensor,
+        env_query_idx: Optional[torch.Tensor] = None,
+        return_loss: bool = False,
+    ):
+        self._check_esdf()
+        cost, grad = self._get_sphere_cost(
+            query_sphere.detach(), activation_distance.view(-1)[0], env_query_idx
+        )
+        return self._write_query_buffer(
+            query_sphere, collision_query_buffer, weight, cost, grad, True, return_loss
+        )
+
+    def get_sphere_collision(
+        self,
+        query_sphere,
+        collision_query_buffer: CollisionQueryBuffer,
+        weight: torch.Tensor,
+        activation_distance: torch.Tensor,
+        env_query_idx: Optional[torch.Tensor] = None,
+        return_loss: bool = False,
+    ):
+        self._check_esdf()
+        if return_loss:
+            raise ValueError("cannot return loss for classification, use get_sphere_distance")
+        cost, grad = self._get_sphere_cost(
+            query_sphere.detach(), activation_distance.view(-1)[0], env_query_idx
+        )
+        return self._write_query_buffer(
+            query_sphere, collision_query_buffer, weight, cost, grad, False, return_loss
+        )
+
+    def get_swept_sphere_distance(
+        self,
+        query_sphere,
+        collision_query_buffer: CollisionQueryBuffer,
+        weight: torch.Tensor,
+        activation_distance: torch.Tensor,
+        speed_dt: torch.Tensor,
+        sweep_steps: int,
+        enable_speed_metric=False,
+        env_query_idx: Optional[torch.Tensor] = None,
+        return_loss: bool = False,
+    ):
+        self._check_esdf()
+        cost, grad = self._get_swept_sphere_cost(
+            query_sphere.detach(),
+            activation_distance.view(-1)[0],
+            speed_dt.view(-1)[0],
+            sweep_steps,
+            enable_speed_metric,
+            env_query_idx,
+        )
+        return self._write_query_buffer(
+            query_sphere, collision_query_buffer, weight, cost, grad, True, return_loss
+        )
+
+    def get_swept_sphere_collision(
+        self,
+        query_sphere,
+        collision_query_buffer: CollisionQueryBuffer,
+        weight: torch.Tensor,
+        activation_distance: torch.Tensor,
+        speed_dt: torch.Tensor,
+        sweep_steps: int,
+        enable_speed_metric=False,
+        env_query_idx: Optional[torch.Tensor] = None,
+        return_loss: bool = False,
+    ):
+        self._check_esdf()
+        if return_loss:
+            raise ValueError("cannot return loss for classify, use get_swept_sphere_distance")
+        cost, grad = self._get_swept_sphere_cost(
+            query_sphere.detach(),
+            activation_distance.view(-1)[0],
+            speed_dt.view(-1)[0],
+            sweep_steps,
+            False,
+            env_query_idx,
+        )
+        return self._write_query_buffer(
+            query_sphere, collision_query_buffer, weight, cost, grad, False, return_loss
+        )
+
+    def clear_cache(self):
+        self.update_world_fingerprint()
+        if self._esdf is not None:
+            self._esdf[:] = self.esdf_truncation_distance
@@ -11,7 +11,7 @@
 
 # Standard Library
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Union
 
 # Third Party
 import numpy as np
@@ -49,14 +49,15 @@ class WorldMeshCollision(WorldPrimitiveCollision):
 
     def __init__(self, config: WorldCollisionConfig):
         # WorldCollision.(self)
-        init_warp()
+        init_warp(tensor_args=config.tensor_args)
 
         self.tensor_args = config.tensor_args
 
         self._env_n_mesh = None
         self._mesh_tensor_list = None
         self._env_mesh_names = None
-        self._wp_device = wp.torch.device_from_torch(self.tensor_args.device)
+        self._env_mesh_name_idx = None
+        self._wp_device = wp.device_from_torch(self.tensor_args.device)
         self._wp_mesh_cache = {}  # stores warp meshes across environments
 
         super().__init__(config)
@@ -74,6 +75,7 @@ class WorldMeshCollision(WorldPrimitiveCollision):
     def load_collision_model(
         self, world_model: WorldConfig, env_idx: int = 0, load_obb_obs: bool = True
     ):
+        self.update_world_fingerprint()
         max_nmesh = len(world_model.mesh)
         if max_nmesh > 0:
             if self._mesh_tensor_list is None or self._mesh_tensor_list[0].shape[1] < max_nmesh:
@@ -87,6 +89,9 @@ class WorldMeshCollision(WorldPrimitiveCollision):
             self._mesh_tensor_list[2][env_idx, :max_nmesh] = 1
 
             self._env_mesh_names[env_idx][:max_nmesh] = name_list
+            self._env_mesh_name_idx[env_idx] = self._get_name_idx_map(
+                self._env_mesh_names[env_idx]
+            )
             self._env_n_mesh[env_idx] = max_nmesh
 
             self.collision_types["mesh"] = True
@@ -96,6 +101,7 @@ class WorldMeshCollision(WorldPrimitiveCollision):
             self.world_model = world_model
 
     def load_batch_collision_model(self, world_config_list: List[WorldConfig]):
+        self.update_world_fingerprint()
         max_nmesh = max([len(x.mesh) for x in world_config_list])
         if self._mesh_tensor_list is None or self._mesh_tensor_list[0].shape[1] < max_nmesh:
             log_info("Creating new Mesh cache: " + str(max_nmesh))
@@ -138,6 +144,7 @@ class WorldMeshCollision(WorldPrimitiveCollision):
         return name_list, id_list, inv_pose_buffer.get_pose_vector()
 
     def add_mesh(self, new_mesh: Mesh, env_idx: int = 0):
+        self.update_world_fingerprint()
         if self._env_n_mesh[env_idx] >= self._mesh_tensor_list[0].shape[1]:
             log_error(
                 "Cannot add new mesh as we are at mesh cache limit, increase cache limit in WorldMeshCollision"
@@ -155,6 +162,7 @@ class WorldMeshCollision(WorldPrimitiveCollision):
         self._mesh_tensor_list[1][env_idx, curr_idx, :7] = w_obj_pose.inverse().get_pose_vector()
         self._mesh_tensor_list[2][env_idx, curr_idx] = 1
         self._env_mesh_names[env_idx][curr_idx] = wp_mesh_data.name
+        self._env_mesh_name_idx[env_idx] = self._get_name_idx_map(self._env_mesh_names[env_idx])
         self._env_n_mesh[env_idx] = curr_idx + 1
 
     def get_mesh_idx(
@@ -162,9 +170,26 @@ class WorldMeshCollision(WorldPrimitiveCollision):
         name: str,
         env_idx: int = 0,
     ) -> int:
-        if name not in self._env_mesh_names[env_idx]:
+        if name not in self._env_mesh_name_idx[env_idx]:
             log_error("Obstacle with name: " + name + " not found in current world", exc_info=True)
-        return self._env_mesh_names[env_idx].index(name)
+        return self._env_mesh_name_idx[env_idx][name]
+
+    def get_mesh_idx_tensor(
+        self,
+        names: List[str],
+        env_idx: Union[int, List[int]] = 0,
+    ) -> torch.Tensor:
+        """Get cache index of meshes as a tensor, to use with :py:meth:`update_mesh_pose_batch`
+        and :py:meth:`enable_mesh_batch`.
+
+        Args:
+            names: names of meshes.
+            env_idx: environment index of every mesh, a single index is used for all meshes.
+
+        Returns:
+            Index of meshes in their environment, shape [len(names)].
+        """
+        return self._get_idx_tensor(self._env_mesh_name_idx, names, env_idx)
 
     def create_collision_cache(self, mesh_cache=None, obb_cache=None, n_envs=None):
         if n_envs is not None:
@@ -203,6 +228,7 @@ class WorldMeshCollision(WorldPrimitiveCollision):
         ]  # 0=mesh idx, 1=pose, 2=mesh enable
         self.collision_types["mesh"] = True  # TODO: enable this after loading first mesh
         self._env_mesh_names = [[None for _ in range(mesh_cache)] for _ in range(self.n_envs)]
+        self._env_mesh_name_idx = [{} for _ in range(self.n_envs)]
 
         self._wp_mesh_cache = {}
 
@@ -214,6 +240,7 @@ class WorldMeshCollision(WorldPrimitiveCollision):
         env_obj_idx: Optional[torch.Tensor] = None,
         env_idx: int = 0,
     ):
+        self.update_world_fingerprint()
         w_inv_pose = self._get_obstacle_poses(w_obj_pose, obj_w_pose)
 
         if name is not None:
@@ -241,8 +268,14 @@ class WorldMeshCollision(WorldPrimitiveCollision):
             env_obj_idx (Optional[torch.Tensor], optional): _description_. Defaults to None.
             env_idx (int, optional): _description_. Defaults to 0.
         """
-        w_inv_pose = self._get_obstacle_poses(w_obj_pose, obj_w_pose)
-        raise NotImplementedError
+        if name is not None:
+            env_obj_idx = self.get_mesh_idx_tensor(name, env_idx)
+        elif env_obj_idx is None:
+            raise ValueError("name or env_obj_idx needs to be given to update mesh pose")
+        env_obj_idx = env_obj_idx.view(-1)
+        self.update_mesh_pose_batch(
+            torch.full_like(env_obj_idx, env_idx), env_obj_idx, w_obj_pose, obj_w_pose
+        )
 
     def update_mesh_pose_env(
         self,
@@ -261,14 +294,65 @@ class WorldMeshCollision(WorldPrimitiveCollision):
             env_obj_idx (Optional[torch.Tensor], optional): _description_. Defaults to None.
             env_idx (List[int], optional): _description_. Defaults to [0].
         """
-        w_inv_pose = self._get_obstacle_poses(w_obj_pose, obj_w_pose)
         # collect index of mesh across environments:
-        # index_tensor = torch.zeros((1, len(env_idx)), dtype=torch.long, device=self.tensor_args.device)
+        if name is not None:
+            env_obj_idx = self.get_mesh_idx_tensor([name for _ in env_idx], env_idx)
+        elif env_obj_idx is None:
+            raise ValueError("name or env_obj_idx needs to be given to update mesh pose")
+        env_obj_idx = env_obj_idx.view(-1)
+        env_idx = torch.as_tensor(env_idx, device=env_obj_idx.device, dtype=torch.long)
+        if env_obj_idx.shape[0] == 1:
+            env_obj_idx = env_obj_idx.expand(env_idx.shape[0])
+        self.update_mesh_pose_batch(env_idx, env_obj_idx, w_obj_pose, obj_w_pose)
+
+    def update_mesh_pose_batch(
+        self,
+        env_idx: torch.Tensor,
+        mesh_idx: torch.Tensor,
+        w_obj_pose: Optional[Pose] = None,
+        obj_w_pose: Optional[Pose] = None,
+    ):
+        """Update poses of many meshes across environments with a single scatter into the cache.
 
-        # for i, e in enumerate[env_idx]:
-        #    index_tensor[0,i] = self.get_mesh_idx(name, e)
-        raise NotImplementedError
-        # self._mesh_tensor_list[1][env_idx, obj_idx]
+        Cache tensors are written in place, so this can be called between replays of a CUDA graph.
+        Do not capture this call in a graph, the world fingerprint used by plan caches and broad
+        phase culling is only updated on host. Use :py:meth:`get_mesh_idx_tensor` to get mesh
+        indices from names once and reuse them across updates. If a mesh is repeated, the pose
+        written is undefined.
+
+        Args:
+            env_idx: environment index of every mesh, shape [n].
+            mesh_idx: index of every mesh in its environment, shape [n].
+            w_obj_pose: pose of meshes in world frame, batch size n or 1.
+            obj_w_pose: inverse pose of meshes, used if w_obj_pose is None.
+        """
+        self.update_world_fingerprint()
+        w_inv_pose = self._get_obstacle_poses(w_obj_pose, obj_w_pose)
+        env_idx = env_idx.view(-1).long()
+        mesh_idx = mesh_idx.view(-1).long()
+        self._mesh_tensor_list[1][env_idx, mesh_idx, :7] = w_inv_pose.get_pose_vector().view(-1, 7)
+
+    def enable_mesh_batch(
+        self,
+        env_idx: torch.Tensor,
+        mesh_idx: torch.Tensor,
+        enable: Union[bool, torch.Tensor] = True,
+    ):
+        """Enable or disable many meshes across environments with a single scatter into the cache.
+
+        Args:
+            env_idx: environment index of every mesh, shape [n].
+            mesh_idx: index of every mesh in its environment, shape [n].
+            enable: enable flag for all meshes or a tensor with a flag per mesh, shape [n].
+        """
+        self.update_world_fingerprint()
+        env_idx = env_idx.view(-1).long()
+        mesh_idx = mesh_idx.view(-1).long()
+        if isinstance(enable, torch.Tensor):
+            enable = enable.view(-1).to(dtype=self._mesh_tensor_list[2].dtype)
+        else:
+            enable = int(enable)
+        self._mesh_tensor_list[2][env_idx, mesh_idx] = enable
 
     def update_mesh_from_warp(
         self,
@@ -279,6 +363,7 @@ class WorldMeshCollision(WorldPrimitiveCollision):
         env_idx: int = 0,
         name: Optional[str] = None,
     ):
+        self.update_world_fingerprint()
         if name is not None:
             obj_idx = self.get_mesh_idx(name, env_idx)
 
@@ -290,6 +375,7 @@ class WorldMeshCollision(WorldPrimitiveCollision):
         self._mesh_tensor_list[1][env_idx, obj_idx] = w_inv_pose
         self._mesh_tensor_list[2][env_idx, obj_idx] = 1
         self._env_mesh_names[env_idx][obj_idx] = name
+        self._env_mesh_name_idx[env_idx] = self._get_name_idx_map(self._env_mesh_names[env_idx])
         if self._env_n_mesh[env_idx] <= obj_idx:
             self._env_n_mesh[env_idx] = obj_idx + 1
 
@@ -299,9 +385,9 @@ class WorldMeshCollision(WorldPrimitiveCollision):
         w_obj_pose: Pose,
         env_idx: int = 0,
     ):
-        if self._env_mesh_names is not None and name in self._env_mesh_names[env_idx]:
+        if self._env_mesh_name_idx is not None and name in self._env_mesh_name_idx[env_idx]:
             self.update_mesh_pose(name=name, w_obj_pose=w_obj_pose, env_idx=env_idx)
-        elif self._env_obbs_names is not None and name in self._env_obbs_names[env_idx]:
+        elif self._env_obbs_name_idx is not None and name in self._env_obbs_name_idx[env_idx]:
             self.update_obb_pose(name=name, w_obj_pose=w_obj_pose, env_idx=env_idx)
         else:
             log_error("obstacle not found in OBB world model: " + name)
@@ -312,9 +398,9 @@ class WorldMeshCollision(WorldPrimitiveCollision):
         enable: bool = True,
         env_idx: int = 0,
     ):
-        if self._env_mesh_names is not None and name in self._env_mesh_names[env_idx]:
+        if self._env_mesh_name_idx is not None and name in self._env_mesh_name_idx[env_idx]:
             self.enable_mesh(enable, name, None, env_idx)
-        elif self._env_obbs_names is not None and name in self._env_obbs_names[env_idx]:
+        elif self._env_obbs_name_idx is not None and name in self._env_obbs_name_idx[env_idx]:
             self.enable_obb(enable, name, None, env_idx)
         else:
             log_error("Obstacle not found in world model: " + name)
@@ -334,6 +420,7 @@ class WorldMeshCollision(WorldPrimitiveCollision):
             obj_idx (torch.Tensor or int):
 
         """
+        self.update_world_fingerprint()
         if env_mesh_idx is not None:
             self._mesh_tensor_list[2][env_mesh_idx] = int(enable)  # enable == 1
         else:
@@ -593,6 +680,7 @@ class WorldMeshCollision(WorldPrimitiveCollision):
         return d_val
 
     def clear_cache(self):
+        self.update_world_fingerprint()
         self._wp_mesh_cache = {}
         if self._mesh_tensor_list is not None:
             self._mesh_tensor_list[2][:] = 0
@@ -9,6 +9,8 @@
 # its affiliates is strictly prohibited.
 #
 
+from __future__ import annotations
+
 # Standard Library
 from enum import Enum
 from typing import List, Tuple
@@ -16,12 +18,13 @@ from typing import List, Tuple
 # Third Party
 import numpy as np
 import torch
-import trimesh
-from trimesh.voxel.creation import voxelize
 
 # CuRobo
+from curobo.util.helpers import lazy_import
 from curobo.util.logger import log_warn
 
+trimesh = lazy_import("trimesh")
+
 
 class SphereFitType(Enum):
     """Supported sphere fit types are listed here. VOXEL_VOLUME_SAMPLE_SURFACE works best.
@@ -95,7 +98,7 @@ def get_voxelgrid_from_mesh(mesh: trimesh.Trimesh, n_spheres: int, voxelize_meth
     pitch = get_voxel_pitch(mesh, n_spheres)
     radius = pitch / 2.0
     try:
-        voxel = voxelize(mesh, pitch, voxelize_method)
+        voxel = trimesh.voxel.creation.voxelize(mesh, pitch, voxelize_method)
         voxel = voxel.fill("base")
         pts = voxel.points
         rad = np.ravel([radius for _ in range(len(pts))])
@@ -18,7 +18,7 @@ import warp as wp
 # CuRobo
 from curobo.curobolib.kinematics import rotation_matrix_to_quaternion
 from curobo.util.logger import log_error
-from curobo.util.warp import init_warp
+from curobo.util.warp import init_warp, warp_stream_from_torch
 
 
 def transform_points(
@@ -479,7 +479,8 @@ class TransformPoint(torch.autograd.Function):
                 b,
             ],
             outputs=[wp.from_torch(out_points.view(-1, 3), dtype=wp.vec3)],
-            stream=wp.stream_from_torch(position.device),
+            device=wp.device_from_torch(position.device),
+            stream=warp_stream_from_torch(position.device),
         )
 
         return out_points
@@ -532,7 +533,8 @@ class TransformPoint(torch.autograd.Function):
             adj_outputs=[
                 None,
             ],
-            stream=wp.stream_from_torch(grad_output.device),
+            device=wp.device_from_torch(grad_output.device),
+            stream=warp_stream_from_torch(grad_output.device),
             adjoint=True,
         )
         g_p = g_q = g_pt = None
@@ -576,7 +578,8 @@ class BatchTransformPoint(torch.autograd.Function):
                 b,
             ],
             outputs=[wp.from_torch(out_points.view(-1, 3).contiguous(), dtype=wp.vec3)],
-            stream=wp.stream_from_torch(position.device),
+            device=wp.device_from_torch(position.device),
+            stream=warp_stream_from_torch(position.device),
         )
 
         return out_points
@@ -628,7 +631,8 @@ class BatchTransformPoint(torch.autograd.Function):
             adj_outputs=[
                 None,
             ],
-            stream=wp.stream_from_torch(grad_output.device),
+            device=wp.device_from_torch(grad_output.device),
+            stream=warp_stream_from_torch(grad_output.device),
             adjoint=True,
         )
         g_p = g_q = g_pt = None
@@ -698,7 +702,8 @@ class BatchTransformPose(torch.autograd.Function):
                 wp.from_torch(out_position.detach().view(-1, 3).contiguous(), dtype=wp.vec3),
                 wp.from_torch(out_quaternion.detach().view(-1, 4).contiguous(), dtype=wp.vec4),
             ],
-            stream=wp.stream_from_torch(position.device),
+            device=wp.device_from_torch(position.device),
+            stream=warp_stream_from_torch(position.device),
         )
 
         return out_position, out_quaternion
@@ -771,7 +776,8 @@ class BatchTransformPose(torch.autograd.Function):
                 None,
                 None,
             ],
-            stream=wp.stream_from_torch(grad_out_position.device),
+            device=wp.device_from_torch(grad_out_position.device),
+            stream=warp_stream_from_torch(grad_out_position.device),
             adjoint=True,
         )
         g_p1 = g_q1 = g_p2 = g_q2 = None
@@ -842,7 +848,8 @@ class TransformPose(torch.autograd.Function):
                 wp.from_torch(out_position.detach().view(-1, 3).contiguous(), dtype=wp.vec3),
                 wp.from_torch(out_quaternion.detach().view(-1, 4).contiguous(), dtype=wp.vec4),
             ],
-            stream=wp.stream_from_torch(position.device),
+            device=wp.device_from_torch(position.device),
+            stream=warp_stream_from_torch(position.device),
         )
 
         return out_position, out_quaternion
@@ -915,7 +922,8 @@ class TransformPose(torch.autograd.Function):
                 None,
                 None,
             ],
-            stream=wp.stream_from_torch(grad_out_position.device),
+            device=wp.device_from_torch(grad_out_position.device),
+            stream=warp_stream_from_torch(grad_out_position.device),
             adjoint=True,
         )
         g_p1 = g_q1 = g_p2 = g_q2 = None
@@ -973,7 +981,8 @@ class PoseInverse(torch.autograd.Function):
                 wp.from_torch(out_position.detach().view(-1, 3).contiguous(), dtype=wp.vec3),
                 wp.from_torch(out_quaternion.detach().view(-1, 4).contiguous(), dtype=wp.vec4),
             ],
-            stream=wp.stream_from_torch(position.device),
+            device=wp.device_from_torch(position.device),
+            stream=warp_stream_from_torch(position.device),
         )
         # remove close to zero values:
         # out_position[torch.abs(out_position)<1e-8] = 0.0
@@ -1035,7 +1044,8 @@ class PoseInverse(torch.autograd.Function):
                 None,
                 None,
             ],
-            stream=wp.stream_from_torch(grad_out_position.device),
+            device=wp.device_from_torch(grad_out_position.device),
+            stream=warp_stream_from_torch(grad_out_position.device),
             adjoint=True,
         )
         g_p1 = g_q1 = None
@@ -1080,7 +1090,8 @@ class QuatToMatrix(torch.autograd.Function):
             outputs=[
                 wp.from_torch(out_mat.detach().view(-1, 3, 3).contiguous(), dtype=wp.mat33),
             ],
-            stream=wp.stream_from_torch(quaternion.device),
+            device=wp.device_from_torch(quaternion.device),
+            stream=warp_stream_from_torch(quaternion.device),
         )
 
         return out_mat
@@ -1119,7 +1130,8 @@ class QuatToMatrix(torch.autograd.Function):
             adj_outputs=[
                 None,
             ],
-            stream=wp.stream_from_torch(grad_out_mat.device),
+            device=wp.device_from_torch(grad_out_mat.device),
+            stream=warp_stream_from_torch(grad_out_mat.device),
             adjoint=True,
         )
         g_q1 = None
@@ -1162,7 +1174,8 @@ class MatrixToQuaternion(torch.autograd.Function):
             outputs=[
                 wp.from_torch(out_quaternion.detach().view(-1, 4).contiguous(), dtype=wp.vec4),
             ],
-            stream=wp.stream_from_torch(in_mat.device),
+            device=wp.device_from_torch(in_mat.device),
+            stream=warp_stream_from_torch(in_mat.device),
         )
 
         return out_quaternion
@@ -1199,7 +1212,8 @@ class MatrixToQuaternion(torch.autograd.Function):
             adj_outputs=[
                 None,
             ],
-            stream=wp.stream_from_torch(grad_out_q.device),
+            device=wp.device_from_torch(grad_out_q.device),
+            stream=warp_stream_from_torch(grad_out_q.device),
             adjoint=True,
         )
         g_q1 = None
@@ -17,15 +17,17 @@ from typing import Any, Dict, List, Optional, Sequence
 # Third Party
 import numpy as np
 import torch
-import trimesh
 
 # CuRobo
 from curobo.geom.sphere_fit import SphereFitType, fit_spheres_to_mesh
 from curobo.types.base import TensorDeviceType
 from curobo.types.math import Pose
+from curobo.util.helpers import lazy_import
 from curobo.util.logger import log_error, log_warn
 from curobo.util_file import get_assets_path, join_path
 
+trimesh = lazy_import("trimesh")
+
 
 @dataclass
 class Material:
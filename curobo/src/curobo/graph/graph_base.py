@@ -25,7 +25,13 @@ import torch.autograd.profiler as profiler
 # CuRobo
 from curobo.geom.sdf.world import WorldCollision
 from curobo.geom.types import WorldConfig
-from curobo.graph.graph_nx import NetworkxGraph
+from curobo.graph.roadmap_cache import (
+    get_changed_obstacle_aabbs,
+    get_data_hash,
+    get_world_signatures,
+    load_roadmap,
+    save_roadmap,
+)
 from curobo.rollout.arm_base import ArmBase, ArmBaseConfig
 from curobo.rollout.rollout_base import RolloutBase, RolloutMetrics
 from curobo.types import tensor
@@ -110,6 +116,19 @@ class GraphConfig:
     interpolation_dt: float = 0.02
     interpolation_deviation: float = 0.05
     interpolation_acceleration_scale: float = 0.5
+    #: nearest neighbour queries use a spatial index once the roadmap has this many nodes, dense
+    #: distance computation on device is faster for smaller roadmaps.
+    spatial_index_min_nodes: int = 4096
+    #: check feasibility of samples in stages of increasing cost (joint bounds, link bounding
+    #: sphere collision, sphere collision, self collision), with only samples that pass a stage
+    #: evaluated in the next stage. This is not captured in a cuda graph as batch size changes
+    #: between stages and syncs with host, enable when samples are mostly infeasible or when
+    #: running without cuda graphs, e.g., on cpu.
+    use_cascade_mask_samples: bool = False
+    #: insert roadmap edges without collision checking (lazy PRM). Edges on shortest paths are
+    #: checked when the graph is searched, invalid edges are removed and the search is repeated.
+    #: Validity of checked edges is cached until the world changes near them.
+    lazy_edge_validation: bool = False
 
     @staticmethod
     def from_dict(
@@ -164,6 +183,7 @@ class GraphConfig:
             base_config_data["world_collision_checker_cfg"],
             world_model,
             world_coll_checker=world_coll_checker,
+            tensor_args=tensor_args,
         )
         arm_base = ArmBase(cfg)
 
@@ -177,6 +197,7 @@ class GraphConfig:
                 base_config_data["world_collision_checker_cfg"],
                 world_model,
                 world_coll_checker=world_coll_checker,
+                tensor_args=tensor_args,
             )
             arm_base_cg_rollout = ArmBase(cfg_cg)
         else:
@@ -211,8 +232,19 @@ class GraphPlanBase(GraphConfig):
         self.i = 0
         self._valid_bias_node = False
         self._out_traj_state = None
+        # graph containers are imported here as they load scipy:
+        # CuRobo
+        from curobo.graph.graph_csr import CsrGraph
+        from curobo.graph.spatial_index import WeightedNodeIndex
+
         # validated graph is stored here:
-        self.graph = NetworkxGraph()
+        self.graph = CsrGraph()
+        self._node_index = WeightedNodeIndex(self.distance_weight)
+
+        # obstacles that changed since edges were last validated, used for lazy revalidation:
+        self._world_signatures = self._get_world_signatures()
+        self._changed_obstacle_aabbs = []
+        self._revalidate_all_edges = False
 
         self.path = None
 
@@ -229,6 +261,10 @@ class GraphPlanBase(GraphConfig):
             device=self.tensor_args.device,
             dtype=self.tensor_args.dtype,
         )
+        # edges checked with lazy_edge_validation, stored as keys from _get_edge_keys:
+        self._edge_key_base = self.path.shape[0]
+        self._valid_edge_keys = set()
+        self._invalid_edge_keys = set()
         self.sample_gen = HaltonGenerator(
             self.dof,
             self.tensor_args,
@@ -264,6 +300,8 @@ class GraphPlanBase(GraphConfig):
         return x_samples
 
     def mask_samples(self, x_samples):  # call feasibility here:
+        if self.use_cascade_mask_samples:
+            return self._mask_samples_cascade(x_samples)
         if self.use_cuda_graph_mask_samples and x_samples.shape[0] <= self.max_cg_buffer:
             return self._mask_samples_cuda_graph(x_samples)
         else:
@@ -308,6 +346,19 @@ class GraphPlanBase(GraphConfig):
         mask = torch.cat(d).squeeze()
         return mask
 
+    @profiler.record_function("geometric_planner/cascade_mask_samples")
+    def _mask_samples_cascade(self, x_samples):
+        d = []
+        for i in range(math.ceil(x_samples.shape[0] / self.max_buffer)):
+            start = i * self.max_buffer
+            end = (i + 1) * self.max_buffer
+            metrics = self.safety_rollout_fn.rollout_constraint_cascade(
+                x_samples[start:end, :].unsqueeze(1), use_batch_env=False
+            )
+            d.append(metrics.feasible)
+        mask = torch.cat(d).squeeze()
+        return mask
+
     def _cuda_graph_rollout_constraint(self, x_samples, use_batch_env=False):
         self._cu_act_buffer[: x_samples.shape[0]] = x_samples
         metrics = self.rollout_fn.rollout_constraint_cuda_graph(
@@ -342,6 +393,7 @@ class GraphPlanBase(GraphConfig):
             dtype=self.tensor_args.dtype,
         )
         self.reset_graph()
+        self._node_index.reset()
         self.path *= 0.0
         self.i = 0
         self._valid_bias_node = False
@@ -458,17 +510,7 @@ class GraphPlanBase(GraphConfig):
         nodes = self.path[: self.i, : self.dof]
         return Graph(nodes=nodes, edges=node_edges, connectivity=edge_connect)
 
-    def _validate_graph(self):
-        self.graph.update_graph()
-        edge_list = self.graph.get_edges()
-        edges = torch.as_tensor(
-            edge_list, device=self.tensor_args.device, dtype=self.tensor_args.dtype
-        )
-
-        # find start and end points for these edges:
-        start_pts = self.path[edges[:, 0].long(), : self.dof]
-        end_pts = self.path[edges[:, 1].long(), : self.dof]
-
+    def _get_edge_interpolation(self, start_pts, end_pts):
         # first check the start and end points:
         # get largest edge:
         dist = self._distance(start_pts, end_pts, norm=False)
@@ -482,6 +524,20 @@ class GraphPlanBase(GraphConfig):
             start_pts.unsqueeze(1)
             + delta_vec.unsqueeze(1) @ dist.unsqueeze(1) / self.distance_weight
         )
+        return line_vec
+
+    def _validate_graph(self):
+        self.graph.update_graph()
+        edge_list = self.graph.get_edges()
+        edges = torch.as_tensor(
+            edge_list, device=self.tensor_args.device, dtype=self.tensor_args.dtype
+        )
+
+        # find start and end points for these edges:
+        start_pts = self.path[edges[:, 0].long(), : self.dof]
+        end_pts = self.path[edges[:, 1].long(), : self.dof]
+
+        line_vec = self._get_edge_interpolation(start_pts, end_pts)
         b, h, _ = line_vec.shape
         print("Number of points to check: ", b * h)
 
@@ -495,33 +551,30 @@ class GraphPlanBase(GraphConfig):
 
         #
         node_mask = ~mask[:, 0]
-        node_list = (
-            torch.unique(
-                torch.cat((edges[node_mask][:, 0].long(), edges[~mask[:, -1]][:, 1].long()))
-            )
-            .cpu()
-            .tolist()
+        node_list = torch.unique(
+            torch.cat((edges[node_mask][:, 0].long(), edges[~mask[:, -1]][:, 1].long()))
         )
 
         new_path = self.path[node_list]
-        new_path[:, self.dof + 1] = torch.as_tensor(
-            [x for x in range(new_path.shape[0])],
-            device=self.tensor_args.device,
-            dtype=self.tensor_args.dtype,
+        new_path[:, self.dof + 1] = torch.arange(
+            new_path.shape[0], device=self.tensor_args.device, dtype=self.tensor_args.dtype
         )
         self.i = new_path.shape[0]  # + 1
         self.path[: self.i] = new_path
 
-        reindex_edges = []
         if len(new_edges) > 0:
-            # reindex edges:
-            for e in range(len(new_edges)):
-                st_idx = node_list.index(int(new_edges[e][0]))
-                end_idx = node_list.index(int(new_edges[e][1]))
-                reindex_edges.append([st_idx, end_idx])
-
-            new_edges[:, 0:2] = torch.as_tensor(
-                reindex_edges, device=self.tensor_args.device, dtype=self.tensor_args.dtype
+            # reindex edges with a lookup table from old node index to new node index:
+            node_lookup = torch.full(
+                (int(torch.max(edges[:, 0:2]).item()) + 1,),
+                -1,
+                device=self.tensor_args.device,
+                dtype=torch.int64,
+            )
+            node_lookup[node_list] = torch.arange(
+                node_list.shape[0], device=self.tensor_args.device, dtype=torch.int64
+            )
+            new_edges[:, 0:2] = node_lookup[new_edges[:, 0:2].long()].to(
+                dtype=self.tensor_args.dtype
             )
         else:
             print("ERROR")
@@ -531,11 +584,7 @@ class GraphPlanBase(GraphConfig):
             self.path[new_edges[:, 1].long(), : self.dof],
         )
         new_edges[:, 2] = d
-        new_edges = new_edges.detach().cpu().numpy().tolist()
 
-        # compute path lengths:
-
-        new_edges = [[int(x[0]), int(x[1]), x[2]] for x in new_edges]
         # self.i += 1
         self.path[self.i :] *= 0.0
         #
@@ -544,8 +593,267 @@ class GraphPlanBase(GraphConfig):
         self.graph.add_edges(new_edges)
         self.graph.add_nodes(list(range(self.i)))
         self.graph.update_graph()
+        # nodes were reindexed, all remaining edges are collision free:
+        self._invalid_edge_keys.clear()
+        self._valid_edge_keys = set(self._get_edge_keys(self.graph.get_edges()).tolist())
+
+        # nodes were reindexed, rebuild spatial index:
+        self._node_index.reset()
+        self._update_node_index()
+        self._world_signatures = self._get_world_signatures()
+        self._changed_obstacle_aabbs = []
+        self._revalidate_all_edges = False
         print("Validated graph", len(new_edges), edges.shape)
 
+    def _get_world_signatures(self) -> Optional[Dict[str, str]]:
+        world_coll_checker = self.safety_rollout_fn.world_coll_checker
+        if world_coll_checker is None:
+            return {}
+        return get_world_signatures(world_coll_checker.world_model)
+
+    def update_world(self):
+        """Track obstacles changed in the collision checker, edges are revalidated lazily.
+
+        Call this after loading a new world in the collision checker. Only edges whose robot
+        spheres intersect the bounding box of added or changed obstacles are checked for collision
+        on the next query. If obstacles cannot be tracked (e.g., a BloxMap), all edges are checked.
+        """
+        signatures = self._get_world_signatures()
+        if signatures is None or self._world_signatures is None:
+            self._revalidate_all_edges = True
+        else:
+            world_model = self.safety_rollout_fn.world_coll_checker.world_model
+            if world_model is not None:
+                self._changed_obstacle_aabbs += get_changed_obstacle_aabbs(
+                    self._world_signatures, world_model
+                )
+        self._world_signatures = signatures
+
+    @torch.no_grad()
+    def revalidate_graph(self):
+        """Remove edges that are in collision with obstacles changed since last validation.
+
+        With :py:attr:`GraphConfig.lazy_edge_validation`, edges near changed obstacles are marked
+        as unchecked instead and are checked when they are on a shortest path.
+        """
+        if self._revalidate_all_edges or len(self._changed_obstacle_aabbs) > 0:
+            obstacle_aabbs = None
+            if not self._revalidate_all_edges:
+                obstacle_aabbs = self.tensor_args.to_device(np.stack(self._changed_obstacle_aabbs))
+            if self.lazy_edge_validation:
+                self._reset_lazy_edges(obstacle_aabbs)
+            else:
+                self._revalidate_edges(obstacle_aabbs)
+        self._changed_obstacle_aabbs = []
+        self._revalidate_all_edges = False
+
+    @profiler.record_function("geometric_planner/revalidate_edges")
+    def _revalidate_edges(self, obstacle_aabbs: Optional[torch.Tensor] = None):
+        edge_list = self.graph.get_edges()
+        if edge_list.shape[0] == 0:
+            return
+        edges = torch.as_tensor(
+            edge_list, device=self.tensor_args.device, dtype=self.tensor_args.dtype
+        )
+        start_pts = self.path[edges[:, 0].long(), : self.dof]
+        end_pts = self.path[edges[:, 1].long(), : self.dof]
+        line_vec = self._get_edge_interpolation(start_pts, end_pts)
+        b, h, _ = line_vec.shape
+
+        if obstacle_aabbs is None:
+            check_mask = torch.ones(b, device=self.tensor_args.device, dtype=torch.bool)
+        else:
+            check_mask = self._get_edges_near_aabbs(line_vec, obstacle_aabbs)
+        edge_mask = torch.ones(b, device=self.tensor_args.device, dtype=torch.bool)
+        if torch.any(check_mask):
+            check_vec = line_vec[check_mask]
+            mask = self.mask_samples(check_vec.view(-1, self.dof)).view(check_vec.shape[0], h)
+            edge_mask[check_mask] = torch.all(mask, dim=1)
+        if torch.all(edge_mask):
+            return
+        # node indices are unchanged, only edges in collision are removed:
+        self.graph.reset_graph()
+        self.graph.add_edges(edges[edge_mask])
+        self.graph.add_nodes(list(range(self.i)))
+        self.graph.update_graph()
+
+    def _reset_lazy_edges(self, obstacle_aabbs: Optional[torch.Tensor] = None):
+        # edges removed earlier can be inserted again and are checked on use:
+        self._invalid_edge_keys.clear()
+        if obstacle_aabbs is None or len(self._valid_edge_keys) == 0:
+            self._valid_edge_keys.clear()
+            return
+        keys = np.fromiter(self._valid_edge_keys, dtype=np.int64, count=len(self._valid_edge_keys))
+        edges = torch.as_tensor(
+            np.stack((keys // self._edge_key_base, keys % self._edge_key_base), axis=-1),
+            device=self.tensor_args.device,
+        )
+        line_vec = self._get_edge_interpolation(
+            self.path[edges[:, 0], : self.dof], self.path[edges[:, 1], : self.dof]
+        )
+        near = self._get_edges_near_aabbs(line_vec, obstacle_aabbs).cpu().numpy()
+        self._valid_edge_keys.difference_update(keys[near].tolist())
+
+    def _get_edge_keys(self, edges: np.ndarray) -> np.ndarray:
+        # undirected edge between node i and node j is stored as min(i,j) * base + max(i,j):
+        edges = np.asarray(edges)[:, :2].astype(np.int64)
+        return np.min(edges, axis=-1) * self._edge_key_base + np.max(edges, axis=-1)
+
+    def _get_unchecked_edges(self, edges: np.ndarray) -> np.ndarray:
+        if edges.shape[0] == 0 or len(self._valid_edge_keys) == 0:
+            return edges
+        valid_keys = np.fromiter(
+            self._valid_edge_keys, dtype=np.int64, count=len(self._valid_edge_keys)
+        )
+        return edges[~np.isin(self._get_edge_keys(edges), valid_keys)]
+
+    @profiler.record_function("geometric_planner/check_lazy_edges")
+    def _check_lazy_edges(self, edges: np.ndarray) -> np.ndarray:
+        """Collision check edges with one call to mask_samples and remove invalid edges.
+
+        Args:
+            edges: edges as [n, 2] or [n, 3] array with start and end node index.
+
+        Returns:
+            validity of every edge.
+        """
+        edge_idx = torch.as_tensor(
+            np.asarray(edges)[:, :2].astype(np.int64), device=self.tensor_args.device
+        )
+        line_vec = self._get_edge_interpolation(
+            self.path[edge_idx[:, 0], : self.dof], self.path[edge_idx[:, 1], : self.dof]
+        )
+        b, h, _ = line_vec.shape
+        mask = self.mask_samples(line_vec.view(b * h, self.dof)).view(b, h)
+        valid = torch.all(mask, dim=1).cpu().numpy()
+        keys = self._get_edge_keys(edges)
+        self._valid_edge_keys.update(keys[valid].tolist())
+        if not np.all(valid):
+            self._invalid_edge_keys.update(keys[~valid].tolist())
+            self.graph.remove_edges(edges[~valid])
+        return valid
+
+    def _validate_lazy_paths(self, start_idx_list: List[int], goal_idx_list: List[int]):
+        """Check edges on shortest paths until every connected pair has a valid shortest path.
+
+        Each search checks all unchecked edges on the current shortest paths in one batch. Pairs
+        that get disconnected by removal of invalid edges have no path.
+        """
+        while True:
+            exists = self.graph.batch_path_exists(start_idx_list, goal_idx_list)
+            idx_list = [i for i in range(len(exists)) if exists[i]]
+            if len(idx_list) == 0:
+                return
+            path_list, _ = self.graph.get_batch_shortest_path(
+                [start_idx_list[i] for i in idx_list], [goal_idx_list[i] for i in idx_list]
+            )
+            path_edges = [np.stack((p[:-1], p[1:]), axis=-1) for p in path_list if len(p) > 1]
+            if len(path_edges) == 0:
+                return
+            path_edges = np.concatenate(path_edges, axis=0)
+            _, unique_idx = np.unique(self._get_edge_keys(path_edges), return_index=True)
+            unchecked_edges = self._get_unchecked_edges(path_edges[unique_idx])
+            if unchecked_edges.shape[0] == 0:
+                return
+            self._check_lazy_edges(unchecked_edges)
+
+    def _get_edges_near_aabbs(
+        self, line_vec: torch.Tensor, obstacle_aabbs: torch.Tensor, margin: float = 0.05
+    ) -> torch.Tensor:
+        b, h, _ = line_vec.shape
+        q = line_vec.view(b * h, self.dof)
+        kinematics = self.safety_rollout_fn.kinematics
+        near = []
+        for start in range(0, q.shape[0], self.max_buffer):
+            spheres = kinematics.get_state(
+                q[start : start + self.max_buffer]
+            ).link_spheres_tensor.view(-1, kinematics.total_spheres, 1, 4)
+            closest = torch.max(
+                torch.min(spheres[..., :3], obstacle_aabbs[:, 1]), obstacle_aabbs[:, 0]
+            )
+            dist = torch.norm(spheres[..., :3] - closest, dim=-1)
+            hit = (dist <= spheres[..., 3] + margin) & (spheres[..., 3] > 0.0)
+            near.append(torch.any(hit.view(hit.shape[0], -1), dim=-1))
+        return torch.any(torch.cat(near).view(b, h), dim=-1)
+
+    def get_roadmap_hash(self) -> str:
+        """Hash robot kinematics and planner parameters that a saved roadmap depends on."""
+        kinematics_config = self.safety_rollout_fn.kinematics.kinematics_config
+        return get_data_hash(
+            [
+                self.dof,
+                self.bounds,
+                self.distance_weight,
+                kinematics_config.fixed_transforms,
+                kinematics_config.joint_map_type,
+                kinematics_config.link_spheres,
+                kinematics_config.joint_names,
+                kinematics_config.lock_jointstate.position
+                if kinematics_config.lock_jointstate is not None
+                else None,
+            ]
+        )
+
+    def save_roadmap(self, file_path: str):
+        """Save nodes and edges of roadmap to a folder, see :py:mod:`curobo.graph.roadmap_cache`.
+
+        Pending world changes are validated before saving so that stored edges are collision free
+        in the world given by the stored obstacle signatures. Unchecked lazy edges are also
+        checked before saving.
+        """
+        self.revalidate_graph()
+        if self.lazy_edge_validation:
+            unchecked_edges = self._get_unchecked_edges(self.graph.get_edges())
+            if unchecked_edges.shape[0] > 0:
+                self._check_lazy_edges(unchecked_edges)
+        meta_data = {
+            "robot_hash": self.get_roadmap_hash(),
+            "world_signatures": self._world_signatures,
+        }
+        save_roadmap(
+            file_path,
+            self.path[: self.i, : self.dof].cpu().numpy(),
+            self.graph.get_edges(),
+            meta_data,
+        )
+
+    def load_roadmap(self, file_path: str) -> bool:
+        """Load roadmap saved with :py:meth:`save_roadmap`, replacing current roadmap.
+
+        Edges are revalidated lazily against obstacles that differ from the world the roadmap was
+        saved with.
+
+        Returns:
+            True if roadmap was loaded, False if not found or robot configuration has changed.
+        """
+        data = load_roadmap(file_path)
+        if data is None:
+            log_warn("Roadmap not found: " + file_path)
+            return False
+        nodes, edges, meta_data = data
+        if meta_data["robot_hash"] != self.get_roadmap_hash():
+            log_warn("Roadmap was saved with a different robot configuration, not loading")
+            return False
+        if nodes.shape[0] >= self.max_nodes:
+            log_warn("Roadmap has more nodes than max_nodes, not loading")
+            return False
+        self.reset_buffer()
+        self.i = nodes.shape[0]
+        self.path[: self.i, : self.dof] = self.tensor_args.to_device(np.asarray(nodes))
+        self.path[: self.i, self.dof + 1] = torch.arange(
+            self.i, device=self.tensor_args.device, dtype=self.tensor_args.dtype
+        )
+        self.graph.add_edges(edges)
+        self.graph.add_nodes(list(range(self.i)))
+        self.graph.update_graph()
+        self._update_node_index()
+
+        # compare world at save time with current world:
+        saved_signatures = meta_data["world_signatures"]
+        self._world_signatures = saved_signatures
+        self.update_world()
+        return True
+
     def _get_graph_shortest_path(self, start_node_idx, goal_node_idx, return_length=False):
         # st_time = time.time()
         path = self.graph.get_shortest_path(
@@ -557,17 +865,10 @@ class GraphPlanBase(GraphConfig):
     def batch_get_graph_shortest_path(self, start_idx_list, goal_idx_list, return_length=False):
         if len(start_idx_list) != len(goal_idx_list):
             raise ValueError("Start and Goal idx length are not equal")
-        path_list = []
-        cmax_list = []
-        for i in range(len(start_idx_list)):
-            path = self._get_graph_shortest_path(
-                start_idx_list[i], goal_idx_list[i], return_length=return_length
-            )
-            if return_length:
-                path_list.append(path[0])
-                cmax_list.append(path[1])
-            else:
-                path_list.append(path)
+        if self.lazy_edge_validation:
+            self._validate_lazy_paths(start_idx_list, goal_idx_list)
+        # shortest paths from all start nodes are computed with a single graph search:
+        path_list, cmax_list = self.graph.get_batch_shortest_path(start_idx_list, goal_idx_list)
         if return_length:
             return path_list, cmax_list
         return path_list
@@ -625,9 +926,9 @@ class GraphPlanBase(GraphConfig):
     def batch_path_exists(self, start_idx_list, goal_idx_list, all_paths=False):
         if len(start_idx_list) != len(goal_idx_list):
             raise ValueError("Start and Goal idx length are not equal")
-        path_label = []
-        for i in range(len(start_idx_list)):
-            path_label.append(self.path_exists(start_idx_list[i], goal_idx_list[i]))
+        if self.lazy_edge_validation:
+            self._validate_lazy_paths(start_idx_list, goal_idx_list)
+        path_label = self.graph.batch_path_exists(start_idx_list, goal_idx_list)
         if all_paths:
             label = all(path_label)
         else:
@@ -639,6 +940,7 @@ class GraphPlanBase(GraphConfig):
         start_time = time.time()
 
         try:
+            self.revalidate_graph()
             path = self._find_paths(x_init, x_goal)
             path.success = torch.as_tensor(
                 path.success, device=self.tensor_args.device, dtype=torch.bool
@@ -688,6 +990,8 @@ class GraphPlanBase(GraphConfig):
 
     def reset_graph(self):
         self.graph.reset_graph()
+        self._valid_edge_keys.clear()
+        self._invalid_edge_keys.clear()
 
     @profiler.record_function("geometric_planner/compute_distance")
     def _distance(self, pt, batch_pts, norm=True):
@@ -699,6 +1003,13 @@ class GraphPlanBase(GraphConfig):
     def distance(self, pt, batch_pts, norm=True):
         return self._distance(pt, batch_pts, norm=norm)
 
+    def _use_node_index(self) -> bool:
+        return self.i >= self.spatial_index_min_nodes
+
+    def _update_node_index(self):
+        if self._use_node_index():
+            self._node_index.update(self.path[:, : self.dof], self.i)
+
     def _hybrid_nearest(self, sample_node, path, radius, k_n=10):
         # compute distance:
         dist = self._distance(sample_node[..., : self.dof], path[:, : self.dof])
@@ -708,12 +1019,22 @@ class GraphPlanBase(GraphConfig):
             nodes = path[idx]  # , idx
         return nodes
 
-    def _nearest(self, sample_point, current_graph):
+    def _nearest(self, sample_point, current_graph=None):
+        if current_graph is None:
+            if self._use_node_index():
+                _, idx = self._node_index.nearest(sample_point[..., : self.dof].view(-1, self.dof))
+                return self.path[idx[0]], idx[0]
+            current_graph = self.path[: self.i]
         dist = self._distance(sample_point[..., : self.dof], current_graph[:, : self.dof])
         _, idx = torch.min(dist, 0)
         return current_graph[idx], idx
 
-    def _k_nearest(self, sample_point, current_graph, k=10):
+    def _k_nearest(self, sample_point, current_graph=None, k=10):
+        if current_graph is None:
+            if self._use_node_index():
+                _, idx = self._node_index.knn(sample_point[..., : self.dof].view(-1, self.dof), k)
+                return self.path[idx[0]]
+            current_graph = self.path[: self.i]
         dist = self._distance(sample_point[..., : self.dof], current_graph[:, : self.dof])
         # give the k nearest:
         # get_top_k(dist, k)
@@ -721,7 +1042,12 @@ class GraphPlanBase(GraphConfig):
         return current_graph[idx]  # , idx
 
     @profiler.record_function("geometric_planner/k_nearest")
-    def _batch_k_nearest(self, sample_point, current_graph, k=10):
+    def _batch_k_nearest(self, sample_point, current_graph=None, k=10):
+        if current_graph is None:
+            if self._use_node_index():
+                _, idx = self._node_index.knn(sample_point[:, : self.dof], k)
+                return self.path[idx]
+            current_graph = self.path[: self.i]
         dist = self._distance(
             sample_point[:, : self.dof].unsqueeze(1), current_graph[:, : self.dof]
         )
@@ -730,7 +1056,14 @@ class GraphPlanBase(GraphConfig):
         _, idx = torch.topk(dist, k, largest=False, dim=-1)
         return current_graph[idx]  # , idx
 
-    def _near(self, sample_point, current_graph, radius):
+    def _near(self, sample_point, current_graph=None, radius=0.1):
+        if current_graph is None:
+            if self._use_node_index():
+                idx = self._node_index.radius(
+                    sample_point[..., : self.dof].view(-1, self.dof), radius
+                )[0]
+                return self.path[idx]
+            current_graph = self.path[: self.i]
         dist = self._distance(sample_point[..., : self.dof], current_graph[:, : self.dof])
         nodes = current_graph[dist < radius]
         return nodes
@@ -827,19 +1160,18 @@ class GraphPlanBase(GraphConfig):
     def _add_batch_edges_to_graph(self, new_nodes, start_nodes, lazy=False, add_exact_node=False):
         # add new nodes to graph:
         node_set = self.add_nodes_to_graph(new_nodes[:, : self.dof], add_exact_node=add_exact_node)
-        # now connect start nodes to new nodes:
-        edge_list = []
-        edge_distance = (
-            self.distance(start_nodes[:, : self.dof], node_set[:, : self.dof])
-            .to(device="cpu")
-            .tolist()
+        # now connect start nodes to new nodes, edges are copied to host in one transfer:
+        edge_distance = self.distance(start_nodes[:, : self.dof], node_set[:, : self.dof])
+        edge_list = torch.stack(
+            (start_nodes[:, self.dof + 1], node_set[:, self.dof + 1], edge_distance), dim=-1
         )
-        start_idx_list = start_nodes[:, self.dof + 1].to(device="cpu", dtype=torch.int64).tolist()
-        goal_idx_list = node_set[:, self.dof + 1].to(device="cpu", dtype=torch.int64).tolist()
-        edge_list = [
-            [start_idx_list[x], goal_idx_list[x], edge_distance[x]]
-            for x in range(node_set.shape[0])
-        ]
+        if lazy and len(self._invalid_edge_keys) > 0:
+            # skip edges that were found to be in collision:
+            edge_list = edge_list.cpu().numpy()
+            invalid_keys = np.fromiter(
+                self._invalid_edge_keys, dtype=np.int64, count=len(self._invalid_edge_keys)
+            )
+            edge_list = edge_list[~np.isin(self._get_edge_keys(edge_list), invalid_keys)]
         self.graph.add_edges(edge_list)
         return True
 
@@ -861,10 +1193,15 @@ class GraphPlanBase(GraphConfig):
     @profiler.record_function("geometric_planner/add_unique_nodes")
     def _add_unique_nodes_to_graph(self, nodes, add_exact_node=False, skip_unique_check=False):
         if self.i > 0:  # and not skip_unique_check:
-            dist, idx = torch.min(
-                self.distance(nodes[:, : self.dof].unsqueeze(1), self.path[: self.i, : self.dof]),
-                dim=-1,
-            )
+            if self._use_node_index():
+                dist, idx = self._node_index.nearest(nodes[:, : self.dof])
+            else:
+                dist, idx = torch.min(
+                    self.distance(
+                        nodes[:, : self.dof].unsqueeze(1), self.path[: self.i, : self.dof]
+                    ),
+                    dim=-1,
+                )
             node_distance = self.node_similarity_distance
             if add_exact_node:
                 node_distance = 0.0
@@ -888,6 +1225,7 @@ class GraphPlanBase(GraphConfig):
             )
 
         self.i += i_new
+        self._update_node_index()
 
         return node_set
 
@@ -903,8 +1241,8 @@ class GraphPlanBase(GraphConfig):
         edge_set=None,
     ):
         # connect the batch to the existing graph
-        path = self.path
         dof = self.dof
+        lazy = lazy or self.lazy_edge_validation
 
         i = self.i
 
@@ -914,20 +1252,20 @@ class GraphPlanBase(GraphConfig):
             if connect_mode == "radius":
                 raise NotImplementedError
                 scale_radius = self.neighbour_radius * (np.log(i) / i) ** (1 / dof)
-                nodes = self._near(sample_node, path[:i, :], radius=scale_radius)
+                nodes = self._near(sample_node, radius=scale_radius)
                 if nodes.shape[0] == 0:
-                    nodes = self._k_nearest(sample_node, path[:i, :], k=k_n)
+                    nodes = self._k_nearest(sample_node, k=k_n)
             elif connect_mode == "nearest":
-                nodes = self._batch_k_nearest(x_set, path[:i, :], k=k_nn)[1:]
+                nodes = self._batch_k_nearest(x_set, k=k_nn)[1:]
             elif connect_mode == "knn":
                 # k_n = min(max(int(1 * 2.71828 * np.log(i)), k_nn), i)
                 # print(k_n, self.i, k_nn)
                 k_n = min(k_nn, i)
 
-                nodes = self._batch_k_nearest(x_set, path[:i, :], k=k_n)
+                nodes = self._batch_k_nearest(x_set, k=k_n)
             elif connect_mode == "hybrid":
                 k_n = min(max(int(1 * 2.71828 * np.log(i)), k_nn), i)
-                nodes = self._batch_k_nearest(x_set, path[:i, :], k=k_n)
+                nodes = self._batch_k_nearest(x_set, k=k_n)
                 print("Hybrid will default to knn")
             # you would end up with:
             # for each node in x_set, you would have n nodes to connect
@@ -0,0 +1,234 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""Array backed undirected roadmap used by graph planners.
+
+Edges are appended to growable COO buffers and compacted into a symmetric CSR matrix when the
+graph is queried. Shortest paths for a batch of start nodes are computed in a single call to
+:py:func:`scipy.sparse.csgraph.dijkstra`, which avoids per-node python overhead of networkx.
+"""
+
+# Standard Library
+from typing import List, Optional, Tuple, Union
+
+# Third Party
+import numpy as np
+import torch
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+
+
+class CsrGraph(object):
+    def __init__(self, initial_edge_buffer: int = 1024):
+        self._initial_edge_buffer = initial_edge_buffer
+        self.reset_graph()
+
+    def reset_graph(self):
+        # COO edge buffers, each undirected edge is stored once:
+        self._edge_src = np.zeros(self._initial_edge_buffer, dtype=np.int64)
+        self._edge_dst = np.zeros(self._initial_edge_buffer, dtype=np.int64)
+        self._edge_weight = np.zeros(self._initial_edge_buffer, dtype=np.float64)
+        self._n_edges = 0
+        self._n_nodes = 0
+        self._csr = None
+        self._component_labels = None
+        self._dirty = True
+
+    @property
+    def number_of_nodes(self) -> int:
+        return self._n_nodes
+
+    @property
+    def number_of_edges(self) -> int:
+        self.update_graph()
+        return self._n_edges
+
+    def add_node(self, i: int):
+        self._n_nodes = max(self._n_nodes, int(i) + 1)
+        self._dirty = True
+
+    def add_nodes(self, node_list: List[int]):
+        if len(node_list) > 0:
+            self.add_node(max(node_list))
+
+    def add_edge(self, start_i: int, end_i: int, weight: float):
+        self.add_edges([[start_i, end_i, weight]])
+
+    def add_edges(self, edge_list: Union[List[List[float]], np.ndarray, torch.Tensor]):
+        """Append edges to graph.
+
+        Args:
+            edge_list: edges as [n, 3] with start index, end index and weight. A list of
+                [start, end, weight] entries, a numpy array or a tensor are accepted. Tensors are
+                copied to host memory once for the whole batch.
+        """
+        if isinstance(edge_list, torch.Tensor):
+            edge_list = edge_list.detach().to(device="cpu", dtype=torch.float64).numpy()
+        edges = np.asarray(edge_list, dtype=np.float64).reshape(-1, 3)
+        n = edges.shape[0]
+        if n == 0:
+            return
+        self._reserve(self._n_edges + n)
+        self._edge_src[self._n_edges : self._n_edges + n] = edges[:, 0]
+        self._edge_dst[self._n_edges : self._n_edges + n] = edges[:, 1]
+        self._edge_weight[self._n_edges : self._n_edges + n] = edges[:, 2]
+        self._n_edges += n
+        self._n_nodes = max(self._n_nodes, int(np.max(edges[:, :2])) + 1)
+        self._dirty = True
+
+    def remove_edges(self, edge_list: Union[List[List[float]], np.ndarray, torch.Tensor]):
+        """Remove edges from graph, nodes are not removed.
+
+        Args:
+            edge_list: edges as [n, 2] or [n, 3] with start index and end index in the first two
+                columns. Direction of edges is ignored.
+        """
+        if isinstance(edge_list, torch.Tensor):
+            edge_list = edge_list.detach().to(device="cpu", dtype=torch.float64).numpy()
+        edges = np.asarray(edge_list, dtype=np.float64)
+        if edges.shape[0] == 0:
+            return
+        edges = edges.reshape(edges.shape[0], -1)[:, :2].astype(np.int64)
+        self.update_graph()
+        n = self._n_edges
+        base = self._n_nodes + 1
+        keys = self._edge_src[:n] * base + self._edge_dst[:n]
+        remove_keys = np.min(edges, axis=-1) * base + np.max(edges, axis=-1)
+        keep = ~np.isin(keys, remove_keys)
+        n = int(np.count_nonzero(keep))
+        self._edge_src[:n] = self._edge_src[: self._n_edges][keep]
+        self._edge_dst[:n] = self._edge_dst[: self._n_edges][keep]
+        self._edge_weight[:n] = self._edge_weight[: self._n_edges][keep]
+        self._n_edges = n
+        self._dirty = True
+
+    def _reserve(self, n_edges: int):
+        if n_edges <= self._edge_src.shape[0]:
+            return
+        new_size = max(n_edges, 2 * self._edge_src.shape[0])
+        for name in ["_edge_src", "_edge_dst", "_edge_weight"]:
+            old = getattr(self, name)
+            new = np.zeros(new_size, dtype=old.dtype)
+            new[: self._n_edges] = old[: self._n_edges]
+            setattr(self, name, new)
+
+    def update_graph(self):
+        """Remove duplicate edges and rebuild CSR adjacency if edges were added."""
+        if not self._dirty:
+            return
+        n = self._n_edges
+        src = np.minimum(self._edge_src[:n], self._edge_dst[:n])
+        dst = np.maximum(self._edge_src[:n], self._edge_dst[:n])
+        weight = self._edge_weight[:n]
+
+        # keep the smallest weight for duplicate edges:
+        order = np.lexsort((weight, dst, src))
+        src, dst, weight = src[order], dst[order], weight[order]
+        keep = np.ones(n, dtype=bool)
+        if n > 1:
+            keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+        src, dst, weight = src[keep], dst[keep], weight[keep]
+        n = src.shape[0]
+        self._edge_src[:n] = src
+        self._edge_dst[:n] = dst
+        self._edge_weight[:n] = weight
+        self._n_edges = n
+
+        # store both directions, build csr directly so that zero weight edges are kept:
+        row = np.concatenate((src, dst))
+        col = np.concatenate((dst, src))
+        data = np.concatenate((weight, weight))
+        order = np.argsort(row, kind="stable")
+        indptr = np.zeros(self._n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row, minlength=self._n_nodes), out=indptr[1:])
+        self._csr = csr_matrix(
+            (data[order], col[order], indptr), shape=(self._n_nodes, self._n_nodes)
+        )
+        self._component_labels = None
+        self._dirty = False
+
+    def get_edges(self, attribue="weight") -> np.ndarray:
+        """Get unique edges as [n, 3] array of start index, end index, weight."""
+        self.update_graph()
+        n = self._n_edges
+        return np.stack(
+            (self._edge_src[:n], self._edge_dst[:n], self._edge_weight[:n]), axis=-1
+        ).astype(np.float64)
+
+    def _get_component_labels(self) -> np.ndarray:
+        self.update_graph()
+        if self._component_labels is None:
+            _, self._component_labels = connected_components(self._csr, directed=False)
+        return self._component_labels
+
+    def path_exists(self, start_node_idx: int, goal_node_idx: int) -> bool:
+        return self.batch_path_exists([start_node_idx], [goal_node_idx])[0]
+
+    def batch_path_exists(self, start_idx_list: List[int], goal_idx_list: List[int]) -> List[bool]:
+        labels = self._get_component_labels()
+        start = np.asarray(start_idx_list, dtype=np.int64)
+        goal = np.asarray(goal_idx_list, dtype=np.int64)
+        valid = (start < self._n_nodes) & (goal < self._n_nodes)
+        exists = np.zeros(start.shape[0], dtype=bool)
+        exists[valid] = labels[start[valid]] == labels[goal[valid]]
+        return exists.tolist()
+
+    def get_shortest_path(self, start_node_idx: int, goal_node_idx: int, return_length=False):
+        path, length = self.get_batch_shortest_path([start_node_idx], [goal_node_idx])
+        if return_length:
+            return path[0], length[0]
+        return path[0]
+
+    def get_batch_shortest_path(
+        self, start_idx_list: List[int], goal_idx_list: List[int]
+    ) -> Tuple[List[List[int]], List[float]]:
+        """Compute shortest paths for all start and goal pairs with one multi-source search.
+
+        Raises:
+            ValueError: if there is no path between a start and goal pair.
+        """
+        self.update_graph()
+        start = np.asarray(start_idx_list, dtype=np.int64)
+        goal = np.asarray(goal_idx_list, dtype=np.int64)
+        if np.any(start >= self._n_nodes) or np.any(goal >= self._n_nodes):
+            raise ValueError("Node not found in graph")
+        sources, source_idx = np.unique(start, return_inverse=True)
+        dist, predecessors = dijkstra(
+            self._csr, directed=True, indices=sources, return_predecessors=True
+        )
+        lengths = dist[source_idx, goal]
+        if np.any(np.isinf(lengths)):
+            raise ValueError("No path between start and goal node")
+        paths = []
+        for i in range(start.shape[0]):
+            pred = predecessors[source_idx[i]]
+            node = goal[i]
+            path = [int(node)]
+            while node != start[i]:
+                node = pred[node]
+                path.append(int(node))
+            paths.append(path[::-1])
+        return paths, lengths.tolist()
+
+    def get_path_lengths(self, goal_node_idx: int) -> List[float]:
+        """Get shortest path length from all nodes to goal, -1 for nodes with no path."""
+        self.update_graph()
+        dist = dijkstra(self._csr, directed=True, indices=goal_node_idx)
+        reachable = np.nonzero(~np.isinf(dist))[0]
+        path_lengths = dist[: reachable[-1] + 1]
+        path_lengths[np.isinf(path_lengths)] = -1.0
+        return path_lengths.tolist()
+
+    def get_node_degree(self, node_idx: Optional[np.ndarray] = None) -> np.ndarray:
+        self.update_graph()
+        degree = np.diff(self._csr.indptr)
+        if node_idx is not None:
+            degree = degree[node_idx]
+        return degree
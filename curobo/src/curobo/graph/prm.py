@@ -512,6 +512,7 @@ class PRMStar(GraphPlanBase):
                 path[self.i + i, dof + 1] = self.i + i
 
             self.i = self.i + number_of_nodes
+            self._update_node_index()
         sample_nodes = v_set[:, : self.dof]
         self.connect_nodes(sample_nodes, lazy=lazy, k_nn=k_nn)
 
@@ -0,0 +1,125 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""Utilities to store a graph planner roadmap on disk and to track world changes.
+
+A roadmap is stored as a folder with ``nodes.npy`` ([n_nodes, dof]), ``edges.npy`` ([n_edges, 3]
+with start index, end index, weight) and ``roadmap.yml`` with the robot configuration hash and
+obstacle signatures of the world the edges were validated against. Arrays are saved in numpy format
+so that they can be memory mapped when loading.
+"""
+
+# Standard Library
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Third Party
+import numpy as np
+
+# CuRobo
+from curobo.geom.types import BloxMap, Obstacle, WorldConfig
+from curobo.util.helpers import get_data_hash
+from curobo.util_file import join_path, load_yaml, write_yaml
+
+_NODES_FILE = "nodes.npy"
+_EDGES_FILE = "edges.npy"
+_META_FILE = "roadmap.yml"
+_NON_GEOMETRIC_FIELDS = ["color", "texture_id", "texture", "material", "tensor_args"]
+
+
+def get_obstacle_signature(obstacle: Obstacle) -> Optional[str]:
+    """Hash geometric fields of an obstacle, returns None if obstacle cannot be tracked.
+
+    Visual properties are ignored. A :py:class:`~curobo.geom.types.BloxMap` is updated outside of
+    the world configuration, so it cannot be tracked with a signature.
+    """
+    if isinstance(obstacle, BloxMap):
+        return None
+    data = {k: v for k, v in vars(obstacle).items() if k not in _NON_GEOMETRIC_FIELDS}
+    data["type"] = type(obstacle).__name__
+    return get_data_hash(data)
+
+
+def get_world_signatures(world: Optional[WorldConfig]) -> Optional[Dict[str, str]]:
+    """Get signature of every obstacle in world indexed by obstacle name.
+
+    Returns:
+        dictionary of obstacle signatures, None if world contains untrackable obstacles.
+    """
+    if world is None or not isinstance(world, WorldConfig):
+        return None
+    signatures = {}
+    for obstacle in world.objects:
+        sig = get_obstacle_signature(obstacle)
+        if sig is None:
+            return None
+        signatures[obstacle.name] = sig
+    return signatures
+
+
+def get_obstacle_aabb(obstacle: Obstacle) -> np.ndarray:
+    """Compute axis aligned bounding box of obstacle in world frame as [2, 3] (min, max)."""
+    mesh = obstacle.get_trimesh_mesh()
+    if obstacle.pose is not None:
+        mesh.apply_transform(obstacle.get_transform_matrix())
+    return np.asarray(mesh.bounds, dtype=np.float64)
+
+
+def get_changed_obstacle_aabbs(
+    old_signatures: Dict[str, str], world: WorldConfig
+) -> List[np.ndarray]:
+    """Get bounding boxes of obstacles that were added or changed in world.
+
+    Removed obstacles are not returned as removing geometry cannot invalidate a collision free edge.
+    """
+    aabbs = []
+    for obstacle in world.objects:
+        if old_signatures.get(obstacle.name, None) != get_obstacle_signature(obstacle):
+            aabbs.append(get_obstacle_aabb(obstacle))
+    return aabbs
+
+
+def save_roadmap(file_path: str, nodes: np.ndarray, edges: np.ndarray, meta_data: Dict):
+    """Save roadmap to a folder.
+
+    Args:
+        file_path: folder to write roadmap files, created if it does not exist.
+        nodes: joint configuration of nodes, row index is the node index.
+        edges: edges as [n_edges, 3] with start index, end index, weight.
+        meta_data: robot configuration hash and world signatures.
+    """
+    os.makedirs(file_path, exist_ok=True)
+    np.save(join_path(file_path, _NODES_FILE), np.ascontiguousarray(nodes))
+    np.save(join_path(file_path, _EDGES_FILE), np.ascontiguousarray(edges, dtype=np.float64))
+    meta_data = dict(meta_data)
+    meta_data["n_nodes"] = int(nodes.shape[0])
+    meta_data["n_edges"] = int(edges.shape[0])
+    write_yaml(meta_data, join_path(file_path, _META_FILE))
+
+
+def load_roadmap(
+    file_path: str, mmap: bool = True
+) -> Optional[Tuple[np.ndarray, np.ndarray, Dict]]:
+    """Load roadmap saved with :py:func:`save_roadmap`.
+
+    Args:
+        file_path: roadmap folder.
+        mmap: memory map node and edge arrays instead of reading them into memory.
+
+    Returns:
+        nodes, edges and meta data, None if roadmap files are not found.
+    """
+    if not os.path.exists(join_path(file_path, _META_FILE)):
+        return None
+    mmap_mode = "r" if mmap else None
+    nodes = np.load(join_path(file_path, _NODES_FILE), mmap_mode=mmap_mode)
+    edges = np.load(join_path(file_path, _EDGES_FILE), mmap_mode=mmap_mode)
+    meta_data = load_yaml(join_path(file_path, _META_FILE))
+    return nodes, edges, meta_data
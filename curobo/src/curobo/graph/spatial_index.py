@@ -0,0 +1,156 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""Weighted configuration space index for nearest neighbour queries on roadmap nodes.
+
+Nodes are stored in a KD-tree built over weighted joint positions, such that euclidean distance in
+the tree matches :py:func:`curobo.graph.graph_base.compute_distance_norm_jit`. New nodes are
+appended to an unindexed tail that is searched densely on device and merged with tree results. The
+tree is rebuilt once the tail grows beyond a fraction of the indexed nodes, which keeps insertion
+amortized :math:`O(\\log N)` while queries stay :math:`O(k \\log N + T)` for a tail of size T.
+"""
+
+# Standard Library
+from typing import List, Tuple
+
+# Third Party
+import numpy as np
+import torch
+from scipy.spatial import cKDTree
+
+
+class WeightedNodeIndex:
+    def __init__(
+        self,
+        distance_weight: torch.Tensor,
+        rebuild_ratio: float = 0.25,
+        min_tail_nodes: int = 1024,
+    ):
+        """Initialize index.
+
+        Args:
+            distance_weight: weight per configuration space dimension, query results are on the
+                same device.
+            rebuild_ratio: tree is rebuilt when unindexed nodes exceed this ratio of indexed nodes.
+            min_tail_nodes: minimum number of unindexed nodes before tree is rebuilt.
+        """
+        self.distance_weight = distance_weight
+        self.rebuild_ratio = rebuild_ratio
+        self.min_tail_nodes = min_tail_nodes
+        self.reset()
+
+    def reset(self):
+        self._tree = None
+        self._n_tree = 0
+        self._n_nodes = 0
+        self._nodes = None
+
+    @property
+    def n_nodes(self) -> int:
+        return self._n_nodes
+
+    @property
+    def n_tree_nodes(self) -> int:
+        return self._n_tree
+
+    def update(self, nodes: torch.Tensor, n_nodes: int):
+        """Track nodes appended to buffer, rebuilding tree when unindexed tail is too large.
+
+        Args:
+            nodes: node buffer of shape [max_nodes, dof], row index is the node index. Rows below
+                the previously tracked count are assumed unchanged, use :py:meth:`rebuild` if
+                nodes were reindexed.
+            n_nodes: number of valid nodes in buffer.
+        """
+        self._nodes = nodes
+        self._n_nodes = n_nodes
+        if n_nodes - self._n_tree > max(self.min_tail_nodes, self.rebuild_ratio * self._n_tree):
+            self.rebuild(nodes, n_nodes)
+
+    def rebuild(self, nodes: torch.Tensor, n_nodes: int):
+        """Build tree over all valid nodes in buffer."""
+        self._nodes = nodes
+        self._n_nodes = n_nodes
+        self._n_tree = n_nodes
+        if n_nodes == 0:
+            self._tree = None
+            return
+        weighted_nodes = (nodes[:n_nodes] * self.distance_weight).detach()
+        self._tree = cKDTree(weighted_nodes.to(device="cpu", dtype=torch.float64).numpy())
+
+    def _tail_distance(self, query: torch.Tensor) -> torch.Tensor:
+        tail = self._nodes[self._n_tree : self._n_nodes]
+        return torch.norm((tail - query.unsqueeze(1)) * self.distance_weight, dim=-1)
+
+    def _query_tree(self, query: torch.Tensor, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        weighted_query = (query * self.distance_weight).detach()
+        dist, idx = self._tree.query(
+            weighted_query.to(device="cpu", dtype=torch.float64).numpy(), k=k
+        )
+        return dist.reshape(query.shape[0], k), idx.reshape(query.shape[0], k)
+
+    def knn(self, query: torch.Tensor, k: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Find k nearest nodes for a batch of queries.
+
+        Args:
+            query: query configurations of shape [batch, dof].
+            k: number of neighbours, should be less than or equal to number of nodes.
+
+        Returns:
+            distance and node index, each of shape [batch, k] sorted by increasing distance.
+        """
+        dist_list = []
+        idx_list = []
+        if self._n_tree > 0:
+            k_tree = min(k, self._n_tree)
+            dist, idx = self._query_tree(query, k_tree)
+            dist_list.append(torch.as_tensor(dist, device=query.device, dtype=query.dtype))
+            idx_list.append(torch.as_tensor(idx, device=query.device, dtype=torch.long))
+        if self._n_nodes > self._n_tree:
+            dist_list.append(self._tail_distance(query))
+            idx_list.append(
+                torch.arange(self._n_tree, self._n_nodes, device=query.device).expand(
+                    query.shape[0], -1
+                )
+            )
+        dist = torch.cat(dist_list, dim=-1)
+        idx = torch.cat(idx_list, dim=-1)
+        k = min(k, dist.shape[-1])
+        dist, k_idx = torch.topk(dist, k, largest=False, dim=-1)
+        return dist, torch.gather(idx, -1, k_idx)
+
+    def nearest(self, query: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Find nearest node for a batch of queries, returns distance and index of shape [batch]."""
+        dist, idx = self.knn(query, 1)
+        return dist[:, 0], idx[:, 0]
+
+    def radius(self, query: torch.Tensor, radius: float) -> List[torch.Tensor]:
+        """Find all nodes within radius of each query.
+
+        Returns:
+            list of node indices for every query in batch.
+        """
+        idx_list = [[] for _ in range(query.shape[0])]
+        if self._n_tree > 0:
+            weighted_query = (query * self.distance_weight).detach()
+            tree_idx = self._tree.query_ball_point(
+                weighted_query.to(device="cpu", dtype=torch.float64).numpy(), r=radius
+            )
+            idx_list = [list(x) for x in tree_idx]
+        out_idx = []
+        if self._n_nodes > self._n_tree:
+            tail_mask = (self._tail_distance(query) < radius).cpu()
+        for i in range(query.shape[0]):
+            idx = torch.as_tensor(idx_list[i], device=query.device, dtype=torch.long)
+            if self._n_nodes > self._n_tree:
+                tail_idx = torch.nonzero(tail_mask[i]).view(-1).to(device=query.device)
+                idx = torch.cat((idx, tail_idx + self._n_tree))
+            out_idx.append(idx)
+        return out_idx
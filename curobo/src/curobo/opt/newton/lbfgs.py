@@ -70,7 +70,7 @@ class LBFGSOpt(NewtonOptBase, LBFGSOptConfig):
         if config is not None:
             LBFGSOptConfig.__init__(self, **vars(config))
         NewtonOptBase.__init__(self)
-        if self.d_opt >= 1024 or self.history >= 512:
+        if (self.d_opt >= 1024 or self.history >= 512) and self.tensor_args.device.type != "cpu":
             log_warn("LBFGS: Not using LBFGS Cuda Kernel as d_opt>1024 or history>=512")
             self.use_cuda_kernel = False
         if self.history > self.d_opt:
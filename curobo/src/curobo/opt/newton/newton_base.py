@@ -95,7 +95,7 @@ class NewtonOptBase(Optimizer, NewtonOptConfig):
         self._out_best_c = None
         self._out_best_grad = None
         self.cu_opt_graph = None
-        if self.d_opt >= 1024:
+        if self.d_opt >= 1024 and self.tensor_args.device.type != "cpu":
             self.use_cuda_line_search_kernel = False
         if self.use_temporal_smooth:
             self._temporal_mat = build_fd_matrix(
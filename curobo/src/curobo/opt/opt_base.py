@@ -50,6 +50,10 @@ class OptimizerConfig:
         # check cuda graph version:
         if self.use_cuda_graph:
             self.use_cuda_graph = is_cuda_graph_available()
+        if self.tensor_args.device.type == "cpu":
+            # cuda graphs and cuda synchronization are not available for cpu tensors:
+            self.use_cuda_graph = False
+            self.sync_cuda_time = False
         if self.num_particles is None:
             self.num_particles = 1
 
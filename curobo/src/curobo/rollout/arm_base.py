@@ -438,6 +438,9 @@ class ArmBase(RolloutBase, ArmBaseConfig):
         Returns:
             _description_
         """
+        if self.tensor_args.device.type == "cpu":
+            # cuda graphs are not available for cpu tensors:
+            return self.get_metrics(state)
         if not self._metrics_cuda_graph_init:
             # create new cuda graph for metrics:
             self._cu_metrics_state_in = state.detach().clone()
@@ -543,8 +546,94 @@ class ArmBase(RolloutBase, ArmBaseConfig):
         metrics = self.constraint_fn(state, use_batch_env=use_batch_env)
         return metrics
 
+    @profiler.record_function("arm_base/rollout_constraint_cascade")
+    def rollout_constraint_cascade(
+        self, act_seq: torch.Tensor, use_batch_env: bool = True
+    ) -> RolloutMetrics:
+        """Compute feasibility by evaluating constraints in order of increasing cost.
+
+        Joint bounds are checked first. Kinematics and world collision with one bounding sphere
+        per link are computed for states within bounds. Sphere world collision is only computed
+        for states with bounding spheres in collision and self collision only for states that
+        are free of world collision. States are compacted between stages, so each stage runs on
+        a dense batch.
+
+        The feasible mask matches :meth:`rollout_constraint`. The constraint value of a rejected
+        state only contains the terms evaluated before it was rejected.
+
+        Args:
+            act_seq: actions, [batch, horizon, dof].
+            use_batch_env: query world collision in environment of every batch.
+
+        Returns:
+            metrics with feasible and constraint of shape [batch, horizon].
+        """
+        world_enabled = (
+            self.constraint_cfg.primitive_collision_cfg is not None
+            and self.primitive_collision_constraint.enabled
+        )
+        self_enabled = (
+            self.constraint_cfg.self_collision_cfg is not None
+            and self.robot_self_collision_constraint.enabled
+        )
+        b, h = act_seq.shape[0], act_seq.shape[1]
+        if world_enabled and self.primitive_collision_constraint.use_sweep and h > 1:
+            # swept collision depends on neighbouring timesteps, states cannot be compacted:
+            return self.rollout_constraint(act_seq, use_batch_env=use_batch_env)
+
+        # stage 1: joint bounds
+        self.dynamics_model.update_batch_size(b)
+        state_seq = self.dynamics_model.tensor_step(
+            self.start_state, act_seq, self.dynamics_model.state_seq
+        )
+        constraint = self.bound_constraint.forward(state_seq).view(b * h)
+        idx = torch.nonzero(constraint == 0.0).view(-1)
+        if idx.shape[0] > 0 and (world_enabled or self_enabled):
+            q = state_seq.position.view(b * h, -1)[idx]
+            robot_spheres = self.dynamics_model.robot_model.forward(q)[-1].unsqueeze(1)
+
+            if world_enabled:
+                env_query_idx = None
+                if use_batch_env and self._goal_buffer.batch_world_idx is not None:
+                    env_query_idx = self._goal_buffer.batch_world_idx.view(-1)
+                    env_query_idx = env_query_idx.repeat_interleave(h)[idx]
+                # stage 2: world collision with link bounding spheres
+                kinematics_config = self.kinematics.kinematics_config
+                coll_constraint = self.primitive_collision_constraint.bounding_sphere_fn(
+                    robot_spheres,
+                    kinematics_config.link_sphere_idx_map,
+                    kinematics_config.link_map.shape[0],
+                    env_query_idx=env_query_idx,
+                ).view(-1)
+                check_idx = torch.nonzero(coll_constraint > 0.0).view(-1)
+
+                # stage 3: world collision with robot spheres
+                if check_idx.shape[0] > 0:
+                    coll_constraint = self.primitive_collision_constraint.forward(
+                        robot_spheres[check_idx].contiguous(),
+                        env_query_idx=(
+                            None if env_query_idx is None else env_query_idx[check_idx]
+                        ),
+                    ).view(-1)
+                    constraint.index_add_(0, idx[check_idx], coll_constraint)
+                    free = constraint[idx] == 0.0
+                    idx = idx[free]
+                    robot_spheres = robot_spheres[free]
+
+            # stage 4: self collision
+            if self_enabled and idx.shape[0] > 0:
+                self_constraint = self.robot_self_collision_constraint.forward(
+                    robot_spheres.contiguous()
+                ).view(-1)
+                constraint.index_add_(0, idx, self_constraint)
+
+        constraint = constraint.view(b, h)
+        return RolloutMetrics(constraint=constraint, feasible=constraint == 0.0)
+
     def rollout_constraint_cuda_graph(self, act_seq: torch.Tensor, use_batch_env: bool = True):
         # TODO: move this to RolloutBase
+        if self.tensor_args.device.type == "cpu":
+            return self.rollout_constraint(act_seq, use_batch_env=use_batch_env)
         if not self._rollout_constraint_cuda_graph_init:
             # create new cuda graph for metrics:
             self._cu_rollout_constraint_act_in = act_seq.clone()
@@ -21,7 +21,7 @@ import warp as wp
 from curobo.cuda_robot_model.types import JointLimits
 from curobo.types.robot import JointState
 from curobo.types.tensor import T_DOF
-from curobo.util.warp import init_warp
+from curobo.util.warp import init_warp, warp_stream_from_torch
 
 # Local Folder
 from .cost_base import CostBase, CostConfig
@@ -388,7 +388,7 @@ class WarpBoundSmoothFunction(torch.autograd.Function):
                 dof,
             ],
             device=wp_device,
-            stream=wp.stream_from_torch(vel.device),
+            stream=warp_stream_from_torch(vel.device),
         )
         ctx.save_for_backward(out_gp, out_gv, out_ga, out_gj)
         # out_c = out_cost
@@ -499,7 +499,7 @@ class WarpBoundFunction(torch.autograd.Function):
                 dof,
             ],
             device=wp_device,
-            stream=wp.stream_from_torch(vel.device),
+            stream=warp_stream_from_torch(vel.device),
         )
         ctx.save_for_backward(out_gp, out_gv, out_ga, out_gj)
         # out_c = out_cost
@@ -589,7 +589,7 @@ class WarpBoundPosFunction(torch.autograd.Function):
                 dof,
             ],
             device=wp_device,
-            stream=wp.stream_from_torch(pos.device),
+            stream=warp_stream_from_torch(pos.device),
         )
         ctx.save_for_backward(out_gp)
         # cost = torch.linalg.norm(out_cost, dim=-1)
@@ -18,7 +18,7 @@ import torch
 import warp as wp
 
 # CuRobo
-from curobo.util.warp import init_warp
+from curobo.util.warp import init_warp, warp_stream_from_torch
 
 # Local Folder
 from .cost_base import CostBase, CostConfig
@@ -178,7 +178,7 @@ class L2DistFunction(torch.autograd.Function):
                 dof,
             ],
             device=wp_device,
-            stream=wp.stream_from_torch(pos.device),
+            stream=warp_stream_from_torch(pos.device),
         )
         # cost = torch.linalg.norm(out_cost_v, dim=-1)
         # if pos.requires_grad:
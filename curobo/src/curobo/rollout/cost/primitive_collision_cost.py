@@ -98,6 +98,7 @@ class PrimitiveCollisionCost(CostBase, PrimitiveCollisionCostConfig):
         self.int_mat = None
         self._fd_matrix = None
         self._collision_query_buffer = CollisionQueryBuffer()
+        self._bounding_sphere_query_buffer = CollisionQueryBuffer()
 
     def sweep_kernel_fn(self, robot_spheres_in, env_query_idx: Optional[torch.Tensor] = None):
         self._collision_query_buffer.update_buffer_shape(
@@ -176,6 +177,46 @@ class PrimitiveCollisionCost(CostBase, PrimitiveCollisionCostConfig):
             cost = weight_distance(dist, self.weight, self.sum_distance)
         return cost
 
+    def bounding_sphere_fn(
+        self,
+        robot_spheres_in: torch.Tensor,
+        sphere_link_idx: torch.Tensor,
+        n_links: int,
+        env_query_idx: Optional[torch.Tensor] = None,
+    ):
+        """Compute discrete collision cost with one bounding sphere per link.
+
+        The bounding sphere of a link contains all spheres of the link, so a cost of zero
+        guarantees that :meth:`discrete_fn` is also zero for the same robot spheres. This is used
+        to reject collision free configurations by checking fewer spheres.
+
+        Args:
+            robot_spheres_in: robot spheres in world frame, [batch, horizon, n_spheres, 4].
+            sphere_link_idx: link index of every sphere, [n_spheres].
+            n_links: number of links in the kinematic tree.
+            env_query_idx: environment index for every batch, used with batched worlds.
+
+        Returns:
+            collision cost, [batch, horizon].
+        """
+        bounding_spheres = get_link_bounding_spheres(robot_spheres_in, sphere_link_idx, n_links)
+        self._bounding_sphere_query_buffer.update_buffer_shape(
+            bounding_spheres.shape, self.tensor_args, self.world_coll_checker.collision_types
+        )
+        dist = self.coll_check_fn(
+            bounding_spheres,
+            self._bounding_sphere_query_buffer,
+            self.weight,
+            env_query_idx=env_query_idx,
+            activation_distance=self.activation_distance,
+            return_loss=self.return_loss,
+        )
+        if self.classify:
+            cost = weight_collision(dist, self.weight, self.sum_distance)
+        else:
+            cost = weight_distance(dist, self.weight, self.sum_distance)
+        return cost
+
     def update_dt(self, dt: Union[float, torch.Tensor]):
         self.speed_dt[:] = dt  # / self._og_speed_dt
         return super().update_dt(dt)
@@ -184,6 +225,39 @@ class PrimitiveCollisionCost(CostBase, PrimitiveCollisionCostConfig):
         return self._collision_query_buffer.get_gradient_buffer()
 
 
+def get_link_bounding_spheres(
+    spheres: torch.Tensor, sphere_link_idx: torch.Tensor, n_links: int
+) -> torch.Tensor:
+    """Compute a sphere per link that contains all enabled spheres of the link.
+
+    Bounding spheres are centered at the mean of sphere centers of the link. Spheres with
+    negative radius are disabled and are ignored.
+
+    Args:
+        spheres: spheres in world frame, [batch, horizon, n_spheres, 4].
+        sphere_link_idx: link index of every sphere, [n_spheres].
+        n_links: number of links.
+
+    Returns:
+        bounding spheres, [batch, horizon, n_links, 4]. Links without enabled spheres get a
+        negative radius.
+    """
+    link_idx = sphere_link_idx.to(dtype=torch.long)
+    b, h, n, _ = spheres.shape
+    enabled = spheres[..., 3:] >= 0.0
+    weight = enabled.to(dtype=spheres.dtype)
+    count = torch.zeros((b, h, n_links, 1), device=spheres.device, dtype=spheres.dtype)
+    count.index_add_(2, link_idx, weight)
+    center = torch.zeros((b, h, n_links, 3), device=spheres.device, dtype=spheres.dtype)
+    center.index_add_(2, link_idx, spheres[..., :3] * weight)
+    center = center / torch.clamp(count, min=1.0)
+    extent = torch.linalg.norm(spheres[..., :3] - center[:, :, link_idx], dim=-1)
+    extent = torch.where(enabled[..., 0], extent + spheres[..., 3], -1.0)
+    radius = torch.full((b, h, n_links), -1.0, device=spheres.device, dtype=spheres.dtype)
+    radius = radius.scatter_reduce(2, link_idx.expand(b, h, n), extent, reduce="amax")
+    return torch.cat((center, radius.unsqueeze(-1)), dim=-1).contiguous()
+
+
 @torch.jit.script
 def weight_sweep_distance(int_mat, dist, weight, sum_cost: bool):
     dist = torch.sum(dist, dim=-1)
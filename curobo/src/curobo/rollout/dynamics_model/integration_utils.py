@@ -17,6 +17,7 @@ from packaging import version
 
 # CuRobo
 from curobo.curobolib.tensor_step import (
+    tensor_step_acc_bwd,
     tensor_step_acc_fwd,
     tensor_step_acc_idx_fwd,
     tensor_step_pos_clique_bwd,
@@ -681,8 +682,7 @@ class AccelerationTensorStepKernel(torch.autograd.Function):
         u_grad = None
         (traj_dt, out_grad_position) = ctx.saved_tensors
         if ctx.needs_input_grad[0]:
-            raise NotImplementedError()
-            u_grad = tensor_step_pos_clique_bwd(
+            u_grad = tensor_step_acc_bwd(
                 out_grad_position,
                 grad_out_p,
                 grad_out_v,
@@ -692,6 +692,7 @@ class AccelerationTensorStepKernel(torch.autograd.Function):
                 out_grad_position.shape[0],
                 out_grad_position.shape[1],
                 out_grad_position.shape[2],
+                use_rk2=True,
             )
         return u_grad, None, None, None, None, None, None, None, None, None
 
@@ -735,8 +736,7 @@ class AccelerationTensorStepIdxKernel(torch.autograd.Function):
         u_grad = None
         (traj_dt, out_grad_position) = ctx.saved_tensors
         if ctx.needs_input_grad[0]:
-            raise NotImplementedError()
-            u_grad = tensor_step_pos_clique_bwd(
+            u_grad = tensor_step_acc_bwd(
                 out_grad_position,
                 grad_out_p,
                 grad_out_v,
@@ -746,6 +746,7 @@ class AccelerationTensorStepIdxKernel(torch.autograd.Function):
                 out_grad_position.shape[0],
                 out_grad_position.shape[1],
                 out_grad_position.shape[2],
+                use_rk2=False,
             )
         return u_grad, None, None, None, None, None, None, None, None, None, None
 
@@ -9,8 +9,17 @@
 # its affiliates is strictly prohibited.
 #
 # Standard Library
+import hashlib
+import importlib.util
+import sys
 from collections import defaultdict
-from typing import List
+from dataclasses import fields, is_dataclass
+from types import ModuleType
+from typing import Any, List
+
+# Third Party
+import numpy as np
+import torch
 
 
 def default_to_regular(d):
@@ -27,3 +36,64 @@ def list_idx_if_not_none(d_list: List, idx: int):
         else:
             idx_list.append(None)
     return idx_list
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Import a module on first attribute access.
+
+    Use this for heavy dependencies that are only needed by a few functions of a module, so that
+    importing the module stays fast. Annotations using the module should be postponed with
+    ``from __future__ import annotations``.
+
+    Args:
+        name: absolute name of module.
+
+    Returns:
+        module, which is executed when one of its attributes is accessed.
+
+    Raises:
+        ModuleNotFoundError: if module is not installed.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError("No module named " + name, name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def _update_hash(hash_fn, data: Any):
+    if data is None:
+        hash_fn.update(b"none")
+    elif isinstance(data, torch.Tensor):
+        _update_hash(hash_fn, data.detach().cpu().numpy())
+    elif isinstance(data, np.ndarray):
+        hash_fn.update(str(data.dtype).encode() + str(data.shape).encode())
+        hash_fn.update(np.ascontiguousarray(data).tobytes())
+    elif isinstance(data, (list, tuple)):
+        for d in data:
+            _update_hash(hash_fn, d)
+    elif isinstance(data, dict):
+        for k in sorted(data.keys()):
+            _update_hash(hash_fn, k)
+            _update_hash(hash_fn, data[k])
+    elif is_dataclass(data) and not isinstance(data, type):
+        hash_fn.update(type(data).__name__.encode())
+        for f in fields(data):
+            _update_hash(hash_fn, f.name)
+            _update_hash(hash_fn, getattr(data, f.name))
+    else:
+        hash_fn.update(repr(data).encode())
+
+
+def get_data_hash(data: Any) -> str:
+    """Compute a stable hash of nested tensors, arrays, lists, dictionaries, dataclasses and
+    scalars."""
+    hash_fn = hashlib.sha256()
+    _update_hash(hash_fn, data)
+    return hash_fn.hexdigest()
@@ -16,10 +16,8 @@ from typing import Dict, List, Optional
 
 # Third Party
 import numpy as np
-import scipy.interpolate as si
 import torch
 import torch.autograd.profiler as profiler
-from scipy.stats.qmc import Halton
 from torch.distributions.multivariate_normal import MultivariateNormal
 
 # CuRobo
@@ -144,6 +142,9 @@ def bspline(c_arr, t_arr=None, n=100, degree=3):
         t_arr = np.linspace(0, cv.shape[0], cv.shape[0])
     else:
         t_arr = t_arr.cpu().numpy()
+    # Third Party
+    import scipy.interpolate as si
+
     spl = si.splrep(t_arr, cv, k=degree, s=0.5)
 
     xx = np.linspace(0, cv.shape[0], n)
@@ -417,6 +418,9 @@ class HaltonGenerator:
     ):
         self._seed = seed
         self.tensor_args = tensor_args
+        # Third Party
+        from scipy.stats.qmc import Halton
+
         self.sequencer = Halton(d=ndims, seed=seed, scramble=False)
         # scale samples by joint range:
         up_bounds = self.tensor_args.to_device(up_bounds)
@@ -617,6 +621,9 @@ def generate_halton_samples(
         for dim in range(ndims):
             samples[:, dim] = generate_van_der_corput_samples_batch(idx_batch, bases[dim])
     else:
+        # Third Party
+        from scipy.stats.qmc import Halton
+
         sequencer = Halton(d=ndims, seed=seed, scramble=False)
         samples = torch.tensor(
             sequencer.random(num_samples), device=tensor_args.device, dtype=tensor_args.dtype
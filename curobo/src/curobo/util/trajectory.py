@@ -10,8 +10,12 @@
 #
 # Standard Library
 import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 # Third Party
 import numpy as np
@@ -156,7 +160,7 @@ def get_batch_interpolated_trajectory(
     if out_traj_state.position.shape[1] < steps_max:
         log_error("Interpolation buffer shape is smaller than steps_max")
 
-    if kind in [InterpolateType.LINEAR, InterpolateType.CUBIC]:
+    if kind in [InterpolateType.LINEAR, InterpolateType.CUBIC, InterpolateType.QUINTIC]:
         # plot and save:
         out_traj_state = get_cpu_linear_interpolation(
             raw_traj,
@@ -191,27 +195,114 @@ def get_batch_interpolated_trajectory(
 def get_cpu_linear_interpolation(
     raw_traj, traj_steps, out_traj_state, kind: InterpolateType, opt_dt=None, interpolation_dt=None
 ):
-    cpu_traj = raw_traj.position.cpu().numpy()
-    out_traj = out_traj_state.position
-    retimed_traj = out_traj.cpu()
-    for k in range(out_traj.shape[0]):
-        tstep = traj_steps[k].item()
-        opt_d = opt_dt[k].item()
-        for i in range(cpu_traj.shape[-1]):
-            retimed_traj[k, :tstep, i] = linear_smooth(
-                cpu_traj[k, :, i],
-                y=None,
-                n=tstep,
-                kind=kind,
-                last_step=tstep,
-                opt_dt=opt_d,
-                interpolation_dt=interpolation_dt,
-            )
-        retimed_traj[k, tstep:, :] = retimed_traj[k, tstep - 1 : tstep, :]
-    out_traj_state.position[:] = retimed_traj.to(device=raw_traj.position.device)
+    """Interpolate a batch of trajectories with :py:func:`get_batch_spline_interpolation`.
+
+    This was previously computed on cpu, one joint at a time. The name is kept for compatibility,
+    interpolation now runs on the device of raw_traj.
+    """
+    out_traj_state.position[:] = get_batch_spline_interpolation(
+        raw_traj.position,
+        traj_steps,
+        opt_dt,
+        interpolation_dt,
+        out_traj_state.position.shape[1],
+        kind,
+    )
     return out_traj_state
 
 
+@lru_cache(maxsize=32)
+def _get_spline_coefficient_matrix(
+    n_knots: int, degree: int, device: torch.device, dtype: torch.dtype
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Get linear map from knot values to piecewise polynomial coefficients of interpolating spline.
+
+    The spline interpolates values at unit spaced knots 0, 1, ..., n_knots - 1 with the same
+    boundary conditions as :py:func:`scipy.interpolate.make_interp_spline` (not-a-knot), which is
+    also used by :py:class:`scipy.interpolate.interp1d`. As interpolation is invariant to scaling
+    the knot spacing, the same matrix is used for all trajectories with n_knots points.
+
+    Returns:
+        breakpoints of polynomial pieces [n_pieces + 1] and coefficient matrix
+        [n_pieces, degree + 1, n_knots] where coefficient m multiplies (s - breakpoint)^m.
+    """
+    # Third Party
+    from scipy import interpolate
+
+    knots = np.arange(n_knots, dtype=np.float64)
+    spline = interpolate.make_interp_spline(knots, np.eye(n_knots), k=degree)
+    breaks = np.unique(spline.t[degree : spline.t.shape[0] - degree])
+    coeffs = np.stack(
+        [spline(breaks[:-1], nu=m) / math.factorial(m) for m in range(degree + 1)], axis=1
+    )
+    return (
+        torch.as_tensor(breaks, device=device, dtype=dtype),
+        torch.as_tensor(coeffs, device=device, dtype=dtype),
+    )
+
+
+@profiler.record_function("interpolation/batch_spline")
+def get_batch_spline_interpolation(
+    raw_position: torch.Tensor,
+    traj_steps: torch.Tensor,
+    knot_dt: torch.Tensor,
+    interpolation_dt: float,
+    out_steps: int,
+    kind: InterpolateType = InterpolateType.LINEAR,
+) -> torch.Tensor:
+    """Interpolate a batch of trajectories with linear, cubic or quintic splines on device.
+
+    Output is numerically equivalent to calling :py:func:`linear_smooth` for every trajectory and
+    joint, with all trajectories and joints interpolated at once.
+
+    Args:
+        raw_position: knot positions of shape [batch, horizon, dof], spaced by knot_dt in time.
+        traj_steps: number of interpolated timesteps for each trajectory [batch]. Timesteps after
+            this are filled with the last interpolated position.
+        knot_dt: time between knots for each trajectory [batch].
+        interpolation_dt: time between interpolated timesteps.
+        out_steps: number of timesteps in output.
+        kind: spline type, one of LINEAR, CUBIC or QUINTIC.
+
+    Returns:
+        interpolated positions of shape [batch, out_steps, dof].
+    """
+    degree = {InterpolateType.LINEAR: 1, InterpolateType.CUBIC: 3, InterpolateType.QUINTIC: 5}[
+        kind
+    ]
+    b, horizon, dof = raw_position.shape
+    # spline is evaluated in double precision to match scipy:
+    out_dtype = raw_position.dtype
+    raw_position = raw_position.to(dtype=torch.float64)
+    breaks, coeffs = _get_spline_coefficient_matrix(
+        horizon, degree, raw_position.device, torch.float64
+    )
+    knot_dt = torch.as_tensor(knot_dt, device=raw_position.device, dtype=torch.float64)
+    traj_steps = torch.as_tensor(traj_steps, device=raw_position.device)
+
+    # query time in units of knots, steps beyond traj_steps repeat the last step:
+    steps = torch.arange(out_steps, device=raw_position.device).view(1, out_steps)
+    steps = torch.minimum(steps, traj_steps.view(b, 1) - 1).to(dtype=raw_position.dtype)
+    query = steps * interpolation_dt / knot_dt.view(b, 1)
+
+    piece = torch.clamp(
+        torch.searchsorted(breaks, query.contiguous(), right=True) - 1, 0, coeffs.shape[0] - 1
+    )
+    local_query = (query - breaks[piece]).unsqueeze(-1)
+
+    # polynomial coefficients of each piece [batch, pieces, degree + 1, dof]:
+    piece_coeffs = torch.einsum("pmk,bkd->bpmd", coeffs, raw_position)
+    piece_coeffs = torch.gather(
+        piece_coeffs,
+        1,
+        piece.view(b, out_steps, 1, 1).expand(b, out_steps, degree + 1, dof),
+    )
+    out_position = piece_coeffs[:, :, degree]
+    for m in range(degree - 1, -1, -1):
+        out_position = out_position * local_query + piece_coeffs[:, :, m]
+    return out_position.to(dtype=out_dtype)
+
+
 def get_cpu_kunz_stilman_interpolation(
     raw_traj: JointState,
     traj_steps: int,
@@ -221,7 +312,17 @@ def get_cpu_kunz_stilman_interpolation(
     opt_dt: float,
     interpolation_dt: float,
     max_deviation: float = 0.1,
+    num_workers: Optional[int] = None,
 ):
+    """Retime a batch of trajectories with Kunz & Stilman time-optimal path parameterization.
+
+    Trajectories are retimed in parallel with a thread pool, each worker thread using its own
+    instance of the smoother. Results are written to out_traj_state with one copy per state
+    field. Trajectories that fail to retime are interpolated linearly on device.
+
+    Args:
+        num_workers: number of threads, defaults to number of cpus.
+    """
     try:
         # Third Party
         from trajectory_smoothing import TrajectorySmoother
@@ -235,66 +336,63 @@ def get_cpu_kunz_stilman_interpolation(
         )
 
     cpu_traj = raw_traj.position.cpu().numpy()
-    out_traj = out_traj_state.position
-    retimed_traj = out_traj.cpu()
-    out_traj_vel = out_traj_state.velocity.cpu()
-    out_traj_acc = out_traj_state.acceleration.cpu()
-    out_traj_jerk = out_traj_state.jerk.cpu()
-    dof = cpu_traj.shape[-1]
-    trajectory_sm = TrajectorySmoother(
-        dof,
-        max_velocity.cpu().view(dof).numpy(),
-        max_acceleration.cpu().view(dof).numpy() * 0.5,
-        max_deviation,
-    )
-    for k in range(out_traj.shape[0]):
-        tstep = traj_steps[k].item()
-        opt_d = opt_dt[k].item()
-        in_traj = np.copy(cpu_traj[k])
-
-        if np.sum(in_traj[-1]) != 0.0:
-            out = trajectory_sm.smooth_interpolate(
-                in_traj, traj_dt=0.001, interpolation_dt=interpolation_dt, max_tsteps=tstep
+    cpu_traj_steps = torch.as_tensor(traj_steps).cpu().numpy()
+    b, out_steps, dof = out_traj_state.position.shape
+    cpu_max_velocity = max_velocity.cpu().view(dof).numpy()
+    cpu_max_acceleration = max_acceleration.cpu().view(dof).numpy() * 0.5
+    thread_data = threading.local()
+
+    def smooth_interpolate(k: int):
+        if not hasattr(thread_data, "trajectory_sm"):
+            thread_data.trajectory_sm = TrajectorySmoother(
+                dof, cpu_max_velocity, cpu_max_acceleration, max_deviation
             )
-            if out.success:
-                retimed_traj[k, : out.length, :] = torch.as_tensor(out.position)
-                out_traj_vel[k, : out.length, :] = torch.as_tensor(out.velocity)
-                out_traj_acc[k, : out.length, :] = torch.as_tensor(out.acceleration)
-                out_traj_jerk[k, : out.length, :] = torch.as_tensor(out.jerk)
-                retimed_traj[k, out.length :, :] = retimed_traj[k, out.length - 1 : out.length, :]
-
-                out_traj_vel[k, out.length :, :] = out_traj_vel[k, out.length - 1 : out.length, :]
-                out_traj_acc[k, out.length :, :] = out_traj_acc[k, out.length - 1 : out.length, :]
-                out_traj_jerk[k, out.length :, :] = out_traj_jerk[k, out.length - 1 : out.length, :]
-            else:
-                log_warn("Kunz Stilman interpolation failed, using linear")
-                for i in range(cpu_traj.shape[-1]):
-                    retimed_traj[k, :tstep, i] = linear_smooth(
-                        cpu_traj[k, :, i],
-                        y=None,
-                        n=tstep,
-                        kind=InterpolateType.LINEAR,
-                        last_step=tstep,
-                        opt_dt=opt_d,
-                        interpolation_dt=interpolation_dt,
-                    )
-                retimed_traj[k, tstep:, :] = retimed_traj[k, tstep - 1 : tstep, :]
-        else:
-            for i in range(cpu_traj.shape[-1]):
-                retimed_traj[k, :tstep, i] = linear_smooth(
-                    cpu_traj[k, :, i],
-                    y=None,
-                    n=tstep,
-                    kind=InterpolateType.LINEAR,
-                    last_step=tstep,
-                    opt_dt=opt_d,
-                    interpolation_dt=interpolation_dt,
-                )
-            retimed_traj[k, tstep:, :] = retimed_traj[k, tstep - 1 : tstep, :]
-    out_traj_state.position[:] = retimed_traj.to(device=raw_traj.position.device)
-    out_traj_state.velocity[:] = out_traj_vel.to(device=raw_traj.position.device)
-    out_traj_state.acceleration[:] = out_traj_acc.to(device=raw_traj.position.device)
-    out_traj_state.jerk[:] = out_traj_jerk.to(device=raw_traj.position.device)
+        return thread_data.trajectory_sm.smooth_interpolate(
+            np.copy(cpu_traj[k]),
+            traj_dt=0.001,
+            interpolation_dt=interpolation_dt,
+            max_tsteps=int(cpu_traj_steps[k]),
+        )
+
+    # trajectories ending at zero are not retimed:
+    smooth_idx = [k for k in range(b) if np.sum(cpu_traj[k, -1]) != 0.0]
+    if num_workers is None:
+        num_workers = os.cpu_count()
+    num_workers = max(1, min(num_workers, len(smooth_idx)))
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        smooth_result = list(executor.map(smooth_interpolate, smooth_idx))
+
+    success_idx = [k for k, out in zip(smooth_idx, smooth_result) if out.success]
+    success_result = [out for out in smooth_result if out.success]
+    if len(success_idx) < len(smooth_idx):
+        log_warn("Kunz Stilman interpolation failed, using linear")
+
+    if len(success_result) > 0:
+        out_data = np.zeros((4, len(success_result), out_steps, dof), dtype=np.float32)
+        for i, out in enumerate(success_result):
+            for j, data in enumerate([out.position, out.velocity, out.acceleration, out.jerk]):
+                out_data[j, i, : out.length] = data
+                out_data[j, i, out.length :] = data[out.length - 1]
+        out_data = torch.as_tensor(out_data, device=out_traj_state.position.device)
+        out_data = out_data.to(dtype=out_traj_state.position.dtype)
+        success_idx_tensor = torch.as_tensor(success_idx, device=out_data.device)
+        out_traj_state.position[success_idx_tensor] = out_data[0]
+        out_traj_state.velocity[success_idx_tensor] = out_data[1]
+        out_traj_state.acceleration[success_idx_tensor] = out_data[2]
+        out_traj_state.jerk[success_idx_tensor] = out_data[3]
+
+    success_set = set(success_idx)
+    linear_idx = [k for k in range(b) if k not in success_set]
+    if len(linear_idx) > 0:
+        linear_idx = torch.as_tensor(linear_idx, device=out_traj_state.position.device)
+        out_traj_state.position[linear_idx] = get_batch_spline_interpolation(
+            raw_traj.position[linear_idx],
+            torch.as_tensor(traj_steps, device=linear_idx.device)[linear_idx],
+            torch.as_tensor(opt_dt, device=linear_idx.device)[linear_idx],
+            interpolation_dt,
+            out_steps,
+            InterpolateType.LINEAR,
+        )
 
     return out_traj_state
 
@@ -340,10 +438,10 @@ def get_interpolated_trajectory(
         )
 
     for b in range(len(trajectory)):
-        raw_traj = trajectory[b].cpu().view(-1, dof).numpy()
         current_kind = kind
 
         if current_kind == InterpolateType.KUNZ_STILMAN_OPTIMAL:
+            raw_traj = trajectory[b].cpu().view(-1, dof).numpy()
             out = trajectory_sm.smooth_interpolate(
                 raw_traj, interpolation_dt=interpolation_dt, traj_dt=0.001, max_tsteps=des_horizon
             )
@@ -371,18 +469,22 @@ def get_interpolated_trajectory(
             else:
                 current_kind = InterpolateType.LINEAR
         if current_kind in [InterpolateType.LINEAR, InterpolateType.CUBIC, InterpolateType.QUINTIC]:
-            retimed_traj = torch.zeros((interpolation_steps, raw_traj.shape[-1]))
-            if raw_traj.shape[0] < 5:
+            raw_position = tensor_args.to_device(trajectory[b]).view(1, -1, dof)
+            if raw_position.shape[1] < 5:
                 current_kind = InterpolateType.LINEAR
-            for i in range(raw_traj.shape[-1]):
-                retimed_traj[:, i] = linear_smooth(
-                    raw_traj[:, i],
-                    y=None,
-                    n=interpolation_steps,
-                    kind=kind,
-                    last_step=des_horizon,
+            last_step = interpolation_steps if des_horizon is None else des_horizon
+
+            # knot spacing in units of interpolated steps, matches linear_smooth with y=None:
+            if current_kind == InterpolateType.CUBIC:
+                raw_position = torch.cat(
+                    (raw_position, raw_position[:, -1:].repeat(1, 4, 1)), dim=1
                 )
-            retimed_traj = retimed_traj.to(**vars(tensor_args))
+                knot_dt = float(last_step + 3) / float(raw_position.shape[1] - 1)
+            else:
+                knot_dt = float(last_step) / float(raw_position.shape[1] - 1)
+            retimed_traj = get_batch_spline_interpolation(
+                raw_position, [last_step], [knot_dt], 1.0, interpolation_steps, current_kind
+            )[0]
             out_traj_state.position[b, :interpolation_steps, :] = retimed_traj
             out_traj_state.position[b, interpolation_steps:, :] = retimed_traj[
                 interpolation_steps - 1 : interpolation_steps, :
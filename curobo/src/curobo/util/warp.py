@@ -10,6 +10,7 @@
 #
 
 # Third Party
+import torch
 import warp as wp
 
 # CuRobo
@@ -23,6 +24,16 @@ def init_warp(quiet=True, tensor_args: TensorDeviceType = TensorDeviceType()):
     # wp.config.mode = "debug"
     # wp.config.enable_backward = True
     wp.init()
-
-    wp.force_load(wp.device_from_torch(tensor_args.device))
+    device = tensor_args.device
+    if device.type == "cuda" and wp.get_cuda_device_count() == 0:
+        # cpu only machine, warp kernels will be launched on cpu tensors:
+        device = torch.device("cpu")
+    wp.force_load(wp.device_from_torch(device))
     return True
+
+
+def warp_stream_from_torch(device: torch.device):
+    """Get warp stream for a torch device. Kernels on cpu tensors are launched without a stream."""
+    if device.type == "cpu":
+        return None
+    return wp.stream_from_torch(device)
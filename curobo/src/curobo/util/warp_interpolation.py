@@ -15,7 +15,7 @@ import warp as wp
 
 # CuRobo
 from curobo.types.robot import JointState
-from curobo.util.warp import init_warp
+from curobo.util.warp import init_warp, warp_stream_from_torch
 
 wp.set_module_options({"fast_math": False})
 
@@ -171,6 +171,6 @@ def get_cuda_linear_interpolation(
             int_horizon,
             raw_dt,
         ],
-        stream=wp.stream_from_torch(raw_traj.position.device),
+        stream=warp_stream_from_torch(raw_traj.position.device),
     )
     return out_traj
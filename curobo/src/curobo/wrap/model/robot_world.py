@@ -11,8 +11,9 @@
 """This module has differentiable layers built from CuRobo's core features for use in Pytorch. """
 
 # Standard Library
+import math
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 # Third Party
 import torch
@@ -34,6 +35,7 @@ from curobo.types.base import TensorDeviceType
 from curobo.types.math import Pose
 from curobo.types.robot import RobotConfig
 from curobo.types.state import JointState
+from curobo.util.logger import log_error
 from curobo.util.sample_lib import HaltonGenerator
 from curobo.util.warp import init_warp
 from curobo.util_file import get_robot_configs_path, get_world_configs_path, join_path, load_yaml
@@ -54,6 +56,13 @@ class RobotWorldConfig:
     tensor_args: TensorDeviceType = TensorDeviceType()
     contact_distance: float = 0.0
 
+    #: Maximum number of configurations validated at once when rejection sampling. Bounds memory
+    #: used by :meth:`RobotWorld.sample` and :meth:`RobotWorld.sample_trajectory`.
+    sample_chunk_size: int = 10000
+
+    #: Maximum number of validation chunks when rejection sampling before raising an error.
+    max_sample_iterations: int = 1000
+
     @staticmethod
     def load_from_config(
         robot_config: Union[RobotConfig, str] = "franka.yml",
@@ -178,6 +187,8 @@ class RobotWorld(RobotWorldConfig):
     def __init__(self, config: RobotWorldConfig) -> None:
         RobotWorldConfig.__init__(self, **vars(config))
         self._batch_pose_idx = None
+        # number of validated and accepted samples, used to estimate acceptance rate:
+        self._sample_stats = [0, 0]
 
     def get_kinematics(self, q: torch.Tensor) -> CudaRobotModelState:
         state = self.kinematics.get_state(q)
@@ -185,6 +196,7 @@ class RobotWorld(RobotWorldConfig):
 
     def update_world(self, world_config: WorldConfig):
         self.world_model.load_collision_model(world_config)
+        self._sample_stats = [0, 0]
 
     def get_collision_distance(
         self, x_sph: torch.Tensor, env_query_idx: Optional[torch.Tensor] = None
@@ -270,17 +282,50 @@ class RobotWorld(RobotWorldConfig):
         return d
 
     def sample(self, n: int, mask_valid: bool = True, env_query_idx: Optional[torch.Tensor] = None):
-        """
+        """Sample joint configurations within joint limits.
+
         This does not support batched environments, use sample_trajectory instead.
+
+        Args:
+            n: number of configurations.
+            mask_valid: only return configurations that are valid, see :meth:`validate`. Exactly
+                n configurations are returned, candidates are validated in chunks of at most
+                :attr:`sample_chunk_size`.
+            env_query_idx: environment index to check collisions against.
+
+        Returns:
+            configurations of shape [n, dof].
         """
-        n_samples = n
-        if mask_valid:
-            n_samples = n * self.rejection_ratio
-        q = self.sampler.get_samples(n_samples, bounded=True)
-        if mask_valid:
-            q_mask = self.validate(q, env_query_idx)
-            q = q[q_mask][:n]
-        return q
+        if not mask_valid:
+            return self.sampler.get_samples(n, bounded=True)
+        q = self._rejection_sample(
+            1,
+            n,
+            lambda x: self.validate(x.view(-1, x.shape[-1]), env_query_idx).view(1, -1),
+        )
+        return q.view(n, -1)
+
+    def sample_iter(
+        self,
+        n: int,
+        batch_size: int = 10000,
+        env_query_idx: Optional[torch.Tensor] = None,
+    ) -> Iterator[torch.Tensor]:
+        """Stream valid joint configurations, useful to generate large datasets.
+
+        Args:
+            n: total number of configurations.
+            batch_size: number of configurations in every yielded tensor, the last tensor has the
+                remaining configurations.
+            env_query_idx: environment index to check collisions against.
+
+        Yields:
+            valid configurations of shape [batch_size, dof], exactly n in total.
+        """
+        while n > 0:
+            n_batch = min(batch_size, n)
+            yield self.sample(n_batch, env_query_idx=env_query_idx)
+            n -= n_batch
 
     def validate(self, q: torch.Tensor, env_query_idx: Optional[torch.Tensor] = None):
         """
@@ -303,16 +348,29 @@ class RobotWorld(RobotWorldConfig):
         mask_valid: bool = True,
         env_query_idx: Optional[torch.Tensor] = None,
     ):
-        n_samples = batch * horizon
-        if mask_valid:
-            n_samples = batch * horizon * self.rejection_ratio
-        q = self.sampler.get_samples(n_samples, bounded=True)
-        q = q.reshape(batch, horizon * self.rejection_ratio, -1)
-        if mask_valid:
-            q_mask = self.validate_trajectory(q, env_query_idx)
-            q = [q[i][q_mask[i, :], :][:horizon, :].unsqueeze(0) for i in range(batch)]
-            q = torch.cat(q)
-        return q
+        """Sample a batch of joint configurations, with horizon configurations in every batch.
+
+        Args:
+            batch: number of batches.
+            horizon: number of configurations per batch.
+            mask_valid: only return configurations that are valid in the environment of the batch,
+                see :meth:`validate_trajectory`.
+            env_query_idx: environment index of every batch, shape [batch].
+
+        Returns:
+            configurations of shape [batch, horizon, dof].
+        """
+        if not mask_valid:
+            q = self.sampler.get_samples(batch * horizon, bounded=True)
+            return q.view(batch, horizon, -1)
+
+        def validate_fn(x: torch.Tensor, idx: torch.Tensor) -> torch.Tensor:
+            env_idx = None
+            if env_query_idx is not None:
+                env_idx = env_query_idx[idx].contiguous()
+            return self.validate_trajectory(x, env_idx)
+
+        return self._rejection_sample(batch, horizon, validate_fn, pass_batch_idx=True)
 
     def validate_trajectory(self, q: torch.Tensor, env_query_idx: Optional[torch.Tensor] = None):
         """
@@ -330,6 +388,76 @@ class RobotWorld(RobotWorldConfig):
         d_mask = mask(d_self, d_world, d_bound)
         return d_mask
 
+    def _rejection_sample(
+        self, batch: int, n: int, validate_fn, pass_batch_idx: bool = False
+    ) -> torch.Tensor:
+        """Fill every batch with n valid samples.
+
+        Candidates are only sampled for batches that are not yet full. The number of candidates per
+        batch is estimated from the acceptance rate observed since the world was last updated
+        (initialized with :attr:`rejection_ratio`) and capped such that at most
+        :attr:`sample_chunk_size` configurations are validated at once. Valid candidates are
+        compacted into the output with a single scatter, invalid and surplus candidates are
+        written to a discarded column.
+
+        Args:
+            batch: number of batches.
+            n: number of valid samples per batch.
+            validate_fn: takes candidates of shape [active_batch, m, dof] (and index of active
+                batches when pass_batch_idx is True) and returns validity mask [active_batch, m].
+            pass_batch_idx: pass index of active batches to validate_fn.
+
+        Returns:
+            valid samples of shape [batch, n, dof].
+        """
+        dof = self.kinematics.get_dof()
+        device = self.tensor_args.device
+        out = torch.zeros((batch, n + 1, dof), device=device, dtype=self.tensor_args.dtype)
+        n_filled = torch.zeros(batch, device=device, dtype=torch.long)
+        n_validated = 0
+        active = torch.arange(batch, device=device)
+        for _ in range(self.max_sample_iterations):
+            n_active = active.shape[0]
+            # acceptance rate with prior of 1 / rejection_ratio:
+            acceptance = (self._sample_stats[1] + 1.0) / (
+                self._sample_stats[0] + self.rejection_ratio
+            )
+            n_remaining = n - n_filled[active].min().item()
+            n_candidates = max(1, math.ceil(1.2 * n_remaining / acceptance))
+            n_candidates = 2 ** math.ceil(math.log2(n_candidates))
+            n_candidates = min(n_candidates, max(1, self.sample_chunk_size // n_active))
+
+            q = self.sampler.get_samples(n_active * n_candidates, bounded=True)
+            q = q.view(n_active, n_candidates, dof)
+            if pass_batch_idx:
+                q_mask = validate_fn(q, active)
+            else:
+                q_mask = validate_fn(q)
+            q_mask = q_mask.view(n_active, n_candidates)
+
+            # scatter valid samples after already filled samples, rest go to column n:
+            out_idx = n_filled[active].unsqueeze(-1) + torch.cumsum(q_mask, dim=-1) - 1
+            out_idx = torch.where(q_mask, out_idx.clamp(max=n), n)
+            out_idx = out_idx + active.unsqueeze(-1) * (n + 1)
+            out.view(-1, dof).index_copy_(0, out_idx.view(-1), q.view(-1, dof))
+
+            n_valid = torch.count_nonzero(q_mask, dim=-1)
+            n_filled[active] = torch.clamp(n_filled[active] + n_valid, max=n)
+            n_validated += q_mask.numel()
+            self._sample_stats[0] += q_mask.numel()
+            self._sample_stats[1] += n_valid.sum().item()
+
+            active = torch.nonzero(n_filled < n).view(-1)
+            if active.shape[0] == 0:
+                return out[:, :n].contiguous()
+        log_error(
+            "Could not find "
+            + str(n)
+            + " valid samples in "
+            + str(n_validated)
+            + " candidates, increase max_sample_iterations"
+        )
+
     def pose_distance(self, x_des: Pose, x_current: Pose):
         if len(x_current.position.shape) == 2:
             x_current = x_current.unsqueeze(1)
@@ -0,0 +1,225 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""Cache of successful inverse kinematics solutions indexed by goal pose.
+
+:py:class:`~curobo.wrap.reacher.ik_solver.IKSolver` can seed optimization with solutions of
+previously solved goal poses that are close to the current goal. This reduces the number of seeds
+and iterations required when the same goals are queried repeatedly (e.g., pick poses in bins).
+
+A goal pose is stored as a 7D key of position and quaternion with non-negative w, weighted by
+:py:attr:`IKSolutionCache.rotation_weight`. Keys are indexed with
+:py:class:`~curobo.graph.spatial_index.WeightedNodeIndex`. When the cache is full, the least
+recently used solution is replaced.
+"""
+
+# Standard Library
+import os
+from typing import List, Optional, Tuple
+
+# Third Party
+import numpy as np
+import torch
+
+# CuRobo
+from curobo.types.base import TensorDeviceType
+from curobo.util.logger import log_info, log_warn
+
+_CACHE_VERSION = 1
+
+
+class IKSolutionCache:
+    def __init__(
+        self,
+        dof: int,
+        joint_names: List[str],
+        tensor_args: TensorDeviceType = TensorDeviceType(),
+        max_size: int = 10000,
+        rotation_weight: float = 0.1,
+        max_seed_distance: float = 0.1,
+        duplicate_distance: float = 0.001,
+    ):
+        """Initialize cache.
+
+        Args:
+            dof: number of joints in solution.
+            joint_names: names of joints in solution, used to validate cache files.
+            tensor_args: device to store solutions.
+            max_size: maximum number of solutions, least recently used solutions are replaced.
+            rotation_weight: weight of quaternion distance relative to position distance (meters).
+            max_seed_distance: cached solutions with weighted goal distance larger than this are
+                not used as seeds.
+            duplicate_distance: a new solution replaces a cached solution when their goals are
+                closer than this distance.
+        """
+        self.dof = dof
+        self.joint_names = joint_names
+        self.tensor_args = tensor_args
+        self.max_size = max_size
+        self.rotation_weight = rotation_weight
+        self.max_seed_distance = max_seed_distance
+        self.duplicate_distance = duplicate_distance
+        self._keys = torch.zeros((max_size, 7), **vars(tensor_args))
+        self._solutions = torch.zeros((max_size, dof), **vars(tensor_args))
+        # CuRobo
+        from curobo.graph.spatial_index import WeightedNodeIndex
+
+        weight = tensor_args.to_device([1.0, 1.0, 1.0] + [rotation_weight] * 4)
+        self._index = WeightedNodeIndex(weight, min_tail_nodes=64)
+        self.reset()
+
+    def reset(self):
+        """Remove all solutions, called when the world or robot geometry changes."""
+        self._n = 0
+        self._tick = 0
+        self._last_used = np.zeros(self.max_size, dtype=np.int64)
+        self._index.reset()
+        self._index_dirty = False
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _get_keys(self, position: torch.Tensor, quaternion: torch.Tensor) -> torch.Tensor:
+        # q and -q represent the same rotation, store quaternion with non-negative w:
+        sign = torch.where(quaternion[..., :1] < 0.0, -1.0, 1.0)
+        return torch.cat((position, quaternion * sign), dim=-1).view(-1, 7)
+
+    def _query(self, keys: torch.Tensor, k: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        if self._index_dirty:
+            self._index.rebuild(self._keys, self._n)
+            self._index_dirty = False
+        return self._index.knn(keys, k)
+
+    def _touch(self, idx: np.ndarray):
+        self._tick += 1
+        self._last_used[idx] = self._tick
+
+    def get_seeds(
+        self, position: torch.Tensor, quaternion: torch.Tensor, k: int
+    ) -> Tuple[Optional[torch.Tensor], Optional[torch.Tensor]]:
+        """Get cached solutions of goals nearest to query goals.
+
+        Args:
+            position: goal positions of shape [batch, 3].
+            quaternion: goal quaternions (wxyz) of shape [batch, 4].
+            k: maximum number of solutions per goal.
+
+        Returns:
+            solutions of shape [batch, k, dof] sorted by goal distance and validity mask of shape
+            [batch, k]. None if the cache is empty.
+        """
+        if self._n == 0 or k == 0:
+            return None, None
+        dist, idx = self._query(self._get_keys(position, quaternion), k)
+        valid = dist <= self.max_seed_distance
+        if dist.shape[-1] < k:
+            pad = k - dist.shape[-1]
+            valid = torch.nn.functional.pad(valid, (0, pad), value=False)
+            idx = torch.nn.functional.pad(idx, (0, pad), value=0)
+        self._touch(torch.unique(idx[valid]).cpu().numpy())
+        return self._solutions[idx], valid
+
+    def add(
+        self,
+        position: torch.Tensor,
+        quaternion: torch.Tensor,
+        solution: torch.Tensor,
+        success: torch.Tensor,
+    ):
+        """Add successful solutions to cache.
+
+        Args:
+            position: goal positions of shape [batch, 3].
+            quaternion: goal quaternions (wxyz) of shape [batch, 4].
+            solution: joint configurations of shape [batch, dof].
+            success: success of every solution, shape [batch].
+        """
+        success = success.view(-1)
+        if not torch.any(success):
+            return
+        keys = self._get_keys(position, quaternion)[success]
+        solution = solution.view(-1, self.dof)[success]
+
+        slots = np.full(keys.shape[0], -1, dtype=np.int64)
+        if self._n > 0:
+            # goals that are already in cache keep their key and only update the solution:
+            dist, idx = self._query(keys, 1)
+            duplicate = (dist[:, 0] <= self.duplicate_distance).cpu().numpy()
+            slots[duplicate] = idx[:, 0].cpu().numpy()[duplicate]
+            if np.any(duplicate):
+                duplicate_t = torch.as_tensor(duplicate, device=keys.device)
+                self._solutions[idx[duplicate_t, 0]] = solution[duplicate_t].to(
+                    dtype=self._solutions.dtype
+                )
+
+        new_keys = np.nonzero(slots < 0)[0]
+        n_append = min(new_keys.shape[0], self.max_size - self._n)
+        new_slots = np.arange(self._n, self._n + n_append)
+        n_evict = min(new_keys.shape[0] - n_append, self._n)
+        if n_evict > 0:
+            # replace least recently used solutions, excluding the ones updated above:
+            last_used = self._last_used[: self._n].copy()
+            last_used[slots[slots >= 0]] = np.iinfo(np.int64).max
+            evict = np.argsort(last_used, kind="stable")[:n_evict]
+            new_slots = np.concatenate((new_slots, evict))
+            self._index_dirty = True
+        new_keys = new_keys[: new_slots.shape[0]]
+        slots[new_keys] = new_slots
+
+        new_keys_t = torch.as_tensor(new_keys, device=keys.device)
+        new_slots_t = torch.as_tensor(new_slots, device=keys.device)
+        self._keys[new_slots_t] = keys[new_keys_t].to(dtype=self._keys.dtype)
+        self._solutions[new_slots_t] = solution[new_keys_t].to(dtype=self._solutions.dtype)
+        self._n += n_append
+        self._touch(slots[slots >= 0])
+        if not self._index_dirty:
+            self._index.update(self._keys, self._n)
+
+    def save(self, file_path: str):
+        """Save cached solutions to a file."""
+        dir_name = os.path.dirname(file_path)
+        if dir_name != "":
+            os.makedirs(dir_name, exist_ok=True)
+        torch.save(
+            {
+                "version": _CACHE_VERSION,
+                "joint_names": self.joint_names,
+                "keys": self._keys[: self._n].cpu(),
+                "solutions": self._solutions[: self._n].cpu(),
+                "last_used": torch.as_tensor(self._last_used[: self._n]),
+            },
+            file_path,
+        )
+
+    def load(self, file_path: str) -> bool:
+        """Load solutions saved with :py:meth:`save`, replacing cached solutions.
+
+        Returns:
+            True if solutions were loaded, False if file is missing or was saved for different
+            joints.
+        """
+        if not os.path.isfile(file_path):
+            return False
+        data = torch.load(file_path, map_location="cpu")
+        if data["version"] != _CACHE_VERSION or data["joint_names"] != self.joint_names:
+            log_warn("IK solution cache " + file_path + " was saved for different joints")
+            return False
+        self.reset()
+        n = min(data["keys"].shape[0], self.max_size)
+        # keep most recently used solutions:
+        order = np.argsort(-data["last_used"].numpy(), kind="stable")[:n]
+        self._keys[:n] = self.tensor_args.to_device(data["keys"][order])
+        self._solutions[:n] = self.tensor_args.to_device(data["solutions"][order])
+        self._last_used[:n] = n - np.arange(n)
+        self._tick = n
+        self._n = n
+        self._index.rebuild(self._keys, self._n)
+        log_info("Loaded " + str(n) + " IK solutions from " + file_path)
+        return True
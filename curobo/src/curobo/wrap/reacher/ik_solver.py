@@ -40,6 +40,7 @@ from curobo.util_file import (
     join_path,
     load_yaml,
 )
+from curobo.wrap.reacher.ik_cache import IKSolutionCache
 from curobo.wrap.reacher.types import ReacherSolveState, ReacherSolveType
 from curobo.wrap.wrap_base import WrapBase, WrapConfig, WrapResult
 
@@ -57,6 +58,16 @@ class IKSolverConfig:
     sample_rejection_ratio: int = 50
     tensor_args: TensorDeviceType = TensorDeviceType()
 
+    #: Seed optimization with solutions of previously solved goal poses that are close to the
+    #: current goal, see :py:class:`~curobo.wrap.reacher.ik_cache.IKSolutionCache`.
+    use_solution_cache: bool = False
+
+    #: Maximum number of solutions in cache.
+    solution_cache_size: int = 10000
+
+    #: Maximum number of cached solutions used as seeds per goal pose.
+    solution_cache_seeds: int = 4
+
     @staticmethod
     @profiler.record_function("ik_solver/load_from_robot_config")
     def load_from_robot_config(
@@ -90,6 +101,9 @@ class IKSolverConfig:
         regularization: bool = True,
         collision_activation_distance: Optional[float] = None,
         high_precision: bool = False,
+        use_solution_cache: bool = False,
+        solution_cache_size: int = 10000,
+        solution_cache_seeds: int = 4,
     ):
         if position_threshold <= 0.001:
             high_precision = True
@@ -241,6 +255,9 @@ class IKSolverConfig:
             world_coll_checker=world_coll_checker,
             rollout_fn=aux_rollout,
             tensor_args=tensor_args,
+            use_solution_cache=use_solution_cache,
+            solution_cache_size=solution_cache_size,
+            solution_cache_seeds=solution_cache_seeds,
         )
         return ik_cfg
 
@@ -338,6 +355,14 @@ class IKSolver(IKSolverConfig):
         self._solve_state = None
         self._kin_list = None
         self._rollout_list = None
+        self.solution_cache = None
+        if self.use_solution_cache:
+            self.solution_cache = IKSolutionCache(
+                self.dof,
+                self.rollout_fn.kinematics.joint_names,
+                self.tensor_args,
+                max_size=self.solution_cache_size,
+            )
 
     def update_goal_buffer(
         self,
@@ -665,8 +690,14 @@ class IKSolver(IKSolverConfig):
     ) -> IKResult:
         # create goal buffer:
         goal_buffer = self.update_goal_buffer(solve_state, goal_pose, retract_config, link_poses)
+        use_cache = (
+            self.solution_cache is not None
+            and not solve_state.batch_env
+            and solve_state.n_goalset == 1
+            and link_poses is None
+        )
         coord_position_seed = self.get_seed(
-            num_seeds, goal_buffer.goal_pose, use_nn_seed, seed_config
+            num_seeds, goal_buffer.goal_pose, use_nn_seed, seed_config, use_cache
         )
 
         if newton_iters is not None:
@@ -676,6 +707,13 @@ class IKSolver(IKSolverConfig):
         if newton_iters is not None:
             self.solver.newton_optimizer.outer_iters = self.og_newton_iters
         ik_result = self.get_result(num_seeds, result, goal_buffer.goal_pose, return_seeds)
+        if use_cache:
+            self.solution_cache.add(
+                goal_pose.position,
+                goal_pose.quaternion,
+                ik_result.solution[:, 0],
+                ik_result.success[:, 0],
+            )
 
         return ik_result
 
@@ -722,7 +760,12 @@ class IKSolver(IKSolverConfig):
 
     @profiler.record_function("ik/get_seed")
     def get_seed(
-        self, num_seeds: int, goal_pose: Pose, use_nn_seed, seed_config: Optional[T_BDOF] = None
+        self,
+        num_seeds: int,
+        goal_pose: Pose,
+        use_nn_seed,
+        seed_config: Optional[T_BDOF] = None,
+        use_solution_cache: bool = False,
     ) -> torch.Tensor:
         if seed_config is None:
             coord_position_seed = self.generate_seed(
@@ -741,9 +784,39 @@ class IKSolver(IKSolverConfig):
             coord_position_seed = torch.cat((seed_config, coord_position_seed), dim=1)
         else:
             coord_position_seed = seed_config
+        if use_solution_cache:
+            coord_position_seed = self.get_cached_seed(num_seeds, goal_pose, coord_position_seed)
         coord_position_seed = coord_position_seed.view(-1, 1, self.dof)
         return coord_position_seed
 
+    def get_cached_seed(
+        self, num_seeds: int, goal_pose: Pose, coord_position_seed: torch.Tensor
+    ) -> torch.Tensor:
+        """Put cached solutions of nearest goal poses first in seeds.
+
+        Cached solutions replace the last seeds, which are random seeds unless all seeds were
+        given in ``seed_config``. Goals without a close cached solution keep their seeds.
+
+        Args:
+            num_seeds: number of seeds per goal pose.
+            goal_pose: goal poses of shape [batch].
+            coord_position_seed: seeds of shape [batch, num_seeds, dof].
+
+        Returns:
+            seeds of shape [batch, num_seeds, dof].
+        """
+        k = min(self.solution_cache_seeds, num_seeds)
+        cached_seed, valid = self.solution_cache.get_seeds(
+            goal_pose.position.view(-1, 3), goal_pose.quaternion.view(-1, 4), k
+        )
+        if cached_seed is None:
+            return coord_position_seed
+        coord_position_seed = coord_position_seed.view(goal_pose.batch, num_seeds, self.dof)
+        cached_seed = torch.where(
+            valid.unsqueeze(-1), cached_seed, coord_position_seed[:, num_seeds - k :]
+        )
+        return torch.cat((cached_seed, coord_position_seed[:, : num_seeds - k]), dim=1)
+
     def solve(
         self,
         goal_pose: Pose,
@@ -917,8 +990,24 @@ class IKSolver(IKSolverConfig):
 
     def update_world(self, world: WorldConfig) -> bool:
         self.world_coll_checker.load_collision_model(world)
+        self.reset_solution_cache()
         return True
 
+    def reset_solution_cache(self) -> None:
+        """Remove cached solutions, call when obstacles or robot geometry change."""
+        if self.solution_cache is not None:
+            self.solution_cache.reset()
+
+    def save_solution_cache(self, file_path: str) -> None:
+        if self.solution_cache is None:
+            log_error("IKSolver was created with use_solution_cache=False")
+        self.solution_cache.save(file_path)
+
+    def load_solution_cache(self, file_path: str) -> bool:
+        if self.solution_cache is None:
+            log_error("IKSolver was created with use_solution_cache=False")
+        return self.solution_cache.load(file_path)
+
     def reset_seed(self) -> None:
         self.q_sample_gen.reset()
 
@@ -969,10 +1058,12 @@ class IKSolver(IKSolverConfig):
             k.attach_object(
                 sphere_radius=sphere_radius, sphere_tensor=sphere_tensor, link_name=link_name
             )
+        self.reset_solution_cache()
 
     def detach_object_from_robot(self, link_name: str = "attached_object") -> None:
         for k in self.get_all_kinematics_instances():
             k.detach_object(link_name)
+        self.reset_solution_cache()
 
     def get_retract_config(self):
         return self.rollout_fn.dynamics_model.retract_config
@@ -53,6 +53,7 @@ from curobo.util_file import (
 )
 from curobo.wrap.reacher.evaluator import TrajEvaluator, TrajEvaluatorConfig
 from curobo.wrap.reacher.ik_solver import IKResult, IKSolver, IKSolverConfig
+from curobo.wrap.reacher.plan_cache import MotionPlanCache
 from curobo.wrap.reacher.trajopt import TrajOptSolver, TrajOptSolverConfig
 from curobo.wrap.reacher.types import ReacherSolveState, ReacherSolveType
 
@@ -124,6 +125,10 @@ class MotionGenConfig:
     #: scale initial dt by this value to finetune trajectory optimization.
     finetune_dt_scale: float = 1.05
 
+    #: number of successful :meth:`MotionGen.plan_single` results to reuse for repeated queries
+    #: in an unchanged world. 0 disables plan caching.
+    plan_cache_size: int = 0
+
     @staticmethod
     @profiler.record_function("motion_gen_config/load_from_robot_config")
     def load_from_robot_config(
@@ -198,6 +203,8 @@ class MotionGenConfig:
         velocity_scale: Optional[Union[List[float], float]] = None,
         acceleration_scale: Optional[Union[List[float], float]] = None,
         jerk_scale: Optional[Union[List[float], float]] = None,
+        use_ik_solution_cache: bool = False,
+        plan_cache_size: int = 0,
     ):
         """Load motion generation configuration from robot and world configurations.
 
@@ -273,6 +280,10 @@ class MotionGenConfig:
             velocity_scale (Optional[Union[List[float], float]], optional): _description_. Defaults to None.
             acceleration_scale (Optional[Union[List[float], float]], optional): _description_. Defaults to None.
             jerk_scale (Optional[Union[List[float], float]], optional): _description_. Defaults to None.
+            use_ik_solution_cache (bool, optional): seed IK with solutions of nearby previously
+                solved goal poses. Defaults to False.
+            plan_cache_size (int, optional): number of successful plans to reuse for repeated
+                queries in an unchanged world, 0 disables plan caching. Defaults to 0.
 
         Returns:
             _type_: _description_
@@ -388,6 +399,7 @@ class MotionGenConfig:
             use_fixed_samples=use_ik_fixed_samples,
             store_debug=store_ik_debug,
             collision_activation_distance=collision_activation_distance,
+            use_solution_cache=use_ik_solution_cache,
         )
 
         ik_solver = IKSolver(ik_solver_cfg)
@@ -554,6 +566,7 @@ class MotionGenConfig:
             store_debug_in_result=store_debug_in_result,
             interpolation_dt=interpolation_dt,
             finetune_dt_scale=finetune_dt_scale,
+            plan_cache_size=plan_cache_size,
         )
 
 
@@ -628,6 +641,9 @@ class MotionGenResult:
     #: stores graph plan.
     graph_plan: Optional[JointState] = None
 
+    #: returns true when this result is a revalidated copy of a previously computed plan.
+    from_plan_cache: bool = False
+
     def clone(self):
         m = MotionGenResult(
             self.success.clone(),
@@ -653,6 +669,7 @@ class MotionGenResult:
             if self.interpolated_plan is not None
             else None,
             interpolation_dt=self.interpolation_dt,
+            from_plan_cache=self.from_plan_cache,
         )
         return m
 
@@ -716,6 +733,48 @@ class MotionGenResult:
 
         return self
 
+    def get_batch_index(self, idx: int) -> MotionGenResult:
+        """Get result of one problem from a batched result, keeping a batch dimension of 1.
+
+        Graph plan is not copied as its shape depends on success across the batch.
+        """
+
+        def _get_idx(tensor):
+            if tensor is None or not isinstance(tensor, (torch.Tensor, JointState)):
+                return tensor
+            if isinstance(tensor, torch.Tensor) and tensor.ndim == 0:
+                return tensor
+            return tensor[[idx]]
+
+        return MotionGenResult(
+            success=_get_idx(self.success),
+            valid_query=self.valid_query,
+            optimized_plan=_get_idx(self.optimized_plan),
+            optimized_dt=_get_idx(self.optimized_dt),
+            position_error=_get_idx(self.position_error),
+            rotation_error=_get_idx(self.rotation_error),
+            cspace_error=_get_idx(self.cspace_error),
+            solve_time=self.solve_time,
+            ik_time=self.ik_time,
+            graph_time=self.graph_time,
+            trajopt_time=self.trajopt_time,
+            finetune_time=self.finetune_time,
+            total_time=self.total_time,
+            interpolated_plan=_get_idx(self.interpolated_plan),
+            interpolation_dt=self.interpolation_dt,
+            path_buffer_last_tstep=(
+                [self.path_buffer_last_tstep[idx]]
+                if self.path_buffer_last_tstep is not None
+                else None
+            ),
+            debug_info=self.debug_info,
+            status=self.status,
+            attempts=self.attempts,
+            trajopt_attempts=self.trajopt_attempts,
+            used_graph=self.used_graph,
+            from_plan_cache=self.from_plan_cache,
+        )
+
     def get_paths(self) -> List[JointState]:
         path = [
             self.interpolated_plan[x].trim_trajectory(0, self.path_buffer_last_tstep[x])
@@ -808,6 +867,9 @@ class MotionGen(MotionGenConfig):
         self._batch_path_buffer_last_tstep = None
         self._rollout_list = None
         self._kin_list = None
+        self.plan_cache = None
+        if self.plan_cache_size > 0:
+            self.plan_cache = MotionPlanCache(max_size=self.plan_cache_size)
         self.update_batch_size(seeds=self.trajopt_seeds)
 
     def update_batch_size(self, seeds=10, batch=1):
@@ -1203,6 +1265,14 @@ class MotionGen(MotionGenConfig):
         plan_config: MotionGenPlanConfig = MotionGenPlanConfig(),
         link_poses: List[Pose] = None,
     ) -> MotionGenResult:
+        cache_key = None
+        if self.plan_cache is not None and link_poses is None:
+            # compute key before planning as plan_config is modified across attempts:
+            cache_key = self.plan_cache.get_key(start_state, goal_pose, plan_config)
+            result = self._get_cached_plan(cache_key)
+            if result is not None:
+                return result
+
         solve_state = self._get_solve_state(
             ReacherSolveType.SINGLE, plan_config, goal_pose, start_state
         )
@@ -1214,8 +1284,42 @@ class MotionGen(MotionGenConfig):
             plan_config,
             link_poses=link_poses,
         )
+        if cache_key is not None and result.success[0].item():
+            self.plan_cache.add(cache_key, result.clone(), self._get_world_fingerprint())
+        return result
+
+    def _get_world_fingerprint(self) -> Optional[int]:
+        if self.world_coll_checker is None:
+            return None
+        return self.world_coll_checker.world_fingerprint
+
+    def _get_cached_plan(self, cache_key) -> Optional[MotionGenResult]:
+        """Get plan from cache after checking its interpolated trajectory against constraints."""
+        start_time = time.time()
+        cached_result = self.plan_cache.get(cache_key, self._get_world_fingerprint())
+        if cached_result is None:
+            return None
+        q = cached_result.interpolated_plan.position.view(-1, self._dof)
+        metrics = self.check_constraints(JointState.from_position(q))
+        if not torch.all(metrics.feasible):
+            self.plan_cache.remove(cache_key)
+            return None
+        result = cached_result.clone()
+        result.from_plan_cache = True
+        result.attempts = 0
+        result.solve_time = 0.0
+        result.ik_time = 0.0
+        result.graph_time = 0.0
+        result.trajopt_time = 0.0
+        result.finetune_time = 0.0
+        result.total_time = time.time() - start_time
         return result
 
+    def clear_plan_cache(self):
+        """Remove cached plans, world changes are detected automatically."""
+        if self.plan_cache is not None:
+            self.plan_cache.clear()
+
     def plan_goalset(
         self,
         start_state: JointState,
@@ -1811,9 +1915,19 @@ class MotionGen(MotionGenConfig):
 
     def update_world(self, world: WorldConfig):
         self.world_coll_checker.load_collision_model(world)
-        self.graph_planner.reset_graph()
+        # graph edges near changed obstacles are revalidated on next graph query:
+        self.graph_planner.update_world()
+        self.ik_solver.reset_solution_cache()
         return True
 
+    def save_graph_roadmap(self, file_path: str):
+        """Save roadmap of graph planner to a folder, to reload with :meth:`load_graph_roadmap`."""
+        self.graph_planner.save_roadmap(file_path)
+
+    def load_graph_roadmap(self, file_path: str) -> bool:
+        """Load roadmap of graph planner, edges are revalidated against the current world."""
+        return self.graph_planner.load_roadmap(file_path)
+
     def clear_world_cache(self):
         self.world_coll_checker.clear_cache()
 
@@ -2287,9 +2401,13 @@ class MotionGen(MotionGenConfig):
         self.robot_cfg.kinematics.kinematics_config.attach_object(
             sphere_radius=sphere_radius, sphere_tensor=sphere_tensor, link_name=link_name
         )
+        self.ik_solver.reset_solution_cache()
+        self.clear_plan_cache()
 
     def detach_spheres_from_robot(self, link_name: str = "attached_object") -> None:
         self.robot_cfg.kinematics.kinematics_config.detach_object(link_name)
+        self.ik_solver.reset_solution_cache()
+        self.clear_plan_cache()
 
     def get_full_js(self, active_js: JointState) -> JointState:
         return self.rollout_fn.get_full_dof_from_solution(active_js)
@@ -0,0 +1,241 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""Asyncio front end that groups single goal planning requests into batched motion generation.
+
+Independent callers await :py:meth:`MotionGenBatchServer.plan`. Requests are queued and solved
+together with :py:meth:`~curobo.wrap.reacher.motion_gen.MotionGen.plan_batch` once
+``batch_size`` requests are waiting or when the oldest request has waited ``max_wait_time``
+seconds. Batches are padded to ``batch_size`` by repeating the last request, so that CUDA graphs
+created by :py:meth:`~curobo.wrap.reacher.motion_gen.MotionGen.warmup` with the same batch size
+are reused.
+
+Example:
+
+.. code-block:: python
+
+    motion_gen.warmup(batch=8)
+    async with MotionGenBatchServer(motion_gen, batch_size=8) as server:
+        result = await server.plan(start_state, goal_pose)
+"""
+
+# Standard Library
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# Third Party
+import torch
+
+# CuRobo
+from curobo.types.math import Pose
+from curobo.types.state import JointState
+from curobo.util.logger import log_error, log_info
+from curobo.wrap.reacher.motion_gen import MotionGen, MotionGenPlanConfig, MotionGenResult
+
+
+@dataclass
+class MotionGenServerMetrics:
+    """Timing of requests served by :py:class:`MotionGenBatchServer`."""
+
+    #: number of requests solved.
+    n_requests: int = 0
+
+    #: number of calls to plan_batch.
+    n_batches: int = 0
+
+    #: number of padded problems across all batches.
+    n_padded: int = 0
+
+    #: sum of seconds requests waited in queue before their batch started solving.
+    queue_wait_time: float = 0.0
+
+    #: maximum seconds a request waited in queue.
+    max_queue_wait_time: float = 0.0
+
+    #: sum of seconds spent in plan_batch.
+    solve_time: float = 0.0
+
+    #: seconds spent in plan_batch for every batch.
+    batch_solve_time: List[float] = field(default_factory=list)
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.n_requests / max(self.n_batches, 1)
+
+    @property
+    def mean_queue_wait_time(self) -> float:
+        return self.queue_wait_time / max(self.n_requests, 1)
+
+    @property
+    def mean_solve_time(self) -> float:
+        return self.solve_time / max(self.n_batches, 1)
+
+
+@dataclass
+class _PlanRequest:
+    start_state: JointState
+    goal_pose: Pose
+    future: asyncio.Future
+    submit_time: float
+
+
+class MotionGenBatchServer:
+    def __init__(
+        self,
+        motion_gen: MotionGen,
+        batch_size: int,
+        max_wait_time: float = 0.005,
+        plan_config: MotionGenPlanConfig = MotionGenPlanConfig(),
+        use_executor: bool = True,
+    ):
+        """Initialize server, call :py:meth:`start` or use as an async context manager.
+
+        Args:
+            motion_gen: motion generation instance, only accessed from the solver thread while
+                the server is running.
+            batch_size: number of problems in every plan_batch call. Use the batch size given to
+                :py:meth:`~curobo.wrap.reacher.motion_gen.MotionGen.warmup` to reuse CUDA graphs.
+            max_wait_time: maximum seconds the oldest queued request waits for more requests
+                before a partial batch is solved.
+            plan_config: planning parameters used for every batch.
+            use_executor: run plan_batch in a worker thread so that the event loop keeps
+                accepting requests while a batch is solved. When False, plan_batch blocks the
+                event loop.
+        """
+        if batch_size < 1:
+            log_error("batch_size should be greater than 0")
+        self.motion_gen = motion_gen
+        self.batch_size = batch_size
+        self.max_wait_time = max_wait_time
+        self.plan_config = plan_config
+        self.use_executor = use_executor
+        self.metrics = MotionGenServerMetrics()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue()
+        if self.use_executor:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        self._task = asyncio.get_running_loop().create_task(self._serve())
+
+    async def stop(self):
+        """Solve queued requests and stop server."""
+        if not self.is_running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
+
+    async def plan(self, start_state: JointState, goal_pose: Pose) -> MotionGenResult:
+        """Plan from start state to goal pose as part of a batch.
+
+        Args:
+            start_state: start joint state with a batch of 1, only position is used.
+            goal_pose: goal pose with a batch of 1.
+
+        Returns:
+            result of this request with a batch dimension of 1.
+        """
+        if not self.is_running:
+            log_error("MotionGenBatchServer is not running, call start()")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        await self._queue.put(_PlanRequest(start_state, goal_pose, future, time.perf_counter()))
+        return await future
+
+    async def _serve(self):
+        stop = False
+        while not stop:
+            request = await self._queue.get()
+            if request is None:
+                break
+            requests = [request]
+            deadline = request.submit_time + self.max_wait_time
+            while len(requests) < self.batch_size:
+                if self._queue.empty():
+                    timeout = deadline - time.perf_counter()
+                    if timeout <= 0.0:
+                        break
+                    try:
+                        request = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    request = self._queue.get_nowait()
+                if request is None:
+                    stop = True
+                    break
+                requests.append(request)
+            await self._solve_batch(requests)
+        log_info("MotionGenBatchServer stopped")
+
+    def _get_batch_problem(self, requests: List[_PlanRequest]):
+        # pad batch by repeating last request:
+        padded = requests + [requests[-1]] * (self.batch_size - len(requests))
+        position = torch.cat([r.start_state.position.view(1, -1) for r in padded])
+        start_state = JointState.from_position(
+            position, joint_names=requests[0].start_state.joint_names
+        )
+        goal_pose = Pose.cat([r.goal_pose for r in padded])
+        return start_state, goal_pose
+
+    def _plan_batch(self, start_state: JointState, goal_pose: Pose) -> MotionGenResult:
+        # plan_batch modifies plan_config across attempts:
+        return self.motion_gen.plan_batch(start_state, goal_pose, self.plan_config.clone())
+
+    async def _solve_batch(self, requests: List[_PlanRequest]):
+        start_time = time.perf_counter()
+        for r in requests:
+            wait_time = start_time - r.submit_time
+            self.metrics.queue_wait_time += wait_time
+            self.metrics.max_queue_wait_time = max(self.metrics.max_queue_wait_time, wait_time)
+        try:
+            start_state, goal_pose = self._get_batch_problem(requests)
+            if self._executor is not None:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._plan_batch, start_state, goal_pose
+                )
+            else:
+                result = self._plan_batch(start_state, goal_pose)
+        except Exception as e:
+            for r in requests:
+                if not r.future.done():
+                    r.future.set_exception(e)
+            return
+        solve_time = time.perf_counter() - start_time
+        self.metrics.n_requests += len(requests)
+        self.metrics.n_batches += 1
+        self.metrics.n_padded += self.batch_size - len(requests)
+        self.metrics.solve_time += solve_time
+        self.metrics.batch_solve_time.append(solve_time)
+        for i, r in enumerate(requests):
+            if not r.future.done():
+                r.future.set_result(result.get_batch_index(i))
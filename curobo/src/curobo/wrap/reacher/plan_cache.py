@@ -0,0 +1,111 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+"""Memoization of motion plans for repeated start and goal queries.
+
+:py:class:`~curobo.wrap.reacher.motion_gen.MotionGen` stores successful plans keyed on the
+quantized start state, quantized goal pose and planning parameters. Entries are only valid for
+the world they were planned in, identified by
+:py:attr:`~curobo.geom.sdf.world.WorldCollision.world_fingerprint`, all entries are removed
+when the fingerprint changes.
+"""
+
+# Standard Library
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+# Third Party
+import torch
+
+# CuRobo
+from curobo.types.math import Pose
+from curobo.types.state import JointState
+
+
+class MotionPlanCache:
+    def __init__(
+        self,
+        max_size: int = 64,
+        joint_resolution: float = 0.001,
+        position_resolution: float = 0.001,
+        rotation_resolution: float = 0.001,
+    ):
+        """Initialize cache.
+
+        Args:
+            max_size: maximum number of plans, least recently used plans are removed.
+            joint_resolution: start states within this distance per joint (radians or meters)
+                share a plan.
+            position_resolution: goal positions within this distance per axis (meters) share a
+                plan.
+            rotation_resolution: goal quaternions within this distance per component share a plan.
+        """
+        self.max_size = max_size
+        self.joint_resolution = joint_resolution
+        self.position_resolution = position_resolution
+        self.rotation_resolution = rotation_resolution
+        self._plans = OrderedDict()
+        self._world_fingerprint = None
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def clear(self):
+        self._plans.clear()
+
+    @staticmethod
+    def _quantize(tensor: Optional[torch.Tensor], resolution: float) -> Optional[Tuple[int]]:
+        if tensor is None:
+            return None
+        return tuple(torch.round(tensor.view(-1) / resolution).to(dtype=torch.int64).tolist())
+
+    def get_key(self, start_state: JointState, goal_pose: Pose, plan_config: Any) -> Hashable:
+        """Compute key of a planning query.
+
+        Args:
+            start_state: start joint state.
+            goal_pose: goal pose of end-effector.
+            plan_config: planning parameters, instance of
+                :py:class:`~curobo.wrap.reacher.motion_gen.MotionGenPlanConfig`.
+        """
+        quaternion = goal_pose.quaternion.view(-1, 4)
+        # q and -q represent the same rotation:
+        quaternion = torch.where(quaternion[:, :1] < 0.0, -quaternion, quaternion)
+        return (
+            self._quantize(start_state.position, self.joint_resolution),
+            self._quantize(start_state.velocity, self.joint_resolution),
+            self._quantize(start_state.acceleration, self.joint_resolution),
+            self._quantize(goal_pose.position, self.position_resolution),
+            self._quantize(quaternion, self.rotation_resolution),
+            tuple(vars(plan_config).items()),
+        )
+
+    def _check_world(self, world_fingerprint: Optional[int]):
+        if world_fingerprint != self._world_fingerprint:
+            self.clear()
+            self._world_fingerprint = world_fingerprint
+
+    def get(self, key: Hashable, world_fingerprint: Optional[int]) -> Optional[Any]:
+        """Get plan of key, returns None if not found or if world changed since it was added."""
+        self._check_world(world_fingerprint)
+        if key not in self._plans:
+            return None
+        self._plans.move_to_end(key)
+        return self._plans[key]
+
+    def add(self, key: Hashable, plan: Any, world_fingerprint: Optional[int]):
+        self._check_world(world_fingerprint)
+        self._plans[key] = plan
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.max_size:
+            self._plans.popitem(last=False)
+
+    def remove(self, key: Hashable):
+        self._plans.pop(key, None)
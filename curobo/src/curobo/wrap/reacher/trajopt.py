@@ -190,6 +190,8 @@ class TrajOptSolverConfig:
                 : len(smooth_weight)
             ] = smooth_weight  # velocity
 
+        if tensor_args.device.type == "cpu":
+            sync_cuda_time = False
         if store_debug:
             use_cuda_graph = False
             fixed_iters = True
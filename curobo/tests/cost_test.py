@@ -13,12 +13,16 @@ import torch
 
 # CuRobo
 from curobo.geom.sdf.world import WorldCollisionConfig, WorldPrimitiveCollision
-from curobo.geom.types import WorldConfig
+from curobo.geom.sdf.world_esdf import WorldEsdfCollision
+from curobo.geom.types import Cuboid, WorldConfig
+from curobo.rollout.cost.pose_cost import PoseCost, PoseCostConfig
 from curobo.rollout.cost.primitive_collision_cost import (
     PrimitiveCollisionCost,
     PrimitiveCollisionCostConfig,
 )
+from curobo.rollout.rollout_base import Goal
 from curobo.types.base import TensorDeviceType
+from curobo.types.math import Pose
 from curobo.util_file import get_world_configs_path, join_path, load_yaml
 
 
@@ -45,3 +49,196 @@ def test_primitive_collision_cost():
     ).view(-1, 1, 1, 4)
     c = cost.forward(q_spheres).flatten()
     assert c[0] > 0.0 and c[1] == 0.0
+
+
+def test_esdf_collision_cost_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    world_cfg = WorldConfig(
+        cuboid=[Cuboid("wall", [0.02, 0.0, 0.0, 1, 0, 0, 0], dims=[0.1, 1.0, 1.0])]
+    )
+    coll_check_list = [
+        WorldPrimitiveCollision(WorldCollisionConfig(tensor_args, world_model=world_cfg)),
+        WorldEsdfCollision(
+            WorldCollisionConfig(tensor_args, world_model=world_cfg, esdf_voxel_size=0.01)
+        ),
+    ]
+    # sphere trajectories crossing the wall:
+    q_spheres = torch.zeros((2, 5, 2, 4), **vars(tensor_args))
+    q_spheres[..., 0] = torch.linspace(-0.3, 0.3, 5, **vars(tensor_args)).view(1, -1, 1)
+    q_spheres[:, :, 1, 1] = 0.2
+    q_spheres[1, ..., 2] = 0.1
+    q_spheres[..., 3] = 0.05
+    out = []
+    for coll_check in coll_check_list:
+        for use_sweep in [False, True]:
+            cost = PrimitiveCollisionCost(
+                PrimitiveCollisionCostConfig(
+                    weight=1.0,
+                    tensor_args=tensor_args,
+                    world_coll_checker=coll_check,
+                    use_sweep=use_sweep,
+                    use_speed_metric=use_sweep,
+                    activation_distance=0.02,
+                    classify=False,
+                )
+            )
+            x = q_spheres.clone().requires_grad_(True)
+            c = cost.forward(x)
+            c.sum().backward()
+            out.append((c.detach(), x.grad.clone()))
+            if isinstance(coll_check, WorldEsdfCollision):
+                # activation distance is read on device, so queries captured in CUDA graphs
+                # follow in place updates:
+                cost.activation_distance[:] = 0.2
+                c_wide = cost.forward(q_spheres)
+                assert torch.all(c_wide >= c.detach()) and torch.any(c_wide > c.detach())
+    # discrete cost matches primitive kernel:
+    assert torch.count_nonzero(out[0][0]) > 0
+    assert torch.allclose(out[0][0], out[2][0], atol=1e-3)
+    assert torch.allclose(out[0][1], out[2][1], atol=1e-2)
+    # swept cost samples the sweep uniformly instead of jumping across free space, so it finds
+    # all collisions of the primitive kernel:
+    assert torch.count_nonzero(out[1][0]) > 0
+    assert torch.all(out[3][0][out[1][0] > 0.0] > 0.0)
+    assert torch.all(torch.isfinite(out[3][1]))
+
+
+def test_pose_cost_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    cost_cfg = PoseCostConfig(weight=[2.0, 10.0], tensor_args=tensor_args)
+    cost = PoseCost(cost_cfg)
+    b, h = 4, 3
+    ee_pos = torch.rand((b, h, 3), **vars(tensor_args), requires_grad=True)
+    ee_quat = torch.zeros((b, h, 4), **vars(tensor_args))
+    ee_quat[..., 0] = 1.0
+    goal_pose = Pose(
+        torch.rand((2, 3), **vars(tensor_args)), tensor_args.to_device([[1, 0, 0, 0]] * 2)
+    )
+    batch_pose_idx = torch.as_tensor([0, 1, 1, 0], dtype=torch.int32).view(-1, 1)
+    goal = Goal(goal_pose=goal_pose, batch_pose_idx=batch_pose_idx)
+
+    c = cost.forward(ee_pos, ee_quat, goal)
+    c.sum().backward()
+
+    ref_pos = ee_pos.detach().clone().requires_grad_(True)
+    goal_pos = goal_pose.position[batch_pose_idx.view(-1).long()].unsqueeze(1)
+    ref_c = 10.0 * torch.norm(ref_pos - goal_pos, dim=-1)
+    ref_c.sum().backward()
+    assert torch.allclose(c, ref_c)
+    assert torch.allclose(ee_pos.grad, ref_pos.grad)
+
+
+def _quat_error_ref(goal_quat: torch.Tensor, quat: torch.Tensor) -> torch.Tensor:
+    # vector part of goal * conj(quat), flipped to the shortest rotation as in the kernel
+    gw, gx, gy, gz = goal_quat.unbind(-1)
+    w, x, y, z = quat.unbind(-1)
+    vec = torch.stack(
+        [
+            -gw * x + w * gx - gy * z + y * gz,
+            -gw * y + w * gy - gz * x + z * gx,
+            -gw * z + w * gz - gx * y + x * gy,
+        ],
+        dim=-1,
+    )
+    sign = torch.where(torch.sum(goal_quat * quat, dim=-1) < 0.0, 1.0, -1.0)
+    return sign.unsqueeze(-1) * vec
+
+
+def test_pose_cost_rotated_goal_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    b, h = 4, 3
+    torch.manual_seed(0)
+    goal_pose = Pose(
+        torch.rand((2, 3), **vars(tensor_args)),
+        torch.nn.functional.normalize(torch.randn((2, 4), **vars(tensor_args)), dim=-1),
+    )
+    batch_pose_idx = torch.as_tensor([0, 1, 1, 0], dtype=torch.int32).view(-1, 1)
+    goal = Goal(goal_pose=goal_pose, batch_pose_idx=batch_pose_idx)
+    goal_pos = goal_pose.position[batch_pose_idx.view(-1).long()].unsqueeze(1)
+    goal_quat = goal_pose.quaternion[batch_pose_idx.view(-1).long()].unsqueeze(1)
+    ee_pos = torch.rand((b, h, 3), **vars(tensor_args))
+    ee_quat = torch.nn.functional.normalize(torch.randn((b, h, 4), **vars(tensor_args)), dim=-1)
+
+    for use_metric in [False, True]:
+        cost_cfg = PoseCostConfig(
+            weight=[3.0, 10.0, 2.0, 5.0], use_metric=use_metric, tensor_args=tensor_args
+        )
+        cost = PoseCost(cost_cfg)
+        pos = ee_pos.clone().requires_grad_(True)
+        quat = ee_quat.clone().requires_grad_(True)
+        c = cost.forward(pos, quat, goal)
+        c.sum().backward()
+
+        ref_pos = ee_pos.clone().requires_grad_(True)
+        ref_q_err = _quat_error_ref(goal_quat, ee_quat).requires_grad_(True)
+        p_dist = torch.norm(ref_pos - goal_pos, dim=-1)
+        r_dist = torch.norm(ref_q_err, dim=-1)
+        if use_metric:
+            ref_c = 3.0 * torch.log2(torch.cosh(2.0 * r_dist)) + 10.0 * torch.log2(
+                torch.cosh(5.0 * p_dist)
+            )
+            # kernel gradients are taken w.r.t. the natural log of cosh
+            grad_c = 3.0 * torch.log(torch.cosh(2.0 * r_dist)) + 10.0 * torch.log(
+                torch.cosh(5.0 * p_dist)
+            )
+        else:
+            ref_c = 3.0 * r_dist + 10.0 * p_dist
+            grad_c = ref_c
+        grad_c.sum().backward()
+
+        assert torch.allclose(c, ref_c, atol=1e-4)
+        assert torch.allclose(pos.grad, ref_pos.grad, atol=1e-4)
+        assert torch.allclose(quat.grad[..., 1:], ref_q_err.grad, atol=1e-4)
+        assert torch.all(quat.grad[..., 0] == 0.0)
+
+
+def test_pose_cost_rotated_goal_matches_kernel():
+    tensor_args = TensorDeviceType()
+    cpu_args = TensorDeviceType(device=torch.device("cpu"))
+    b, h = 4, 3
+    torch.manual_seed(0)
+    goal_pos = torch.rand((2, 3), **vars(cpu_args))
+    goal_quat = torch.nn.functional.normalize(torch.randn((2, 4), **vars(cpu_args)), dim=-1)
+    batch_pose_idx = torch.as_tensor([0, 1, 1, 0], dtype=torch.int32).view(-1, 1)
+    ee_pos = torch.rand((b, h, 3), **vars(cpu_args))
+    ee_quat = torch.nn.functional.normalize(torch.randn((b, h, 4), **vars(cpu_args)), dim=-1)
+
+    for use_metric in [False, True]:
+        out = []
+        for t_args in [cpu_args, tensor_args]:
+            cost_cfg = PoseCostConfig(
+                weight=[3.0, 10.0, 2.0, 5.0], use_metric=use_metric, tensor_args=t_args
+            )
+            cost = PoseCost(cost_cfg)
+            goal = Goal(
+                goal_pose=Pose(t_args.to_device(goal_pos), t_args.to_device(goal_quat)),
+                batch_pose_idx=batch_pose_idx.to(device=t_args.device),
+            )
+            pos = t_args.to_device(ee_pos).requires_grad_(True)
+            quat = t_args.to_device(ee_quat).requires_grad_(True)
+            c = cost.forward(pos, quat, goal)
+            c.sum().backward()
+            out.append([x.cpu() for x in [c, pos.grad, quat.grad]])
+        for x_cpu, x_cuda in zip(*out):
+            assert torch.allclose(x_cpu, x_cuda, atol=1e-4)
+
+
+def test_pose_cost_goalset_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    cost_cfg = PoseCostConfig(weight=[1.0, 1.0], tensor_args=tensor_args)
+    cost = PoseCost(cost_cfg)
+    b, h, n_goals = 4, 3, 5
+    ee_pos = torch.rand((b, h, 3), **vars(tensor_args))
+    ee_quat = torch.zeros((b, h, 4), **vars(tensor_args))
+    ee_quat[..., 0] = 1.0
+    goal_pose = Pose(
+        torch.rand((1, n_goals, 3), **vars(tensor_args)),
+        tensor_args.to_device([[[1, 0, 0, 0]] * n_goals]),
+    )
+    goal = Goal(goal_pose=goal_pose, batch_pose_idx=torch.zeros((b, 1), dtype=torch.int32))
+
+    c, r_err, p_dist = cost.forward_out_distance(ee_pos, ee_quat, goal)
+
+    ref_dist = torch.norm(ee_pos.unsqueeze(2) - goal_pose.position.view(1, 1, n_goals, 3), dim=-1)
+    assert torch.allclose(p_dist, torch.min(ref_dist, dim=-1)[0])
+    assert torch.all(r_err == 0.0)
@@ -9,12 +9,19 @@
 # its affiliates is strictly prohibited.
 #
 
+# Standard Library
+import os
+
+# Third Party
+import torch
+
 # CuRobo
 from curobo.cuda_robot_model.cuda_robot_generator import (
     CudaRobotGenerator,
     CudaRobotGeneratorConfig,
 )
 from curobo.cuda_robot_model.cuda_robot_model import CudaRobotModelConfig
+from curobo.types.base import TensorDeviceType
 from curobo.util_file import get_robot_configs_path, join_path, load_yaml
 
 
@@ -53,3 +60,93 @@ def test_cuda_robot_generator_config_cspace():
     robot_generator = CudaRobotGenerator(config)
 
     assert len(robot_generator.cspace.max_jerk) == 7
+
+
+def test_cuda_robot_generator_self_collision_matrix():
+    robot_file = "quad_ur10e.yml"
+    robot_params = load_yaml(join_path(get_robot_configs_path(), robot_file))["robot_cfg"][
+        "kinematics"
+    ]
+    robot_params["tensor_args"] = TensorDeviceType(device=torch.device("cpu"))
+    config = CudaRobotGeneratorConfig(**robot_params)
+    robot_generator = CudaRobotGenerator(config)
+    self_collision = robot_generator.self_collision_config
+    link_map = robot_generator._link_sphere_idx_map.cpu()
+    radius = robot_generator._link_spheres_tensor[:, 3].cpu()
+    offset = self_collision.offset.cpu()
+    distance = self_collision.distance_threshold.cpu()
+    ignore = robot_generator.self_collision_ignore
+    idx_to_name = {v: k for k, v in robot_generator._name_to_idx_map.items()}
+
+    for _ in range(100):
+        i, j = torch.randint(0, distance.shape[0], (2,)).tolist()
+        name_i = idx_to_name[link_map[i].item()]
+        name_j = idx_to_name[link_map[j].item()]
+        if (
+            name_i == name_j
+            or name_j in ignore.get(name_i, [])
+            or name_i in ignore.get(name_j, [])
+        ):
+            assert distance[i, j] == -torch.inf
+        else:
+            assert distance[i, j] == radius[i] + radius[j] + offset[i] + offset[j]
+
+
+def test_cuda_robot_generator_self_collision_thread_data():
+    robot_file = "franka.yml"
+    robot_params = load_yaml(join_path(get_robot_configs_path(), robot_file))["robot_cfg"][
+        "kinematics"
+    ]
+    robot_params["tensor_args"] = TensorDeviceType(device=torch.device("cpu"))
+    robot_generator = CudaRobotGenerator(CudaRobotGeneratorConfig(**robot_params))
+
+    # large collision matrix, thread buffer overflows:
+    torch.manual_seed(0)
+    n_spheres = 300
+    threshold = torch.rand((n_spheres, n_spheres))
+    threshold[torch.rand((n_spheres, n_spheres)) > 0.5] = -torch.inf
+    thread_loc, sl_idx, valid_data, _ = robot_generator._create_self_collision_thread_data(
+        threshold
+    )
+    assert not valid_data
+    assert sl_idx == thread_loc.shape[0]
+    pairs = thread_loc.view(-1, 2).long()
+    assert torch.all(pairs[:, 0] < pairs[:, 1])
+    assert torch.all(threshold[pairs[:, 0], pairs[:, 1]] != -torch.inf)
+
+    # small collision matrix:
+    threshold = threshold[:50, :50]
+    thread_loc, sl_idx, valid_data, _ = robot_generator._create_self_collision_thread_data(
+        threshold
+    )
+    assert valid_data
+    upper = torch.triu(threshold != -torch.inf, diagonal=1)
+    assert sl_idx == 2 * torch.count_nonzero(upper).item()
+    assert torch.all(thread_loc[sl_idx:] == -1)
+
+
+def test_cuda_robot_generator_model_cache(tmp_path):
+    robot_file = "franka.yml"
+    robot_params = load_yaml(join_path(get_robot_configs_path(), robot_file))["robot_cfg"][
+        "kinematics"
+    ]
+    robot_params["tensor_args"] = TensorDeviceType(device=torch.device("cpu"))
+    robot_params["model_cache_path"] = str(tmp_path)
+    built = CudaRobotGenerator(CudaRobotGeneratorConfig(**robot_params))
+    assert len(os.listdir(tmp_path)) == 1
+    cached = CudaRobotGenerator(CudaRobotGeneratorConfig(**robot_params))
+    assert cached.link_names == built.link_names
+    for config in ["kinematics_config", "self_collision_config"]:
+        for k, v in vars(getattr(built, config)).items():
+            if isinstance(v, torch.Tensor):
+                assert torch.equal(v, getattr(getattr(cached, config), k))
+    assert cached.kinematics_config.joint_names == built.kinematics_config.joint_names
+    assert cached.kinematics_parser is not None
+
+    # changing configuration creates a new cache entry:
+    robot_params["collision_sphere_buffer"] = 0.01
+    padded = CudaRobotGenerator(CudaRobotGeneratorConfig(**robot_params))
+    assert len(os.listdir(tmp_path)) == 2
+    assert not torch.equal(
+        padded.kinematics_config.link_spheres, built.kinematics_config.link_spheres
+    )
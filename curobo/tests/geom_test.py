@@ -12,13 +12,16 @@
 import torch
 
 # CuRobo
+from curobo.geom.sdf.utils import create_collision_checker
 from curobo.geom.sdf.world import (
+    CollisionCheckerType,
     CollisionQueryBuffer,
     WorldCollisionConfig,
     WorldPrimitiveCollision,
 )
+from curobo.geom.sdf.world_esdf import WorldEsdfCollision
 from curobo.geom.sdf.world_mesh import WorldMeshCollision
-from curobo.geom.types import Cuboid, WorldConfig
+from curobo.geom.types import Capsule, Cuboid, WorldConfig
 from curobo.types.base import TensorDeviceType
 from curobo.types.math import Pose
 from curobo.util_file import get_world_configs_path, join_path, load_yaml
@@ -209,3 +212,364 @@ def test_swept_world_primitive_mesh_instance():
     assert abs(d_sph_swept[0].item() - 0.1) < 1e-3
     assert abs(d_sph_swept[1].item() - 0.0) < 1e-9
     assert abs(d_sph_swept[2].item() - 0.1) < 1e-3
+
+
+def test_world_fingerprint():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    world_cfg = WorldConfig.from_dict(
+        load_yaml(join_path(get_world_configs_path(), "collision_test.yml"))
+    )
+    coll_cfg = WorldCollisionConfig(world_model=world_cfg, tensor_args=tensor_args)
+    coll_check = WorldPrimitiveCollision(coll_cfg)
+    name = world_cfg.cuboid[0].name
+
+    fingerprint = coll_check.world_fingerprint
+    coll_check.enable_obstacle(name, False)
+    assert coll_check.world_fingerprint != fingerprint
+
+    fingerprint = coll_check.world_fingerprint
+    coll_check.update_obstacle_pose(name, Pose.from_list([0, 0, 1, 1, 0, 0, 0], tensor_args))
+    assert coll_check.world_fingerprint != fingerprint
+
+    fingerprint = coll_check.world_fingerprint
+    coll_check.load_collision_model(world_cfg)
+    assert coll_check.world_fingerprint != fingerprint
+
+
+def test_world_primitive_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    world_cfg = WorldConfig(
+        cuboid=[Cuboid("cube_1", [0.1, 0.2, 0.3, 0.924, 0.0, 0.383, 0.0], dims=[0.4, 0.3, 0.5])]
+    )
+    coll_cfg = WorldCollisionConfig(world_model=world_cfg, tensor_args=tensor_args)
+    coll_check = WorldPrimitiveCollision(coll_cfg)
+    # spheres inside cuboid, closest to its +y face:
+    x_sph = torch.rand((4, 5, 10, 4), **vars(tensor_args)) * 0.02
+    x_sph[..., :3] += tensor_args.to_device([0.1, 0.22, 0.3])
+    x_sph[..., 3] = 0.05
+    x_sph[0, 0, 0, 3] = -1.0
+    query_buffer = CollisionQueryBuffer.initialize_from_shape(
+        x_sph.shape, tensor_args, coll_check.collision_types
+    )
+    weight = tensor_args.to_device([1])
+    act_distance = tensor_args.to_device([0.02])
+
+    x_grad = x_sph.clone().requires_grad_(True)
+    d_sph = coll_check.get_sphere_distance(x_grad, query_buffer, weight, act_distance)
+    d_sph.sum().backward()
+    grad = x_grad.grad[..., :3].clone()
+    assert torch.all(d_sph.view(-1)[1:] > 0.0) and d_sph[0, 0, 0] == 0.0
+
+    d_coll = coll_check.get_sphere_collision(x_sph, query_buffer, weight, act_distance)
+    assert torch.equal(d_coll > 0.0, d_sph > 0.0)
+
+    eps = 1e-3
+    for k in range(3):
+        x_p, x_m = x_sph.clone(), x_sph.clone()
+        x_p[..., k] += eps
+        x_m[..., k] -= eps
+        d_p = coll_check.get_sphere_distance(x_p, query_buffer, weight, act_distance).clone()
+        d_m = coll_check.get_sphere_distance(x_m, query_buffer, weight, act_distance).clone()
+        assert torch.allclose((d_p - d_m) / (2 * eps), grad[..., k], atol=1e-3)
+
+
+def test_swept_world_primitive_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    world_cfg = WorldConfig(
+        cuboid=[Cuboid("wall", [0.0, 0.0, 0.0, 1, 0, 0, 0], dims=[0.02, 1.0, 1.0])]
+    )
+    world_cfg_2 = WorldConfig(
+        cuboid=[Cuboid("wall", [5.0, 0.0, 0.0, 1, 0, 0, 0], dims=[0.02, 1, 1])]
+    )
+    coll_cfg = WorldCollisionConfig(world_model=None, tensor_args=tensor_args)
+    coll_cfg.cache = {"obb": 2}
+    coll_check = WorldPrimitiveCollision(coll_cfg)
+    coll_check.load_batch_collision_model([world_cfg, world_cfg_2])
+    # sphere jumps across wall between timesteps:
+    x_sph = torch.as_tensor(
+        [[-0.3, 0.0, 0.0, 0.05], [-0.1, 0.0, 0.0, 0.05], [0.1, 0.0, 0.0, 0.05]],
+        **vars(tensor_args),
+    ).view(1, 3, 1, 4)
+    x_sph = x_sph.repeat(2, 1, 1, 1)
+    env_query_idx = torch.as_tensor([0, 1], device=tensor_args.device, dtype=torch.int32)
+    query_buffer = CollisionQueryBuffer.initialize_from_shape(
+        x_sph.shape, tensor_args, coll_check.collision_types
+    )
+    weight = tensor_args.to_device([1])
+    act_distance = tensor_args.to_device([0.0])
+    dt = tensor_args.to_device([0.1])
+
+    d_sph = coll_check.get_sphere_distance(
+        x_sph, query_buffer, weight, act_distance, env_query_idx
+    ).clone()
+    assert torch.all(d_sph == 0.0)
+    d_swept = coll_check.get_swept_sphere_distance(
+        x_sph, query_buffer, weight, act_distance, dt, 4, False, env_query_idx
+    ).clone()
+    assert torch.all(d_swept[0, 1:] > 0.0) and torch.all(d_swept[1] == 0.0)
+    d_swept_coll = coll_check.get_swept_sphere_collision(
+        x_sph, query_buffer, weight, act_distance, dt, 4, False, env_query_idx
+    )
+    assert torch.equal(d_swept_coll > 0.0, d_swept > 0.0)
+
+
+def _get_shelf_world(n_shelves: int, seed: int = 0):
+    generator = torch.Generator().manual_seed(seed)
+    position = torch.rand((n_shelves, 3), generator=generator) * 4.0 - 2.0
+    quat = torch.nn.functional.normalize(torch.randn((n_shelves, 4), generator=generator), dim=-1)
+    dims = torch.rand((n_shelves, 3), generator=generator) * 0.3 + 0.05
+    cuboids = [
+        Cuboid("shelf_" + str(i), position[i].tolist() + quat[i].tolist(), dims[i].tolist())
+        for i in range(n_shelves)
+    ]
+    cuboids.append(Cuboid("floor", [0.0, 0.0, -2.05, 1, 0, 0, 0], dims=[10.0, 10.0, 0.1]))
+    return WorldConfig(cuboid=cuboids)
+
+
+def test_world_primitive_broad_phase_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    world_list = [_get_shelf_world(300, 0), _get_shelf_world(200, 1)]
+    coll_check_list = [
+        WorldPrimitiveCollision(
+            WorldCollisionConfig(
+                tensor_args, world_model=world_list, cache={"obb": 310}, obb_broad_phase=x
+            )
+        )
+        for x in [False, True]
+    ]
+    x_sph = torch.rand((2, 6, 20, 4), **vars(tensor_args))
+    x_sph[..., :3] = x_sph[..., :3] * 1.5 - 0.75
+    x_sph[..., 3] = x_sph[..., 3] * 0.1 + 0.02
+    x_sph[:, :, 0, 3] = -1.0
+    env_query_idx = torch.as_tensor([0, 1], device=tensor_args.device, dtype=torch.int32)
+    weight = tensor_args.to_device([1])
+    act_distance = tensor_args.to_device([0.02])
+    dt = tensor_args.to_device([0.1])
+
+    def get_distance(coll_check):
+        out = []
+        for env_idx in [None, env_query_idx]:
+            query_buffer = CollisionQueryBuffer.initialize_from_shape(
+                x_sph.shape, tensor_args, coll_check.collision_types
+            )
+            x_grad = x_sph.clone().requires_grad_(True)
+            d = coll_check.get_sphere_distance(
+                x_grad, query_buffer, weight, act_distance, env_idx
+            )
+            d.sum().backward()
+            d_swept = coll_check.get_swept_sphere_distance(
+                x_sph, query_buffer, weight, act_distance, dt, 4, True, env_idx
+            )
+            out.extend([d.detach().clone(), x_grad.grad.clone(), d_swept.clone()])
+        return out
+
+    def check_equal():
+        reference, culled = [get_distance(x) for x in coll_check_list]
+        assert reference[0].sum() > 0.0
+        for d_ref, d_culled in zip(reference, culled):
+            assert torch.allclose(d_ref, d_culled, atol=1e-5)
+
+    check_equal()
+    candidates = coll_check_list[1]._get_obb_query_tensors(x_sph, act_distance, env_query_idx)
+    assert candidates[5] < 200
+
+    # move obstacles into and out of grid bounds, then enable and add obstacles:
+    for coll_check in coll_check_list:
+        coll_check.update_obb_pose(
+            w_obj_pose=Pose.from_list([0.1, 0.0, 0.0, 1, 0, 0, 0], tensor_args),
+            name="shelf_3",
+            env_idx=1,
+        )
+        coll_check.update_obb_pose(
+            w_obj_pose=Pose.from_list([20.0, 0.0, 0.0, 1, 0, 0, 0], tensor_args),
+            name="shelf_4",
+            env_idx=0,
+        )
+        coll_check.enable_obb(False, name="shelf_5", env_idx=0)
+        coll_check.add_obb(Cuboid("box", [0.3, 0.2, 0.1, 1, 0, 0, 0], [0.2, 0.2, 0.2]), 1)
+    assert coll_check_list[1]._obb_broad_phase.world_fingerprint == (
+        coll_check_list[1].world_fingerprint
+    )
+    check_equal()
+
+
+def test_world_esdf_cpu(tmp_path):
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    cuboid = Cuboid("cube_1", [0.1, 0.2, 0.3, 0.924, 0.0, 0.383, 0.0], dims=[0.4, 0.3, 0.5])
+    world_list = [WorldConfig(cuboid=[cuboid]), WorldConfig(mesh=[cuboid.get_mesh()])]
+    coll_check_list = [
+        create_collision_checker(
+            WorldCollisionConfig(
+                tensor_args,
+                world_model=x,
+                checker_type=CollisionCheckerType.ESDF,
+                esdf_voxel_size=0.01,
+                esdf_cache_path=str(tmp_path),
+            )
+        )
+        for x in world_list
+    ]
+    assert isinstance(coll_check_list[0], WorldEsdfCollision)
+    assert torch.allclose(coll_check_list[0]._esdf, coll_check_list[1]._esdf, atol=1e-5)
+    assert len(list(tmp_path.iterdir())) == 2
+
+    # spheres near the +y face of cuboid, same as primitive checker:
+    x_sph = torch.rand((4, 5, 10, 4), **vars(tensor_args)) * 0.02
+    x_sph[..., :3] += tensor_args.to_device([0.1, 0.22, 0.3])
+    x_sph[..., 3] = 0.05
+    x_sph[0, 0, 0, 3] = -1.0
+    weight = tensor_args.to_device([1])
+    act_distance = tensor_args.to_device([0.02])
+    prim_check = WorldPrimitiveCollision(WorldCollisionConfig(tensor_args, world_list[0]))
+    d_list = []
+    for coll_check in [prim_check, coll_check_list[0]]:
+        query_buffer = CollisionQueryBuffer.initialize_from_shape(
+            x_sph.shape, tensor_args, coll_check.collision_types
+        )
+        x_grad = x_sph.clone().requires_grad_(True)
+        d_sph = coll_check.get_sphere_distance(x_grad, query_buffer, weight, act_distance)
+        d_sph.sum().backward()
+        d_list.append((d_sph.detach().clone(), x_grad.grad.clone()))
+    assert torch.allclose(d_list[0][0], d_list[1][0], atol=1e-3)
+    assert torch.allclose(d_list[0][1], d_list[1][1], atol=1e-2)
+
+    # gradient is analytic gradient of interpolated distance:
+    coll_check = coll_check_list[0]
+    eps = 1e-4
+    x_sph[..., :3] += tensor_args.to_device([0.0, 0.1, 0.0])
+    x_grad = x_sph.clone().requires_grad_(True)
+    d_sph = coll_check.get_sphere_distance(x_grad, query_buffer, weight, act_distance)
+    d_sph.sum().backward()
+    assert torch.count_nonzero(d_sph) > 0
+    for k in range(3):
+        x_p, x_m = x_sph.clone(), x_sph.clone()
+        x_p[..., k] += eps
+        x_m[..., k] -= eps
+        d_p = coll_check.get_sphere_distance(x_p, query_buffer, weight, act_distance).clone()
+        d_m = coll_check.get_sphere_distance(x_m, query_buffer, weight, act_distance).clone()
+        assert torch.allclose((d_p - d_m) / (2 * eps), x_grad.grad[..., k], atol=1e-2)
+
+    # second checker loads grid from cache:
+    cached_check = WorldEsdfCollision(
+        WorldCollisionConfig(tensor_args, esdf_voxel_size=0.01, esdf_cache_path=str(tmp_path))
+    )
+    cached_check._bake_esdf = None
+    cached_check.load_collision_model(world_list[0])
+    assert torch.equal(cached_check._esdf, coll_check._esdf)
+
+
+def test_swept_world_esdf_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    world_cfg = WorldConfig(
+        cuboid=[Cuboid("wall", [0.0, 0.0, 0.0, 1, 0, 0, 0], dims=[0.02, 1.0, 1.0])]
+    )
+    world_cfg_2 = WorldConfig(
+        capsule=[Capsule("pole", [5.0, 0.0, 0.0, 1, 0, 0, 0], radius=0.05, tip=[0, 0, 0.5])]
+    )
+    coll_check = WorldEsdfCollision(
+        WorldCollisionConfig(tensor_args, esdf_voxel_size=0.02, esdf_truncation_distance=0.2)
+    )
+    coll_check.load_batch_collision_model([world_cfg, world_cfg_2])
+    assert coll_check._esdf.shape[0] == 2
+    # sphere jumps across wall between timesteps:
+    x_sph = torch.as_tensor(
+        [[-0.3, 0.0, 0.0, 0.05], [-0.1, 0.0, 0.0, 0.05], [0.1, 0.0, 0.0, 0.05]],
+        **vars(tensor_args),
+    ).view(1, 3, 1, 4)
+    x_sph = x_sph.repeat(2, 1, 1, 1)
+    env_query_idx = torch.as_tensor([0, 1], device=tensor_args.device, dtype=torch.int32)
+    query_buffer = CollisionQueryBuffer.initialize_from_shape(
+        x_sph.shape, tensor_args, coll_check.collision_types
+    )
+    weight = tensor_args.to_device([1])
+    act_distance = tensor_args.to_device([0.0])
+    dt = tensor_args.to_device([0.1])
+
+    d_sph = coll_check.get_sphere_distance(
+        x_sph, query_buffer, weight, act_distance, env_query_idx
+    ).clone()
+    assert torch.all(d_sph == 0.0)
+    d_swept = coll_check.get_swept_sphere_distance(
+        x_sph, query_buffer, weight, act_distance, dt, 4, True, env_query_idx
+    ).clone()
+    assert torch.all(d_swept[0, 1:] > 0.0) and torch.all(d_swept[1] == 0.0)
+    d_swept_coll = coll_check.get_swept_sphere_collision(
+        x_sph, query_buffer, weight, act_distance, dt, 4, False, env_query_idx
+    )
+    assert torch.equal(d_swept_coll > 0.0, d_swept > 0.0)
+
+    # sphere touching the pole in env 1:
+    x_sph[1, :, 0, :3] = tensor_args.to_device([5.08, 0.0, 0.25])
+    d_sph = coll_check.get_sphere_distance(
+        x_sph, query_buffer, weight, act_distance, env_query_idx
+    )
+    assert torch.all(d_sph[1] > 0.0) and torch.all(d_sph[0] == 0.0)
+
+
+def test_world_esdf_refit_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    world_list = [
+        WorldConfig(cuboid=[Cuboid("box", [x, 0.0, 0.0, 1, 0, 0, 0], dims=[0.2, 0.2, 0.2])])
+        for x in [0.0, 2.0]
+    ]
+    coll_check = WorldEsdfCollision(
+        WorldCollisionConfig(
+            tensor_args, n_envs=2, esdf_voxel_size=0.02, esdf_truncation_distance=0.2
+        )
+    )
+    coll_check.load_collision_model(world_list[0], env_idx=0)
+    grid_shape = coll_check._esdf.shape
+    # world in env 1 is outside the grid fit to env 0, grid is refit to both worlds:
+    coll_check.load_collision_model(world_list[1], env_idx=1)
+    assert coll_check._esdf.shape[1] > grid_shape[1]
+    x_sph = tensor_args.to_device([[0.0, 0.0, 0.0, 0.05], [2.0, 0.0, 0.0, 0.05]])
+    x_sph = x_sph.view(1, 2, 1, 4).repeat(2, 1, 1, 1)
+    env_query_idx = torch.as_tensor([0, 1], device=tensor_args.device, dtype=torch.int32)
+    query_buffer = CollisionQueryBuffer.initialize_from_shape(
+        x_sph.shape, tensor_args, coll_check.collision_types
+    )
+    weight = tensor_args.to_device([1])
+    act_distance = tensor_args.to_device([0.0])
+    d_sph = coll_check.get_sphere_distance(
+        x_sph, query_buffer, weight, act_distance, env_query_idx
+    ).view(2, 2)
+    assert d_sph[0, 0] > 0.0 and d_sph[0, 1] == 0.0
+    assert d_sph[1, 0] == 0.0 and d_sph[1, 1] > 0.0
+
+    # world within grid bounds keeps the grid:
+    grid_shape = coll_check._esdf.shape
+    coll_check.load_collision_model(world_list[0], env_idx=1)
+    assert coll_check._esdf.shape == grid_shape
+
+
+def test_world_esdf_keeps_buffers_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    world_list = [
+        WorldConfig(cuboid=[Cuboid("box", [x, 0.0, 0.0, 1, 0, 0, 0], dims=[0.2, 0.2, 0.2])])
+        for x in [0.0, 0.5]
+    ]
+    coll_check = WorldEsdfCollision(
+        WorldCollisionConfig(
+            tensor_args,
+            world_model=world_list[0],
+            esdf_voxel_size=0.02,
+            esdf_truncation_distance=0.2,
+        )
+    )
+    esdf_ptr = coll_check._esdf.data_ptr()
+    origin_ptr = coll_check._grid_origin.data_ptr()
+    x_sph = tensor_args.to_device([[0.0, 0.0, 0.0, 0.05], [0.5, 0.0, 0.0, 0.05]])
+    x_sph = x_sph.view(1, 1, 2, 4)
+    query_buffer = CollisionQueryBuffer.initialize_from_shape(
+        x_sph.shape, tensor_args, coll_check.collision_types
+    )
+    weight = tensor_args.to_device([1])
+    act_distance = tensor_args.to_device([0.0])
+
+    # same world and a moved world with the same grid shape reuse the buffers:
+    for world in [world_list[0], world_list[1]]:
+        coll_check.load_collision_model(world)
+        assert coll_check._esdf.data_ptr() == esdf_ptr
+        assert coll_check._grid_origin.data_ptr() == origin_ptr
+    d_sph = coll_check.get_sphere_distance(x_sph, query_buffer, weight, act_distance).view(-1)
+    assert d_sph[0] == 0.0 and d_sph[1] > 0.0
@@ -0,0 +1,233 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+
+# Third Party
+import numpy as np
+import pytest
+import torch
+
+# CuRobo
+from curobo.graph.graph_base import GraphConfig
+from curobo.graph.graph_csr import CsrGraph
+from curobo.geom.types import Cuboid, WorldConfig
+from curobo.graph.graph_nx import NetworkxGraph
+from curobo.graph.prm import PRMStar
+from curobo.graph.roadmap_cache import (
+    get_changed_obstacle_aabbs,
+    get_data_hash,
+    get_world_signatures,
+    load_roadmap,
+    save_roadmap,
+)
+from curobo.graph.spatial_index import WeightedNodeIndex
+from curobo.rollout.cost.primitive_collision_cost import get_link_bounding_spheres
+from curobo.types.base import TensorDeviceType
+
+
+def _random_edges(n_nodes=60, n_edges=150, seed=0):
+    rng = np.random.default_rng(seed)
+    pairs = np.unique(np.sort(rng.integers(0, n_nodes, (n_edges, 2)), axis=-1), axis=0)
+    weight = rng.random(pairs.shape[0])
+    return [[int(pairs[i, 0]), int(pairs[i, 1]), float(weight[i])] for i in range(len(pairs))]
+
+
+def test_csr_graph_matches_networkx():
+    edges = _random_edges()
+    # add duplicate edges in reverse direction:
+    edges += [[e[1], e[0], e[2]] for e in edges[:20]]
+    nx_graph = NetworkxGraph()
+    csr_graph = CsrGraph(initial_edge_buffer=16)
+    for g in [nx_graph, csr_graph]:
+        g.add_edges(edges)
+        g.add_nodes(list(range(60)))
+        g.update_graph()
+
+    assert csr_graph.get_edges().shape[0] == len(nx_graph.get_edges())
+
+    nx_lengths = np.array(nx_graph.get_path_lengths(0))
+    csr_lengths = np.array(csr_graph.get_path_lengths(0))
+    assert np.allclose(nx_lengths, csr_lengths)
+
+    start = [0, 3, 3, 10]
+    goal = [5, 7, 11, 40]
+    exists = csr_graph.batch_path_exists(start, goal)
+    assert exists == [nx_graph.path_exists(s, g) for s, g in zip(start, goal)]
+
+    start = [s for s, e in zip(start, exists) if e]
+    goal = [g for g, e in zip(goal, exists) if e]
+    paths, lengths = csr_graph.get_batch_shortest_path(start, goal)
+    for i in range(len(start)):
+        _, nx_length = nx_graph.get_shortest_path(start[i], goal[i], return_length=True)
+        assert paths[i][0] == start[i] and paths[i][-1] == goal[i]
+        assert lengths[i] == pytest.approx(nx_length)
+
+
+def test_csr_graph_tensor_edges():
+    graph = CsrGraph()
+    edges = torch.as_tensor([[0, 1, 0.5], [1, 2, 0.0], [4, 3, 1.0]])
+    graph.add_edges(edges)
+    path, length = graph.get_shortest_path(2, 0, return_length=True)
+    assert path == [2, 1, 0]
+    assert length == pytest.approx(0.5)
+    assert not graph.path_exists(0, 4)
+    with pytest.raises(ValueError):
+        graph.get_shortest_path(0, 3)
+
+
+@pytest.mark.parametrize("n_nodes", [500, 3000])
+def test_weighted_node_index(n_nodes):
+    torch.manual_seed(0)
+    dof = 7
+    weight = torch.rand(dof) + 0.5
+    nodes = torch.rand((4000, dof))
+    index = WeightedNodeIndex(weight, min_tail_nodes=256)
+
+    # add nodes in batches so that both the tree and the unindexed tail are searched:
+    for i in range(100, n_nodes + 1, 100):
+        index.update(nodes, i)
+    assert index.n_nodes == n_nodes
+    assert 0 < index.n_tree_nodes <= n_nodes
+
+    query = torch.rand((32, dof))
+    dense_dist = torch.norm((nodes[:n_nodes] - query.unsqueeze(1)) * weight, dim=-1)
+    dense_dist, dense_idx = torch.topk(dense_dist, 10, largest=False, dim=-1)
+    dist, idx = index.knn(query, 10)
+    assert torch.allclose(dist, dense_dist, atol=1e-5)
+    assert torch.equal(idx, dense_idx)
+
+    _, nearest_idx = index.nearest(query)
+    assert torch.equal(nearest_idx, dense_idx[:, 0])
+
+    radius_idx = index.radius(query[:2], 0.5)
+    for i in range(2):
+        dense = torch.norm((nodes[:n_nodes] - query[i]) * weight, dim=-1) < 0.5
+        assert torch.equal(torch.sort(radius_idx[i])[0], torch.nonzero(dense).view(-1))
+
+
+def test_roadmap_cache_save_load(tmp_path):
+    nodes = np.random.rand(20, 7).astype(np.float32)
+    edges = np.array([[0, 1, 0.5], [3, 2, 1.0]])
+    meta_data = {"robot_hash": get_data_hash([torch.ones(3), "franka"]), "world_signatures": {}}
+    save_roadmap(str(tmp_path), nodes, edges, meta_data)
+    load_nodes, load_edges, load_meta = load_roadmap(str(tmp_path))
+    assert np.allclose(load_nodes, nodes)
+    assert np.allclose(load_edges, edges)
+    assert load_meta["robot_hash"] == meta_data["robot_hash"]
+    assert load_roadmap(str(tmp_path / "missing")) is None
+
+
+def test_roadmap_cache_changed_obstacles():
+    world = WorldConfig(
+        cuboid=[
+            Cuboid(name="table", pose=[0, 0, -0.1, 1, 0, 0, 0], dims=[1.0, 1.0, 0.2]),
+            Cuboid(name="box", pose=[0.5, 0, 0.3, 1, 0, 0, 0], dims=[0.1, 0.1, 0.1]),
+        ]
+    )
+    signatures = get_world_signatures(world)
+    assert len(get_changed_obstacle_aabbs(signatures, world)) == 0
+
+    new_world = WorldConfig(
+        cuboid=[
+            Cuboid(name="table", pose=[0, 0, -0.1, 1, 0, 0, 0], dims=[1.0, 1.0, 0.2]),
+            Cuboid(name="box", pose=[0.5, 0.2, 0.3, 1, 0, 0, 0], dims=[0.1, 0.1, 0.1]),
+        ]
+    )
+    aabbs = get_changed_obstacle_aabbs(signatures, new_world)
+    assert len(aabbs) == 1
+    assert np.allclose(aabbs[0], [[0.45, 0.15, 0.25], [0.55, 0.25, 0.35]])
+
+    # removing an obstacle does not invalidate edges:
+    removed_world = WorldConfig(cuboid=[new_world.cuboid[0]])
+    assert len(get_changed_obstacle_aabbs(signatures, removed_world)) == 0
+
+
+def test_cascade_mask_samples_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    world = WorldConfig(
+        cuboid=[
+            Cuboid(name="table", pose=[0, 0, -0.1, 1, 0, 0, 0], dims=[2.0, 2.0, 0.2]),
+            Cuboid(name="box", pose=[0.4, 0, 0.4, 1, 0, 0, 0], dims=[0.2, 0.2, 0.2]),
+        ]
+    )
+    graph_cfg = GraphConfig.load_from_robot_config(
+        "franka.yml", world, tensor_args, use_cuda_graph=False
+    )
+    rollout = graph_cfg.safety_rollout_fn
+    lows, highs = rollout.action_bound_lows, rollout.action_bound_highs
+    torch.manual_seed(0)
+    x = lows + (highs - lows) * torch.rand((1000, lows.shape[0]), **vars(tensor_args))
+    # out of joint limits:
+    x[:50] = x[:50] * 3.0
+
+    metrics = rollout.rollout_constraint(x.unsqueeze(1), use_batch_env=False)
+    cascade_metrics = rollout.rollout_constraint_cascade(x.unsqueeze(1), use_batch_env=False)
+    assert 0 < torch.count_nonzero(metrics.feasible) < x.shape[0]
+    assert torch.equal(metrics.feasible, cascade_metrics.feasible)
+
+    # bounding spheres contain all spheres of their link:
+    kinematics_config = rollout.kinematics.kinematics_config
+    spheres = rollout.dynamics_model.robot_model.forward(x[50:60])[-1].unsqueeze(1)
+    link_idx = kinematics_config.link_sphere_idx_map.long()
+    bounding_spheres = get_link_bounding_spheres(
+        spheres, link_idx, kinematics_config.link_map.shape[0]
+    )[:, :, link_idx]
+    enabled = spheres[..., 3] >= 0.0
+    gap = bounding_spheres[..., 3] - spheres[..., 3]
+    gap -= torch.linalg.norm(bounding_spheres[..., :3] - spheres[..., :3], dim=-1)
+    assert torch.all(gap[enabled] >= -1e-5)
+
+
+def test_csr_graph_remove_edges():
+    graph = CsrGraph()
+    graph.add_edges([[0, 1, 1.0], [1, 2, 1.0], [0, 2, 3.0]])
+    _, length = graph.get_shortest_path(0, 2, return_length=True)
+    assert length == pytest.approx(2.0)
+    # direction of removed edge is ignored:
+    graph.remove_edges(np.array([[2, 1]]))
+    path, length = graph.get_shortest_path(0, 2, return_length=True)
+    assert path == [0, 2]
+    assert length == pytest.approx(3.0)
+    assert graph.number_of_edges == 2
+
+
+def test_lazy_prm_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    world = WorldConfig(
+        cuboid=[
+            Cuboid(name="table", pose=[0, 0, -0.1, 1, 0, 0, 0], dims=[2.0, 2.0, 0.2]),
+            Cuboid(name="box", pose=[0.45, 0, 0.35, 1, 0, 0, 0], dims=[0.1, 0.5, 0.7]),
+        ]
+    )
+    graph_cfg = GraphConfig.load_from_robot_config(
+        "franka.yml", world, tensor_args, use_cuda_graph=False
+    )
+    graph_cfg.lazy_edge_validation = True
+    planner = PRMStar(graph_cfg)
+
+    # find a start and goal pair that cannot be connected directly:
+    x = planner.get_feasible_sample_set(planner.get_samples(200))
+    edge_free = torch.stack(
+        [
+            planner.mask_samples(
+                planner._get_edge_interpolation(x[i : i + 1], x[i + 1 : i + 2]).view(-1, 7)
+            ).all()
+            for i in range(20)
+        ]
+    )
+    i = int(torch.nonzero(~edge_free)[0])
+    result = planner.find_paths(x[i : i + 1], x[i + 1 : i + 2])
+    assert result.success[0]
+
+    plan = result.plan[0]
+    line_vec = planner._get_edge_interpolation(plan[:-1], plan[1:])
+    assert planner.mask_samples(line_vec.view(-1, 7)).all()
+    # only edges on searched paths are checked:
+    assert len(planner._valid_edge_keys) < planner.graph.number_of_edges / 4
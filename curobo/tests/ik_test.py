@@ -8,21 +8,27 @@
 # without an express license agreement from NVIDIA CORPORATION or
 # its affiliates is strictly prohibited.
 #
+# Standard Library
+import os
+
 # Third Party
 import torch
 
 # CuRobo
 from curobo.geom.sdf.world import (
     CollisionCheckerType,
+    CollisionQueryBuffer,
     WorldCollisionConfig,
     WorldPrimitiveCollision,
 )
+from curobo.geom.sdf.world_esdf import WorldEsdfCollision
 from curobo.geom.sdf.world_mesh import WorldMeshCollision
 from curobo.geom.types import WorldConfig
 from curobo.types.base import TensorDeviceType
 from curobo.types.math import Pose
 from curobo.types.robot import RobotConfig
 from curobo.util_file import get_robot_configs_path, get_world_configs_path, join_path, load_yaml
+from curobo.wrap.reacher.ik_cache import IKSolutionCache
 from curobo.wrap.reacher.ik_solver import IKSolver, IKSolverConfig
 
 
@@ -58,6 +64,33 @@ def test_basic_ik():
     assert torch.count_nonzero(success).item() >= 1.0  # we check if atleast 1 is successful
 
 
+def test_basic_ik_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+
+    robot_cfg = RobotConfig.from_dict(
+        load_yaml(join_path(get_robot_configs_path(), "franka.yml"))["robot_cfg"], tensor_args
+    )
+    ik_config = IKSolverConfig.load_from_robot_config(
+        robot_cfg,
+        None,
+        rotation_threshold=0.05,
+        position_threshold=0.005,
+        num_seeds=20,
+        self_collision_check=False,
+        self_collision_opt=False,
+        tensor_args=tensor_args,
+    )
+    ik_solver = IKSolver(ik_config)
+    b_size = 5
+    q_sample = ik_solver.sample_configs(b_size)
+    kin_state = ik_solver.fk(q_sample)
+    goal = Pose(kin_state.ee_position, kin_state.ee_quaternion)
+    result = ik_solver.solve_batch(goal)
+
+    assert result.solution.device.type == "cpu"
+    assert torch.count_nonzero(result.success).item() >= 1.0
+
+
 def test_full_config_collision_free_ik():
     tensor_args = TensorDeviceType()
     world_file = "collision_cubby.yml"
@@ -89,6 +122,74 @@ def test_full_config_collision_free_ik():
     assert torch.count_nonzero(success).item() >= 9.0  # we check if atleast 90% are successful
 
 
+def test_esdf_collision_free_ik():
+    tensor_args = TensorDeviceType()
+    world_cfg = WorldConfig.from_dict(
+        load_yaml(join_path(get_world_configs_path(), "collision_cubby.yml"))
+    )
+    ik_config = IKSolverConfig.load_from_robot_config(
+        "franka.yml",
+        world_cfg,
+        rotation_threshold=0.05,
+        position_threshold=0.005,
+        num_seeds=30,
+        self_collision_check=True,
+        self_collision_opt=True,
+        tensor_args=tensor_args,
+        use_cuda_graph=True,
+        collision_checker_type=CollisionCheckerType.ESDF,
+    )
+    ik_solver = IKSolver(ik_config)
+    b_size = 10
+    # second solve replays the captured cuda graph:
+    for _ in range(2):
+        q_sample = ik_solver.sample_configs(b_size)
+        kin_state = ik_solver.fk(q_sample)
+        goal = Pose(kin_state.ee_position, kin_state.ee_quaternion)
+        result = ik_solver.solve(goal)
+        assert torch.count_nonzero(result.success).item() >= 9.0
+
+
+def test_esdf_collision_free_ik_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    robot_cfg = RobotConfig.from_dict(
+        load_yaml(join_path(get_robot_configs_path(), "franka.yml"))["robot_cfg"], tensor_args
+    )
+    world_cfg = WorldConfig.from_dict(
+        load_yaml(join_path(get_world_configs_path(), "collision_cubby.yml"))
+    )
+    ik_config = IKSolverConfig.load_from_robot_config(
+        robot_cfg,
+        world_cfg,
+        rotation_threshold=0.05,
+        position_threshold=0.005,
+        num_seeds=20,
+        self_collision_check=False,
+        self_collision_opt=False,
+        tensor_args=tensor_args,
+        collision_checker_type=CollisionCheckerType.ESDF,
+    )
+    ik_solver = IKSolver(ik_config)
+    assert isinstance(ik_solver.world_coll_checker, WorldEsdfCollision)
+    b_size = 5
+    q_sample = ik_solver.sample_configs(b_size)
+    kin_state = ik_solver.fk(q_sample)
+    goal = Pose(kin_state.ee_position, kin_state.ee_quaternion)
+    result = ik_solver.solve_batch(goal)
+    assert torch.count_nonzero(result.success).item() >= 1.0
+
+    # solutions are collision free for primitive checker:
+    prim_check = WorldPrimitiveCollision(WorldCollisionConfig(tensor_args, world_model=world_cfg))
+    spheres = ik_solver.fk(result.solution[result.success]).link_spheres_tensor.unsqueeze(1)
+    query_buffer = CollisionQueryBuffer.initialize_from_shape(
+        spheres.shape, tensor_args, prim_check.collision_types
+    )
+    d = prim_check.get_sphere_collision(
+        spheres, query_buffer, tensor_args.to_device([1.0]), tensor_args.to_device([0.0])
+    )
+    assert torch.count_nonzero(d) == 0
+
+
 def test_attach_object_full_config_collision_free_ik():
     tensor_args = TensorDeviceType()
     world_file = "collision_cubby.yml"
@@ -209,3 +310,74 @@ def test_batch_env_mesh_ik():
 
     success = result.success
     assert torch.count_nonzero(success).item() >= 1.0  # we check if atleast 90% are successful
+
+
+def test_ik_solution_cache_seed():
+    tensor_args = TensorDeviceType()
+    ik_config = IKSolverConfig.load_from_robot_config(
+        "franka.yml",
+        None,
+        num_seeds=20,
+        self_collision_check=False,
+        self_collision_opt=False,
+        tensor_args=tensor_args,
+        use_solution_cache=True,
+    )
+    ik_solver = IKSolver(ik_config)
+    q_sample = ik_solver.sample_configs(5)
+    kin_state = ik_solver.fk(q_sample)
+    goal = Pose(kin_state.ee_position, kin_state.ee_quaternion)
+    result = ik_solver.solve_batch(goal)
+    assert len(ik_solver.solution_cache) == torch.count_nonzero(result.success[:, 0]).item()
+
+    seed = ik_solver.get_seed(20, goal, False, use_solution_cache=True).view(5, 20, -1)
+    success = result.success[:, 0]
+    assert torch.allclose(seed[success, 0], result.solution[success, 0])
+
+    ik_solver.update_world(WorldConfig())
+    assert len(ik_solver.solution_cache) == 0
+
+
+def test_ik_solution_cache(tmp_path):
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    cache = IKSolutionCache(2, ["j0", "j1"], tensor_args, max_size=4)
+    position = torch.as_tensor([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [2.0, 0.0, 0.0]])
+    quaternion = torch.as_tensor([[1.0, 0.0, 0.0, 0.0]]).repeat(3, 1)
+    solution = torch.as_tensor([[0.0, 0.0], [1.0, 1.0], [2.0, 2.0]])
+    cache.add(position, quaternion, solution, torch.as_tensor([True, True, False]))
+    assert len(cache) == 2
+
+    # quaternion sign is ignored:
+    seed, valid = cache.get_seeds(
+        torch.as_tensor([[0.95, 0.0, 0.0], [5.0, 0.0, 0.0]]),
+        -quaternion[:2],
+        k=2,
+    )
+    assert seed.shape == (2, 2, 2)
+    assert valid.tolist() == [[True, False], [False, False]]
+    assert torch.allclose(seed[0, 0], solution[1])
+
+    # same goal replaces solution:
+    cache.add(position[1:2], quaternion[1:2], solution[2:3], torch.as_tensor([True]))
+    assert len(cache) == 2
+    seed, valid = cache.get_seeds(position[1:2], quaternion[1:2], k=1)
+    assert torch.allclose(seed[0, 0], solution[2])
+
+    # least recently used goal is replaced when full:
+    new_position = torch.as_tensor([[0.0, 1.0, 0.0], [0.0, 2.0, 0.0], [0.0, 3.0, 0.0]])
+    cache.add(new_position, quaternion, solution, torch.ones(3, dtype=torch.bool))
+    assert len(cache) == 4
+    _, valid = cache.get_seeds(position[:2], quaternion[:2], k=1)
+    assert valid.view(-1).tolist() == [False, True]
+
+    file_path = os.path.join(str(tmp_path), "ik_cache.pt")
+    cache.save(file_path)
+    loaded_cache = IKSolutionCache(2, ["j0", "j1"], tensor_args, max_size=4)
+    assert loaded_cache.load(file_path)
+    seed, valid = loaded_cache.get_seeds(new_position, quaternion, k=1)
+    assert torch.all(valid)
+    assert torch.allclose(seed[:, 0], solution)
+    assert not IKSolutionCache(2, ["a", "b"], tensor_args).load(file_path)
+
+    loaded_cache.reset()
+    assert loaded_cache.get_seeds(new_position, quaternion, k=1) == (None, None)
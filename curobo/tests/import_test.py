@@ -0,0 +1,55 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+
+# Standard Library
+import subprocess
+import sys
+
+# Third Party
+import pytest
+
+# CuRobo
+from curobo.curobolib.extension_loader import LazyExtension
+from curobo.util.helpers import lazy_import
+
+
+def test_import_does_not_load_extensions():
+    code = (
+        "import sys\n"
+        "import curobo.wrap.reacher.motion_gen\n"
+        "from curobo.curobolib import geom, kinematics, ls, opt, tensor_step\n"
+        "loaded = [m.is_loaded for m in [geom.geom_cu, kinematics.kinematics_fused_cu, "
+        "ls.line_search_cu, opt.lbfgs_step_cu, tensor_step.tensor_step_cu]]\n"
+        "heavy = [m for m in ['yourdfpy', 'pxr', 'scipy.stats', 'nvblox_torch'] "
+        "if m in sys.modules]\n"
+        "print(any(loaded), heavy)\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    assert out.strip().splitlines()[-1] == "False []"
+
+
+def test_lazy_extension_failure_is_cached():
+    ext = LazyExtension("missing_cu", ["missing_kernel.cu"])
+    assert not ext.is_loaded
+    with pytest.raises(Exception) as first_error:
+        ext.forward()
+    with pytest.raises(Exception) as second_error:
+        ext.forward()
+    assert second_error.value is first_error.value
+
+
+def test_lazy_import():
+    json = lazy_import("json")
+    assert json.dumps([1]) == "[1]"
+    with pytest.raises(ModuleNotFoundError):
+        lazy_import("curobo_missing_module")
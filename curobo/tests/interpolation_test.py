@@ -9,13 +9,24 @@
 # its affiliates is strictly prohibited.
 #
 
+# Standard Library
+import sys
+import types
+
 # Third Party
+import pytest
 import torch
 
 # CuRobo
 from curobo.types.base import TensorDeviceType
 from curobo.types.robot import JointState
-from curobo.util.trajectory import InterpolateType, get_batch_interpolated_trajectory
+from curobo.util.trajectory import (
+    InterpolateType,
+    get_batch_interpolated_trajectory,
+    get_batch_spline_interpolation,
+    get_cpu_kunz_stilman_interpolation,
+    linear_smooth,
+)
 
 
 def test_linear_interpolation():
@@ -64,4 +75,88 @@ def test_linear_interpolation():
     )
 
 
+@pytest.mark.parametrize(
+    "kind", [InterpolateType.LINEAR, InterpolateType.CUBIC, InterpolateType.QUINTIC]
+)
+def test_batch_spline_interpolation(kind):
+    b, h, dof = 4, 32, 3
+    int_dt = 0.02
+    torch.manual_seed(0)
+    position = torch.cumsum(torch.rand((b, h, dof)) - 0.5, dim=1)
+    opt_dt = torch.rand(b) * 0.1 + 0.02
+    traj_steps = torch.ceil((h - 1) * opt_dt / int_dt).to(dtype=torch.int32)
+    out_steps = int(torch.max(traj_steps).item()) + 2
+
+    out_position = get_batch_spline_interpolation(
+        position, traj_steps, opt_dt, int_dt, out_steps, kind
+    )
+
+    for k in range(b):
+        tstep = traj_steps[k].item()
+        for i in range(dof):
+            scipy_position = linear_smooth(
+                position[k, :, i].numpy(),
+                n=tstep,
+                kind=kind,
+                last_step=tstep,
+                opt_dt=opt_dt[k].item(),
+                interpolation_dt=int_dt,
+            )
+            assert torch.allclose(out_position[k, :tstep, i], scipy_position.float(), atol=1e-6)
+        assert torch.allclose(out_position[k, tstep:], out_position[k, tstep - 1 : tstep])
+
+
 # test_linear_interpolation()
+
+
+class _StubSmoothResult:
+    def __init__(self, position, success):
+        self.success = success
+        self.length = position.shape[0]
+        self.position = position
+        self.velocity = position * 2.0
+        self.acceleration = position * 3.0
+        self.jerk = position * 4.0
+
+
+class _StubTrajectorySmoother:
+    def __init__(self, dof, max_velocity, max_acceleration, max_deviation):
+        self.dof = dof
+
+    def smooth_interpolate(self, in_traj, traj_dt, interpolation_dt, max_tsteps):
+        # fail on trajectories that start with a negative value:
+        return _StubSmoothResult(in_traj[: max_tsteps // 2] + 1.0, in_traj[0, 0] >= 0.0)
+
+
+def test_kunz_stilman_batch_interpolation(monkeypatch):
+    stub_module = types.ModuleType("trajectory_smoothing")
+    stub_module.TrajectorySmoother = _StubTrajectorySmoother
+    monkeypatch.setitem(sys.modules, "trajectory_smoothing", stub_module)
+
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    b, h, dof = 5, 10, 2
+    raw_traj = JointState.zeros((b, h, dof), tensor_args)
+    raw_traj.position[:] = torch.rand((b, h, dof)) + 0.1
+    raw_traj.position[1, 0, 0] = -1.0
+    out_traj = JointState.zeros((b, 12, dof), tensor_args)
+    traj_steps = torch.full((b,), 12, dtype=torch.int32)
+    opt_dt = torch.full((b,), 0.02)
+
+    out_traj = get_cpu_kunz_stilman_interpolation(
+        raw_traj,
+        traj_steps,
+        out_traj,
+        max_velocity=torch.ones(dof),
+        max_acceleration=torch.ones(dof),
+        opt_dt=opt_dt,
+        interpolation_dt=0.02,
+        num_workers=3,
+    )
+    for k in [0, 2, 3, 4]:
+        expected = raw_traj.position[k, :6] + 1.0
+        assert torch.allclose(out_traj.position[k, :6], expected)
+        assert torch.allclose(out_traj.position[k, 6:], expected[-1:].expand(6, dof))
+        assert torch.allclose(out_traj.jerk[k, :6], expected * 4.0)
+    # failed trajectory is linearly interpolated:
+    assert torch.allclose(out_traj.position[1, :10], raw_traj.position[1])
+    assert torch.all(out_traj.velocity[1] == 0.0)
@@ -169,3 +169,55 @@ def test_locked_joints_kinematics():
     assert torch.linalg.norm(out.ee_position - out_locked.ee_position) < 1e-5
     assert torch.linalg.norm(out.ee_quaternion - out_locked.ee_quaternion) < 1e-5
     assert torch.linalg.norm(out.link_spheres_tensor - out_locked.link_spheres_tensor) < 1e-5
+
+
+def test_franka_cpu_kinematics():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    cfg = CudaRobotModelConfig.from_robot_yaml_file("franka.yml", "panda_hand", tensor_args)
+
+    robot_model = CudaRobotModel(cfg)
+    q_test = torch.as_tensor([0.0, -1.2, 0.0, -2.0, 0.0, 1.0, 0.0], **vars(tensor_args)).view(1, -1)
+    ee_position = torch.as_tensor([6.0860e-02, -4.7547e-12, 7.6373e-01], **vars(tensor_args)).view(
+        1, -1
+    )
+    ee_quat = torch.as_tensor([0.0382, 0.9193, 0.3808, 0.0922], **vars(tensor_args)).view(1, -1)
+    for b in [1, 10, 100]:
+        state = robot_model.get_state(q_test.repeat(b, 1).clone())
+        assert torch.linalg.norm(state.ee_position - ee_position) < 1e-3
+        assert torch.linalg.norm(state.ee_quaternion - ee_quat) < 1e-1
+        assert state.link_spheres_tensor.shape == (b, robot_model.total_spheres, 4)
+
+
+@pytest.mark.parametrize("robot_file", ["franka.yml", "dual_ur10e.yml"])
+def test_cpu_kinematics_backward(robot_file):
+    # CuRobo
+    from curobo.curobolib.kinematics import _cpu_kinematics_forward
+
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    cfg = CudaRobotModelConfig.from_robot_yaml_file(robot_file, tensor_args=tensor_args)
+    robot_model = CudaRobotModel(cfg)
+    k_cfg = robot_model.kinematics_config
+    q = torch.rand((10, robot_model.get_dof()), **vars(tensor_args))
+    w_pos = torch.rand((10, len(robot_model.link_names), 3), **vars(tensor_args))
+    w_sph = torch.rand((10, robot_model.total_spheres, 3), **vars(tensor_args))
+
+    # autograd through the pytorch forward is the reference gradient:
+    q_ref = q.clone().requires_grad_(True)
+    link_pos, _, spheres, _ = _cpu_kinematics_forward(
+        q_ref,
+        k_cfg.fixed_transforms,
+        k_cfg.link_spheres,
+        k_cfg.link_map,
+        k_cfg.joint_map,
+        k_cfg.joint_map_type,
+        k_cfg.store_link_map,
+        k_cfg.link_sphere_idx_map,
+    )
+    torch.sum(link_pos * w_pos).add(torch.sum(spheres[..., :3] * w_sph)).backward()
+
+    q_in = q.clone().requires_grad_(True)
+    state = robot_model.get_state(q_in)
+    torch.sum(state.links_position * w_pos).add(
+        torch.sum(state.link_spheres_tensor[..., :3] * w_sph)
+    ).backward()
+    assert torch.max(torch.abs(q_in.grad - q_ref.grad)) < 1e-3
@@ -0,0 +1,90 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+
+# Standard Library
+import asyncio
+
+# Third Party
+import pytest
+import torch
+
+# CuRobo
+from curobo.types.base import TensorDeviceType
+from curobo.types.math import Pose
+from curobo.types.state import JointState
+from curobo.wrap.reacher.motion_gen import MotionGenResult
+from curobo.wrap.reacher.motion_gen_server import MotionGenBatchServer
+
+
+class StubMotionGen:
+    """Returns a plan that holds the start state and succeeds when goal x is positive."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def plan_batch(self, start_state, goal_pose, plan_config):
+        batch = start_state.position.shape[0]
+        self.batch_sizes.append(batch)
+        plan = JointState.from_position(start_state.position.unsqueeze(1).repeat(1, 5, 1))
+        return MotionGenResult(
+            success=goal_pose.position[:, 0] > 0.0,
+            interpolated_plan=plan,
+            optimized_plan=plan,
+            position_error=goal_pose.position[:, 0],
+            path_buffer_last_tstep=list(range(batch)),
+        )
+
+
+def _get_request(i: int):
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    start_state = JointState.from_position(torch.zeros((1, 7)) + i)
+    goal_pose = Pose.from_list([1.0 - i, 0.0, 0.5, 1.0, 0.0, 0.0, 0.0], tensor_args)
+    return start_state, goal_pose
+
+
+@pytest.mark.parametrize("use_executor", [True, False])
+def test_motion_gen_batch_server(use_executor):
+    motion_gen = StubMotionGen()
+
+    async def run():
+        async with MotionGenBatchServer(
+            motion_gen, batch_size=4, max_wait_time=0.05, use_executor=use_executor
+        ) as server:
+            results = await asyncio.gather(*[server.plan(*_get_request(i)) for i in range(5)])
+        return server, results
+
+    server, results = asyncio.run(run())
+
+    # all batches are padded to the same shape:
+    assert motion_gen.batch_sizes == [4, 4]
+    assert server.metrics.n_batches == 2
+    assert server.metrics.n_requests == 5
+    assert server.metrics.n_padded == 3
+    assert server.metrics.mean_queue_wait_time >= 0.0
+    assert len(server.metrics.batch_solve_time) == 2
+    for i, result in enumerate(results):
+        assert result.success.tolist() == [i == 0]
+        assert result.interpolated_plan.position.shape == (1, 5, 7)
+        assert torch.all(result.interpolated_plan.position == i)
+        assert result.path_buffer_last_tstep == [i % 4]
+
+
+def test_motion_gen_batch_server_error():
+    class FailingMotionGen:
+        def plan_batch(self, start_state, goal_pose, plan_config):
+            raise ValueError("planning failed")
+
+    async def run():
+        async with MotionGenBatchServer(FailingMotionGen(), batch_size=2) as server:
+            with pytest.raises(ValueError):
+                await server.plan(*_get_request(0))
+
+    asyncio.run(run())
@@ -8,14 +8,16 @@
 # without an express license agreement from NVIDIA CORPORATION or
 # its affiliates is strictly prohibited.
 #
-
+# Third Party
+import torch
 
 # CuRobo
 from curobo.types.base import TensorDeviceType
 from curobo.types.math import Pose
 from curobo.types.robot import JointState, RobotConfig
 from curobo.util_file import get_robot_configs_path, join_path, load_yaml
-from curobo.wrap.reacher.motion_gen import MotionGen, MotionGenConfig
+from curobo.wrap.reacher.motion_gen import MotionGen, MotionGenConfig, MotionGenPlanConfig
+from curobo.wrap.reacher.plan_cache import MotionPlanCache
 
 
 def test_motion_gen():
@@ -97,3 +99,60 @@ def test_motion_gen_graph():
         start_state, retract_pose, enable_graph=True, partial_ik_opt=False, enable_opt=False
     )
     assert result.success.item()
+
+
+def test_motion_gen_plan_cache():
+    tensor_args = TensorDeviceType()
+    motion_gen_config = MotionGenConfig.load_from_robot_config(
+        "franka.yml",
+        "collision_test.yml",
+        tensor_args,
+        trajopt_tsteps=40,
+        use_cuda_graph=True,
+        plan_cache_size=4,
+    )
+    motion_gen = MotionGen(motion_gen_config)
+    retract_cfg = motion_gen.get_retract_config()
+    state = motion_gen.rollout_fn.compute_kinematics(
+        JointState.from_position(retract_cfg.view(1, -1))
+    )
+    retract_pose = Pose(state.ee_pos_seq.squeeze(), quaternion=state.ee_quat_seq.squeeze())
+    start_state = JointState.from_position(retract_cfg.view(1, -1) + 0.5)
+
+    result = motion_gen.plan_single(start_state, retract_pose, MotionGenPlanConfig())
+    assert result.success.item()
+    assert not result.from_plan_cache
+    cached_result = motion_gen.plan_single(start_state, retract_pose, MotionGenPlanConfig())
+    assert cached_result.success.item()
+    assert cached_result.from_plan_cache
+    assert torch.allclose(
+        cached_result.interpolated_plan.position, result.interpolated_plan.position
+    )
+
+    motion_gen.world_coll_checker.enable_obstacle(
+        motion_gen.world_coll_checker.world_model.cuboid[0].name, False
+    )
+    result = motion_gen.plan_single(start_state, retract_pose, MotionGenPlanConfig())
+    assert not result.from_plan_cache
+
+
+def test_motion_plan_cache_key():
+    cache = MotionPlanCache(max_size=2, joint_resolution=0.01)
+    start_state = JointState.from_position(torch.zeros((1, 7)))
+    goal_pose = Pose.from_list([0.5, 0.0, 0.5, 1.0, 0.0, 0.0, 0.0], TensorDeviceType(device="cpu"))
+    key = cache.get_key(start_state, goal_pose, MotionGenPlanConfig())
+
+    near_start_state = JointState.from_position(torch.zeros((1, 7)) + 0.001)
+    flipped_goal_pose = Pose(goal_pose.position, -goal_pose.quaternion)
+    assert cache.get_key(near_start_state, flipped_goal_pose, MotionGenPlanConfig()) == key
+    assert cache.get_key(start_state, goal_pose, MotionGenPlanConfig(enable_graph=True)) != key
+
+    cache.add(key, "plan", world_fingerprint=0)
+    assert cache.get(key, world_fingerprint=0) == "plan"
+    assert cache.get(key, world_fingerprint=1) is None
+    assert len(cache) == 0
+
+    for i in range(3):
+        cache.add(i, "plan", world_fingerprint=1)
+    assert len(cache) == 2
+    assert cache.get(0, world_fingerprint=1) is None
@@ -13,6 +13,7 @@
 import torch
 
 # CuRobo
+from curobo.types.base import TensorDeviceType
 from curobo.wrap.model.robot_world import RobotWorld, RobotWorldConfig
 
 
@@ -149,3 +150,42 @@ def test_robot_batch_world_collision():
     )
     assert d_world.shape[0] == b
     assert torch.sum(d_world) == 0.0
+
+
+def test_robot_world_rejection_sample():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    # roughly 40% of configurations are valid in the cubby world:
+    config = RobotWorldConfig.load_from_config(
+        "franka.yml",
+        ["collision_cubby.yml", "collision_table.yml"],
+        tensor_args,
+        collision_activation_distance=0.0,
+    )
+    model = RobotWorld(config)
+    model.sample_chunk_size = 256
+
+    # sample checks collisions against the first environment:
+    q = model.sample(300)
+    assert q.shape == (300, 7)
+    assert torch.all(model.validate(q))
+
+    n_total = 0
+    for q in model.sample_iter(500, batch_size=200):
+        assert q.shape[0] <= 200
+        n_total += q.shape[0]
+    assert n_total == 500
+
+    # record chunk sizes, validation still runs collision checks:
+    chunk_sizes = []
+    validate_trajectory = model.validate_trajectory
+
+    def record_validate_trajectory(q, env_query_idx=None):
+        chunk_sizes.append(q.shape[0] * q.shape[1])
+        return validate_trajectory(q, env_query_idx)
+
+    model.validate_trajectory = record_validate_trajectory
+    env_query_idx = torch.as_tensor([0, 1, 0], dtype=torch.int32)
+    q = model.sample_trajectory(3, 100, env_query_idx=env_query_idx)
+    assert q.shape == (3, 100, 7)
+    assert len(chunk_sizes) > 1 and max(chunk_sizes) <= model.sample_chunk_size
+    assert torch.all(validate_trajectory(q, env_query_idx))
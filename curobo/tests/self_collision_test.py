@@ -104,3 +104,47 @@ def test_self_collision_franka():
     cost_fn._out_distance[:] = 0.0
     out = cost_fn.forward(in_spheres)
     assert out.sum().item() > 0.0
+
+
+def test_self_collision_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+
+    robot_cfg = load_yaml(join_path(get_robot_configs_path(), "franka.yml"))["robot_cfg"]
+    robot_cfg = RobotConfig.from_dict(robot_cfg, tensor_args)
+    kinematics = CudaRobotModel(robot_cfg.kinematics)
+    self_collision_data = kinematics.get_self_collision_config()
+    self_collision_config = SelfCollisionCostConfig(
+        **{"weight": 1.0, "classify": False, "self_collision_kin_config": self_collision_data},
+        tensor_args=tensor_args
+    )
+    cost_fn = SelfCollisionCost(self_collision_config)
+
+    b, h = 10, 3
+    n = self_collision_data.collision_matrix.shape[0]
+    in_spheres = torch.rand((b, h, n, 4), **vars(tensor_args)) * 0.5
+    in_spheres[..., 3] = 0.05
+    in_spheres[0, 0, :, 3] = -1.0
+    in_spheres.requires_grad = True
+    out = cost_fn.forward(in_spheres)
+    out.sum().backward()
+
+    # brute force penetration across all enabled sphere pairs:
+    radius = in_spheres.detach()[..., 3] + self_collision_data.offset
+    position = in_spheres.detach()[..., :3].view(b * h, n, 3)
+    penetration = (
+        radius.unsqueeze(-1)
+        + radius.unsqueeze(-2)
+        - torch.cdist(position, position).view(b, h, n, n)
+    )
+    check = (
+        (self_collision_data.collision_matrix == 1)
+        & torch.triu(torch.ones((n, n), dtype=torch.bool), diagonal=1)
+        & (radius.unsqueeze(-1) > 0.0)
+        & (radius.unsqueeze(-2) > 0.0)
+    )
+    ref = torch.clamp(torch.amax(torch.where(check, penetration, 0.0), dim=(-1, -2)), min=0.0)
+
+    assert torch.allclose(out, ref, atol=1e-5)
+    assert out[0, 0] == 0.0
+    n_grad = torch.count_nonzero(torch.any(in_spheres.grad != 0.0, dim=-1), dim=-1)
+    assert torch.all(n_grad[out > 0.0] == 2) and torch.all(n_grad[out == 0.0] == 0)
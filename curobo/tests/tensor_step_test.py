@@ -0,0 +1,73 @@
+#
+# Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+#
+# Third Party
+import pytest
+import torch
+
+# CuRobo
+from curobo.rollout.dynamics_model.integration_utils import (
+    AccelerationTensorStepIdxKernel,
+    AccelerationTensorStepKernel,
+    CliqueTensorStepCentralDifferenceKernel,
+    CliqueTensorStepIdxCentralDifferenceKernel,
+    CliqueTensorStepIdxKernel,
+    CliqueTensorStepKernel,
+)
+
+
+def run_tensor_step(step_fn, u_act, use_idx: bool, traj_dt: torch.Tensor):
+    b, h, dof = u_act.shape
+    tensor_args = {"device": u_act.device, "dtype": u_act.dtype}
+    generator = torch.Generator().manual_seed(1)
+    start = [torch.randn((2, dof), generator=generator).to(**tensor_args) for _ in range(3)]
+    out = [torch.zeros((b, h, dof), **tensor_args) for _ in range(4)]
+    u_grad = torch.zeros((b, h, dof), **tensor_args)
+    if use_idx:
+        start_idx = torch.tensor([1, 0, 1], device=u_act.device, dtype=torch.int32)
+        return step_fn.apply(u_act, *start, start_idx, *out, traj_dt, u_grad)
+    start = [x[:1].repeat(b, 1) for x in start]
+    return step_fn.apply(u_act, *start, *out, traj_dt, u_grad)
+
+
+@pytest.mark.parametrize(
+    "step_fn, use_idx, position_control",
+    [
+        (CliqueTensorStepKernel, False, True),
+        (CliqueTensorStepIdxKernel, True, True),
+        (CliqueTensorStepCentralDifferenceKernel, False, True),
+        (CliqueTensorStepIdxCentralDifferenceKernel, True, True),
+        (AccelerationTensorStepKernel, False, False),
+        (AccelerationTensorStepIdxKernel, True, False),
+    ],
+)
+def test_tensor_step_gradient_cpu(step_fn, use_idx, position_control):
+    b, h, dof = 3, 12, 4
+    tensor_args = {"device": torch.device("cpu"), "dtype": torch.float64}
+    dt = torch.full((h,), 0.05, **tensor_args)
+    # position kernels take inverse of dt:
+    traj_dt = 1.0 / dt if position_control else dt
+    torch.manual_seed(0)
+    weights = [torch.randn((b, h, dof), **tensor_args) for _ in range(4)]
+
+    def loss(u):
+        return sum(
+            torch.sum(w * x) for w, x in zip(weights, run_tensor_step(step_fn, u, use_idx, traj_dt))
+        )
+
+    u_act = torch.randn((b, h, dof), **tensor_args).requires_grad_(True)
+    loss(u_act).backward()
+    u_grad = u_act.grad.clone()
+
+    direction = torch.randn((b, h, dof), **tensor_args)
+    eps = 1e-6
+    with torch.no_grad():
+        fd_grad = (loss(u_act + eps * direction) - loss(u_act - eps * direction)) / (2 * eps)
+    assert torch.allclose(torch.sum(u_grad * direction), fd_grad, rtol=1e-5)
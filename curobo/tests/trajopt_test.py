@@ -86,6 +86,31 @@ def test_trajopt_single_js(trajopt_solver):
     assert result.success.item()
 
 
+def test_trajopt_single_pose_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    robot_cfg = RobotConfig.from_dict(
+        load_yaml(join_path(get_robot_configs_path(), "franka.yml"))["robot_cfg"], tensor_args
+    )
+    world_cfg = WorldConfig.from_dict(
+        load_yaml(join_path(get_world_configs_path(), "collision_table.yml"))
+    )
+    trajopt_config = TrajOptSolverConfig.load_from_robot_config(
+        robot_cfg, world_cfg, tensor_args, num_seeds=2
+    )
+    trajopt_solver = TrajOptSolver(trajopt_config)
+    q_start = trajopt_solver.retract_config
+    q_goal = q_start.clone() + 0.1
+    kin_state = trajopt_solver.fk(q_goal)
+    goal_pose = Pose(kin_state.ee_position, kin_state.ee_quaternion)
+    goal_state = JointState.from_position(q_goal)
+    current_state = JointState.from_position(q_start)
+    js_goal = Goal(goal_pose=goal_pose, goal_state=goal_state, current_state=current_state)
+    result = trajopt_solver.solve_single(js_goal)
+
+    assert result.solution.position.device.type == "cpu"
+    assert result.success.item()
+
+
 def test_trajopt_single_pose(trajopt_solver):
     trajopt_solver.reset_seed()
     q_start = trajopt_solver.retract_config
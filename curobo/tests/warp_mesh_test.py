@@ -13,9 +13,13 @@
 import torch
 
 # CuRobo
-from curobo.geom.sdf.world import CollisionQueryBuffer, WorldCollisionConfig
+from curobo.geom.sdf.world import (
+    CollisionQueryBuffer,
+    WorldCollisionConfig,
+    WorldPrimitiveCollision,
+)
 from curobo.geom.sdf.world_mesh import WorldMeshCollision
-from curobo.geom.types import Mesh
+from curobo.geom.types import Cuboid, Mesh, WorldConfig
 from curobo.types.base import TensorDeviceType
 from curobo.types.math import Pose
 from curobo.util_file import get_assets_path, join_path
@@ -104,3 +108,155 @@ def test_swept_sdf_pose():
     out = out.view(-1)
     assert out[0] <= 0.0
     assert out[1] >= 0.01
+
+
+def test_sdf_cpu_matches_primitive():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    cuboid = Cuboid(name="box", dims=[1.0, 1.0, 1.0], pose=[0.1, 0.0, 0.2, 1, 0, 0, 0])
+    box_world = WorldConfig(cuboid=[cuboid])
+    world_ccheck = WorldMeshCollision(WorldCollisionConfig(tensor_args))
+    world_ccheck.create_collision_cache(mesh_cache=1)
+    world_ccheck.add_mesh(cuboid.get_mesh(), env_idx=0)
+    primitive_ccheck = WorldPrimitiveCollision(
+        WorldCollisionConfig(tensor_args, world_model=box_world)
+    )
+    # spheres close to the surface, mesh queries are limited to max_distance:
+    query_spheres = tensor_args.to_device(
+        [[[[0.1, 0.0, 0.65, 0.1], [0.58, 0.1, 0.2, 0.05], [0.1, 0.0, 0.8, 0.05]]]]
+    )
+    act_distance = tensor_args.to_device([0.01])
+    weight = tensor_args.to_device([1.0])
+    out = []
+    for ccheck in [world_ccheck, primitive_ccheck]:
+        collision_buffer = CollisionQueryBuffer.initialize_from_shape(
+            query_spheres.shape, tensor_args, ccheck.collision_types
+        )
+        x = query_spheres.clone().requires_grad_(True)
+        d = ccheck.get_sphere_distance(x, collision_buffer, weight, act_distance)
+        torch.sum(d).backward()
+        out.append((d.detach().view(-1), x.grad.clone()))
+    assert out[0][0][0] > 0.0 and out[0][0][2] == 0.0
+    assert torch.allclose(out[0][0], out[1][0], atol=1e-4)
+    assert torch.allclose(out[0][1], out[1][1], atol=1e-4)
+
+
+def test_swept_sdf_batch_env_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    world_list = [
+        WorldConfig(
+            mesh=[
+                Cuboid(
+                    name="box", dims=[1.0, 1.0, 1.0], pose=[0.0, 0.0, 2.0 * i, 1, 0, 0, 0]
+                ).get_mesh()
+            ]
+        )
+        for i in range(2)
+    ]
+    world_ccheck = WorldMeshCollision(
+        WorldCollisionConfig(tensor_args, cache={"mesh": 1}, n_envs=2)
+    )
+    world_ccheck.load_batch_collision_model(world_list)
+    # same trajectory in both environments, box in env 1 is moved away:
+    query_spheres = torch.zeros((2, 3, 1, 4), **vars(tensor_args))
+    query_spheres[:, :, 0, 0] = tensor_args.to_device([-0.9, 0.0, 0.9])
+    query_spheres[:, :, 0, 2] = 0.55
+    query_spheres[..., 3] = 0.1
+    env_query_idx = torch.arange(2, device=tensor_args.device, dtype=torch.int32)
+    act_distance = tensor_args.to_device([0.01])
+    weight = tensor_args.to_device([1.0])
+    dt = act_distance.clone()
+    collision_buffer = CollisionQueryBuffer.initialize_from_shape(
+        query_spheres.shape, tensor_args, world_ccheck.collision_types
+    )
+    out = world_ccheck.get_swept_sphere_distance(
+        query_spheres, collision_buffer, weight, act_distance, dt, 4, False, env_query_idx
+    )
+    out = out.view(2, 3)
+    assert torch.all(out[0] > 0.0)
+    assert torch.all(out[1] == 0.0)
+
+
+def test_batch_obstacle_pose_update_cpu():
+    tensor_args = TensorDeviceType(device=torch.device("cpu"))
+    world_list = [
+        WorldConfig(
+            cuboid=[
+                Cuboid(name="box_" + str(j), dims=[0.2, 0.2, 0.2], pose=[j, i, 0, 1, 0, 0, 0])
+                for j in range(3)
+            ],
+            mesh=[
+                Cuboid(
+                    name="mesh_" + str(j), dims=[0.2, 0.2, 0.2], pose=[j, i, 1, 1, 0, 0, 0]
+                ).get_mesh()
+                for j in range(3)
+            ],
+        )
+        for i in range(2)
+    ]
+    ccheck_list = [
+        WorldMeshCollision(
+            WorldCollisionConfig(
+                tensor_args, cache={"obb": 3, "mesh": 3}, n_envs=2, obb_broad_phase=True
+            )
+        )
+        for _ in range(2)
+    ]
+    for ccheck in ccheck_list:
+        ccheck.load_batch_collision_model(world_list)
+    names = ["box_2", "box_0", "box_1"]
+    env_idx = [1, 0, 1]
+    w_obj_pose = Pose(
+        tensor_args.to_device([[0.5, 0.0, 0.3], [0.0, 0.2, 0.1], [1.0, 1.0, 0.5]]),
+        tensor_args.to_device([[0.7071, 0.0, 0.0, 0.7071], [1, 0, 0, 0], [1, 0, 0, 0]]),
+    )
+
+    # reference updates one obstacle at a time by name:
+    ref_ccheck, ccheck = ccheck_list
+    for i in range(len(names)):
+        pose = Pose(w_obj_pose.position[i : i + 1], w_obj_pose.quaternion[i : i + 1])
+        ref_ccheck.update_obb_pose(w_obj_pose=pose, name=names[i], env_idx=env_idx[i])
+        ref_ccheck.update_mesh_pose(
+            w_obj_pose=pose, name=names[i].replace("box", "mesh"), env_idx=env_idx[i]
+        )
+    ref_ccheck.enable_obb(False, names[1], env_idx=env_idx[1])
+    ref_ccheck.enable_mesh(False, "mesh_0", env_idx=0)
+
+    cache_ptr = [x.data_ptr() for x in ccheck._cube_tensor_list + ccheck._mesh_tensor_list]
+    env_idx_tensor = torch.as_tensor(env_idx, device=tensor_args.device)
+    obb_idx = ccheck.get_obb_idx_tensor(names, env_idx)
+    mesh_idx = ccheck.get_mesh_idx_tensor([n.replace("box", "mesh") for n in names], env_idx)
+    assert obb_idx.tolist() == [2, 0, 1]
+    ccheck.update_obb_pose_batch(env_idx_tensor, obb_idx, w_obj_pose=w_obj_pose)
+    ccheck.update_mesh_pose_batch(env_idx_tensor, mesh_idx, w_obj_pose=w_obj_pose)
+    enable = torch.as_tensor([True, False, True], device=tensor_args.device)
+    ccheck.enable_obb_batch(env_idx_tensor, obb_idx, enable)
+    ccheck.enable_mesh_batch(env_idx_tensor[1:2], mesh_idx[1:2], False)
+
+    assert cache_ptr == [
+        x.data_ptr() for x in ccheck._cube_tensor_list + ccheck._mesh_tensor_list
+    ]
+    for x, y in zip(
+        ccheck._cube_tensor_list + ccheck._mesh_tensor_list,
+        ref_ccheck._cube_tensor_list + ref_ccheck._mesh_tensor_list,
+    ):
+        assert torch.allclose(x, y)
+
+    # broad phase is updated in place, queries match a full rebuild:
+    query_spheres = tensor_args.to_device([[[[0.5, 0.0, 0.3, 0.1], [1.0, 1.0, 0.5, 0.1]]]])
+    query_spheres = query_spheres.repeat(2, 1, 1, 1)
+    env_query_idx = torch.arange(2, device=tensor_args.device, dtype=torch.int32)
+    act_distance = tensor_args.to_device([0.01])
+    weight = tensor_args.to_device([1.0])
+    ref_ccheck._obb_broad_phase.world_fingerprint = None
+    out = []
+    for c in [ccheck, ref_ccheck]:
+        collision_buffer = CollisionQueryBuffer.initialize_from_shape(
+            query_spheres.shape, tensor_args, c.collision_types
+        )
+        out.append(
+            c.get_sphere_distance(
+                query_spheres, collision_buffer, weight, act_distance, env_query_idx
+            ).clone()
+        )
+    assert torch.all(out[0].view(2, 2)[1] > 0.0)
+    assert torch.allclose(out[0], out[1])